@@ -1,7 +1,7 @@
 // ===== CONFIGURAÇÕES GLOBAIS =====
 const API_BASE_URL = 'http://127.0.0.1:8000/api';
 let map = null;
-let markersCluster = null;
+let markersLayer = null;
 let allPetsPerdidos = [];
 let currentLocation = null;
 
@@ -31,15 +31,89 @@ function initMap() {
         maxZoom: 18
     }).addTo(map);
     
-    // Inicializa cluster de marcadores
-    markersCluster = L.markerClusterGroup({
-        maxClusterRadius: 50,
-        spiderfyOnMaxZoom: true,
-        showCoverageOnHover: false,
-        zoomToBoundsOnClick: true
+    // Camada de marcadores: o agrupamento (cluster) já vem pronto do servidor
+    markersLayer = L.layerGroup();
+    map.addLayer(markersLayer);
+    
+    // Recarrega os marcadores da área visível ao arrastar/dar zoom
+    map.on('moveend', debounce(loadMarkers, 300));
+}
+
+// ===== MARCADORES DO MAPA (ENDPOINT LEVE) =====
+async function loadMarkers() {
+    try {
+        const params = new URLSearchParams({
+            bbox: map.getBounds().toBBoxString(),
+            zoom: map.getZoom()
+        });
+        const estado = document.getElementById('estado-filter')?.value || '';
+        const cidade = document.getElementById('cidade-filter')?.value || '';
+        const especie = document.getElementById('especie-filter')?.value || '';
+        if (estado) params.append('estado', estado);
+        if (cidade) params.append('cidade', cidade);
+        if (especie) params.append('especie', especie);
+        
+        const response = await fetch(`${API_BASE_URL}/pets-perdidos/markers/?${params}`);
+        if (!response.ok) throw new Error('Erro ao carregar marcadores');
+        
+        // Formato colunar: cada lista tem um valor por marcador
+        const data = await response.json();
+        renderMarkers(data);
+    } catch (error) {
+        console.error('❌ Erro ao carregar marcadores:', error);
+    }
+}
+
+function renderMarkers(data) {
+    markersLayer.clearLayers();
+    
+    const customIcon = L.icon({
+        iconUrl: 'https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-red.png',
+        shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
+        iconSize: [25, 41],
+        iconAnchor: [12, 41],
+        popupAnchor: [1, -34],
+        shadowSize: [41, 41]
     });
     
-    map.addLayer(markersCluster);
+    // Pets individuais: popup leve, detalhes completos sob demanda
+    const pontos = data.pontos;
+    pontos.id.forEach((id, i) => {
+        const marker = L.marker([pontos.lat[i], pontos.lng[i]], { icon: customIcon });
+        marker.bindPopup(`
+            <div class="pet-popup">
+                <img src="${pontos.thumb[i] || '/static/Estetica_site/default-pet.png'}" alt="Pet perdido" style="width: 100%; max-height: 150px; object-fit: cover; border-radius: 8px; margin-bottom: 10px;">
+                <p style="margin: 3px 0;"><strong>Espécie:</strong> ${pontos.especie[i]}</p>
+                <button onclick="showPetDetails(${id})" style="
+                    width: 100%;
+                    padding: 8px;
+                    background: linear-gradient(135deg, #4CAF50, #45a049);
+                    color: white;
+                    border: none;
+                    border-radius: 5px;
+                    cursor: pointer;
+                    margin-top: 10px;
+                    font-weight: bold;
+                ">Ver Detalhes Completos</button>
+            </div>
+        `);
+        markersLayer.addLayer(marker);
+    });
+    
+    // Clusters calculados no servidor: clique aproxima o zoom
+    const clusters = data.clusters;
+    clusters.total.forEach((total, i) => {
+        const tamanho = total < 10 ? 'small' : total < 100 ? 'medium' : 'large';
+        const cluster = L.marker([clusters.lat[i], clusters.lng[i]], {
+            icon: L.divIcon({
+                html: `<div><span>${total}</span></div>`,
+                className: `marker-cluster marker-cluster-${tamanho}`,
+                iconSize: [40, 40]
+            })
+        });
+        cluster.on('click', () => map.setView([clusters.lat[i], clusters.lng[i]], map.getZoom() + 2));
+        markersLayer.addLayer(cluster);
+    });
 }
 
 // ===== CARREGAR PETS PERDIDOS =====
@@ -101,79 +175,8 @@ async function loadPetsPerdidos(debug = false) {
 
 // ===== RENDERIZAR PETS NO MAPA =====
 function renderPetsOnMap(pets) {
-    // Limpa marcadores anteriores
-    markersCluster.clearLayers();
-    
-    console.log(`📍 Renderizando ${pets.length} pets no mapa`);
-    
-    pets.forEach(pet => {
-        // Verifica se tem coordenadas válidas
-        if (!pet.latitude || !pet.longitude) {
-            console.warn(`⚠️ Pet ${pet.nome} (ID: ${pet.id}) sem coordenadas válidas:`, {
-                latitude: pet.latitude,
-                longitude: pet.longitude
-            });
-            return; // Pula este pet
-        }
-        
-        console.log(`✅ Adicionando marcador para ${pet.nome}:`, {
-            lat: pet.latitude,
-            lng: pet.longitude,
-            status: pet.status
-        });
-        
-        // Ícone customizado baseado no status (perdido=vermelho, encontrado=verde)
-        let iconColor = 'red'; // padrão para perdido
-        if (pet.status === 'encontrado') {
-            iconColor = 'green';
-        }
-        
-        const iconUrl = `https://raw.githubusercontent.com/pointhi/leaflet-color-markers/master/img/marker-icon-2x-${iconColor}.png`;
-        
-        const customIcon = L.icon({
-            iconUrl: iconUrl,
-            shadowUrl: 'https://cdnjs.cloudflare.com/ajax/libs/leaflet/1.9.4/images/marker-shadow.png',
-            iconSize: [25, 41],
-            iconAnchor: [12, 41],
-            popupAnchor: [1, -34],
-            shadowSize: [41, 41]
-        });
-        
-        const marker = L.marker([pet.latitude, pet.longitude], { icon: customIcon });
-        
-        // Cor do título baseado no status
-        const titleColor = iconColor === 'red' ? '#d32f2f' : '#4CAF50';
-        const statusText = pet.status === 'encontrado' ? 'Encontrado' : 'Perdido';
-        
-        // Popup com detalhes do pet
-        const popupContent = `
-            <div class="pet-popup">
-                <img src="${pet.imagem_principal_url || '/static/Estetica_site/default-pet.png'}" alt="${pet.nome}" style="width: 100%; max-height: 150px; object-fit: cover; border-radius: 8px; margin-bottom: 10px;">
-                <h3 style="margin: 5px 0; color: ${titleColor};">${pet.nome}</h3>
-                <p style="margin: 3px 0;"><strong>Status:</strong> <span style="color: ${titleColor};">${statusText}</span></p>
-                <p style="margin: 3px 0;"><strong>Espécie:</strong> ${pet.especie_display}</p>
-                <p style="margin: 3px 0;"><strong>Cor:</strong> ${pet.cor}</p>
-                <p style="margin: 3px 0;"><strong>Porte:</strong> ${pet.porte_display}</p>
-                <p style="margin: 3px 0;"><strong>${statusText} em:</strong> ${formatDate(pet.status === 'encontrado' ? pet.data_encontro : pet.data_perda)}</p>
-                <p style="margin: 3px 0;"><strong>Local:</strong> ${pet.bairro}, ${pet.cidade}/${pet.estado}</p>
-                ${pet.oferece_recompensa ? `<p style="margin: 3px 0; color: #4CAF50;"><strong>💰 Recompensa: R$ ${pet.valor_recompensa}</strong></p>` : ''}
-                <button onclick="showPetDetails(${pet.id})" style="
-                    width: 100%;
-                    padding: 8px;
-                    background: linear-gradient(135deg, #4CAF50, #45a049);
-                    color: white;
-                    border: none;
-                    border-radius: 5px;
-                    cursor: pointer;
-                    margin-top: 10px;
-                    font-weight: bold;
-                ">Ver Detalhes Completos</button>
-            </div>
-        `;
-        
-        marker.bindPopup(popupContent);
-        markersCluster.addLayer(marker);
-    });
+    // Os marcadores vêm de /pets-perdidos/markers/ (loadMarkers) para a
+    // área visível; aqui só ajustamos o enquadramento conforme os filtros
     
     // Ajusta zoom do mapa baseado nos filtros
     const estadoFiltro = document.getElementById('estado-filter')?.value;
@@ -203,6 +206,9 @@ function renderPetsOnMap(pets) {
         // Sem filtros ativos - sempre foca no Brasil com zoom 4
         map.setView([-14.235, -51.9253], 4);
     }
+    
+    // setView na mesma posição não dispara 'moveend': recarrega os filtros
+    loadMarkers();
 }
 
 // ===== RENDERIZAR LISTA DE PETS =====
@@ -249,9 +255,17 @@ function renderPetsList(pets) {
 }
 
 // ===== MODAL DE DETALHES DO PET =====
-function showPetDetails(petId) {
+async function showPetDetails(petId) {
     console.log('🔍 Abrindo detalhes do pet ID:', petId);
-    const pet = allPetsPerdidos.find(p => p.id === petId);
+    let pet = allPetsPerdidos.find(p => p.id === petId);
+    if (!pet) {
+        // Marcador do mapa fora da página carregada: busca os detalhes
+        const response = await fetch(`${API_BASE_URL}/pets-perdidos/${petId}/`);
+        if (response.ok) {
+            pet = await response.json();
+            allPetsPerdidos.push(pet);
+        }
+    }
     if (!pet) {
         console.error('❌ Pet não encontrado:', petId);
         return;
@@ -580,12 +594,9 @@ async function submitFoundPet(event) {
         
         const result = await response.json();
         
-        // Mostra mensagem de sucesso com possíveis matches
-        if (result.possiveis_matches && result.possiveis_matches.length > 0) {
-            toast.success(`✅ Reporte enviado! Encontramos ${result.possiveis_matches.length} possível(is) match(es). Nossa equipe entrará em contato em breve.`, 6000);
-        } else {
-            toast.success('Reporte enviado com sucesso! Nossa equipe analisará e entrará em contato se encontrarmos um match.');
-        }
+        // O matching com pets perdidos roda em segundo plano:
+        // os donos de possíveis matches são avisados por notificação
+        toast.success('Reporte enviado com sucesso! Vamos comparar com os pets perdidos cadastrados e entraremos em contato se encontrarmos um match.', 6000);
         
         if(window.fecharModalFound) window.fecharModalFound();
     } catch (error) {
@@ -640,15 +651,14 @@ function initLocationPicker(type) {
 
 async function reverseGeocode(lat, lng, type) {
     try {
-        const response = await fetch(`https://nominatim.openstreetmap.org/reverse?lat=${lat}&lon=${lng}&format=json`);
+        // Geocodificação reversa pelo backend (cache + base offline do IBGE)
+        const response = await fetch(`${API_BASE_URL}/geocode/?lat=${lat}&lon=${lng}`);
+        if (!response.ok) return;
         const data = await response.json();
         
-        if (data.address) {
-            document.getElementById(`${type}-cidade`).value = data.address.city || data.address.town || data.address.village || '';
-            document.getElementById(`${type}-estado`).value = data.address.state_code || '';
-            document.getElementById(`${type}-bairro`).value = data.address.suburb || data.address.neighbourhood || '';
-            document.getElementById(`${type}-endereco`).value = data.display_name || '';
-        }
+        document.getElementById(`${type}-cidade`).value = data.cidade || '';
+        document.getElementById(`${type}-estado`).value = data.estado || '';
+        document.getElementById(`${type}-endereco`).value = data.endereco || '';
     } catch (error) {
         console.error('Erro ao buscar endereço:', error);
     }
@@ -890,14 +900,15 @@ function updateCoordinatesFound(lat, lng) {
 }
 
 async function geocodeLostAddress(cidade, estado) {
-    const endereco = `${cidade}, ${estado}, Brasil`;
+    const params = new URLSearchParams({ cidade, estado });
     try {
-        const response = await fetch(`https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(endereco)}&limit=1`);
-        const data = await response.json();
+        // Geocodificação pelo backend (cache + base offline do IBGE)
+        const response = await fetch(`${API_BASE_URL}/geocode/?${params}`);
         
-        if (data && data.length > 0) {
-            const lat = parseFloat(data[0].lat);
-            const lng = parseFloat(data[0].lon);
+        if (response.ok) {
+            const data = await response.json();
+            const lat = data.latitude;
+            const lng = data.longitude;
             
             mapLost.setView([lat, lng], 13);
             markerLost.setLatLng([lat, lng]);
@@ -909,14 +920,15 @@ async function geocodeLostAddress(cidade, estado) {
 }
 
 async function geocodeFoundAddress(cidade, estado) {
-    const endereco = `${cidade}, ${estado}, Brasil`;
+    const params = new URLSearchParams({ cidade, estado });
     try {
-        const response = await fetch(`https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(endereco)}&limit=1`);
-        const data = await response.json();
+        // Geocodificação pelo backend (cache + base offline do IBGE)
+        const response = await fetch(`${API_BASE_URL}/geocode/?${params}`);
         
-        if (data && data.length > 0) {
-            const lat = parseFloat(data[0].lat);
-            const lng = parseFloat(data[0].lon);
+        if (response.ok) {
+            const data = await response.json();
+            const lat = data.latitude;
+            const lng = data.longitude;
             
             mapFound.setView([lat, lng], 13);
             markerFound.setLatLng([lat, lng]);
@@ -5,7 +5,7 @@ let map = null;
 let marker = null;
 let geocodingTimeout = null;
 
-// Carregar municípios do IBGE quando o estado for selecionado
+// Carregar municípios (base do IBGE no backend) quando o estado for selecionado
 const estadoSelect = document.getElementById('estado');
 const municipioSelect = document.getElementById('municipio');
 
@@ -41,9 +41,11 @@ estadoSelect.addEventListener('change', async function() {
     }
 
     try {
-        const response = await fetch(`https://servicodados.ibge.gov.br/api/v1/localidades/estados/${estado}/municipios`);
+        // Base do IBGE servida pelo backend (já em ordem alfabética)
+        const response = await fetch(`${API_BASE}/localidades/?uf=${encodeURIComponent(estado)}`);
+        if (!response.ok) throw new Error('Falha ao carregar municípios');
         const data = await response.json();
-        const municipios = data.map(m => m.nome).sort();
+        const municipios = data.municipios.map(m => m.nome);
         municipiosCache[estado] = municipios;
         populateMunicipios(municipios);
     } catch (error) {
@@ -375,15 +377,21 @@ function updateCoordinates(lat, lng) {
 
 async function geocodeAddress() {
     const endereco = `${localInput.value}, ${municipioSelect.value}, ${estadoSelect.options[estadoSelect.selectedIndex].text}, Brasil`;
+    const params = new URLSearchParams({
+        endereco: localInput.value,
+        cidade: municipioSelect.value,
+        estado: estadoSelect.value
+    });
     
     try {
-        // Usa API Nominatim do OpenStreetMap para geocoding
-        const response = await fetch(`https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(endereco)}&limit=1`);
-        const data = await response.json();
+        // Geocodificação pelo backend (cache + base offline do IBGE)
+        const response = await fetch(`${API_BASE}/geocode/?${params}`);
+        const data = response.ok ? await response.json() : null;
         
-        if (data && data.length > 0) {
-            const lat = parseFloat(data[0].lat);
-            const lng = parseFloat(data[0].lon);
+        // precisao 'municipio' = só a sede da cidade: o usuário ajusta o marcador
+        if (data && data.precisao !== 'municipio') {
+            const lat = data.latitude;
+            const lng = data.longitude;
             
             // Move mapa e marcador para a localização
             map.setView([lat, lng], 16);
@@ -405,15 +413,18 @@ async function geocodeAddress() {
 }
 
 async function geocodeMunicipio() {
-    const municipio = `${municipioSelect.value}, ${estadoSelect.options[estadoSelect.selectedIndex].text}, Brasil`;
+    const params = new URLSearchParams({
+        cidade: municipioSelect.value,
+        estado: estadoSelect.value
+    });
     
     try {
-        const response = await fetch(`https://nominatim.openstreetmap.org/search?format=json&q=${encodeURIComponent(municipio)}&limit=1`);
-        const data = await response.json();
+        const response = await fetch(`${API_BASE}/geocode/?${params}`);
         
-        if (data && data.length > 0) {
-            const lat = parseFloat(data[0].lat);
-            const lng = parseFloat(data[0].lon);
+        if (response.ok) {
+            const data = await response.json();
+            const lat = data.latitude;
+            const lng = data.longitude;
             
             map.setView([lat, lng], 13);
             marker.setLatLng([lat, lng]);
@@ -39,8 +39,8 @@ function renderLogged(username, isStaff = false) {
   btnNotif.addEventListener('click', () => abrirModalNotificacoes());
   container.appendChild(btnNotif);
   
-  // Atualiza contador de notificações
-  carregarContagemNotificacoes();
+  // Atualiza contador de notificações (stream SSE; sem suporte, busca uma vez)
+  conectarStreamNotificacoes();
   
   const dropdown = document.createElement('div');
   dropdown.className = 'nav-user-dropdown';
@@ -88,6 +88,7 @@ function renderLogged(username, isStaff = false) {
   document.addEventListener('keydown', (e) => { if (e.key === 'Escape') closeAll(); });
 
   menu.querySelector('.logout-item').addEventListener('click', () => {
+    if (streamNotificacoes) streamNotificacoes.close();
     localStorage.removeItem('access');
     localStorage.removeItem('refresh');
     window.location.href = '/login/';
@@ -149,34 +150,107 @@ async function carregarContagemNotificacoes() {
   if (!token) return;
   
   try {
-    const response = await fetch('http://localhost:8000/api/notificacoes/?lida=false', {
+    // O navegador reenvia o ETag: sem mudança a resposta é um 304 vazio
+    const response = await fetch('http://localhost:8000/api/notificacoes/contagem/', {
       headers: { 'Authorization': `Bearer ${token}` }
     });
     
     if (!response.ok) return;
     
     const data = await response.json();
-    const notificacoes = data.results || data;
-    const count = notificacoes.length;
-    
-    const badge = document.querySelector('.badge-notificacoes');
-    const btnNotif = document.querySelector('.btn-notificacoes');
-    
-    if (badge && btnNotif) {
-      if (count > 0) {
-        badge.textContent = count > 99 ? '99+' : count;
-        badge.style.display = 'flex';
-        btnNotif.classList.add('has-notifications'); // Ícone verde
-      } else {
-        badge.style.display = 'none';
-        btnNotif.classList.remove('has-notifications'); // Ícone cinza
-      }
-    }
+    atualizarBadgeNotificacoes(data.nao_lidas);
   } catch (error) {
     console.error('Erro ao carregar notificações:', error);
   }
 }
 
+function atualizarBadgeNotificacoes(count) {
+  const badge = document.querySelector('.badge-notificacoes');
+  const btnNotif = document.querySelector('.btn-notificacoes');
+  
+  if (badge && btnNotif) {
+    if (count > 0) {
+      badge.textContent = count > 99 ? '99+' : count;
+      badge.style.display = 'flex';
+      btnNotif.classList.add('has-notifications'); // Ícone verde
+    } else {
+      badge.style.display = 'none';
+      btnNotif.classList.remove('has-notifications'); // Ícone cinza
+    }
+  }
+}
+
+// Stream SSE de notificações (/api/notificacoes/stream/): o servidor envia
+// a contagem de não lidas e as notificações novas, sem polling
+let streamNotificacoes = null;
+
+async function conectarStreamNotificacoes() {
+  const token = localStorage.getItem('access');
+  if (!token) return;
+  if (typeof EventSource === 'undefined') {
+    carregarContagemNotificacoes();
+    return;
+  }
+  if (streamNotificacoes) streamNotificacoes.close();
+  
+  // Ticket de uso único e curta duração: o JWT não vai na URL (que fica
+  // nos logs de acesso do servidor/proxy)
+  let ticket;
+  try {
+    const response = await fetch('http://localhost:8000/api/notificacoes/stream/ticket/', {
+      method: 'POST',
+      headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!response.ok) throw new Error('ticket');
+    ticket = (await response.json()).ticket;
+  } catch (_) {
+    carregarContagemNotificacoes();
+    setTimeout(conectarStreamNotificacoes, 30000);
+    return;
+  }
+  
+  const fonte = new EventSource(`http://localhost:8000/api/notificacoes/stream/?ticket=${encodeURIComponent(ticket)}`);
+  streamNotificacoes = fonte;
+  
+  fonte.addEventListener('contagem', (e) => {
+    atualizarBadgeNotificacoes(JSON.parse(e.data).nao_lidas);
+  });
+  
+  fonte.addEventListener('notificacao', () => {
+    const dropdown = document.getElementById('dropdown-notificacoes');
+    if (dropdown && dropdown.classList.contains('open')) renderizarNotificacoes();
+  });
+  
+  fonte.addEventListener('fim', async (e) => {
+    // O ticket já foi usado: reconecta com um novo (o EventSource reusaria a URL antiga)
+    const { motivo } = JSON.parse(e.data);
+    fonte.close();
+    if (motivo === 'token_expirado') {
+      const refresh = localStorage.getItem('refresh');
+      try {
+        if (refresh) await refreshToken(refresh);
+      } catch (_) { /* falha no refresh */ }
+    }
+    // Servidor sem stream (WSGI): não pede mais tickets, só consulta a
+    // contagem a cada 30 segundos (304 quando nada mudou)
+    if (motivo === 'sem_stream') {
+      setInterval(carregarContagemNotificacoes, 30000);
+      return;
+    }
+    setTimeout(conectarStreamNotificacoes, 1000);
+  });
+  
+  fonte.onerror = () => {
+    // 401/403 ou servidor sem stream: o navegador desiste; volta a buscar
+    // a contagem e tenta o stream de novo em 30 segundos
+    if (fonte.readyState === EventSource.CLOSED) {
+      carregarContagemNotificacoes();
+      setTimeout(conectarStreamNotificacoes, 30000);
+    }
+  };
+  return true;
+}
+
 async function carregarNotificacoes() {
   const token = localStorage.getItem('access');
   if (!token) return [];
@@ -206,6 +280,7 @@ async function marcarComoLida(id) {
       headers: { 'Authorization': `Bearer ${token}` }
     });
     
+    // Sob WSGI o stream só entrega a contagem a cada 30s: atualiza já
     if (response.ok) {
       carregarContagemNotificacoes();
     }
@@ -453,10 +528,3 @@ function getTipoIcon(tipo) {
   };
   return icons[tipo] || 'fas fa-bell';
 }
-
-// Atualiza notificações a cada 30 segundos
-setInterval(() => {
-  if (localStorage.getItem('access')) {
-    carregarContagemNotificacoes();
-  }
-}, 30000);
@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+O stream SSE de notificações (/api/notificacoes/stream/) só fica aberto sob
+ASGI, por exemplo:
+
+    uvicorn backend.asgi:application --host 0.0.0.0 --port 8000
+
+Com mais de um processo ASGI (ou notificações criadas pelo worker de
+tarefas), use EVENTOS_BROKER=redis para que todos recebam os eventos.
 """
 
 import os
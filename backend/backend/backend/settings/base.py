@@ -52,11 +52,14 @@ REST_FRAMEWORK = {
         'user_burst': '60/minute',
         'user_sustained': '500/hour',
         'registro': '5/hour',
+        'login': '10/hour',  # 10 tentativas de login por hora por IP
         'pet_perdido': '10/hour',
         'contato': '5/hour',
         'denuncia': '10/hour',  # 10 denúncias por hora por IP
         'adocao': '5/hour',  # 5 solicitações de adoção por hora por IP
         'upload': '20/hour',  # 20 uploads de arquivos por hora por IP
+        'list': '100/hour',  # 100 listagens por hora por IP
+        'detail': '200/hour',  # 200 leituras de detalhe por hora por IP
     },
 }
 
@@ -143,6 +146,78 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'  # Dentro do /app no Docker
 
+# Fila de tarefas (core.tarefas)
+# False: tarefas rodam no worker (python manage.py processar_tarefas) - padrão de produção
+# True: tarefas rodam no próprio processo após o commit (útil sem worker; padrão em dev.py)
+TAREFAS_SINCRONAS = os.getenv('TAREFAS_SINCRONAS', 'False').lower() == 'true'
+
+# Eventos em tempo real (core.eventos) - stream SSE de notificações
+# 'memoria': pub/sub no próprio processo (um único processo ASGI): só entrega notificações criadas
+#            nesse processo - as do worker (processar_tarefas) não chegam ao stream em tempo
+#            real (o worker avisa ao iniciar; elas aparecem na próxima consulta)
+# 'redis': pub/sub no Redis (vários processos/containers; requer o pacote redis)
+EVENTOS_BROKER = os.getenv('EVENTOS_BROKER', 'memoria').lower()
+EVENTOS_REDIS_URL = os.getenv('EVENTOS_REDIS_URL', 'redis://localhost:6379/0')
+
+# Retenção de notificações (core.retencao / manage.py arquivar_notificacoes)
+# Notificações lidas há mais que N dias saem da tabela principal
+NOTIFICACOES_RETENCAO_DIAS = int(os.getenv('NOTIFICACOES_RETENCAO_DIAS', '90'))
+
+# Cache (core.cache - respostas das listagens públicas)
+# Sem CACHE_REDIS_URL: LocMemCache, por processo (dev/testes)
+# Com CACHE_REDIS_URL: Redis compartilhado entre processos/containers (requer o pacote redis)
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', '')
+RESPOSTAS_CACHE_TIMEOUT = int(os.getenv('RESPOSTAS_CACHE_TIMEOUT', '300'))
+# max-age enviado aos clientes; 0 = sempre revalida com If-None-Match (304 barato)
+RESPOSTAS_CACHE_MAX_AGE = int(os.getenv('RESPOSTAS_CACHE_MAX_AGE', '0'))
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'sos_pets',
+        },
+        'respostas': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+            'KEY_PREFIX': 'sos_pets:respostas',
+            'TIMEOUT': RESPOSTAS_CACHE_TIMEOUT,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'respostas': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'respostas',
+            'TIMEOUT': RESPOSTAS_CACHE_TIMEOUT,
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        },
+    }
+
+# Contadores de throttling (core.throttling): com CACHE_REDIS_URL, compartilhados entre processos
+THROTTLE_CACHE = os.getenv('THROTTLE_CACHE', 'default')
+
+# Localidades do IBGE (core.localidades - /api/localidades/)
+# A base só muda com `manage.py atualizar_localidades`: o navegador pode guardá-la por 1 dia
+LOCALIDADES_CACHE_MAX_AGE = int(os.getenv('LOCALIDADES_CACHE_MAX_AGE', '86400'))
+
+# Geocodificação (core.geocodificacao - /api/geocode/)
+# Provedores consultados em ordem: 'nominatim' (rede), 'centroides' (sedes do IBGE, offline),
+# 'local' (testes) ou caminho pontuado de uma subclasse de core.geocodificacao.Provedor
+GEOCODIFICACAO_PROVEDORES = [
+    p.strip() for p in os.getenv('GEOCODIFICACAO_PROVEDORES', 'nominatim,centroides').split(',') if p.strip()
+]
+GEOCODIFICACAO_NOMINATIM_URL = os.getenv('GEOCODIFICACAO_NOMINATIM_URL', 'https://nominatim.openstreetmap.org')
+# A política do Nominatim exige um User-Agent que identifique a aplicação
+GEOCODIFICACAO_USER_AGENT = os.getenv('GEOCODIFICACAO_USER_AGENT', 'SOS-Pets/1.0 (geocodificacao)')
+GEOCODIFICACAO_TIMEOUT = float(os.getenv('GEOCODIFICACAO_TIMEOUT', '3'))
+GEOCODIFICACAO_CACHE_TTL_DIAS = int(os.getenv('GEOCODIFICACAO_CACHE_TTL_DIAS', '30'))
+GEOCODIFICACAO_CACHE_TTL_VAZIO_HORAS = int(os.getenv('GEOCODIFICACAO_CACHE_TTL_VAZIO_HORAS', '6'))
+GEOCODIFICACAO_CACHE_MAX = int(os.getenv('GEOCODIFICACAO_CACHE_MAX', '50000'))
+
 # CORS (valores default mais permissivos no dev)
 CORS_ALLOW_ALL_ORIGINS = os.getenv('CORS_ALLOW_ALL_ORIGINS', 'False').lower() == 'true'
 CORS_ALLOWED_ORIGINS = [o for o in os.getenv('CORS_ALLOWED_ORIGINS', '').split(',') if o]
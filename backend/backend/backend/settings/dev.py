@@ -1,3 +1,5 @@
+import os
+
 from .base import *  # noqa
 
 DEBUG = True
@@ -5,3 +7,7 @@ ALLOWED_HOSTS = ['localhost', '127.0.0.1']
 
 # Em dev, liberar CORS para facilitar o desenvolvimento
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Em dev, tarefas (matching, notificações) rodam no próprio processo após o commit,
+# sem precisar do worker. Com `make worker` (ou no docker-compose), use TAREFAS_SINCRONAS=False
+TAREFAS_SINCRONAS = os.getenv('TAREFAS_SINCRONAS', 'True').lower() == 'true'
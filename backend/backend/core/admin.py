@@ -1,9 +1,13 @@
 from django.contrib import admin
+from django.db.models import Count, Max
 from .models import (
     Usuario, Animal, Adocao, Denuncia, Donativo, Historia, Contato,
-    AnimalParaAdocao, SolicitacaoAdocao, Notificacao,
-    PetPerdido, PetPerdidoFoto, ReportePetEncontrado, ReportePetEncontradoFoto
+    AnimalParaAdocao, SolicitacaoAdocao, Notificacao, NotificacaoArquivada,
+    PetPerdido, PetPerdidoFoto, ReportePetEncontrado, ReportePetEncontradoFoto,
+    PossivelMatch, SessaoUpload, Tarefa
 )
+from .cache import invalidar_modelo
+from .notificacoes import definir_leitura
 
 @admin.register(Usuario)
 class UsuarioAdmin(admin.ModelAdmin):
@@ -116,6 +120,7 @@ class PetPerdidoAdmin(admin.ModelAdmin):
         # Define data de encontro e remove do mapa (ativo=False)
         # Evita que continue aparecendo como perdido após reunião
         updated = queryset.update(status='encontrado', data_encontrado=timezone.now(), ativo=False)
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} pet(s) marcado(s) como encontrado(s).')
     marcar_como_encontrado.short_description = 'Marcar como encontrado'
     
@@ -124,6 +129,7 @@ class PetPerdidoAdmin(admin.ModelAdmin):
         # VISIBILIDADE: Torna pets visíveis no mapa público
         # Usado quando pet ainda está perdido e precisa de divulgação
         updated = queryset.update(ativo=True)
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} pet(s) ativado(s) no mapa.')
     ativar_pets.short_description = 'Ativar no mapa'
     
@@ -133,10 +139,28 @@ class PetPerdidoAdmin(admin.ModelAdmin):
         # Usado quando dono desiste de busca ou pet foi encontrado
         # Mantém registro no banco para histórico/estatísticas
         updated = queryset.update(ativo=False)
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} pet(s) desativado(s) do mapa.')
     desativar_pets.short_description = 'Desativar do mapa'
 
 
+class PossivelMatchInline(admin.TabularInline):
+    """Possíveis matches do reporte, do melhor score para o pior, como gravados pelo matching."""
+    model = PossivelMatch
+    extra = 0
+    fields = ('pet_perdido', 'score', 'distancia_km', 'criterios', 'data_calculo')
+    readonly_fields = ('pet_perdido', 'score', 'distancia_km', 'criterios', 'data_calculo')
+    ordering = ('-score', 'distancia_km', 'id')
+    can_delete = False
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('pet_perdido')
+    
+    def has_add_permission(self, request, obj=None):
+        # Matches são gerados pelo matching automático
+        return False
+
+
 @admin.register(ReportePetEncontrado)
 class ReportePetEncontradoAdmin(admin.ModelAdmin):
     """
@@ -155,25 +179,43 @@ class ReportePetEncontradoAdmin(admin.ModelAdmin):
     Note:
         Sistema de matching automático calcula distância e compara características
     """
-    list_display = ('id', 'especie', 'cidade', 'estado', 'status', 'data_encontro', 'data_criacao', 'total_matches')
+    list_display = (
+        'id', 'especie', 'cidade', 'estado', 'status', 'data_encontro', 'data_criacao',
+        'total_matches', 'melhor_score'
+    )
     list_filter = ('especie', 'porte', 'status', 'estado', 'data_criacao')
     search_fields = ('descricao', 'cidade', 'bairro', 'nome_pessoa', 'email_contato')
-    readonly_fields = ('data_criacao', 'data_analise', 'data_atualizacao', 'possiveis_matches')
-    filter_horizontal = ('possiveis_matches',)
+    readonly_fields = ('data_criacao', 'data_analise', 'data_atualizacao')
+    inlines = [PossivelMatchInline]
     actions = ['marcar_em_analise', 'rejeitar_reportes']
     
+    def get_queryset(self, request):
+        # Contagem e melhor score na própria consulta da listagem
+        return super().get_queryset(request).annotate(
+            _total_matches=Count('matches', distinct=True),
+            _melhor_score=Max('matches__score'),
+        )
+    
     def total_matches(self, obj):
-        return obj.possiveis_matches.count()
+        return obj._total_matches
     total_matches.short_description = 'Possíveis Matches'
+    total_matches.admin_order_field = '_total_matches'
+    
+    def melhor_score(self, obj):
+        return obj._melhor_score
+    melhor_score.short_description = 'Melhor Score'
+    melhor_score.admin_order_field = '_melhor_score'
     
     def marcar_em_analise(self, request, queryset):
         updated = queryset.update(status='em_analise')
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} reporte(s) marcado(s) como em análise.')
     marcar_em_analise.short_description = 'Marcar como em análise'
     
     def rejeitar_reportes(self, request, queryset):
         from django.utils import timezone
         updated = queryset.update(status='rejeitado', analisado_por=request.user, data_analise=timezone.now())
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} reporte(s) rejeitado(s).')
     rejeitar_reportes.short_description = 'Rejeitar reportes'
 
@@ -224,11 +266,13 @@ class AnimalParaAdocaoAdmin(admin.ModelAdmin):
     def aprovar_pets(self, request, queryset):
         from django.utils import timezone
         updated = queryset.update(status='aprovado', data_aprovacao=timezone.now())
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} pet(s) aprovado(s) para adoção.')
     aprovar_pets.short_description = 'Aprovar pets selecionados'
     
     def rejeitar_pets(self, request, queryset):
         updated = queryset.update(status='rejeitado')
+        invalidar_modelo(queryset.model._meta.label)
         self.message_user(request, f'{updated} pet(s) rejeitado(s).')
     rejeitar_pets.short_description = 'Rejeitar pets selecionados'
 
@@ -287,6 +331,63 @@ class NotificacaoAdmin(admin.ModelAdmin):
     actions = ['marcar_como_lidas']
     
     def marcar_como_lidas(self, request, queryset):
-        updated = queryset.update(lida=True)
+        # Por usuário, via serviço: mantém o contador de não lidas em dia
+        por_usuario = {}
+        for pk, usuario_id in queryset.filter(lida=False).values_list('pk', 'usuario_id'):
+            por_usuario.setdefault(usuario_id, []).append(pk)
+        updated = sum(definir_leitura(usuario_id, ids=ids) for usuario_id, ids in por_usuario.items())
         self.message_user(request, f'{updated} notificação(ões) marcada(s) como lida(s).')
     marcar_como_lidas.short_description = 'Marcar como lidas'
+
+
+@admin.register(NotificacaoArquivada)
+class NotificacaoArquivadaAdmin(admin.ModelAdmin):
+    """
+    Consulta das notificações arquivadas pela retenção (somente leitura).
+    
+    Os registros são criados por `python manage.py arquivar_notificacoes`.
+    """
+    list_display = ('usuario', 'tipo', 'titulo', 'data_criacao', 'data_arquivamento')
+    list_filter = ('tipo', 'data_arquivamento')
+    search_fields = ('titulo', 'usuario__user__username')
+    list_select_related = ('usuario__user',)
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Tarefa)
+class TarefaAdmin(admin.ModelAdmin):
+    """
+    Admin para acompanhar a fila de tarefas em segundo plano.
+    
+    Mostra tarefas pendentes, em execução, concluídas e com falha,
+    com o último erro registrado. A action devolve falhas para a fila
+    (equivalente a `processar_tarefas --reprocessar-falhas`).
+    """
+    list_display = ('tipo', 'status', 'tentativas', 'max_tentativas', 'agendada_para', 'concluida_em')
+    list_filter = ('status', 'tipo')
+    search_fields = ('tipo', 'erro')
+    readonly_fields = ('data_criacao', 'iniciada_em', 'concluida_em')
+    actions = ['reprocessar_tarefas']
+    
+    def reprocessar_tarefas(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status='processando').update(
+            status='pendente', tentativas=0, agendada_para=timezone.now()
+        )
+        self.message_user(request, f'{updated} tarefa(s) devolvida(s) para a fila.')
+    reprocessar_tarefas.short_description = 'Reprocessar tarefas selecionadas'
+
+
+@admin.register(SessaoUpload)
+class SessaoUploadAdmin(admin.ModelAdmin):
+    """Admin para acompanhar uploads de vídeo em pedaços (progresso e destino)."""
+    list_display = ('id', 'usuario', 'nome_arquivo', 'recebidos', 'tamanho_total', 'status', 'denuncia', 'expira_em')
+    list_filter = ('status',)
+    search_fields = ('nome_arquivo', 'usuario__user__username')
+    list_select_related = ('usuario__user',)
+    readonly_fields = ('recebidos', 'arquivo', 'data_criacao', 'data_atualizacao')
@@ -14,3 +14,11 @@ class CoreConfig(AppConfig):
     """
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Sinais: geração de derivadas de imagem após upload
+        from . import signals
+        signals.conectar()
+        # Base do IBGE em memória antes da primeira requisição
+        from . import localidades
+        localidades.base()
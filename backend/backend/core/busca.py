@@ -0,0 +1,295 @@
+"""
+Busca textual dos catálogos (animais, animais para adoção, pets perdidos)
+Substitui os `__icontains` com curinga inicial (varredura da tabela inteira)
+por um índice invertido de palavras sem acento, consultado por faixa
+
+Fluxo:
+    1. Indexação: os campos textuais de cada registro (nome, raça, cor,
+       descrição, características) são normalizados - minúsculas, sem
+       acento, só letras e números - e quebrados em palavras
+    2. Cada palavra vai para TermoBusca, uma linha por (registro, palavra),
+       com o maior peso entre os campos em que aparece (nome pesa mais que
+       descrição)
+    3. Busca (`?q=`): cada palavra da consulta vira uma faixa do índice
+       (`termo >= 'pau' AND termo < 'pav'` = palavras que começam com
+       "pau") e um semi-join; o registro precisa casar todas as palavras da
+       consulta, então "sao pau" encontra "São Paulo". A relevância é a soma
+       dos pesos, em dobro quando a palavra aparece inteira
+    4. Signals (core.signals) reindexam o registro a cada save/delete; o
+       comando `reindexar_busca` reconstrói o índice
+
+Só igualdade e faixas sobre os índices de TermoBusca: funciona
+igual no SQLite e no MySQL, sem FULLTEXT nem extensões.
+
+Note:
+    Uma primeira versão indexava trigramas. Trigramas comuns ("__p", "ao_")
+    aparecem em boa parte dos registros, e o GROUP BY sobre essas listas
+    ficou mais lento que o próprio LIKE (ver `benchmark_busca`); o índice de
+    palavras mantém as listas curtas e ainda cobre prefixos e acentos.
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value, When
+
+from .cache import invalidar_modelo
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Campos indexados por model, com o peso de cada um na relevância
+CAMPOS_BUSCA: Dict[str, Dict[str, int]] = {
+    'core.Animal': {'nome': 5, 'raca': 3, 'descricao': 1},
+    'core.AnimalParaAdocao': {'nome': 5, 'cor': 2, 'caracteristicas_especiais': 2, 'descricao': 1},
+    'core.PetPerdido': {
+        'nome': 5, 'raca': 3, 'cor': 2, 'caracteristicas_distintivas': 2, 'descricao': 1,
+    },
+}
+
+# Palavras curtas e frequentes demais para restringir uma busca
+PALAVRAS_VAZIAS = frozenset({
+    'a', 'o', 'e', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+    'nos', 'nas', 'com', 'um', 'uma', 'para', 'por', 'ao', 'se', 'que',
+})
+
+# Tamanho de TermoBusca.termo; palavras maiores são truncadas (nos dois lados)
+TAMANHO_TERMO = 40
+
+# Limite de palavras por consulta (cada uma acrescenta uma faixa ao WHERE)
+MAX_PALAVRAS_CONSULTA = 8
+
+LOTE_INDEXACAO = 500
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+# ============================================
+# NORMALIZAÇÃO
+# ============================================
+
+def normalizar(texto: Optional[str]) -> str:
+    """
+    Minúsculas, sem acento e só letras/números separados por espaço.
+
+    Examples:
+        >>> normalizar('São Paulo - Pé-de-Moleque!')
+        'sao paulo pe de moleque'
+        >>> normalizar('Santa Bárbara d’Oeste')
+        'santa barbara d oeste'
+    """
+    if not texto:
+        return ''
+    # Remove só os acentos (marcas combinantes); outros símbolos não ASCII,
+    # como o apóstrofo tipográfico de "d’Oeste", viram separador como o '
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acento.lower()).strip()
+
+
+def palavras(texto: Optional[str]) -> List[str]:
+    """
+    Palavras normalizadas do texto, sem as palavras vazias.
+
+    Examples:
+        >>> palavras('Mancha branca no peito')
+        ['mancha', 'branca', 'peito']
+    """
+    return [p[:TAMANHO_TERMO] for p in normalizar(texto).split() if p not in PALAVRAS_VAZIAS]
+
+
+def termos_documento(valores: Dict[str, Optional[str]], pesos: Dict[str, int]) -> Dict[str, int]:
+    """
+    Palavras de um registro com o maior peso entre os campos em que aparecem.
+
+    Args:
+        valores: {campo: texto} do registro
+        pesos: {campo: peso} de CAMPOS_BUSCA
+
+    Returns:
+        {palavra: peso}
+
+    Examples:
+        >>> termos_documento({'nome': 'Rex', 'descricao': 'Rex é dócil'}, {'nome': 5, 'descricao': 1})
+        {'rex': 5, 'docil': 1}
+    """
+    termos: Dict[str, int] = {}
+    for campo, peso in pesos.items():
+        for palavra in palavras(valores.get(campo)):
+            if termos.get(palavra, 0) < peso:
+                termos[palavra] = peso
+    return termos
+
+
+# ============================================
+# INDEXAÇÃO
+# ============================================
+
+def _linhas(label: str, registros: Iterable) -> list:
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    pesos = CAMPOS_BUSCA[label]
+    return [
+        TermoBusca(modelo=label, objeto_id=registro.pk, termo=termo, peso=peso)
+        for registro in registros
+        for termo, peso in termos_documento(
+            {campo: getattr(registro, campo) for campo in pesos}, pesos
+        ).items()
+    ]
+
+
+def indexar(instancia) -> None:
+    """Reconstrói os termos de um registro (chamado pelos signals)."""
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    label = instancia._meta.label
+    with transaction.atomic():
+        TermoBusca.objects.filter(modelo=label, objeto_id=instancia.pk).delete()
+        TermoBusca.objects.bulk_create(_linhas(label, [instancia]))
+
+
+def remover_do_indice(instancia) -> None:
+    apps.get_model('core', 'TermoBusca').objects.filter(
+        modelo=instancia._meta.label, objeto_id=instancia.pk
+    ).delete()
+
+
+def reindexar(label: str, lote: int = LOTE_INDEXACAO) -> int:
+    """
+    Reconstrói o índice de um model inteiro, em lotes por PK.
+
+    Necessário após bulk_create/update() nos campos indexados, que não
+    disparam signals. Invalida também as listagens em cache do model.
+
+    Returns:
+        Quantidade de registros indexados
+    """
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    Modelo = apps.get_model(label)
+    campos = ['pk', *CAMPOS_BUSCA[label]]
+    TermoBusca.objects.filter(modelo=label).delete()
+
+    total = 0
+    ultimo_pk = 0
+    while True:
+        registros = list(Modelo.objects.filter(pk__gt=ultimo_pk).order_by('pk').only(*campos)[:lote])
+        if not registros:
+            invalidar_modelo(label)
+            return total
+        TermoBusca.objects.bulk_create(_linhas(label, registros), batch_size=5000)
+        total += len(registros)
+        ultimo_pk = registros[-1].pk
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def _sucessor(prefixo: str) -> Optional[str]:
+    """
+    Menor string maior que todas as que começam com `prefixo` (None = sem limite).
+
+    Só há [0-9a-z] nos termos, e dígitos vêm antes das letras tanto em
+    ASCII (SQLite) quanto nas collations do MySQL: depois de '9' vem 'a'.
+
+    Examples:
+        >>> _sucessor('pau'), _sucessor('b9'), _sucessor('caz'), _sucessor('zz')
+        ('pav', 'ba', 'cb', None)
+    """
+    while prefixo:
+        ultimo = prefixo[-1]
+        if ultimo != 'z':
+            return prefixo[:-1] + ('a' if ultimo == '9' else chr(ord(ultimo) + 1))
+        prefixo = prefixo[:-1]
+    return None
+
+
+def _faixa(prefixo: str) -> Q:
+    """Termos que começam com `prefixo`, como faixa do índice (sem LIKE)."""
+    filtro = Q(termo__gte=prefixo)
+    limite = _sucessor(prefixo)
+    return filtro & Q(termo__lt=limite) if limite else filtro
+
+
+def _consulta(texto: Optional[str]) -> List[str]:
+    """
+    Prefixos da consulta, sem repetição e sem os que são prefixo de outro.
+
+    "pa pau" vira só "pau", que já exige o que "pa" exigiria.
+
+    Examples:
+        >>> _consulta('Pa PAU São')
+        ['pau', 'sao']
+    """
+    unicas = list(dict.fromkeys(palavras(texto)))[:MAX_PALAVRAS_CONSULTA]
+    return [p for p in unicas if not any(o != p and o.startswith(p) for o in unicas)]
+
+
+def _relevancia(label: str, prefixos: List[str]) -> Subquery:
+    """
+    Soma dos pesos dos termos casados de cada registro (subconsulta correlacionada).
+
+    As faixas ficam no CASE e a soma é agrupada por objeto_id: a subconsulta
+    lê só os termos do próprio registro pelo índice (modelo, objeto_id,
+    termo), em vez de varrer as faixas inteiras para cada linha da listagem.
+    """
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    casou = Q()
+    for prefixo in prefixos:
+        casou |= _faixa(prefixo)
+    peso = Case(
+        When(termo__in=prefixos, then=F('peso') * 2),  # palavra inteira
+        When(casou, then=F('peso')),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    return Subquery(
+        TermoBusca.objects.filter(modelo=label, objeto_id=OuterRef('pk'))
+        .order_by()
+        .values('objeto_id')
+        .annotate(relevancia=Sum(peso))
+        .values('relevancia')[:1],
+        output_field=IntegerField(),
+    )
+
+
+def buscar(qs: QuerySet, texto: Optional[str], ordenar: bool = True) -> QuerySet:
+    """
+    Filtra o QuerySet pela busca textual e ordena por relevância.
+
+    Consulta sem palavras úteis (vazia, só pontuação ou palavras vazias)
+    devolve o QuerySet sem alteração.
+
+    Args:
+        qs: QuerySet de um model de CAMPOS_BUSCA
+        texto: Valor de `?q=`
+        ordenar: False só filtra e mantém a ordenação atual
+
+    Returns:
+        QuerySet filtrado, anotado com `relevancia_busca` quando ordenado
+
+    Examples:
+        >>> buscar(PetPerdido.objects.filter(ativo=True), 'labrador caramelo')
+        <QuerySet [<PetPerdido: Thor (perdido)>, ...]>
+    """
+    prefixos = _consulta(texto)
+    if not prefixos:
+        return qs
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    label = qs.model._meta.label
+    # Um semi-join por palavra: cada um é uma única faixa do índice
+    # (modelo, termo, objeto_id), o que um OR de faixas não seria
+    for prefixo in prefixos:
+        qs = qs.filter(pk__in=TermoBusca.objects.filter(_faixa(prefixo), modelo=label).values('objeto_id'))
+    return ordenar_por_relevancia(qs, texto) if ordenar else qs
+
+
+def ordenar_por_relevancia(qs: QuerySet, texto: Optional[str]) -> QuerySet:
+    """Ordena por relevância um QuerySet já filtrado com `buscar(..., ordenar=False)`."""
+    prefixos = _consulta(texto)
+    if not prefixos:
+        return qs
+    relevancia = _relevancia(qs.model._meta.label, prefixos)
+    return qs.annotate(relevancia_busca=relevancia).order_by('-relevancia_busca', '-pk')
@@ -0,0 +1,263 @@
+"""
+Cache de respostas das listagens públicas do catálogo
+Listas anônimas de animais, animais para adoção (aprovados) e pets perdidos
+ativos são servidas do cache sem consultar o banco nem serializar de novo
+
+Fluxo:
+    1. A chave é montada a partir dos filtros normalizados da query string
+       (tipo/porte/estado/cidade/nome..., em minúsculas e em ordem fixa),
+       do host e da versão atual do namespace
+    2. Acerto: devolve os dados guardados com o mesmo ETag; se o cliente
+       mandou If-None-Match igual, responde 304 sem corpo
+    3. Falha: roda a listagem normal e guarda o resultado
+    4. Qualquer save/delete de um model que aparece na listagem incrementa
+       a versão do namespace (signals em core.signals): todas as chaves
+       antigas deixam de ser lidas de uma vez e expiram sozinhas pelo TTL
+
+O backend é o alias `respostas` de settings.CACHES: LocMemCache no dev
+(por processo) ou Redis quando CACHE_REDIS_URL está definida (compartilhado
+entre processos, com versão e métricas incrementadas de forma atômica).
+"""
+
+import hashlib
+import json
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+ALIAS_CACHE = 'respostas'
+
+# Parâmetros de paginação que também entram na chave
+PARAMETROS_PAGINACAO = ('page', 'sem_total', 'paginacao', 'cursor', 'ordering')
+
+# Namespaces afetados por cada model: label -> (namespaces, campos ignorados)
+# Campos ignorados: um save que altera só eles não invalida (ex: contador
+# de visualizações incrementado a cada detalhe aberto)
+MODELOS_INVALIDAM = {
+    'core.Animal': (('animais',), ()),
+    'core.AnimalFoto': (('animais',), ()),
+    'core.AnimalVideo': (('animais',), ()),
+    'core.AnimalParaAdocao': (('animais_adocao',), ()),
+    'core.PetPerdido': (('pets_perdidos',), ('visualizacoes',)),
+    'core.PetPerdidoFoto': (('pets_perdidos',), ()),
+    'core.ReportePetEncontrado': (('pets_perdidos',), ()),
+    'core.PossivelMatch': (('pets_perdidos',), ()),
+    # Nome do doador/tutor aparece nas listagens (login só grava last_login)
+    'auth.User': (('animais_adocao', 'pets_perdidos'), ('last_login',)),
+}
+
+NAMESPACES = ('animais', 'animais_adocao', 'pets_perdidos')
+
+
+def _cache():
+    return caches[ALIAS_CACHE]
+
+
+# ============================================
+# VERSÃO DO NAMESPACE (INVALIDAÇÃO)
+# ============================================
+
+def _chave_versao(namespace: str) -> str:
+    return f'versao:{namespace}'
+
+
+def versao(namespace: str) -> int:
+    """Versão atual do namespace (criada com 1 na primeira leitura)."""
+    cache = _cache()
+    atual = cache.get(_chave_versao(namespace))
+    if atual is None:
+        cache.add(_chave_versao(namespace), 1, timeout=None)
+        atual = cache.get(_chave_versao(namespace), 1)
+    return atual
+
+
+def _incrementar(chave: str) -> None:
+    cache = _cache()
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Chave ainda não existe (ou expirou): começa do 2 para nunca
+        # voltar a uma versão já usada por respostas guardadas
+        if not cache.add(chave, 2, timeout=None):
+            cache.incr(chave)
+
+
+def invalidar(*namespaces: str) -> None:
+    """
+    Descarta as respostas guardadas dos namespaces.
+
+    Incrementa a versão agora e, dentro de uma transação, de novo após o
+    commit: uma requisição que leia o banco antes do commit e grave a
+    resposta antiga no cache fica numa versão que ninguém mais lê.
+
+    Examples:
+        >>> invalidar('pets_perdidos')
+    """
+    def incrementar():
+        for namespace in namespaces:
+            _incrementar(_chave_versao(namespace))
+
+    incrementar()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(incrementar)
+
+
+def invalidar_modelo(label: str, campos_alterados: Optional[Iterable[str]] = None) -> None:
+    """
+    Invalida os namespaces em que o model aparece.
+
+    Args:
+        label: 'core.PetPerdido'
+        campos_alterados: update_fields do save (None = todos)
+    """
+    namespaces, ignorados = MODELOS_INVALIDAM.get(label, ((), ()))
+    if campos_alterados is not None and set(campos_alterados) <= set(ignorados):
+        return
+    if namespaces:
+        invalidar(*namespaces)
+
+
+# ============================================
+# MÉTRICAS
+# ============================================
+
+def _registrar(namespace: str, resultado: str) -> None:
+    _incrementar_metrica(f'metricas:{namespace}:{resultado}')
+
+
+def _incrementar_metrica(chave: str) -> None:
+    cache = _cache()
+    try:
+        cache.incr(chave)
+    except ValueError:
+        if not cache.add(chave, 1, timeout=None):
+            cache.incr(chave)
+
+
+def metricas() -> Dict[str, Dict]:
+    """
+    Acertos, falhas e taxa de acerto por namespace (desde o último `zerar_metricas`).
+
+    Returns:
+        {'animais': {'acertos': 90, 'falhas': 10, 'taxa_acerto': 0.9, 'versao': 3}, ...}
+    """
+    cache = _cache()
+    resultado = {}
+    for namespace in NAMESPACES:
+        acertos = cache.get(f'metricas:{namespace}:acerto', 0)
+        falhas = cache.get(f'metricas:{namespace}:falha', 0)
+        total = acertos + falhas
+        resultado[namespace] = {
+            'acertos': acertos,
+            'falhas': falhas,
+            'taxa_acerto': round(acertos / total, 4) if total else None,
+            'versao': versao(namespace),
+        }
+    return resultado
+
+
+def zerar_metricas() -> None:
+    _cache().delete_many([
+        f'metricas:{namespace}:{resultado}' for namespace in NAMESPACES for resultado in ('acerto', 'falha')
+    ])
+
+
+# ============================================
+# CACHE DAS LISTAGENS
+# ============================================
+
+def chave_resposta(namespace: str, request, parametros: Iterable[str]) -> Optional[str]:
+    """
+    Chave da resposta para a requisição, ou None se ela não pode ser cacheada.
+
+    Só requisições anônimas entram (usuários logados podem ver itens
+    próprios não aprovados). Parâmetros fora da lista conhecida também
+    desligam o cache, para nunca servir a resposta de outro filtro.
+
+    Examples:
+        >>> chave_resposta('animais', request, ('tipo', 'porte'))   # ?porte=Medio&tipo=gato
+        'lista:animais:v3:5f1c...'
+    """
+    if request.user.is_authenticated:
+        return None
+    permitidos = set(parametros) | set(PARAMETROS_PAGINACAO)
+    if any(nome not in permitidos for nome in request.query_params):
+        return None
+
+    filtros = sorted(
+        (nome, valor.strip().lower())
+        for nome in request.query_params
+        for valor in request.query_params.getlist(nome)
+        if valor.strip()
+    )
+    # Host e esquema entram porque as URLs de imagem são absolutas
+    base = json.dumps([request.scheme, request.get_host(), filtros])
+    resumo = hashlib.sha1(base.encode()).hexdigest()
+    return f'lista:{namespace}:v{versao(namespace)}:{resumo}'
+
+
+def _etag(dados) -> str:
+    conteudo = json.dumps(dados, sort_keys=True, default=str).encode()
+    return quote_etag(hashlib.md5(conteudo).hexdigest())
+
+
+def _com_cabecalhos(resposta: Response, etag: str) -> Response:
+    resposta['ETag'] = etag
+    resposta['Cache-Control'] = f'public, max-age={settings.RESPOSTAS_CACHE_MAX_AGE}, must-revalidate'
+    # Logados recebem outra lista: caches intermediários não podem misturar
+    patch_vary_headers(resposta, ('Authorization',))
+    return resposta
+
+
+class ListaEmCacheMixin:
+    """
+    Cacheia a action `list` de um ViewSet para requisições anônimas.
+
+    Atributos:
+        cache_namespace: Namespace invalidado pelos models da listagem
+        cache_parametros: Filtros aceitos na query string
+
+    Example:
+        >>> class AnimalViewSet(ListaEmCacheMixin, viewsets.ModelViewSet):
+        ...     cache_namespace = 'animais'
+        ...     cache_parametros = ('status', 'tipo', 'porte', 'sexo', 'estado', 'cidade', 'nome', 'q')
+    """
+    cache_namespace: str = ''
+    cache_parametros: tuple = ()
+
+    def list(self, request, *args, **kwargs):
+        chave = chave_resposta(self.cache_namespace, request, self.cache_parametros)
+        if chave is None:
+            return super().list(request, *args, **kwargs)
+
+        # PASSO 1: Acerto - nada de banco nem serializer
+        guardada = _cache().get(chave)
+        if guardada is not None:
+            _registrar(self.cache_namespace, 'acerto')
+            if guardada['etag'] in parse_etags(request.headers.get('If-None-Match', '')):
+                resposta = Response(status=status.HTTP_304_NOT_MODIFIED)
+            else:
+                resposta = Response(guardada['dados'])
+            resposta['X-Cache'] = 'HIT'
+            return _com_cabecalhos(resposta, guardada['etag'])
+
+        # PASSO 2: Falha - listagem normal, guardada só se deu certo
+        _registrar(self.cache_namespace, 'falha')
+        resposta = super().list(request, *args, **kwargs)
+        if resposta.status_code != status.HTTP_200_OK:
+            return resposta
+        etag = _etag(resposta.data)
+        _cache().set(chave, {'dados': resposta.data, 'etag': etag}, settings.RESPOSTAS_CACHE_TIMEOUT)
+        resposta['X-Cache'] = 'MISS'
+        return _com_cabecalhos(resposta, etag)
@@ -0,0 +1,236 @@
+"""
+Pub/sub de eventos em tempo real (notificações)
+Alimenta o stream SSE em /api/notificacoes/stream/ no lugar do polling do front
+
+Fluxo:
+    1. Quem grava notificações chama `publicar(usuario_id, evento, dados)`
+       (sempre depois do commit, ver core.notificacoes)
+    2. Cada conexão SSE abre `assinar(usuario_id)` e recebe os eventos do
+       próprio usuário por uma fila assíncrona
+    3. O broker é escolhido em settings.EVENTOS_BROKER:
+       - 'memoria': entrega só para conexões do mesmo processo (dev, um
+         único processo ASGI)
+       - 'redis': PUBLISH/SUBSCRIBE no Redis, para vários processos ASGI
+         e para publicações vindas do worker de tarefas
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Eventos guardados por conexão enquanto o cliente não lê; ao encher, o
+# mais antigo é descartado (o cliente se ressincroniza pela contagem)
+TAMANHO_FILA_ASSINATURA = 100
+
+
+def canal_usuario(usuario_id: int) -> str:
+    """Nome do canal de um perfil (Usuario.pk)."""
+    return f'sos_pets:notificacoes:{usuario_id}'
+
+
+# ============================================
+# BROKER EM MEMÓRIA
+# ============================================
+
+class _AssinaturaMemoria:
+    """Fila de uma conexão, registrada no broker enquanto dura o `async with`."""
+
+    def __init__(self, broker: 'BrokerMemoria', canal: str):
+        self._broker = broker
+        self._canal = canal
+        self._fila: Optional[asyncio.Queue] = None
+
+    async def __aenter__(self) -> '_AssinaturaMemoria':
+        self._fila = asyncio.Queue(maxsize=TAMANHO_FILA_ASSINATURA)
+        self._registro = (asyncio.get_running_loop(), self._fila)
+        self._broker._registrar(self._canal, self._registro)
+        return self
+
+    async def __aexit__(self, *exc) -> bool:
+        self._broker._remover(self._canal, self._registro)
+        return False
+
+    async def receber(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Próximo evento, ou None se nada chegar em `timeout` segundos."""
+        try:
+            return await asyncio.wait_for(self._fila.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def _entregar(fila: asyncio.Queue, mensagem: Dict[str, Any]) -> None:
+    """Roda no loop do assinante: enfileira descartando o evento mais antigo se cheia."""
+    if fila.full():
+        fila.get_nowait()
+    fila.put_nowait(mensagem)
+
+
+class BrokerMemoria:
+    """
+    Pub/sub dentro do processo.
+
+    `publicar` pode ser chamado de qualquer thread (views síncronas rodam
+    em threads sob ASGI): a entrega é feita no loop de cada assinante com
+    `call_soon_threadsafe`.
+    """
+
+    def __init__(self):
+        self._assinantes: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def publicar(self, canal: str, mensagem: Dict[str, Any]) -> None:
+        with self._lock:
+            alvos = list(self._assinantes.get(canal, ()))
+        for loop, fila in alvos:
+            try:
+                loop.call_soon_threadsafe(_entregar, fila, mensagem)
+            except RuntimeError:
+                # Loop já encerrado: a conexão caiu e ainda não saiu da lista
+                pass
+
+    def assinar(self, canal: str) -> _AssinaturaMemoria:
+        return _AssinaturaMemoria(self, canal)
+
+    def _registrar(self, canal: str, registro) -> None:
+        with self._lock:
+            self._assinantes.setdefault(canal, set()).add(registro)
+
+    def _remover(self, canal: str, registro) -> None:
+        with self._lock:
+            restantes = self._assinantes.get(canal)
+            if restantes is not None:
+                restantes.discard(registro)
+                if not restantes:
+                    del self._assinantes[canal]
+
+    def total_assinantes(self, canal: str) -> int:
+        with self._lock:
+            return len(self._assinantes.get(canal, ()))
+
+
+# ============================================
+# BROKER REDIS
+# ============================================
+
+class _AssinaturaRedis:
+    """SUBSCRIBE no canal enquanto dura o `async with`."""
+
+    def __init__(self, redis_async, url: str, canal: str):
+        self._redis_async = redis_async
+        self._url = url
+        self._canal = canal
+
+    async def __aenter__(self) -> '_AssinaturaRedis':
+        self._cliente = self._redis_async.Redis.from_url(self._url)
+        self._pubsub = self._cliente.pubsub()
+        await self._pubsub.subscribe(self._canal)
+        return self
+
+    async def __aexit__(self, *exc) -> bool:
+        await self._pubsub.unsubscribe(self._canal)
+        await self._pubsub.close()
+        await self._cliente.close()
+        return False
+
+    async def receber(self, timeout: float) -> Optional[Dict[str, Any]]:
+        mensagem = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if mensagem is None:
+            return None
+        return json.loads(mensagem['data'])
+
+
+class BrokerRedis:
+    """
+    Pub/sub no Redis (PUBLISH/SUBSCRIBE), mesma interface do BrokerMemoria.
+
+    Publicação síncrona (views e worker de tarefas), assinatura com
+    redis.asyncio (conexões SSE).
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+            import redis.asyncio as redis_async
+        except ImportError as e:
+            raise ImproperlyConfigured(
+                "EVENTOS_BROKER='redis' requer o pacote redis (pip install redis)"
+            ) from e
+        self._url = url
+        self._cliente = redis.Redis.from_url(url)
+        self._redis_async = redis_async
+
+    def publicar(self, canal: str, mensagem: Dict[str, Any]) -> None:
+        self._cliente.publish(canal, json.dumps(mensagem, default=str))
+
+    def assinar(self, canal: str) -> _AssinaturaRedis:
+        return _AssinaturaRedis(self._redis_async, self._url, canal)
+
+
+# ============================================
+# API DO MÓDULO
+# ============================================
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def obter_broker():
+    """Broker configurado em settings.EVENTOS_BROKER (criado uma vez por processo)."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                tipo = getattr(settings, 'EVENTOS_BROKER', 'memoria')
+                if tipo == 'memoria':
+                    _broker = BrokerMemoria()
+                elif tipo == 'redis':
+                    _broker = BrokerRedis(settings.EVENTOS_REDIS_URL)
+                else:
+                    raise ImproperlyConfigured(f'EVENTOS_BROKER desconhecido: {tipo!r}')
+    return _broker
+
+
+def publicar(usuario_id: int, evento: str, dados: Dict[str, Any]) -> None:
+    """
+    Envia um evento para as conexões SSE de um usuário.
+
+    Falhas do broker são só registradas: a notificação já está gravada e
+    o cliente a recebe na próxima listagem.
+
+    Args:
+        usuario_id: Usuario.pk do destinatário
+        evento: Nome do evento SSE ('notificacao', 'contagem')
+        dados: Conteúdo serializável em JSON
+
+    Examples:
+        >>> publicar(usuario.pk, 'contagem', {'nao_lidas': 3})
+    """
+    try:
+        obter_broker().publicar(canal_usuario(usuario_id), {'evento': evento, 'dados': dados})
+    except ImproperlyConfigured:
+        raise
+    except Exception:  # noqa: BLE001 - push é melhor esforço
+        logger.exception('Falha ao publicar evento %s para o usuário %s', evento, usuario_id)
+
+
+def assinar(usuario_id: int):
+    """
+    Assinatura assíncrona dos eventos de um usuário.
+
+    Example:
+        >>> async with assinar(usuario.pk) as assinatura:
+        ...     mensagem = await assinatura.receber(timeout=15)
+    """
+    return obter_broker().assinar(canal_usuario(usuario_id))
@@ -0,0 +1,255 @@
+"""
+Utilidades geográficas para o matching de pets perdidos/encontrados
+Implementação única da fórmula Haversine (escalar e em lote), caixa
+delimitadora (bounding box) e um índice de grade (grid) sobre latitude/longitude
+"""
+
+from math import atan2, cos, floor, radians, sin, sqrt
+from typing import Dict, List, Tuple
+
+
+# ============================================
+# CONFIGURAÇÃO DA GRADE
+# ============================================
+
+# Tamanho da célula em graus (~5,5km de latitude por célula)
+# Com raio de busca de 10km, a consulta cobre uma janela de até 5x5 células
+TAMANHO_CELULA_GRAUS = 0.05
+
+# Quilômetros por grau de latitude (aproximação esférica)
+KM_POR_GRAU_LATITUDE = 111.32
+
+# Raio padrão de busca do matching (km)
+RAIO_MATCHING_KM = 10
+
+# Raio médio da Terra em quilômetros
+# (valor aproximado usado em cálculos geodésicos)
+RAIO_TERRA_KM = 6371.0
+
+
+# ============================================
+# DISTÂNCIA (HAVERSINE)
+# ============================================
+
+def distancia_haversine_km(lat1, lon1, lat2, lon2) -> float:
+    """
+    Calcula a distância em km entre duas coordenadas usando a fórmula Haversine.
+
+    Args:
+        lat1, lon1: Primeiro ponto em graus (float ou Decimal)
+        lat2, lon2: Segundo ponto em graus (float ou Decimal)
+
+    Returns:
+        Distância geodésica em quilômetros
+
+    Examples:
+        >>> round(distancia_haversine_km(-23.5505, -46.6333, -23.5613, -46.6561), 1)
+        2.6
+    """
+    # FÓRMULA HAVERSINE: Calcula distância geodésica (linha reta) entre dois pontos
+    # Considera a curvatura da Terra (não é distância euclidiana simples)
+
+    # Converte todas as coordenadas de graus para radianos
+    # Necessário para funções trigonométricas (sin, cos)
+    lat1, lon1, lat2, lon2 = (radians(float(valor)) for valor in (lat1, lon1, lat2, lon2))
+
+    # FÓRMULA HAVERSINE (parte 1): sin²(Δlat/2) + cos(lat1) * cos(lat2) * sin²(Δlon/2)
+    # Este valor representa a distância angular entre os dois pontos
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+
+    # FÓRMULA HAVERSINE (parte 2): ângulo central em radianos
+    # atan2 é usado em vez de asin para maior estabilidade numérica
+    return RAIO_TERRA_KM * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+class MemoDistancias:
+    """
+    Memoização de distâncias por par de coordenadas.
+
+    Pensada para durar uma requisição (ou um lote): a mesma dupla
+    reporte/pet aparece várias vezes numa listagem e só é calculada uma vez.
+
+    Examples:
+        >>> memo = MemoDistancias()
+        >>> memo.distancia(-23.5505, -46.6333, -23.5613, -46.6561) == memo.distancia(-23.5505, -46.6333, -23.5613, -46.6561)
+        True
+        >>> len(memo)
+        1
+    """
+
+    def __init__(self) -> None:
+        self._cache: Dict[Tuple[float, float, float, float], float] = {}
+
+    def distancia(self, lat1, lon1, lat2, lon2) -> float:
+        """Retorna a distância Haversine (km), calculando apenas na primeira vez."""
+        # 6 casas decimais: mesma precisão dos campos latitude/longitude
+        chave = tuple(round(float(valor), 6) for valor in (lat1, lon1, lat2, lon2))
+        if chave not in self._cache:
+            self._cache[chave] = distancia_haversine_km(*chave)
+        return self._cache[chave]
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+# ============================================
+# CAIXA DELIMITADORA (BOUNDING BOX)
+# ============================================
+
+def caixa_delimitadora(latitude, longitude, raio_km: float = RAIO_MATCHING_KM) -> Tuple[float, float, float, float]:
+    """
+    Calcula a caixa delimitadora (bounding box) de um círculo.
+
+    Usada como pré-filtro barato (comparações simples de latitude/longitude
+    no SQL) antes do cálculo exato da distância. O deslocamento em longitude
+    é corrigido pelo cosseno da latitude, já que os meridianos se aproximam
+    à medida que se afastam do equador.
+
+    Args:
+        latitude: Latitude do centro em graus
+        longitude: Longitude do centro em graus
+        raio_km: Raio em quilômetros
+
+    Returns:
+        Tupla (lat_min, lat_max, lon_min, lon_max)
+
+    Examples:
+        >>> [round(v, 3) for v in caixa_delimitadora(0, 0, 111.32)]
+        [-1.0, 1.0, -1.0, 1.0]
+    """
+    lat = float(latitude)
+    lon = float(longitude)
+
+    delta_lat = raio_km / KM_POR_GRAU_LATITUDE
+    # Evita divisão por zero próximo aos polos
+    cos_lat = max(cos(radians(lat)), 0.01)
+    delta_lon = raio_km / (KM_POR_GRAU_LATITUDE * cos_lat)
+
+    return lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon
+
+
+# ============================================
+# FUNÇÕES DO ÍNDICE DE GRADE
+# ============================================
+
+def _indice(valor: float) -> int:
+    """Converte uma coordenada em graus no índice inteiro da célula."""
+    return int(floor(float(valor) / TAMANHO_CELULA_GRAUS))
+
+
+def celula_grade(latitude, longitude) -> str:
+    """
+    Retorna a chave da célula da grade que contém a coordenada.
+
+    A chave é uma string curta "<linha>:<coluna>" que pode ser indexada
+    no banco e comparada por igualdade (sem funções no SQL).
+
+    Args:
+        latitude: Latitude em graus (float ou Decimal)
+        longitude: Longitude em graus (float ou Decimal)
+
+    Returns:
+        Chave da célula
+
+    Examples:
+        >>> celula_grade(-23.5505, -46.6333)
+        '-472:-933'
+    """
+    return f"{_indice(latitude)}:{_indice(longitude)}"
+
+
+def celulas_vizinhas(latitude, longitude, raio_km: float = RAIO_MATCHING_KM) -> List[str]:
+    """
+    Lista as chaves de todas as células que intersectam o raio informado.
+
+    Usa a caixa delimitadora (bounding box) do círculo.
+
+    Args:
+        latitude: Latitude do centro em graus
+        longitude: Longitude do centro em graus
+        raio_km: Raio de busca em quilômetros
+
+    Returns:
+        Lista de chaves de célula (inclui a célula do centro)
+
+    Examples:
+        >>> '-472:-933' in celulas_vizinhas(-23.5505, -46.6333, 10)
+        True
+    """
+    lat_min, lat_max, lon_min, lon_max = caixa_delimitadora(latitude, longitude, raio_km)
+
+    linha_min, linha_max = _indice(lat_min), _indice(lat_max)
+    coluna_min, coluna_max = _indice(lon_min), _indice(lon_max)
+
+    return [
+        f"{linha}:{coluna}"
+        for linha in range(linha_min, linha_max + 1)
+        for coluna in range(coluna_min, coluna_max + 1)
+    ]
+
+
+# ============================================
+# DISTÂNCIAS EM LOTE (NumPy)
+# ============================================
+
+def distancias_haversine_matriz(lat1, lon1, lat2, lon2):
+    """
+    Calcula a matriz de distâncias Haversine (km) entre dois conjuntos de pontos.
+
+    Usado pelo re-matching em lote: um único cálculo vetorizado substitui
+    len(lat1) * len(lat2) chamadas da versão escalar.
+
+    Args:
+        lat1, lon1: Arrays (N,) com as coordenadas do primeiro conjunto (graus)
+        lat2, lon2: Arrays (M,) com as coordenadas do segundo conjunto (graus)
+
+    Returns:
+        numpy.ndarray (N, M) de distâncias em km
+
+    Examples:
+        >>> distancias_haversine_matriz([-23.5505], [-46.6333], [-23.5613], [-46.6561]).round(1)
+        array([[2.6]])
+    """
+    import numpy as np
+
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))[None, :]
+
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+# ============================================
+# MARCADORES DO MAPA
+# ============================================
+
+# A partir deste zoom o mapa recebe um marcador por pet (sem cluster)
+ZOOM_MARCADORES_INDIVIDUAIS = 14
+
+# Tamanho aproximado de um cluster na tela (pixels)
+PIXELS_POR_CLUSTER = 60
+
+
+def tamanho_cluster_graus(zoom: int, pixels: int = PIXELS_POR_CLUSTER) -> float:
+    """
+    Lado (em graus) da célula de agrupamento para um nível de zoom.
+
+    Segue a projeção dos tiles (256px cobrem 360° no zoom 0 e cada nível
+    dobra a resolução): a célula ocupa ~`pixels` na tela em qualquer zoom.
+
+    Args:
+        zoom: Nível de zoom do mapa (0-20)
+        pixels: Tamanho desejado do cluster na tela
+
+    Returns:
+        Tamanho da célula em graus
+
+    Examples:
+        >>> round(tamanho_cluster_graus(4), 4)
+        5.2734
+        >>> tamanho_cluster_graus(5) == tamanho_cluster_graus(4) / 2
+        True
+    """
+    return pixels * 360.0 / (256 * 2 ** zoom)
@@ -0,0 +1,461 @@
+"""
+Geocodificação: endereço -> coordenadas (direta) e coordenadas -> cidade/UF (reversa)
+Substitui as chamadas do navegador ao Nominatim por /api/geocode/, com
+cache persistente e uma base offline de sedes de município como reserva
+
+Fluxo:
+    1. A consulta é normalizada (sem acento/maiúsculas; coordenadas
+       arredondadas a 4 casas, ~11 m) e vira a chave de GeocodificacaoCache
+    2. Acerto não expirado: devolve o resultado guardado. `ultimo_acesso`
+       só é regravado se ficou mais velho que INTERVALO_ACESSO (LRU
+       aproximado, sem uma escrita a cada leitura)
+    3. Falha: os provedores de settings.GEOCODIFICACAO_PROVEDORES são
+       consultados em ordem e o primeiro que encontrar vence:
+       - 'nominatim': API do OpenStreetMap (rede; no máximo 1 chamada por
+         segundo por processo, como pede a política de uso)
+       - 'centroides': sede do município da base do IBGE
+         (core.localidades), sem rede; reversa = sede mais próxima
+       - 'local': respostas fixas em memória, para testes
+       Caminhos pontuados ('pacote.modulo.Classe') também são aceitos
+    4. O resultado é guardado por GEOCODIFICACAO_CACHE_TTL_DIAS; "nada
+       encontrado" por GEOCODIFICACAO_CACHE_TTL_VAZIO_HORAS. Se algum
+       provedor falhou (rede, timeout), a ausência não é guardada e o
+       resultado da reserva (ex.: sede do município no lugar da rua) fica
+       só pelo TTL curto, para o provedor preciso ser consultado de novo
+    5. Caminho de escrita (serializers): `somente_local=True` lê o cache e
+       consulta só os provedores sem rede, sem gravar - o cadastro não
+       espera por um serviço externo
+    6. `limpar_cache_geocodificacao` apaga os expirados e, acima de
+       GEOCODIFICACAO_CACHE_MAX linhas, os menos usados recentemente
+
+Cidade e UF de todo resultado passam por `localizacao_canonica`: o mesmo
+nome oficial e a mesma cidade_norm usados pelos filtros e pelo matching.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import re
+import threading
+import time
+import urllib.parse
+import urllib.request
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .busca import normalizar
+from .geo import KM_POR_GRAU_LATITUDE, distancia_haversine_km
+from .localidades import autocompletar, base, localizacao_canonica, municipio, normalizar_cidade, normalizar_uf
+from .models import GeocodificacaoCache
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Leituras do mesmo registro dentro deste intervalo não regravam ultimo_acesso
+INTERVALO_ACESSO = timedelta(hours=1)
+
+# Casas decimais das coordenadas na chave da reversa (4 casas ~ 11 m)
+CASAS_REVERSA = 4
+
+TAMANHO_CONSULTA = 255
+
+# Sede mais distante aceita pela reversa offline (fora disso: fora do Brasil)
+MAX_DISTANCIA_SEDE_KM = 150
+
+# Separadores de "rua, cidade - UF / país"
+_SEPARADORES = re.compile(r',|/|\s+-\s+')
+
+
+class ErroProvedor(Exception):
+    """Provedor indisponível (rede, timeout, resposta inválida): tenta o próximo."""
+
+
+def _resultado(latitude, longitude, estado, cidade, endereco: str, precisao: str, provedor: str) -> Dict:
+    """Resultado com cidade/UF canônicas (as mesmas gravadas pelos models)."""
+    estado, cidade, _, cidade_ibge = localizacao_canonica(estado, cidade)
+    return {
+        'latitude': round(float(latitude), 6),
+        'longitude': round(float(longitude), 6),
+        'cidade': cidade or '',
+        'estado': estado or '',
+        'cidade_ibge': cidade_ibge,
+        'endereco': endereco,
+        'precisao': precisao,
+        'provedor': provedor,
+    }
+
+
+# ============================================
+# PROVEDORES
+# ============================================
+
+class Provedor:
+    """
+    Interface dos provedores: None = nada encontrado; ErroProvedor = falhou.
+
+    `rede = False` marca provedores que respondem sem serviço externo (os
+    únicos usados com somente_local=True).
+
+    Example:
+        >>> class ProvedorGoogle(Provedor):
+        ...     nome = 'google'
+        ...     def direta(self, consulta): ...
+        ...     def reversa(self, latitude, longitude): ...
+    """
+    nome = ''
+    rede = True
+
+    def direta(self, consulta: str) -> Optional[Dict]:
+        return None
+
+    def reversa(self, latitude: float, longitude: float) -> Optional[Dict]:
+        return None
+
+
+class ProvedorNominatim(Provedor):
+    """API pública do Nominatim (OpenStreetMap), restrita ao Brasil."""
+    nome = 'nominatim'
+
+    # Política de uso do Nominatim: no máximo 1 requisição por segundo
+    INTERVALO_MINIMO = 1.0
+
+    def __init__(self):
+        self.url = settings.GEOCODIFICACAO_NOMINATIM_URL.rstrip('/')
+        self.timeout = settings.GEOCODIFICACAO_TIMEOUT
+        self._lock = threading.Lock()
+        self._ultima_chamada = 0.0
+
+    def direta(self, consulta: str) -> Optional[Dict]:
+        dados = self._get('/search', {'q': consulta, 'countrycodes': 'br', 'limit': 1})
+        return self._converter(dados[0], 'endereco') if dados else None
+
+    def reversa(self, latitude: float, longitude: float) -> Optional[Dict]:
+        dados = self._get('/reverse', {'lat': latitude, 'lon': longitude, 'zoom': 16})
+        if not dados or 'error' in dados:
+            return None
+        return self._converter(dados, 'endereco')
+
+    def _get(self, caminho: str, parametros: Dict):
+        # Sem esperar: dentro do intervalo, cede a vez ao próximo provedor
+        with self._lock:
+            agora = time.monotonic()
+            if agora - self._ultima_chamada < self.INTERVALO_MINIMO:
+                raise ErroProvedor('limite de 1 requisição/s do Nominatim')
+            self._ultima_chamada = agora
+
+        query = urllib.parse.urlencode({**parametros, 'format': 'jsonv2', 'addressdetails': 1})
+        requisicao = urllib.request.Request(
+            f'{self.url}{caminho}?{query}',
+            headers={'User-Agent': settings.GEOCODIFICACAO_USER_AGENT, 'Accept-Language': 'pt-BR'},
+        )
+        try:
+            with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                return json.load(resposta)
+        except (OSError, ValueError) as e:
+            raise ErroProvedor(str(e)) from e
+
+    def _converter(self, item: Dict, precisao: str) -> Dict:
+        endereco = item.get('address', {})
+        cidade = next(
+            (endereco[campo] for campo in ('city', 'town', 'village', 'municipality') if endereco.get(campo)), ''
+        )
+        # 'ISO3166-2-lvl4': 'BR-SP'; senão o nome do estado
+        estado = (endereco.get('ISO3166-2-lvl4') or '').rpartition('-')[2] or endereco.get('state', '')
+        return _resultado(item['lat'], item['lon'], estado, cidade, item.get('display_name', ''), precisao, self.nome)
+
+
+class ProvedorCentroides(Provedor):
+    """
+    Sedes de município da base do IBGE (core.localidades), sem rede.
+
+    Direta: reconhece "cidade, UF" (ou só a cidade, se o nome for único no
+    país) e devolve as coordenadas da sede. Reversa: sede mais próxima,
+    por uma grade de 1 grau montada uma vez por processo.
+    """
+    nome = 'centroides'
+    rede = False
+
+    def __init__(self):
+        self._grade: Optional[Dict[Tuple[int, int], List]] = None
+
+    def direta(self, consulta: str) -> Optional[Dict]:
+        encontrado = self._municipio_da_consulta(consulta)
+        if encontrado is None or encontrado.latitude is None:
+            return None
+        return _resultado(
+            encontrado.latitude, encontrado.longitude, encontrado.uf, encontrado.nome,
+            f'{encontrado.nome} - {encontrado.uf}', 'municipio', self.nome,
+        )
+
+    def reversa(self, latitude: float, longitude: float) -> Optional[Dict]:
+        grade = self._obter_grade()
+        celula_lat, celula_lon = math.floor(latitude), math.floor(longitude)
+        # Fora do anel `raio` tudo fica a pelo menos raio graus (>= raio * 90 km no Brasil)
+        km_minimo_por_grau = KM_POR_GRAU_LATITUDE * math.cos(math.radians(34))
+        melhor, melhor_km = None, float('inf')
+        for raio in range(0, 3):
+            for dlat in range(-raio, raio + 1):
+                for dlon in range(-raio, raio + 1):
+                    if max(abs(dlat), abs(dlon)) != raio:
+                        continue
+                    for m in grade.get((celula_lat + dlat, celula_lon + dlon), ()):
+                        km = distancia_haversine_km(latitude, longitude, m.latitude, m.longitude)
+                        if km < melhor_km:
+                            melhor, melhor_km = m, km
+            if melhor_km <= raio * km_minimo_por_grau:
+                break
+        if melhor is None or melhor_km > MAX_DISTANCIA_SEDE_KM:
+            return None
+        return _resultado(
+            latitude, longitude, melhor.uf, melhor.nome, f'{melhor.nome} - {melhor.uf}', 'municipio', self.nome,
+        )
+
+    def _obter_grade(self) -> Dict[Tuple[int, int], List]:
+        if self._grade is None:
+            grade: Dict[Tuple[int, int], List] = {}
+            for m in base().municipios.values():
+                if m.latitude is not None:
+                    grade.setdefault((math.floor(m.latitude), math.floor(m.longitude)), []).append(m)
+            self._grade = grade
+        return self._grade
+
+    def _municipio_da_consulta(self, consulta: str):
+        partes = [p.strip() for p in _SEPARADORES.split(consulta) if p.strip()]
+        partes = [p for p in partes if normalizar(p) not in ('brasil', 'brazil')]
+        # "..., cidade, UF": a UF é a última parte reconhecida como estado
+        for i in range(len(partes) - 1, -1, -1):
+            uf = normalizar_uf(partes[i])
+            if uf in base().estados:
+                for parte in reversed(partes[:i]):
+                    encontrado = municipio(parte, uf)
+                    if encontrado:
+                        return encontrado
+                return None
+        # Sem UF: só se o nome do município for único no país
+        for parte in reversed(partes):
+            chave = normalizar_cidade(parte)
+            iguais = [m for m in autocompletar(parte, limite=50) if normalizar_cidade(m.nome) == chave]
+            if len(iguais) == 1:
+                return iguais[0]
+        return None
+
+
+class ProvedorLocal(Provedor):
+    """
+    Provedor de testes: respostas registradas em memória, sem rede.
+
+    Example:
+        >>> ProvedorLocal.registrar('Rua A, 10, Santos, SP', -23.96, -46.33, 'Santos', 'SP')
+        >>> with override_settings(GEOCODIFICACAO_PROVEDORES=['local', 'centroides']):
+        ...     geocodificar('rua a 10 santos sp')
+    """
+    nome = 'local'
+    rede = False
+
+    enderecos: Dict[str, Dict] = {}
+    reversos: Dict[Tuple[float, float], Dict] = {}
+    chamadas: List[Tuple] = []
+
+    @classmethod
+    def registrar(cls, consulta: str, latitude: float, longitude: float, cidade: str = '', estado: str = '') -> None:
+        resultado = _resultado(latitude, longitude, estado, cidade, consulta, 'endereco', cls.nome)
+        cls.enderecos[normalizar(consulta)] = resultado
+        cls.reversos[(round(latitude, CASAS_REVERSA), round(longitude, CASAS_REVERSA))] = resultado
+
+    @classmethod
+    def limpar(cls) -> None:
+        cls.enderecos.clear()
+        cls.reversos.clear()
+        cls.chamadas.clear()
+
+    def direta(self, consulta: str) -> Optional[Dict]:
+        self.chamadas.append(('direta', consulta))
+        return self.enderecos.get(normalizar(consulta))
+
+    def reversa(self, latitude: float, longitude: float) -> Optional[Dict]:
+        self.chamadas.append(('reversa', latitude, longitude))
+        return self.reversos.get((latitude, longitude))
+
+
+PROVEDORES = {
+    'nominatim': ProvedorNominatim,
+    'centroides': ProvedorCentroides,
+    'local': ProvedorLocal,
+}
+
+_provedores: Dict[Tuple[str, ...], List[Provedor]] = {}
+_provedores_lock = threading.Lock()
+
+
+def obter_provedores() -> List[Provedor]:
+    """Provedores de settings.GEOCODIFICACAO_PROVEDORES, em ordem (criados uma vez por configuração)."""
+    nomes = tuple(settings.GEOCODIFICACAO_PROVEDORES)
+    if nomes not in _provedores:
+        with _provedores_lock:
+            if nomes not in _provedores:
+                instancias = []
+                for nome in nomes:
+                    try:
+                        classe = PROVEDORES.get(nome) or import_string(nome)
+                    except ImportError:
+                        raise ImproperlyConfigured(f'Provedor de geocodificação desconhecido: {nome!r}')
+                    instancias.append(classe())
+                _provedores[nomes] = instancias
+    return _provedores[nomes]
+
+
+def _consultar_provedores(metodo: str, *args, somente_local: bool = False) -> Tuple[Optional[Dict], bool]:
+    """(primeiro resultado, algum provedor falhou)."""
+    falhou = False
+    for provedor in obter_provedores():
+        if somente_local and provedor.rede:
+            continue
+        try:
+            resultado = getattr(provedor, metodo)(*args)
+        except ErroProvedor as e:
+            logger.warning('Geocodificação %s: provedor %s falhou: %s', metodo, provedor.nome, e)
+            falhou = True
+            continue
+        if resultado:
+            return resultado, falhou
+    return None, falhou
+
+
+# ============================================
+# CACHE
+# ============================================
+
+def _chave(tipo: str, consulta: str) -> str:
+    return hashlib.sha1(f'{tipo}:{consulta}'.encode()).hexdigest()
+
+
+def _em_cache(tipo: str, consulta: str, buscar, gravar: bool = True) -> Tuple[Optional[Dict], bool]:
+    """Resultado do cache ou de `buscar()` (guardado em seguida, se `gravar`); devolve (resultado, veio_do_cache)."""
+    chave = _chave(tipo, consulta)
+    agora = timezone.now()
+
+    # PASSO 1: Acerto - toca ultimo_acesso no máximo uma vez por INTERVALO_ACESSO
+    guardado = (
+        GeocodificacaoCache.objects.filter(chave=chave, expira_em__gt=agora)
+        .values('pk', 'resultado', 'ultimo_acesso').first()
+    )
+    if guardado is not None:
+        if guardado['ultimo_acesso'] < agora - INTERVALO_ACESSO:
+            GeocodificacaoCache.objects.filter(pk=guardado['pk']).update(ultimo_acesso=agora)
+        return guardado['resultado'], True
+
+    # PASSO 2: Falha - provedores; ausência só é guardada se todos responderam
+    resultado, falhou = buscar()
+    if not gravar or (resultado is None and falhou):
+        return resultado, False
+    # Resultado de reserva (um provedor anterior falhou) e ausência: TTL curto
+    if resultado is not None and not falhou:
+        validade = timedelta(days=settings.GEOCODIFICACAO_CACHE_TTL_DIAS)
+    else:
+        validade = timedelta(hours=settings.GEOCODIFICACAO_CACHE_TTL_VAZIO_HORAS)
+    try:
+        GeocodificacaoCache.objects.update_or_create(chave=chave, defaults={
+            'tipo': tipo,
+            'consulta': consulta,
+            'resultado': resultado,
+            'provedor': (resultado or {}).get('provedor', ''),
+            'expira_em': agora + validade,
+            'ultimo_acesso': agora,
+        })
+    except IntegrityError:
+        pass  # outra requisição gravou a mesma chave ao mesmo tempo
+    return resultado, False
+
+
+def geocodificar(consulta: str) -> Tuple[Optional[Dict], bool]:
+    """
+    Coordenadas de um endereço ("rua, número, cidade, UF").
+
+    Returns:
+        (resultado ou None, veio_do_cache)
+
+    Examples:
+        >>> geocodificar('Av. Ana Costa, 100, Santos, SP')
+        ({'latitude': -23.96, 'longitude': -46.33, 'cidade': 'Santos', 'estado': 'SP', ...}, False)
+    """
+    consulta = (consulta or '').strip()[:TAMANHO_CONSULTA]
+    normalizada = normalizar(consulta)
+    if not normalizada:
+        return None, False
+    return _em_cache('direta', normalizada, lambda: _consultar_provedores('direta', consulta))
+
+
+def geocodificar_reversa(latitude, longitude, somente_local: bool = False) -> Tuple[Optional[Dict], bool]:
+    """
+    Cidade/UF (e endereço, se o provedor souber) de um par de coordenadas.
+
+    Args:
+        latitude, longitude: Coordenadas em graus decimais
+        somente_local: Lê o cache e consulta só provedores sem rede, sem
+            gravar (caminho de escrita, que não pode esperar o Nominatim)
+
+    Returns:
+        (resultado ou None, veio_do_cache)
+
+    Examples:
+        >>> geocodificar_reversa(-23.5505, -46.6333)[0]['cidade']
+        'São Paulo'
+    """
+    latitude = round(float(latitude), CASAS_REVERSA)
+    longitude = round(float(longitude), CASAS_REVERSA)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None, False
+    consulta = f'{latitude:.{CASAS_REVERSA}f},{longitude:.{CASAS_REVERSA}f}'
+    return _em_cache(
+        'reversa', consulta,
+        lambda: _consultar_provedores('reversa', latitude, longitude, somente_local=somente_local),
+        gravar=not somente_local,
+    )
+
+
+def limpar_cache(maximo: Optional[int] = None, lote: int = 1000) -> Dict[str, int]:
+    """
+    Apaga os registros expirados e, acima de `maximo`, os de acesso mais antigo (LRU).
+
+    Em lotes por PK, para não travar a tabela.
+
+    Returns:
+        {'expirados': int, 'excedentes': int}
+    """
+    if maximo is None:
+        maximo = settings.GEOCODIFICACAO_CACHE_MAX
+
+    expirados = 0
+    while True:
+        ids = list(
+            GeocodificacaoCache.objects.filter(expira_em__lte=timezone.now())
+            .values_list('pk', flat=True)[:lote]
+        )
+        if not ids:
+            break
+        expirados += GeocodificacaoCache.objects.filter(pk__in=ids).delete()[0]
+
+    excedentes = 0
+    sobra = GeocodificacaoCache.objects.count() - maximo
+    while sobra > 0:
+        ids = list(
+            GeocodificacaoCache.objects.order_by('ultimo_acesso', 'pk')
+            .values_list('pk', flat=True)[:min(lote, sobra)]
+        )
+        if not ids:
+            break
+        apagados = GeocodificacaoCache.objects.filter(pk__in=ids).delete()[0]
+        excedentes += apagados
+        sobra -= apagados
+    return {'expirados': expirados, 'excedentes': excedentes}
@@ -0,0 +1,157 @@
+"""
+Derivadas de imagens enviadas (miniatura, card e tamanho cheio)
+Gera versões WebP e JPEG redimensionadas fora da requisição (core.tarefas)
+
+Fluxo:
+    1. O upload é salvo normalmente no campo de imagem do modelo
+    2. O sinal post_save (core.signals) enfileira 'gerar_derivadas_imagem'
+    3. O worker abre o original uma única vez, grava cada tamanho/formato em
+       uma chave determinística e registra o resultado em `imagem_derivadas`
+    4. Os serializers expõem o mapa de tamanhos (srcset) com `srcset_imagem`
+"""
+
+from io import BytesIO
+from pathlib import PurePosixPath
+from typing import Dict, Optional
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+# ============================================
+# CONFIGURAÇÃO DAS DERIVADAS
+# ============================================
+
+# Nome do tamanho -> maior lado em pixels (nunca amplia o original)
+TAMANHOS_DERIVADAS = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1600,
+}
+
+# Formato -> (formato do Pillow, opções de gravação)
+FORMATOS_DERIVADAS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# Prefixo comum das derivadas no storage
+PREFIXO_DERIVADAS = 'derivadas'
+
+# Modelos com derivadas: label do modelo -> campo de imagem
+# (todos têm o JSONField `imagem_derivadas`)
+CAMPOS_COM_DERIVADAS = {
+    'core.Animal': 'imagem',
+    'core.AnimalFoto': 'imagem',
+    'core.AnimalParaAdocao': 'imagem_principal',
+    'core.DenunciaImagem': 'imagem',
+    'core.PetPerdido': 'imagem_principal',
+    'core.PetPerdidoFoto': 'imagem',
+    'core.ReportePetEncontrado': 'imagem_principal',
+    'core.ReportePetEncontradoFoto': 'imagem',
+}
+
+
+# ============================================
+# CHAVES E GERAÇÃO
+# ============================================
+
+def chave_derivada(nome_original: str, tamanho: str, formato: str) -> str:
+    """
+    Chave de storage de uma derivada, calculada só a partir do original.
+
+    A mesma imagem sempre gera as mesmas chaves: reprocessar sobrescreve
+    em vez de acumular arquivos, e as URLs podem ir para cache de CDN.
+
+    Examples:
+        >>> chave_derivada('pets_perdidos/rex.jpg', 'thumb', 'webp')
+        'derivadas/pets_perdidos/rex/thumb.webp'
+    """
+    original = PurePosixPath(nome_original)
+    return str(PurePosixPath(PREFIXO_DERIVADAS) / original.parent / original.stem / f'{tamanho}.{formato}')
+
+
+def gerar_derivadas(arquivo) -> Dict:
+    """
+    Gera todas as derivadas de um FieldFile de imagem.
+
+    O original é decodificado uma única vez; a orientação EXIF é aplicada
+    e cada tamanho parte do anterior (maior -> menor) para reduzir trabalho.
+
+    Args:
+        arquivo: FieldFile (ex: pet.imagem_principal) com arquivo salvo
+
+    Returns:
+        Valor para `imagem_derivadas`:
+        {'origem': nome do original, 'tamanhos': {'thumb': [largura, altura], ...}}
+    """
+    storage = arquivo.storage
+    with arquivo.open('rb') as original:
+        imagem = ImageOps.exif_transpose(Image.open(original))
+        imagem = imagem.convert('RGB')
+
+    tamanhos = {}
+    atual = imagem
+    for nome, lado in sorted(TAMANHOS_DERIVADAS.items(), key=lambda item: -item[1]):
+        atual = atual.copy()
+        atual.thumbnail((lado, lado), Image.LANCZOS)
+        tamanhos[nome] = list(atual.size)
+        for formato, (formato_pillow, opcoes) in FORMATOS_DERIVADAS.items():
+            buffer = BytesIO()
+            atual.save(buffer, format=formato_pillow, **opcoes)
+            chave = chave_derivada(arquivo.name, nome, formato)
+            # Chave determinística: remove a versão anterior para o storage
+            # não gerar um nome alternativo
+            if storage.exists(chave):
+                storage.delete(chave)
+            storage.save(chave, ContentFile(buffer.getvalue()))
+
+    return {'origem': arquivo.name, 'tamanhos': tamanhos}
+
+
+def remover_derivadas(storage, derivadas: Optional[Dict]) -> None:
+    """Apaga do storage as derivadas registradas em `imagem_derivadas`."""
+    if not derivadas or not derivadas.get('origem'):
+        return
+    for nome in derivadas.get('tamanhos', {}):
+        for formato in FORMATOS_DERIVADAS:
+            chave = chave_derivada(derivadas['origem'], nome, formato)
+            if storage.exists(chave):
+                storage.delete(chave)
+
+
+# ============================================
+# EXPOSIÇÃO NOS SERIALIZERS
+# ============================================
+
+def srcset_imagem(arquivo, derivadas: Optional[Dict], request=None) -> Optional[Dict]:
+    """
+    Mapa de tamanhos de uma imagem para `srcset`/`<picture>`.
+
+    Só lista derivadas já geradas para o arquivo atual; enquanto a tarefa
+    não roda (ou se a imagem foi trocada) retorna None e o cliente usa a
+    URL original.
+
+    Args:
+        arquivo: FieldFile da imagem original
+        derivadas: Valor de `imagem_derivadas` do mesmo registro
+        request: Request para montar URLs absolutas (opcional)
+
+    Returns:
+        {'thumb': {'largura': 160, 'altura': 120, 'webp': url, 'jpg': url}, ...} ou None
+
+    Examples:
+        >>> srcset_imagem(pet.imagem_principal, pet.imagem_derivadas)['thumb']['webp']
+        '/media/derivadas/pets_perdidos/rex/thumb.webp'
+    """
+    if not arquivo or not derivadas or derivadas.get('origem') != arquivo.name:
+        return None
+
+    mapa = {}
+    for nome, (largura, altura) in derivadas.get('tamanhos', {}).items():
+        item = {'largura': largura, 'altura': altura}
+        for formato in FORMATOS_DERIVADAS:
+            url = arquivo.storage.url(chave_derivada(arquivo.name, nome, formato))
+            item[formato] = request.build_absolute_uri(url) if request else url
+        mapa[nome] = item
+    return mapa
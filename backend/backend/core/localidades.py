@@ -0,0 +1,322 @@
+"""
+Localidades (UF e município) em forma canônica
+Os filtros por estado/cidade comparam colunas normalizadas por igualdade,
+em vez de `__iexact`/`__icontains`, que não usam os índices
+
+Base de dados:
+    core/dados/localidades_ibge.json - estados e os 5570 municípios do IBGE
+    (código, nome oficial e coordenadas da sede), versionada junto com o
+    código e atualizada com `python manage.py atualizar_localidades`.
+    É carregada uma única vez por processo (CoreConfig.ready) em dicionários
+    e listas ordenadas; nenhuma consulta sai para a API do IBGE.
+
+Fluxo:
+    1. No save() dos models com endereço (Animal, AnimalParaAdocao,
+       PetPerdido, ReportePetEncontrado), `preencher_localizacao` grava:
+       - estado: sigla da UF em maiúsculas, aceitando também o nome do
+         estado ou o código IBGE ('são paulo', '35', 'sp' -> 'SP')
+       - cidade: nome oficial do município, quando reconhecido
+         ('sao jose dos campos' -> 'São José dos Campos')
+       - cidade_norm: nome da cidade sem acento, em minúsculas e só com
+         letras/números ('São José dos Campos' -> 'sao jose dos campos')
+       - cidade_ibge: código IBGE do município (None se não reconhecido)
+    2. Views e matching normalizam o valor recebido com as mesmas funções e
+       filtram com `estado=` / `cidade_norm=`
+    3. Registros antigos ou gravados com update()/bulk_create são
+       corrigidos por `python manage.py normalizar_localizacoes`
+    4. Formulários usam /api/localidades/ (municípios por UF e
+       autocompletar por prefixo). Os serializers recusam com 400 o nome
+       que não é município da UF; com erro de digitação, a mensagem sugere
+       o município oficial mais parecido (`municipio_aproximado`)
+"""
+
+import json
+from bisect import bisect_left
+from difflib import get_close_matches
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .busca import normalizar
+
+
+# ============================================
+# BASE DO IBGE
+# ============================================
+
+ARQUIVO_LOCALIDADES = Path(__file__).resolve().parent / 'dados' / 'localidades_ibge.json'
+
+CAMPOS_LOCALIZACAO = ('cidade', 'estado')
+
+# Campos gravados por preencher_localizacao, na ordem de localizacao_canonica
+CAMPOS_CANONICOS = ('estado', 'cidade', 'cidade_norm', 'cidade_ibge')
+
+# Limite de sugestões do autocompletar
+MAX_SUGESTOES = 50
+
+# Similaridade mínima (0-1, difflib) para sugerir o município de um nome digitado com erro
+SIMILARIDADE_MINIMA = 0.9
+
+
+class Estado(NamedTuple):
+    codigo: int
+    sigla: str
+    nome: str
+
+
+class Municipio(NamedTuple):
+    codigo: int
+    nome: str
+    uf: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+
+
+class BaseLocalidades:
+    """
+    Estados e municípios em memória, indexados para as consultas da aplicação.
+
+    Atributos:
+        versao: Versão do arquivo (data da última atualização)
+        estados: {sigla: Estado}
+        municipios: {codigo: Municipio}
+        por_nome: {(uf, nome normalizado): Municipio}
+        prefixos: {uf ou '': (nomes normalizados ordenados, municípios na mesma ordem)}
+    """
+
+    def __init__(self, dados: dict):
+        self.versao: str = dados['versao']
+        self.estados: Dict[str, Estado] = {
+            sigla: Estado(codigo, sigla, nome) for codigo, sigla, nome in dados['estados']
+        }
+        sigla_por_codigo = {estado.codigo: estado.sigla for estado in self.estados.values()}
+        self.sigla_por_codigo: Dict[str, str] = {str(codigo): sigla for codigo, sigla in sigla_por_codigo.items()}
+        self.sigla_por_nome: Dict[str, str] = {normalizar(e.nome): e.sigla for e in self.estados.values()}
+
+        # Os dois primeiros dígitos do código do município são o código da UF
+        self.municipios: Dict[int, Municipio] = {
+            codigo: Municipio(codigo, nome, sigla_por_codigo[codigo // 100000], latitude, longitude)
+            for codigo, nome, latitude, longitude in dados['municipios']
+        }
+        self.por_nome: Dict[Tuple[str, str], Municipio] = {
+            (m.uf, normalizar(m.nome)): m for m in self.municipios.values()
+        }
+
+        # Ordem alfabética pelo nome normalizado (empate: UF), geral e por UF
+        ordenados = sorted(self.por_nome.items(), key=lambda item: (item[0][1], item[0][0]))
+        por_uf: Dict[str, List[Tuple[str, Municipio]]] = {sigla: [] for sigla in self.estados}
+        for (uf, nome), m in ordenados:
+            por_uf[uf].append((nome, m))
+        self.prefixos: Dict[str, Tuple[List[str], List[Municipio]]] = {
+            chave: ([nome for nome, _ in itens], [m for _, m in itens])
+            for chave, itens in [('', [(nome, m) for (_, nome), m in ordenados]), *por_uf.items()]
+        }
+
+    @classmethod
+    def do_arquivo(cls, caminho: Path = ARQUIVO_LOCALIDADES) -> 'BaseLocalidades':
+        with open(caminho, encoding='utf-8') as arquivo:
+            return cls(json.load(arquivo))
+
+
+_base: Optional[BaseLocalidades] = None
+
+
+def base() -> BaseLocalidades:
+    """Base carregada (lê o arquivo na primeira chamada; CoreConfig.ready antecipa)."""
+    global _base
+    if _base is None:
+        _base = BaseLocalidades.do_arquivo()
+    return _base
+
+
+def recarregar() -> BaseLocalidades:
+    """Relê o arquivo (após `atualizar_localidades`, sem reiniciar o processo)."""
+    global _base
+    _base = BaseLocalidades.do_arquivo()
+    return _base
+
+
+# ============================================
+# NORMALIZAÇÃO
+# ============================================
+
+def normalizar_uf(valor: Optional[str]) -> Optional[str]:
+    """
+    Sigla canônica da UF a partir da sigla, do nome ou do código IBGE.
+
+    Valores não reconhecidos voltam só sem espaços e em maiúsculas (a
+    validação do model/serializer decide se são aceitos).
+
+    Examples:
+        >>> normalizar_uf(' sp '), normalizar_uf('São Paulo'), normalizar_uf('35')
+        ('SP', 'SP', 'SP')
+        >>> normalizar_uf(None) is None
+        True
+    """
+    if valor is None:
+        return None
+    dados = base()
+    limpo = valor.strip()
+    if limpo.upper() in dados.estados:
+        return limpo.upper()
+    if limpo in dados.sigla_por_codigo:
+        return dados.sigla_por_codigo[limpo]
+    return dados.sigla_por_nome.get(normalizar(limpo), limpo.upper())
+
+
+def normalizar_cidade(valor: Optional[str]) -> str:
+    """
+    Forma de comparação do nome da cidade (sem acento, minúsculas, sem pontuação).
+
+    Examples:
+        >>> normalizar_cidade("Santa Bárbara d'Oeste")
+        'santa barbara d oeste'
+    """
+    return normalizar(valor)
+
+
+def codigo_uf(sigla: Optional[str]) -> Optional[int]:
+    """Código IBGE da UF ('SP' -> 35), ou None se a sigla não existe."""
+    estado = base().estados.get(normalizar_uf(sigla) or '')
+    return estado.codigo if estado else None
+
+
+def municipio(cidade: Optional[str], uf: Optional[str]) -> Optional[Municipio]:
+    """
+    Município do IBGE com esse nome na UF (sem diferenciar acento/maiúsculas).
+
+    Examples:
+        >>> municipio('sao jose dos campos', 'sp')
+        Municipio(codigo=3549904, nome='São José dos Campos', uf='SP', ...)
+        >>> municipio('Atlantis', 'SP') is None
+        True
+    """
+    if not cidade or not uf:
+        return None
+    return base().por_nome.get((normalizar_uf(uf), normalizar_cidade(cidade)))
+
+
+def municipio_aproximado(cidade: Optional[str], uf: Optional[str]) -> Optional[Municipio]:
+    """
+    Município da UF com o nome mais parecido (erro de digitação, letra faltando).
+
+    Usado quando `municipio` não reconhece o nome: a recusa de
+    "Sao Jose dos Campo" sugere o município oficial, sem trocar o que o
+    usuário digitou (o mais parecido pode ser outra cidade real). Só
+    sugere nomes com similaridade de pelo menos SIMILARIDADE_MINIMA (difflib).
+
+    Examples:
+        >>> municipio_aproximado('sao jose dos campo', 'SP').nome
+        'São José dos Campos'
+        >>> municipio_aproximado('Vila Inventada', 'SP') is None
+        True
+    """
+    chave = normalizar_cidade(cidade)
+    sigla = normalizar_uf(uf) if uf else None
+    if not chave or not sigla:
+        return None
+    nomes, _ = base().prefixos.get(sigla, ([], []))
+    parecidos = get_close_matches(chave, nomes, n=1, cutoff=SIMILARIDADE_MINIMA)
+    return base().por_nome.get((sigla, parecidos[0])) if parecidos else None
+
+
+def autocompletar(prefixo: Optional[str], uf: Optional[str] = None, limite: int = 10) -> List[Municipio]:
+    """
+    Municípios cujo nome começa com `prefixo`, em ordem alfabética.
+
+    Busca binária na lista ordenada de nomes normalizados: O(log n) por
+    consulta, sem percorrer os 5570 municípios.
+
+    Args:
+        prefixo: Início do nome ('sao jo', 'São Jo' e 'SAO JO' são iguais)
+        uf: Restringe a uma UF (sigla, nome ou código)
+        limite: Máximo de sugestões (até MAX_SUGESTOES)
+
+    Returns:
+        Lista de Municipio (vazia se o prefixo não tem letras/números)
+    """
+    chave = normalizar_cidade(prefixo)
+    if not chave:
+        return []
+    nomes, municipios = base().prefixos.get(normalizar_uf(uf) if uf else '', ([], []))
+    inicio = bisect_left(nomes, chave)
+    fim = inicio
+    limite = max(1, min(limite, MAX_SUGESTOES))
+    while fim < len(nomes) and fim - inicio < limite and nomes[fim].startswith(chave):
+        fim += 1
+    return municipios[inicio:fim]
+
+
+def preencher_localizacao(instancia, update_fields: Optional[Iterable[str]] = None) -> Optional[Set[str]]:
+    """
+    Canoniza estado/cidade e preenche cidade_norm e cidade_ibge antes do save().
+
+    Args:
+        instancia: Registro com campos cidade, estado, cidade_norm e cidade_ibge
+        update_fields: update_fields recebido pelo save()
+
+    Returns:
+        update_fields acrescido dos campos derivados quando o save parcial
+        altera a localização (None = save completo)
+
+    Example:
+        >>> def save(self, *args, **kwargs):
+        ...     kwargs['update_fields'] = preencher_localizacao(self, kwargs.get('update_fields'))
+        ...     super().save(*args, **kwargs)
+    """
+    for campo, valor in zip(CAMPOS_CANONICOS, localizacao_canonica(instancia.estado, instancia.cidade)):
+        setattr(instancia, campo, valor)
+    if update_fields is None:
+        return None
+    update_fields = set(update_fields)
+    if update_fields & set(CAMPOS_LOCALIZACAO):
+        update_fields |= set(CAMPOS_CANONICOS)
+    return update_fields
+
+
+def localizacao_canonica(estado: Optional[str], cidade: Optional[str]) -> Tuple:
+    """
+    (estado, cidade, cidade_norm, cidade_ibge) canônicos para os valores recebidos.
+
+    Cidade não reconhecida mantém o nome digitado e fica sem código IBGE.
+
+    Examples:
+        >>> localizacao_canonica('sao paulo', 'sao paulo')
+        ('SP', 'São Paulo', 'sao paulo', 3550308)
+    """
+    estado = normalizar_uf(estado)
+    encontrado = municipio(cidade, estado)
+    if encontrado:
+        return estado, encontrado.nome, normalizar_cidade(encontrado.nome), encontrado.codigo
+    return estado, cidade, normalizar_cidade(cidade), None
+
+
+def normalizar_tabela(Modelo, lote: int = 1000, aplicar: bool = True) -> int:
+    """
+    Corrige estado/cidade/cidade_norm/cidade_ibge de todos os registros de um model, em lotes por PK.
+
+    Aceita models históricos (usado também pelas migrações que criaram as
+    colunas).
+
+    Returns:
+        Quantidade de registros alterados (ou que seriam, com aplicar=False)
+    """
+    # Models históricos de migrações antigas podem não ter todas as colunas
+    existentes = {campo.name for campo in Modelo._meta.get_fields()}
+    campos = [campo for campo in CAMPOS_CANONICOS if campo in existentes]
+    alterados = 0
+    ultimo_pk = 0
+    while True:
+        registros = list(Modelo.objects.filter(pk__gt=ultimo_pk).order_by('pk').only('pk', *campos)[:lote])
+        if not registros:
+            return alterados
+        ultimo_pk = registros[-1].pk
+        divergentes = []
+        for registro in registros:
+            canonica = dict(zip(CAMPOS_CANONICOS, localizacao_canonica(registro.estado, registro.cidade)))
+            if any(getattr(registro, campo) != canonica[campo] for campo in campos):
+                for campo in campos:
+                    setattr(registro, campo, canonica[campo])
+                divergentes.append(registro)
+        if aplicar and divergentes:
+            Modelo.objects.bulk_update(divergentes, campos)
+        alterados += len(divergentes)
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.retencao import LOTE_ARQUIVAMENTO, DestinoJsonl, DestinoTabela, arquivar_notificacoes, candidatas
+
+
+class Command(BaseCommand):
+    help = (
+        'Arquiva e remove da tabela de notificações as notificações lidas mais antigas que a '
+        'retenção (NOTIFICACOES_RETENCAO_DIAS), em lotes com transações curtas. Destino: tabela '
+        'NotificacaoArquivada (padrão) ou arquivo JSONL. Informa a vazão em linhas/s.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.NOTIFICACOES_RETENCAO_DIAS,
+            help=f'Idade mínima, em dias (padrão: {settings.NOTIFICACOES_RETENCAO_DIAS})'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=LOTE_ARQUIVAMENTO,
+            help=f'Notificações por transação (padrão: {LOTE_ARQUIVAMENTO})'
+        )
+        parser.add_argument(
+            '--pausa', type=float, default=0.0,
+            help='Segundos de espera entre lotes, para aliviar o banco em produção (padrão: 0)'
+        )
+        parser.add_argument('--limite', type=int, help='Máximo de notificações nesta execução')
+        parser.add_argument('--jsonl', help='Arquiva neste arquivo JSONL (append) em vez da tabela')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta as notificações elegíveis')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0:
+            raise CommandError('--dias não pode ser negativo')
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser maior que zero')
+
+        if options['dry_run']:
+            total = candidatas(options['dias']).count()
+            self.stdout.write(f'{total} notificação(ões) lida(s) com mais de {options["dias"]} dia(s)')
+            return
+
+        destino = DestinoJsonl(options['jsonl']) if options['jsonl'] else DestinoTabela()
+
+        def progresso(arquivadas, segundos):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  {arquivadas} arquivada(s) - {arquivadas / max(segundos, 1e-9):.0f} linhas/s')
+
+        resultado = arquivar_notificacoes(
+            dias=options['dias'],
+            lote=options['lote'],
+            destino=destino,
+            pausa=options['pausa'],
+            limite=options['limite'],
+            progresso=progresso,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado["arquivadas"]} notificação(ões) arquivada(s) em {resultado["lotes"]} lote(s), '
+            f'{resultado["segundos"]:.2f}s ({resultado["linhas_por_segundo"]:.0f} linhas/s) '
+            f'-> {options["jsonl"] or "NotificacaoArquivada"}'
+        ))
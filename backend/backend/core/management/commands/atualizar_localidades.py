@@ -0,0 +1,105 @@
+import json
+import urllib.request
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.localidades import ARQUIVO_LOCALIDADES, BaseLocalidades, recarregar
+
+
+URL_IBGE = 'https://servicodados.ibge.gov.br/api/v1/localidades/municipios?view=nivelado'
+
+
+class Command(BaseCommand):
+    help = (
+        'Atualiza a base de estados/municípios (core/dados/localidades_ibge.json) a partir da API '
+        'de localidades do IBGE. Códigos e nomes vêm do IBGE; as coordenadas da sede dos municípios '
+        'já existentes são mantidas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--arquivo', type=Path,
+            help=f'JSON já baixado de {URL_IBGE} (em vez de baixar agora)'
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=60,
+            help='Tempo máximo do download em segundos (padrão: 60)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Só mostra o que mudaria, sem gravar o arquivo'
+        )
+
+    def handle(self, *args, **options):
+        # PASSO 1: Lista nivelada do IBGE (um item por município, com a UF)
+        try:
+            if options['arquivo']:
+                itens = json.loads(options['arquivo'].read_text(encoding='utf-8'))
+            else:
+                with urllib.request.urlopen(URL_IBGE, timeout=options['timeout']) as resposta:
+                    itens = json.load(resposta)
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Não foi possível obter os municípios do IBGE: {e}')
+        if not itens:
+            raise CommandError('A resposta do IBGE veio vazia.')
+
+        # PASSO 2: Mescla com a base atual (mantém as coordenadas conhecidas)
+        atual = json.loads(ARQUIVO_LOCALIDADES.read_text(encoding='utf-8'))
+        coordenadas = {codigo: (lat, lon) for codigo, _, lat, lon in atual['municipios']}
+        nomes_atuais = {codigo: nome for codigo, nome, _, _ in atual['municipios']}
+
+        estados = sorted({(int(i['UF-id']), i['UF-sigla'], i['UF-nome']) for i in itens})
+        municipios = sorted(
+            [int(i['municipio-id']), i['municipio-nome'], *coordenadas.get(int(i['municipio-id']), (None, None))]
+            for i in itens
+        )
+        novos = [m for m in municipios if m[0] not in nomes_atuais]
+        renomeados = [m for m in municipios if m[0] in nomes_atuais and nomes_atuais[m[0]] != m[1]]
+        removidos = set(nomes_atuais) - {m[0] for m in municipios}
+
+        dados = {
+            'versao': timezone.localdate().isoformat(),
+            'fonte': atual['fonte'],
+            'campos_municipios': atual['campos_municipios'],
+            'estados': [list(e) for e in estados],
+            'municipios': municipios,
+        }
+        # Valida antes de gravar: o arquivo precisa carregar como a aplicação carrega
+        BaseLocalidades(dados)
+
+        self.stdout.write(
+            f'{len(estados)} estado(s), {len(municipios)} município(s): {len(novos)} novo(s), '
+            f'{len(renomeados)} renomeado(s), {len(removidos)} removido(s)'
+        )
+        for codigo, nome, *_ in novos + renomeados:
+            self.stdout.write(f'  {codigo} {nome}')
+        if options['dry_run']:
+            return
+
+        # PASSO 3: Grava um município por linha (diff legível no git)
+        ARQUIVO_LOCALIDADES.write_text(self._formatar(dados), encoding='utf-8')
+        recarregar()
+        self.stdout.write(self.style.SUCCESS(
+            f'Base {dados["versao"]} gravada em {ARQUIVO_LOCALIDADES}. Rode normalizar_localizacoes '
+            f'para aplicar nomes/códigos novos aos registros existentes.'
+        ))
+
+    def _formatar(self, dados):
+        def lista(chave):
+            return ',\n'.join(f'    {json.dumps(item, ensure_ascii=False)}' for item in dados[chave])
+
+        return '\n'.join([
+            '{',
+            f'  "versao": {json.dumps(dados["versao"])},',
+            f'  "fonte": {json.dumps(dados["fonte"], ensure_ascii=False)},',
+            f'  "campos_municipios": {json.dumps(dados["campos_municipios"])},',
+            '  "estados": [',
+            lista('estados'),
+            '  ],',
+            '  "municipios": [',
+            lista('municipios'),
+            '  ]',
+            '}',
+        ]) + '\n'
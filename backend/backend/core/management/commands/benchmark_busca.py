@@ -0,0 +1,111 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.busca import CAMPOS_BUSCA, buscar, reindexar
+from core.models import PetPerdido, Usuario
+
+NOMES = ['Thor', 'Mel', 'Bidu', 'Pipoca', 'Paçoca', 'Luna', 'Tião', 'Amora', 'Fumaça', 'Nina']
+RACAS = ['Labrador', 'Vira-lata', 'Poodle', 'Pinscher', 'Shih-tzu', 'Siamês', 'Persa', None]
+CORES = ['caramelo', 'preto', 'branco', 'marrom', 'cinza', 'rajado', 'tricolor']
+MARCAS = [
+    'coleira azul', 'mancha branca no peito', 'orelha caída', 'cicatriz na pata',
+    'olhos claros', 'rabo cortado', 'plaquinha com telefone',
+]
+LUGARES = ['Praça da Sé', 'São Paulo', 'Parque Ibirapuera', 'Jabaquara', 'Vila Mariana', 'Butantã']
+
+CONSULTAS_PADRAO = ['labrador caramelo', 'paçoca', 'pacoca', 'mancha branca', 'sao paulo', 'tiao']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a busca textual de pets perdidos pelo índice de trigramas (core.busca) com o '
+        'caminho antigo (LIKE %termo% em cada campo): latência p50/p95 e itens encontrados. '
+        'Os dados são criados numa transação e descartados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho', type=int, default=20000, help='Pets perdidos gerados (padrão: 20000)')
+        parser.add_argument('--repeticoes', type=int, default=20, help='Execuções medidas por consulta')
+        parser.add_argument('--consultas', nargs='+', default=CONSULTAS_PADRAO)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        with transaction.atomic():
+            self._popular(options['tamanho'])
+            base = PetPerdido.objects.filter(ativo=True, status='perdido')
+
+            self.stdout.write(f'{"consulta":<20} | {"LIKE p50/p95 (ms)":>19} {"itens":>6} | '
+                              f'{"índice p50/p95 (ms)":>21} {"itens":>6}')
+            for consulta in options['consultas']:
+                like = self._medir(lambda c=consulta: self._like(base, c), options['repeticoes'])
+                indice = self._medir(lambda c=consulta: buscar(base, c), options['repeticoes'])
+                self.stdout.write(
+                    f'{consulta:<20} | {like[0]:8.2f} / {like[1]:8.2f} {like[2]:>6} | '
+                    f'{indice[0]:9.2f} / {indice[1]:9.2f} {indice[2]:>6}'
+                )
+
+            # Descarta todos os dados criados no benchmark
+            transaction.set_rollback(True)
+
+    def _like(self, qs, consulta):
+        """Caminho antigo: a frase inteira em LIKE '%...%' em cada campo (sensível a acento)."""
+        filtro = Q()
+        for campo in CAMPOS_BUSCA['core.PetPerdido']:
+            filtro |= Q(**{f'{campo}__icontains': consulta})
+        return qs.filter(filtro).order_by('-data_criacao')
+
+    def _medir(self, montar_qs, repeticoes):
+        """Mesmo trabalho da listagem paginada: COUNT + primeira página."""
+        latencias = []
+        total = 0
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            qs = montar_qs()
+            total = qs.count()
+            list(qs[:12])
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        latencias.sort()
+        return latencias[len(latencias) // 2], latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))], total
+
+    def _popular(self, tamanho, lote=5000):
+        inicio = time.perf_counter()
+        user = User.objects.create_user(username=f'benchmark_busca_{time.time_ns()}')
+        usuario = Usuario.objects.create(user=user)
+        hoje = timezone.now().date()
+        pets = []
+        for _ in range(tamanho):
+            pets.append(PetPerdido(
+                usuario=usuario,
+                nome=random.choice(NOMES),
+                especie=random.choice(['cachorro', 'gato']),
+                raca=random.choice(RACAS),
+                cor=random.choice(CORES),
+                porte=random.choice(['pequeno', 'medio', 'grande']),
+                caracteristicas_distintivas=', '.join(random.sample(MARCAS, 2)),
+                descricao=f'Fugiu perto de {random.choice(LUGARES)} durante a tarde',
+                data_perda=hoje,
+                latitude=-23.55,
+                longitude=-46.63,
+                endereco='Rua do Benchmark',
+                bairro='Centro',
+                cidade='São Paulo',
+                estado='SP',
+                telefone_contato='11999999999',
+                email_contato='benchmark@example.com',
+                imagem_principal='pets_perdidos/benchmark.jpg',
+            ))
+            if len(pets) >= lote:
+                PetPerdido.objects.bulk_create(pets)
+                pets = []
+        if pets:
+            PetPerdido.objects.bulk_create(pets)
+        # bulk_create não dispara os signals que mantêm o índice
+        reindexar('core.PetPerdido')
+        self.stdout.write(f'  {tamanho} pets criados e indexados em {time.perf_counter() - inicio:.1f}s')
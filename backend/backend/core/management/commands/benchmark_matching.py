@@ -0,0 +1,127 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.geo import celula_grade
+from core.models import PetPerdido, ReportePetEncontrado, Usuario
+from core.views import ReportePetEncontradoViewSet
+
+# Região de São Paulo usada para espalhar os pets (~60km x 60km)
+LAT_CENTRO, LON_CENTRO = -23.5505, -46.6333
+ESPALHAMENTO_GRAUS = 0.3
+
+ESPECIES = ['cachorro', 'gato']
+PORTES = ['pequeno', 'medio', 'grande']
+CORES = ['marrom', 'preto', 'branco', 'caramelo', 'cinza', 'rajado']
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a latência (p50/p95) da criação de reporte de pet encontrado + matching '
+        'com N pets perdidos ativos. Os dados são criados numa transação e descartados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanhos', nargs='+', type=int, default=[10000, 100000, 1000000],
+            help='Quantidades de pets perdidos ativos a testar (padrão: 10k 100k 1M)'
+        )
+        parser.add_argument('--reportes', type=int, default=200, help='Reportes medidos por tamanho')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.stdout.write('Benchmark do matching de pets perdidos/encontrados')
+        for tamanho in options['tamanhos']:
+            random.seed(options['seed'])
+            latencias = self._medir(tamanho, options['reportes'])
+            latencias.sort()
+            p50 = latencias[len(latencias) // 2]
+            p95 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))]
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{tamanho:>9} pets ativos | p50 {p50:7.2f} ms | p95 {p95:7.2f} ms | '
+                    f'máx {latencias[-1]:7.2f} ms'
+                )
+            )
+
+    def _medir(self, tamanho, total_reportes):
+        latencias = []
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark_{tamanho}_{time.time_ns()}')
+            usuario = Usuario.objects.create(user=user)
+            self._popular(usuario, tamanho)
+
+            viewset = ReportePetEncontradoViewSet()
+            hoje = timezone.now().date()
+            for _ in range(total_reportes):
+                lat, lon = self._coordenada()
+                inicio = time.perf_counter()
+                reporte = ReportePetEncontrado.objects.create(
+                    nome_pessoa='Benchmark',
+                    telefone_contato='11999999999',
+                    email_contato='benchmark@example.com',
+                    especie=random.choice(ESPECIES),
+                    cor=random.choice(CORES),
+                    porte=random.choice(PORTES),
+                    descricao='Reporte de benchmark',
+                    data_encontro=hoje,
+                    latitude=lat,
+                    longitude=lon,
+                    endereco='Rua do Benchmark',
+                    bairro='Centro',
+                    cidade='São Paulo',
+                    estado='SP',
+                    imagem_principal='pets_encontrados/benchmark.jpg',
+                )
+                viewset._buscar_matches_automaticos(reporte)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+
+            # Descarta todos os dados criados no benchmark
+            transaction.set_rollback(True)
+        return latencias
+
+    def _popular(self, usuario, tamanho, lote=5000):
+        inicio = time.perf_counter()
+        hoje = timezone.now().date()
+        pets = []
+        for i in range(tamanho):
+            lat, lon = self._coordenada()
+            pets.append(PetPerdido(
+                usuario=usuario,
+                nome=f'Pet {i}',
+                especie=random.choice(ESPECIES),
+                cor=random.choice(CORES),
+                porte=random.choice(PORTES),
+                caracteristicas_distintivas='-',
+                descricao='Pet de benchmark',
+                data_perda=hoje - timedelta(days=random.randint(0, 59)),
+                latitude=lat,
+                longitude=lon,
+                # bulk_create não chama save(): a célula precisa ser calculada aqui
+                geo_celula=celula_grade(lat, lon),
+                endereco='Rua do Benchmark',
+                bairro='Centro',
+                cidade='São Paulo',
+                # ...e a cidade normalizada, usada pelo filtro do matching
+                cidade_norm='sao paulo',
+                estado='SP',
+                telefone_contato='11999999999',
+                email_contato='benchmark@example.com',
+                imagem_principal='pets_perdidos/benchmark.jpg',
+            ))
+            if len(pets) >= lote:
+                PetPerdido.objects.bulk_create(pets)
+                pets = []
+        if pets:
+            PetPerdido.objects.bulk_create(pets)
+        self.stdout.write(f'  {tamanho} pets criados em {time.perf_counter() - inicio:.1f}s')
+
+    def _coordenada(self):
+        lat = LAT_CENTRO + random.uniform(-ESPALHAMENTO_GRAUS, ESPALHAMENTO_GRAUS)
+        lon = LON_CENTRO + random.uniform(-ESPALHAMENTO_GRAUS, ESPALHAMENTO_GRAUS)
+        return round(lat, 6), round(lon, 6)
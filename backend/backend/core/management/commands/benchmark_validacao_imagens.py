@@ -0,0 +1,109 @@
+import time
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+from rest_framework import serializers
+
+from core import validators
+from core.validators import get_image_info, validate_image_dimensions, validate_image_file
+
+# Corpus sintético: dimensões (largura, altura) geradas em cada formato
+DIMENSOES_CORPUS = [(640, 480), (1280, 960), (1920, 1080), (3000, 2000), (4000, 3000)]
+FORMATOS_CORPUS = {'jpg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de validar um upload de imagem como na API (ImageField do DRF + '
+        'validators do model + get_image_info), com e sem a análise em cache no arquivo. '
+        'Usa um corpus sintético JPEG/PNG/WebP ou as imagens de --pasta.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pasta', help='Diretório com imagens .jpg/.jpeg/.png/.webp (padrão: corpus sintético)')
+        parser.add_argument('--repeticoes', type=int, default=20, help='Validações medidas por arquivo')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['repeticoes'] < 1:
+            raise CommandError('--repeticoes deve ser maior que zero')
+
+        corpus = self._ler_pasta(options['pasta']) if options['pasta'] else self._gerar_corpus(options['seed'])
+        if not corpus:
+            raise CommandError('Nenhuma imagem encontrada')
+        self.stdout.write(f'Benchmark da validação de imagens ({len(corpus)} arquivo(s), '
+                          f'{options["repeticoes"]} repetição(ões))')
+
+        totais = {'sem_cache': 0.0, 'com_cache': 0.0}
+        for nome, conteudo in corpus:
+            tempos = {
+                modo: self._medir(nome, conteudo, options['repeticoes'], cache=(modo == 'com_cache'))
+                for modo in totais
+            }
+            for modo, tempo in tempos.items():
+                totais[modo] += tempo
+            self.stdout.write(
+                f'  {nome:<24} {len(conteudo) / 1024:8.0f} KB | sem cache {tempos["sem_cache"]:7.2f} ms | '
+                f'com cache {tempos["com_cache"]:7.2f} ms | {tempos["sem_cache"] / tempos["com_cache"]:4.1f}x'
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Média por upload: sem cache {totais["sem_cache"] / len(corpus):.2f} ms | '
+            f'com cache {totais["com_cache"] / len(corpus):.2f} ms | '
+            f'{totais["sem_cache"] / totais["com_cache"]:.1f}x'
+        ))
+
+    def _medir(self, nome, conteudo, repeticoes, cache):
+        """Mediana (ms) do fluxo de validação de um upload."""
+        campo = serializers.ImageField()
+        tempos = []
+        for _ in range(repeticoes):
+            arquivo = SimpleUploadedFile(nome, conteudo)
+            inicio = time.perf_counter()
+            # Mesmo fluxo de um POST: o ImageField do DRF abre a imagem e
+            # depois rodam os validators do model e quem consulta as dimensões
+            arquivo = campo.to_internal_value(arquivo)
+            if not cache:
+                # Reproduz o comportamento anterior: cada etapa relê o arquivo
+                arquivo.image = None
+            for etapa in (validate_image_file, validate_image_dimensions, get_image_info):
+                if not cache:
+                    arquivo.__dict__.pop(validators._ATRIBUTO_INFO_IMAGEM, None)
+                try:
+                    etapa(arquivo)
+                except ValidationError:
+                    pass
+            tempos.append((time.perf_counter() - inicio) * 1000)
+        tempos.sort()
+        return tempos[len(tempos) // 2]
+
+    def _gerar_corpus(self, seed):
+        """Fotos sintéticas (gradiente + ruído) em JPEG, PNG e WebP."""
+        gerador = np.random.default_rng(seed)
+        corpus = []
+        for largura, altura in DIMENSOES_CORPUS:
+            x = np.linspace(0, 255, largura, dtype=np.float32)
+            y = np.linspace(0, 255, altura, dtype=np.float32)[:, None]
+            base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=-1)
+            ruido = gerador.normal(0, 12, size=base.shape)
+            imagem = Image.fromarray(np.clip(base + ruido, 0, 255).astype(np.uint8), 'RGB')
+            for extensao, formato in FORMATOS_CORPUS.items():
+                buffer = BytesIO()
+                imagem.save(buffer, format=formato)
+                corpus.append((f'{largura}x{altura}.{extensao}', buffer.getvalue()))
+        return corpus
+
+    def _ler_pasta(self, pasta):
+        caminho = Path(pasta)
+        if not caminho.is_dir():
+            raise CommandError(f'Diretório não encontrado: {pasta}')
+        return [
+            (arquivo.name, arquivo.read_bytes())
+            for arquivo in sorted(caminho.iterdir())
+            if arquivo.suffix.lower() in ('.jpg', '.jpeg', '.png', '.webp')
+        ]
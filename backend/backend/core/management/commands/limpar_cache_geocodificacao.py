@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.geocodificacao import limpar_cache
+
+
+class Command(BaseCommand):
+    help = (
+        'Remove do cache de geocodificação os registros expirados e, acima do máximo '
+        '(GEOCODIFICACAO_CACHE_MAX), os de acesso mais antigo. Rodar periodicamente (cron).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max', type=int, default=settings.GEOCODIFICACAO_CACHE_MAX,
+            help=f'Registros mantidos após a limpeza (padrão: {settings.GEOCODIFICACAO_CACHE_MAX})'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Registros apagados por consulta (padrão: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        if options['max'] < 0:
+            raise CommandError('--max não pode ser negativo')
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser maior que zero')
+
+        resultado = limpar_cache(maximo=options['max'], lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado["expirados"]} expirado(s) e {resultado["excedentes"]} excedente(s) removido(s) '
+            f'do cache de geocodificação'
+        ))
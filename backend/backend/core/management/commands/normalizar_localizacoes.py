@@ -0,0 +1,44 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from core.cache import invalidar_modelo
+from core.localidades import normalizar_tabela
+
+
+MODELOS = ('core.Animal', 'core.AnimalParaAdocao', 'core.PetPerdido', 'core.ReportePetEncontrado')
+
+
+class Command(BaseCommand):
+    help = (
+        'Canoniza estado (sigla da UF) e cidade (nome oficial) e preenche cidade_norm/cidade_ibge dos '
+        'registros com endereço. Necessário após bulk_create ou update() em cidade/estado, que não '
+        'passam pelo save(), e após atualizar_localidades.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo', choices=MODELOS, action='append',
+            help='Model a normalizar (pode repetir; padrão: todos)'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Registros lidos por consulta (padrão: 1000)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Só conta os registros divergentes, sem gravar'
+        )
+
+    def handle(self, *args, **options):
+        aplicar = not options['dry_run']
+        for label in options['modelo'] or MODELOS:
+            inicio = time.perf_counter()
+            total = normalizar_tabela(apps.get_model(label), lote=options['lote'], aplicar=aplicar)
+            if aplicar and total:
+                invalidar_modelo(label)
+            acao = 'corrigido(s)' if aplicar else 'a corrigir'
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}: {total} registro(s) {acao} em {time.perf_counter() - inicio:.2f}s'
+            ))
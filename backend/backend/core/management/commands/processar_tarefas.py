@@ -0,0 +1,79 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.tarefas import liberar_travadas, processar_pendentes, reprocessar_falhas
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da fila de tarefas (matching de pets encontrados, notificações). '
+        'Rode quantos processos forem necessários: cada tarefa é reservada por um único worker.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--uma-vez', action='store_true',
+            help='Processa as tarefas pendentes e encerra (padrão: fica aguardando novas tarefas)'
+        )
+        parser.add_argument(
+            '--intervalo', type=float, default=2.0,
+            help='Segundos de espera quando a fila está vazia (padrão: 2)'
+        )
+        parser.add_argument(
+            '--tipo', action='append', dest='tipos',
+            help='Processa apenas tarefas deste tipo (pode repetir)'
+        )
+        parser.add_argument(
+            '--reprocessar-falhas', action='store_true',
+            help='Devolve para a fila as tarefas que falharam e encerra'
+        )
+        parser.add_argument(
+            '--timeout-travadas', type=int, default=15,
+            help='Minutos até uma tarefa "processando" ser considerada travada (padrão: 15)'
+        )
+
+    def handle(self, *args, **options):
+        tipos = options['tipos']
+
+        if options['reprocessar_falhas']:
+            total = reprocessar_falhas(tipos)
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} tarefa(s) devolvida(s) para a fila'))
+            return
+
+        # Notificações criadas aqui (matching) só chegam ao stream SSE do web
+        # por um broker compartilhado; com o 'memoria' elas são gravadas
+        # normalmente e aparecem na próxima consulta, só o push em tempo real se perde
+        if settings.EVENTOS_BROKER == 'memoria':
+            self.stdout.write(self.style.WARNING(
+                'EVENTOS_BROKER=memoria: notificações deste worker não chegam ao stream SSE do web. '
+                'Configure EVENTOS_BROKER=redis (e EVENTOS_REDIS_URL) no web e no worker.'
+            ))
+
+        # Tarefas de workers encerrados no meio da execução
+        travadas = liberar_travadas(timedelta(minutes=options['timeout_travadas']))
+        if travadas:
+            self.stdout.write(self.style.WARNING(f'{travadas} tarefa(s) travada(s) devolvida(s) para a fila'))
+
+        if options['uma_vez']:
+            total = processar_pendentes(tipos=tipos)
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} tarefa(s) processada(s)'))
+            return
+
+        # Encerra após terminar a tarefa atual (docker stop envia SIGTERM)
+        self._parar = False
+        signal.signal(signal.SIGTERM, self._solicitar_parada)
+        signal.signal(signal.SIGINT, self._solicitar_parada)
+
+        self.stdout.write('Worker de tarefas iniciado. Aguardando tarefas...')
+        while not self._parar:
+            # Uma tarefa por vez para checar o sinal de parada entre elas
+            if not processar_pendentes(limite=1, tipos=tipos):
+                time.sleep(options['intervalo'])
+        self.stdout.write('Worker de tarefas encerrado.')
+
+    def _solicitar_parada(self, signum, frame):
+        self._parar = True
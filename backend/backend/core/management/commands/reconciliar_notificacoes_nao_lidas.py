@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.notificacoes import reconciliar_nao_lidas
+
+
+class Command(BaseCommand):
+    help = (
+        'Corrige o contador de notificações não lidas (Usuario.notificacoes_nao_lidas) dos perfis '
+        'em que ele diverge da contagem real, em lotes. Necessário após alterações feitas fora de '
+        'core.notificacoes (admin, shell, queryset.update).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Perfis corrigidos por UPDATE (padrão: 1000)')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta os perfis divergentes')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser maior que zero')
+
+        inicio = time.perf_counter()
+        divergentes = reconciliar_nao_lidas(lote=options['lote'], aplicar=not options['dry_run'])
+        duracao = time.perf_counter() - inicio
+
+        if options['dry_run']:
+            self.stdout.write(f'{divergentes} perfil(is) com contador divergente ({duracao:.2f}s)')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{divergentes} perfil(is) corrigido(s) em {duracao:.2f}s'
+            ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.busca import CAMPOS_BUSCA, LOTE_INDEXACAO, reindexar
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói o índice de busca textual (TermoBusca) dos catálogos. Necessário após '
+        'bulk_create ou update() em campos indexados, que não disparam os signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--modelo', choices=sorted(CAMPOS_BUSCA), action='append',
+            help='Model a reindexar (pode repetir; padrão: todos)'
+        )
+        parser.add_argument(
+            '--lote', type=int, default=LOTE_INDEXACAO,
+            help=f'Registros lidos por consulta (padrão: {LOTE_INDEXACAO})'
+        )
+
+    def handle(self, *args, **options):
+        for label in options['modelo'] or CAMPOS_BUSCA:
+            inicio = time.perf_counter()
+            total = reindexar(label, lote=options['lote'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{label}: {total} registro(s) indexado(s) em {time.perf_counter() - inicio:.2f}s'
+            ))
@@ -0,0 +1,150 @@
+import json
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.matching import MAX_MATCHES, preparar_pets_em_lote, ranquear_em_lote
+from core.models import PetPerdido, PossivelMatch, ReportePetEncontrado
+
+# Quantos grupos (espécie/cidade/estado) de pets perdidos manter em memória
+MAX_GRUPOS_EM_CACHE = 32
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula possiveis_matches de todos os reportes de pets encontrados em aberto '
+        '(pendente/em_analise) com o matching vetorizado (NumPy). Rode após mudar os pesos '
+        'do score. Processa em lotes e grava um checkpoint para retomar de onde parou.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000, help='Reportes por lote/transação (padrão: 1000)')
+        parser.add_argument(
+            '--checkpoint', default='rematch_pets.checkpoint.json',
+            help='Arquivo com o último reporte processado (padrão: rematch_pets.checkpoint.json)'
+        )
+        parser.add_argument('--reiniciar', action='store_true', help='Ignora o checkpoint e começa do início')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1:
+            raise CommandError('--lote deve ser maior que zero')
+
+        checkpoint = Path(options['checkpoint'])
+        ultimo_id = 0
+        if checkpoint.exists() and not options['reiniciar']:
+            ultimo_id = json.loads(checkpoint.read_text())['ultimo_id']
+            self.stdout.write(f'Retomando após o reporte #{ultimo_id} ({checkpoint})')
+
+        abertos = ReportePetEncontrado.objects.filter(status__in=['pendente', 'em_analise'])
+        restantes = abertos.filter(id__gt=ultimo_id).count()
+        self.stdout.write(f'{restantes} reporte(s) em aberto para re-pontuar')
+
+        self._cache_pets = OrderedDict()
+        totais = defaultdict(int)
+        inicio = time.perf_counter()
+
+        while True:
+            lote = list(
+                abertos.filter(id__gt=ultimo_id).order_by('id').values(
+                    'id', 'especie', 'cidade_norm', 'estado', 'latitude', 'longitude',
+                    'porte', 'cor', 'data_encontro'
+                )[:options['lote']]
+            )
+            if not lote:
+                break
+
+            # Cada lote é atômico: uma interrupção nunca deixa matches pela metade
+            with transaction.atomic():
+                resultado = self._processar_lote(lote)
+            ultimo_id = lote[-1]['id']
+            checkpoint.write_text(json.dumps({'ultimo_id': ultimo_id, 'atualizado_em': timezone.now().isoformat()}))
+
+            for chave, valor in resultado.items():
+                totais[chave] += valor
+            decorrido = time.perf_counter() - inicio
+            self.stdout.write(
+                f'  até #{ultimo_id}: {totais["reportes"]}/{restantes} reportes | '
+                f'{totais["reportes"] / decorrido:,.0f} reportes/s | '
+                f'{totais["pares"] / decorrido:,.0f} pares/s'
+            )
+
+        decorrido = time.perf_counter() - inicio
+        # Execução completa: a próxima começa do zero
+        checkpoint.unlink(missing_ok=True)
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {totais["reportes"]} reporte(s) re-pontuado(s) em {decorrido:.1f}s - '
+            f'{totais["pares"]:,} pares pontuados, {totais["matches"]} match(es) gravado(s), '
+            f'{totais["em_analise"]} reporte(s) movido(s) para em análise, '
+            f'{totais["pendente"]} de volta para pendente (sem matches)'
+        ))
+
+    def _processar_lote(self, lote):
+        """Pontua um lote de reportes e regrava seus possiveis_matches."""
+        # Agrupa pelo mesmo filtro do matching: espécie + cidade + estado
+        grupos = defaultdict(list)
+        for reporte in lote:
+            grupos[(reporte['especie'], reporte['cidade_norm'], reporte['estado'])].append(reporte)
+
+        matches = {}
+        # Só os pares reporte x pet realmente pontuados (depois do recorte pela grade)
+        contadores = {'pares': 0}
+        for chave, reportes in grupos.items():
+            pets = self._pets_do_grupo(*chave)
+            colunas = {
+                campo: [reporte[campo] for reporte in reportes]
+                for campo in ('id', 'latitude', 'longitude', 'porte', 'cor', 'data_encontro')
+            }
+            matches.update(ranquear_em_lote(colunas, pets, MAX_MATCHES, contadores))
+
+        # GRAVAÇÃO EM LOTE: apaga os matches antigos do lote e insere os novos
+        ids_lote = [reporte['id'] for reporte in lote]
+        PossivelMatch.objects.filter(reporte_id__in=ids_lote).delete()
+        calculado_em = timezone.now()
+        novos = [
+            PossivelMatch(
+                reporte_id=reporte_id, pet_perdido_id=pet_id, score=score,
+                distancia_km=distancia, criterios=criterios, data_calculo=calculado_em,
+            )
+            for reporte_id, lista in matches.items()
+            for pet_id, score, distancia, criterios in lista
+        ]
+        PossivelMatch.objects.bulk_create(novos, batch_size=5000)
+        movidos = ReportePetEncontrado.objects.filter(
+            pk__in=list(matches), status='pendente'
+        ).update(status='em_analise', data_atualizacao=timezone.now())
+        # Reportes que ficaram sem nenhum match não têm mais o que analisar
+        devolvidos = ReportePetEncontrado.objects.filter(
+            pk__in=ids_lote, status='em_analise'
+        ).exclude(pk__in=list(matches)).update(status='pendente', data_atualizacao=timezone.now())
+
+        return {
+            'reportes': len(lote), 'pares': contadores['pares'], 'matches': len(novos),
+            'em_analise': movidos, 'pendente': devolvidos,
+        }
+
+    def _pets_do_grupo(self, especie, cidade_norm, estado):
+        """Carrega (com cache LRU) os pets perdidos ativos de um grupo já preparados para NumPy."""
+        chave = (especie, cidade_norm, estado)
+        if chave in self._cache_pets:
+            self._cache_pets.move_to_end(chave)
+            return self._cache_pets[chave]
+
+        linhas = PetPerdido.objects.filter(
+            status='perdido',
+            ativo=True,
+            especie=especie,
+            cidade_norm=cidade_norm,
+            estado=estado,
+        ).order_by().values_list('id', 'latitude', 'longitude', 'porte', 'cor', 'data_perda')
+        campos = ('id', 'latitude', 'longitude', 'porte', 'cor', 'data_perda')
+        colunas = dict(zip(campos, map(list, zip(*linhas)))) if linhas else {campo: [] for campo in campos}
+        preparados = preparar_pets_em_lote(colunas)
+
+        self._cache_pets[chave] = preparados
+        if len(self._cache_pets) > MAX_GRUPOS_EM_CACHE:
+            self._cache_pets.popitem(last=False)
+        return preparados
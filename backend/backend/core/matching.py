@@ -0,0 +1,481 @@
+"""
+Matching automático entre pets encontrados e pets perdidos
+Executado pelo worker de tarefas (core.tarefas), fora da requisição HTTP
+
+Direções:
+    - Reporte novo -> pets perdidos próximos (buscar_matches_automaticos)
+    - Pet perdido novo -> reportes em aberto próximos (buscar_reportes_para_pet)
+"""
+
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.utils import timezone
+
+from .cache import invalidar_modelo
+from .geo import (
+    caixa_delimitadora, celulas_vizinhas, distancia_haversine_km, distancias_haversine_matriz,
+    KM_POR_GRAU_LATITUDE, RAIO_MATCHING_KM, TAMANHO_CELULA_GRAUS
+)
+from .models import PetPerdido, PossivelMatch, ReportePetEncontrado
+
+
+# Máximo de possíveis matches guardados por reporte
+MAX_MATCHES = 10
+
+# Score mínimo (0-100) para considerar um pet perdido como possível match
+SCORE_MINIMO = 50
+
+# Matches exibidos por reporte nas listagens (os melhores pelo score)
+MATCHES_EXIBIDOS = 5
+
+
+def calcular_criterios(pet: PetPerdido, reporte: ReportePetEncontrado, distancia: float) -> Dict[str, int]:
+    """
+    Pontos de cada critério de similaridade entre um pet perdido e um reporte.
+
+    Usado nas duas direções do matching: reporte novo contra pets perdidos
+    e pet perdido novo contra reportes em aberto. A espécie já deve ter sido
+    garantida pelo filtro da consulta. O detalhamento é gravado em
+    PossivelMatch.criterios para o admin entender cada score.
+
+    Args:
+        pet: Pet perdido candidato
+        reporte: Reporte de pet encontrado
+        distancia: Distância em km entre os dois
+
+    Returns:
+        {'especie': int, 'porte': int, 'cor': int, 'proximidade': int}
+
+    Examples:
+        >>> calcular_criterios(pet, reporte, 2.5)  # mesmo porte, cor similar
+        {'especie': 30, 'porte': 20, 'cor': 25, 'proximidade': 25}
+    """
+    criterios = {'especie': 0, 'porte': 0, 'cor': 0, 'proximidade': 0}
+
+    # CRITÉRIO 1: Mesma espécie (30 pontos - já garantido pelo filtro)
+    criterios['especie'] = 30
+
+    # CRITÉRIO 2: Mesmo porte (20 pontos)
+    # Pequeno/Médio/Grande - importante para identificação visual
+    if pet.porte == reporte.porte:
+        criterios['porte'] = 20
+
+    # CRITÉRIO 3: Cor similar (25 pontos)
+    # Busca parcial: "marrom" matcha "marrom claro" e vice-versa
+    # Case-insensitive para evitar problemas de digitação
+    if pet.cor and reporte.cor:
+        if pet.cor.lower() in reporte.cor.lower() or reporte.cor.lower() in pet.cor.lower():
+            criterios['cor'] = 25
+
+    # CRITÉRIO 4: Proximidade geográfica (até 25 pontos)
+    # Usa coordenadas GPS (lat/long) para calcular distância real em km
+    # Fórmula Haversine considera curvatura da Terra
+    if distancia <= 10:  # Até 10km de distância
+        criterios['proximidade'] = 15
+        if distancia <= 3:  # Muito próximo (até 3km)
+            criterios['proximidade'] += 10  # Bonus extra - alta probabilidade de match
+
+    return criterios
+
+
+def calcular_score(pet: PetPerdido, reporte: ReportePetEncontrado, distancia: float) -> int:
+    """
+    Calcula o score de similaridade (0-100) entre um pet perdido e um reporte.
+
+    Soma dos pontos de `calcular_criterios`.
+
+    Args:
+        pet: Pet perdido candidato
+        reporte: Reporte de pet encontrado
+        distancia: Distância em km entre os dois
+
+    Returns:
+        Score; >= SCORE_MINIMO indica possível match
+
+    Examples:
+        >>> calcular_score(pet, reporte, 2.5)  # mesmo porte, cor similar
+        100
+    """
+    # DECISÃO: Score >= 50 indica possível match (50% de similaridade mínima)
+    # Exemplos de matches válidos:
+    # - Mesma espécie + mesmo porte + cor similar = 75 pontos ✅
+    # - Mesma espécie + mesmo porte + próximo (10km) = 65 pontos ✅
+    # - Mesma espécie + cor similar + muito próximo (3km) = 80 pontos ✅
+    return sum(calcular_criterios(pet, reporte, distancia).values())
+
+
+def prefetch_matches_ranqueados(limite: int = MATCHES_EXIBIDOS) -> Prefetch:
+    """
+    Prefetch dos `limite` melhores matches de cada reporte, com o pet.
+
+    Uma única consulta para a página inteira: o recorte por reporte é
+    feito no banco (ROW_NUMBER) sobre o índice core_match_ranking_idx.
+    O resultado fica em `reporte.matches_ranqueados`.
+
+    Examples:
+        >>> ReportePetEncontrado.objects.prefetch_related(prefetch_matches_ranqueados())
+    """
+    return Prefetch(
+        'matches',
+        queryset=PossivelMatch.objects.select_related('pet_perdido').order_by('-score', 'distancia_km', 'id')[:limite],
+        to_attr='matches_ranqueados',
+    )
+
+
+def buscar_matches_automaticos(
+    reporte: ReportePetEncontrado, max_matches: int = MAX_MATCHES
+) -> List[PetPerdido]:
+    """
+    Busca pets perdidos que podem ser o pet encontrado no reporte.
+
+    Se houver matches, grava a lista em `reporte.possiveis_matches` e muda
+    o status do reporte para 'em_analise' (requer atenção do admin).
+
+    Args:
+        reporte: Reporte de pet encontrado já salvo
+        max_matches: Quantidade máxima de matches guardados
+
+    Returns:
+        Lista de pets perdidos (melhor score primeiro)
+    """
+    # FILTRO INICIAL: Reduz o escopo de busca para pets relevantes
+    # Critérios obrigatórios:
+    # - status='perdido': Apenas pets ainda não encontrados
+    # - ativo=True: Visíveis no mapa (não removidos pelo usuário)
+    # - mesma espécie: Cachorro só matcha com cachorro, gato com gato
+    # - mesma cidade/estado: Filtra geograficamente por igualdade nas colunas
+    #   normalizadas (sem acento/maiúsculas; índice estado+cidade_norm)
+    # - índice de grade: Apenas células que intersectam o raio de busca
+    #   (evita carregar todos os pets da cidade para calcular distância)
+    # - caixa delimitadora: descarta no SQL os cantos das células fora do raio
+    lat_min, lat_max, lon_min, lon_max = caixa_delimitadora(reporte.latitude, reporte.longitude, RAIO_MATCHING_KM)
+    pets_perdidos = PetPerdido.objects.filter(
+        status='perdido',
+        ativo=True,
+        especie=reporte.especie,
+        cidade_norm=reporte.cidade_norm,
+        estado=reporte.estado,
+        geo_celula__in=celulas_vizinhas(reporte.latitude, reporte.longitude, RAIO_MATCHING_KM),
+        latitude__range=(lat_min, lat_max),
+        longitude__range=(lon_min, lon_max),
+    ).only('id', 'usuario_id', 'nome', 'porte', 'cor', 'latitude', 'longitude').order_by()
+
+    # FILTRO TEMPORAL: Pet encontrado hoje não pode ser pet perdido há 6 meses
+    # Considera apenas pets perdidos nos últimos 60 dias antes do encontro
+    data_limite = reporte.data_encontro - timedelta(days=60)
+    pets_perdidos = pets_perdidos.filter(data_perda__gte=data_limite)
+
+    matches = []
+
+    # ALGORITMO DE SCORE: Calcula similaridade para cada pet perdido
+    for pet in pets_perdidos:
+        # Distância real: a caixa cobre um quadrado, o raio é um círculo
+        distancia = distancia_haversine_km(pet.latitude, pet.longitude, reporte.latitude, reporte.longitude)
+        if distancia > RAIO_MATCHING_KM:
+            continue
+
+        criterios = calcular_criterios(pet, reporte, distancia)
+        score = sum(criterios.values())
+        if score >= SCORE_MINIMO:
+            matches.append((score, distancia, pet, criterios))
+
+    # RANKING: Maior score primeiro; em caso de empate, o mais próximo
+    # Mantém apenas os max_matches melhores candidatos
+    matches.sort(key=lambda item: (-item[0], item[1]))
+    matches = matches[:max_matches]
+
+    # Adiciona matches ao reporte (relacionamento ManyToMany)
+    # Score, distância e critérios ficam gravados na linha do match:
+    # listagens e admin leem o ranking pronto, sem recalcular
+    # Se houver matches, muda status para 'em_analise' (requer atenção admin)
+    if matches:
+        PossivelMatch.objects.filter(reporte=reporte).delete()
+        PossivelMatch.objects.bulk_create([
+            PossivelMatch(
+                reporte=reporte, pet_perdido=pet, score=score,
+                distancia_km=distancia, criterios=criterios,
+            )
+            for score, distancia, pet, criterios in matches
+        ])
+        reporte.status = 'em_analise'
+        reporte.save(update_fields=['status', 'data_atualizacao'])
+
+    return [pet for _, _, pet, _ in matches]
+
+
+def _forca_match(score, distancia) -> Tuple[int, float]:
+    """
+    Chave de ranking de um match: maior score, depois o mais próximo.
+
+    Mesma ordem de PossivelMatch.Meta.ordering; sem score/distância
+    gravados, o match fica no fim do ranking.
+    """
+    return (score or 0, -(distancia if distancia is not None else float('inf')))
+
+
+def buscar_reportes_para_pet(
+    pet: PetPerdido, max_matches: int = MAX_MATCHES
+) -> List[ReportePetEncontrado]:
+    """
+    Matching reverso: compara um pet perdido recém-cadastrado com os
+    reportes de pets encontrados ainda em aberto.
+
+    Só os reportes próximos (mesmo índice de grade/raio usado no matching
+    direto) são pontuados. Os novos matches são gravados com um único
+    INSERT em lote na tabela do ManyToMany e os reportes 'pendente' passam
+    para 'em_analise' com um único UPDATE. Em reportes que já têm
+    `max_matches` possíveis matches, o pet novo substitui o match mais fraco
+    (menor score; empate: mais distante) quando fica à frente dele no ranking.
+
+    Args:
+        pet: Pet perdido já salvo
+        max_matches: Limite de possíveis matches por reporte
+
+    Returns:
+        Reportes que ganharam o pet como possível match
+    """
+    # FILTRO INICIAL: os mesmos critérios do matching direto, invertidos
+    # - status pendente/em_analise: reportes ainda sem match confirmado
+    # - mesma espécie, cidade/estado e células vizinhas do pet
+    # - FILTRO TEMPORAL: reporte no máximo 60 dias após a perda
+    data_limite = pet.data_perda + timedelta(days=60)
+    lat_min, lat_max, lon_min, lon_max = caixa_delimitadora(pet.latitude, pet.longitude, RAIO_MATCHING_KM)
+    reportes = ReportePetEncontrado.objects.filter(
+        status__in=['pendente', 'em_analise'],
+        especie=pet.especie,
+        cidade_norm=pet.cidade_norm,
+        estado=pet.estado,
+        geo_celula__in=celulas_vizinhas(pet.latitude, pet.longitude, RAIO_MATCHING_KM),
+        latitude__range=(lat_min, lat_max),
+        longitude__range=(lon_min, lon_max),
+        data_encontro__lte=data_limite,
+    ).annotate(
+        total_matches=Count('possiveis_matches')
+    ).only('id', 'status', 'porte', 'cor', 'latitude', 'longitude').order_by()
+
+    novos = []
+    cheios = {}
+    for reporte in reportes:
+        distancia = distancia_haversine_km(pet.latitude, pet.longitude, reporte.latitude, reporte.longitude)
+        if distancia > RAIO_MATCHING_KM:
+            continue
+        criterios = calcular_criterios(pet, reporte, distancia)
+        if sum(criterios.values()) < SCORE_MINIMO:
+            continue
+        if reporte.total_matches >= max_matches:
+            cheios[reporte.pk] = (reporte, distancia, criterios)
+        else:
+            novos.append((reporte, distancia, criterios))
+
+    # REPORTES CHEIOS: uma consulta traz os matches de todos; o pet novo
+    # entra no lugar do mais fraco se ficar à frente dele no ranking
+    substituidos = []
+    if cheios:
+        mais_fracos = {}
+        ja_casados = set()
+        for match in PossivelMatch.objects.filter(reporte_id__in=list(cheios)).only(
+            'id', 'reporte_id', 'pet_perdido_id', 'score', 'distancia_km'
+        ):
+            if match.pet_perdido_id == pet.pk:
+                ja_casados.add(match.reporte_id)
+            atual = mais_fracos.get(match.reporte_id)
+            if atual is None or _forca_match(match.score, match.distancia_km) < _forca_match(atual.score, atual.distancia_km):
+                mais_fracos[match.reporte_id] = match
+        for reporte_id, (reporte, distancia, criterios) in cheios.items():
+            fraco = mais_fracos.get(reporte_id)
+            if reporte_id in ja_casados or fraco is None:
+                continue
+            if _forca_match(sum(criterios.values()), distancia) > _forca_match(fraco.score, fraco.distancia_km):
+                substituidos.append(fraco.pk)
+                novos.append((reporte, distancia, criterios))
+
+    if not novos:
+        return []
+
+    # GRAVAÇÃO EM LOTE: um INSERT para todas as linhas do ManyToMany
+    # (ignore_conflicts protege contra o par já existir)
+    with transaction.atomic():
+        PossivelMatch.objects.filter(pk__in=substituidos).delete()
+        PossivelMatch.objects.bulk_create(
+            [
+                PossivelMatch(
+                    reporte=reporte, pet_perdido=pet, score=sum(criterios.values()),
+                    distancia_km=distancia, criterios=criterios,
+                )
+                for reporte, distancia, criterios in novos
+            ],
+            ignore_conflicts=True,
+        )
+    ReportePetEncontrado.objects.filter(
+        pk__in=[reporte.pk for reporte, _, _ in novos], status='pendente'
+    ).update(status='em_analise', data_atualizacao=timezone.now())
+    # Contagem de reportes pendentes da listagem de pets perdidos mudou
+    invalidar_modelo('core.ReportePetEncontrado')
+
+    return [reporte for reporte, _, _ in novos]
+
+
+def preparar_pets_em_lote(pets: Dict[str, Sequence]) -> Dict[str, Any]:
+    """
+    Converte colunas de pets perdidos nos arrays usados por `ranquear_em_lote`.
+
+    A preparação (conversão de Decimal, códigos de cor e índice de grade)
+    é feita uma vez por grupo espécie/cidade/estado e reaproveitada entre
+    lotes de reportes.
+
+    Args:
+        pets: Colunas 'id', 'latitude', 'longitude', 'porte', 'cor', 'data_perda'
+
+    Returns:
+        Dicionário com arrays NumPy e o índice célula -> posições dos pets
+    """
+    import numpy as np
+
+    latitude = np.asarray(pets['latitude'], dtype=np.float64)
+    longitude = np.asarray(pets['longitude'], dtype=np.float64)
+    cores = sorted({(cor or '').lower() for cor in pets['cor']})
+    indice_cor = {cor: i for i, cor in enumerate(cores)}
+    portes = sorted(set(pets['porte']))
+    indice_porte = {porte: i for i, porte in enumerate(portes)}
+
+    # Índice de grade: mesmas células de core.geo, agrupadas com np.unique
+    linhas = np.floor(latitude / TAMANHO_CELULA_GRAUS).astype(np.int64)
+    colunas = np.floor(longitude / TAMANHO_CELULA_GRAUS).astype(np.int64)
+    celulas, inverso = np.unique(np.stack([linhas, colunas], axis=1), axis=0, return_inverse=True)
+    ordem = np.argsort(inverso.ravel(), kind='stable')
+    fins = np.cumsum(np.bincount(inverso.ravel(), minlength=len(celulas)))
+    inicios = fins - np.bincount(inverso.ravel(), minlength=len(celulas))
+    por_celula = {
+        (int(linha), int(coluna)): ordem[inicios[i]:fins[i]]
+        for i, (linha, coluna) in enumerate(celulas)
+    }
+
+    return {
+        'id': np.asarray(pets['id'], dtype=np.int64),
+        'latitude': latitude,
+        'longitude': longitude,
+        'portes': indice_porte,
+        'porte': np.array([indice_porte[porte] for porte in pets['porte']], dtype=np.int32),
+        'data_perda': np.asarray(pets['data_perda'], dtype='datetime64[D]').astype(np.int64),
+        'cores': cores,
+        'cor': np.array([indice_cor[(cor or '').lower()] for cor in pets['cor']], dtype=np.int32),
+        'por_celula': por_celula,
+    }
+
+
+def ranquear_em_lote(
+    reportes: Dict[str, Sequence], pets: Dict[str, Any], max_matches: int = MAX_MATCHES,
+    contadores: Optional[Dict[str, int]] = None,
+) -> Dict[int, List[Tuple[int, int, float, Dict[str, int]]]]:
+    """
+    Versão vetorizada (NumPy) do matching para re-pontuar muitos reportes.
+
+    Aplica exatamente as regras de `buscar_matches_automaticos` +
+    `calcular_score`. Os reportes são agrupados pela célula da grade e cada
+    grupo é comparado, numa única matriz, só com os pets das células que
+    intersectam o raio de busca. Todos os reportes e pets recebidos devem
+    ser da mesma espécie, cidade e estado.
+
+    Args:
+        reportes: Colunas 'id', 'latitude', 'longitude', 'porte', 'cor', 'data_encontro'
+        pets: Resultado de `preparar_pets_em_lote`
+        max_matches: Quantidade máxima de matches por reporte
+        contadores: Se informado, 'pares' é acrescido dos pares reporte x pet
+            efetivamente pontuados (depois do recorte pela grade)
+
+    Returns:
+        {reporte_id: [(pet_id, score, distancia_km, criterios), ...]} com o
+        melhor score primeiro (empate: mais próximo); reportes sem match
+        ficam de fora. `criterios` tem o formato de `calcular_criterios`
+    """
+    import numpy as np
+
+    if not len(pets['id']) or not len(reportes['id']):
+        return {}
+
+    rep_ids = np.asarray(reportes['id'], dtype=np.int64)
+    rep_lat = np.asarray(reportes['latitude'], dtype=np.float64)
+    rep_lon = np.asarray(reportes['longitude'], dtype=np.float64)
+    # Porte como código inteiro (-1: porte que nenhum pet do grupo tem)
+    rep_porte = np.array([pets['portes'].get(porte, -1) for porte in reportes['porte']], dtype=np.int32)
+    # FILTRO TEMPORAL: data_perda >= data_encontro - 60 dias
+    rep_data_limite = np.asarray(reportes['data_encontro'], dtype='datetime64[D]').astype(np.int64) - 60
+
+    # Cor: a comparação por substring não vetoriza, mas há poucas cores
+    # distintas - monta a tabela cores_reporte x cores_pet uma única vez
+    cores_rep = sorted({(cor or '').lower() for cor in reportes['cor']})
+    cor_similar = np.array([
+        [bool(a and b and (a in b or b in a)) for b in pets['cores']]
+        for a in cores_rep
+    ], dtype=bool).reshape(len(cores_rep), len(pets['cores']))
+    indice_rep = {cor: i for i, cor in enumerate(cores_rep)}
+    rep_cor = np.array([indice_rep[(cor or '').lower()] for cor in reportes['cor']], dtype=np.int32)
+
+    # Agrupa os reportes pela célula da grade
+    celula_rep = np.stack([
+        np.floor(rep_lat / TAMANHO_CELULA_GRAUS).astype(np.int64),
+        np.floor(rep_lon / TAMANHO_CELULA_GRAUS).astype(np.int64),
+    ], axis=1)
+    celulas, inverso = np.unique(celula_rep, axis=0, return_inverse=True)
+    inverso = inverso.ravel()
+
+    resultado = {}
+    for i, (linha, coluna) in enumerate(celulas):
+        linhas_rep = np.flatnonzero(inverso == i)
+
+        # Células vizinhas a partir do centro, com folga de uma célula no
+        # raio para cobrir reportes em qualquer ponto da célula
+        vizinhas = celulas_vizinhas(
+            (linha + 0.5) * TAMANHO_CELULA_GRAUS, (coluna + 0.5) * TAMANHO_CELULA_GRAUS,
+            RAIO_MATCHING_KM + TAMANHO_CELULA_GRAUS * KM_POR_GRAU_LATITUDE,
+        )
+        blocos = [pets['por_celula'].get(tuple(map(int, chave.split(':')))) for chave in vizinhas]
+        candidatos = [bloco for bloco in blocos if bloco is not None]
+        if not candidatos:
+            continue
+        cols = np.concatenate(candidatos)
+
+        distancia = distancias_haversine_matriz(
+            rep_lat[linhas_rep], rep_lon[linhas_rep], pets['latitude'][cols], pets['longitude'][cols]
+        )
+        if contadores is not None:
+            contadores['pares'] = contadores.get('pares', 0) + distancia.size
+
+        # Mesmos critérios de calcular_criterios (espécie já garantida: 30 pontos)
+        pontos_porte = 20 * (rep_porte[linhas_rep, None] == pets['porte'][None, cols])
+        pontos_cor = 25 * cor_similar[rep_cor[linhas_rep, None], pets['cor'][None, cols]]
+        pontos_proximidade = 15 * (distancia <= 10) + 10 * (distancia <= 3)
+        score = 30 + pontos_porte + pontos_cor + pontos_proximidade
+        valido = (
+            (distancia <= RAIO_MATCHING_KM)
+            & (pets['data_perda'][None, cols] >= rep_data_limite[linhas_rep, None])
+            & (score >= SCORE_MINIMO)
+        )
+
+        # RANKING: chave única = score (múltiplos de 5) desempatado pela distância
+        chave = np.where(valido, score * 100.0 - distancia, -np.inf)
+        k = min(max_matches, len(cols))
+        melhores = np.argpartition(-chave, k - 1, axis=1)[:, :k]
+
+        for posicao, selecionados in enumerate(melhores):
+            selecionados = selecionados[np.isfinite(chave[posicao, selecionados])]
+            if not len(selecionados):
+                continue
+            selecionados = selecionados[np.argsort(-chave[posicao, selecionados], kind='stable')]
+            resultado[int(rep_ids[linhas_rep[posicao]])] = [
+                (
+                    int(pets['id'][cols[c]]), int(score[posicao, c]), float(distancia[posicao, c]),
+                    {
+                        'especie': 30,
+                        'porte': int(pontos_porte[posicao, c]),
+                        'cor': int(pontos_cor[posicao, c]),
+                        'proximidade': int(pontos_proximidade[posicao, c]),
+                    },
+                )
+                for c in selecionados
+            ]
+
+    return resultado
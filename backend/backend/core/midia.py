@@ -0,0 +1,188 @@
+"""
+Ingestão de mídias enviadas em lote (fotos e vídeos adicionais)
+Substitui o `.objects.create()` por arquivo nos creates com vários uploads
+
+Fluxo:
+    1. `validar_midias` roda os validators de todos os arquivos em paralelo
+       (thread pool) e junta os erros antes de qualquer gravação
+    2. Dentro de `IngestaoMidias`, cada `salvar(...)` grava os arquivos no
+       storage em paralelo e insere as linhas com um único bulk_create
+    3. Se qualquer passo do bloco falhar, a transação é desfeita e os
+       arquivos já gravados (inclusive os registrados com `registrar`) são
+       apagados do storage
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import serializers
+
+from .imagens import CAMPOS_COM_DERIVADAS
+from .tarefas import enfileirar_em_lote
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Threads para validar e gravar arquivos de uma mesma requisição
+MAX_THREADS_MIDIA = 4
+
+
+def _em_paralelo(funcao: Callable, itens: Sequence) -> List:
+    """Aplica `funcao` a cada item no thread pool, preservando a ordem."""
+    if len(itens) <= 1:
+        return [funcao(item) for item in itens]
+    with ThreadPoolExecutor(max_workers=min(MAX_THREADS_MIDIA, len(itens))) as executor:
+        return list(executor.map(funcao, itens))
+
+
+# ============================================
+# VALIDAÇÃO
+# ============================================
+
+def validar_midias(grupos: Dict[str, Tuple[Sequence, Callable]]) -> None:
+    """
+    Valida todos os arquivos de uma requisição em paralelo.
+
+    Args:
+        grupos: Nome do campo do formulário -> (arquivos, validator)
+
+    Raises:
+        serializers.ValidationError: Com todos os erros, por campo
+            ({'fotos_adicionais': ['b.jpg: Imagem muito pequena...']})
+
+    Examples:
+        >>> validar_midias({'fotos_adicionais': (request.FILES.getlist('fotos_adicionais'), validate_image_file)})
+    """
+    itens = [
+        (campo, arquivo, validator)
+        for campo, (arquivos, validator) in grupos.items()
+        for arquivo in arquivos
+    ]
+
+    def validar(item):
+        campo, arquivo, validator = item
+        try:
+            validator(arquivo)
+        except ValidationError as e:
+            return campo, [f'{arquivo.name}: {mensagem}' for mensagem in e.messages]
+        return campo, []
+
+    erros = {}
+    for campo, mensagens in _em_paralelo(validar, itens):
+        if mensagens:
+            erros.setdefault(campo, []).extend(mensagens)
+    if erros:
+        raise serializers.ValidationError(erros)
+
+
+# ============================================
+# GRAVAÇÃO
+# ============================================
+
+class IngestaoMidias:
+    """
+    Bloco transacional de gravação de mídias.
+
+    Tudo dentro do `with` roda em uma transação. Se o bloco terminar com
+    exceção, as linhas são desfeitas pela transação e os arquivos gravados
+    pelo bloco são apagados do storage (o banco não fica apontando para
+    arquivos inexistentes, nem o storage guarda arquivos órfãos).
+
+    Example:
+        >>> with IngestaoMidias() as ingestao:
+        ...     pet = serializer.save()
+        ...     ingestao.registrar(pet.imagem_principal)
+        ...     ingestao.salvar(PetPerdidoFoto, 'imagem', fotos, pet_perdido=pet)
+    """
+
+    def __init__(self):
+        self._gravados: List[Tuple[object, str]] = []
+        self._atomic = transaction.atomic()
+
+    def __enter__(self) -> 'IngestaoMidias':
+        self._atomic.__enter__()
+        return self
+
+    def __exit__(self, tipo_exc, exc, traceback) -> bool:
+        try:
+            self._atomic.__exit__(tipo_exc, exc, traceback)
+        except Exception:
+            # Falha no commit: os arquivos também não podem ficar
+            self._remover_gravados()
+            raise
+        if tipo_exc is not None:
+            self._remover_gravados()
+        return False
+
+    def registrar(self, *arquivos) -> None:
+        """Inclui arquivos gravados fora de `salvar` (ex: imagem principal via serializer)."""
+        for arquivo in arquivos:
+            if arquivo:
+                self._gravados.append((arquivo.storage, arquivo.name))
+
+    def salvar(self, modelo, campo: str, arquivos: Sequence, **valores) -> List:
+        """
+        Grava os arquivos em paralelo e insere os registros em um bulk_create.
+
+        Os arquivos já devem ter passado por `validar_midias`.
+
+        Args:
+            modelo: Classe do model (ex: PetPerdidoFoto)
+            campo: Nome do FileField/ImageField no model
+            arquivos: UploadedFiles da requisição
+            **valores: Demais campos de cada registro (ex: pet_perdido=pet)
+
+        Returns:
+            Registros criados, na ordem dos arquivos
+        """
+        if not arquivos:
+            return []
+
+        field = modelo._meta.get_field(campo)
+        instancias = [modelo(**valores) for _ in arquivos]
+
+        def gravar(par):
+            instancia, arquivo = par
+            nome = field.generate_filename(instancia, arquivo.name)
+            nome = field.storage.save(nome, arquivo, max_length=field.max_length)
+            # Registrado assim que termina, mesmo que outro arquivo falhe no
+            # meio: nada fica para trás no storage
+            self._gravados.append((field.storage, nome))
+            return nome
+
+        nomes = _em_paralelo(gravar, list(zip(instancias, arquivos)))
+        for instancia, nome in zip(instancias, nomes):
+            setattr(instancia, campo, nome)
+
+        criados = modelo.objects.bulk_create(instancias)
+        self._enfileirar_derivadas(modelo, campo, criados, nomes, valores)
+        return criados
+
+    def _enfileirar_derivadas(self, modelo, campo, criados, nomes, valores) -> None:
+        """bulk_create não dispara post_save: agenda as derivadas de imagem aqui."""
+        label = modelo._meta.label
+        if label not in CAMPOS_COM_DERIVADAS:
+            return
+        pks = [instancia.pk for instancia in criados]
+        if None in pks:
+            # Bancos sem RETURNING no INSERT em lote (MySQL): busca pelos
+            # nomes gravados, que são únicos no storage
+            pks = list(
+                modelo.objects.filter(**valores, **{f'{campo}__in': nomes}).values_list('pk', flat=True)
+            )
+        enfileirar_em_lote('gerar_derivadas_imagem', [{'modelo': label, 'pk': pk} for pk in pks])
+
+    def _remover_gravados(self) -> None:
+        for storage, nome in self._gravados:
+            try:
+                storage.delete(nome)
+            except Exception:  # noqa: BLE001 - limpeza não pode esconder o erro original
+                logger.exception('Não foi possível remover %s após falha na ingestão', nome)
+        self._gravados = []
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:37
+
+from math import floor
+
+from django.db import migrations, models
+
+
+# Cópia congelada de core.geo (grade de 0,05 grau): a migração não importa
+# o código do app, que pode mudar depois dela
+TAMANHO_CELULA_GRAUS = 0.05
+
+
+def celula_grade(latitude, longitude):
+    """Chave "<linha>:<coluna>" da célula que contém a coordenada."""
+    linha = int(floor(float(latitude) / TAMANHO_CELULA_GRAUS))
+    coluna = int(floor(float(longitude) / TAMANHO_CELULA_GRAUS))
+    return f"{linha}:{coluna}"
+
+
+def preencher_geo_celula(apps, schema_editor):
+    """Calcula a célula da grade para os pets perdidos já cadastrados."""
+    PetPerdido = apps.get_model('core', 'PetPerdido')
+    pendentes = []
+    for pet in PetPerdido.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        pet.geo_celula = celula_grade(pet.latitude, pet.longitude)
+        pendentes.append(pet)
+        if len(pendentes) >= 2000:
+            PetPerdido.objects.bulk_update(pendentes, ['geo_celula'])
+            pendentes = []
+    if pendentes:
+        PetPerdido.objects.bulk_update(pendentes, ['geo_celula'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_alter_animal_cidade_alter_animal_descricao_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='petperdido',
+            name='geo_celula',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='Célula da Grade'),
+        ),
+        migrations.AddIndex(
+            model_name='petperdido',
+            index=models.Index(fields=['geo_celula', 'especie', 'status', 'ativo'], name='core_petper_geo_cel_da3101_idx'),
+        ),
+        migrations.RunPython(preencher_geo_celula, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_petperdido_geo_celula'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=100, verbose_name='Tipo')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='Argumentos')),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluida', 'Concluída'), ('falhou', 'Falhou')], default='pendente', max_length=20, verbose_name='Status')),
+                ('tentativas', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('max_tentativas', models.PositiveIntegerField(default=5, verbose_name='Máximo de Tentativas')),
+                ('erro', models.TextField(blank=True, default='', verbose_name='Último Erro')),
+                ('agendada_para', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Agendada Para')),
+                ('iniciada_em', models.DateTimeField(blank=True, null=True, verbose_name='Iniciada Em')),
+                ('concluida_em', models.DateTimeField(blank=True, null=True, verbose_name='Concluída Em')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Tarefa',
+                'verbose_name_plural': 'Tarefas',
+                'ordering': ['agendada_para', 'id'],
+                'indexes': [models.Index(fields=['status', 'agendada_para'], name='core_tarefa_status_19b56a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 18:52
+
+from math import floor
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia congelada de core.geo (grade de 0,05 grau): a migração não importa
+# o código do app, que pode mudar depois dela
+TAMANHO_CELULA_GRAUS = 0.05
+
+
+def celula_grade(latitude, longitude):
+    """Chave "<linha>:<coluna>" da célula que contém a coordenada."""
+    linha = int(floor(float(latitude) / TAMANHO_CELULA_GRAUS))
+    coluna = int(floor(float(longitude) / TAMANHO_CELULA_GRAUS))
+    return f"{linha}:{coluna}"
+
+
+def preencher_geo_celula(apps, schema_editor):
+    """Calcula a célula da grade para os reportes já cadastrados."""
+    ReportePetEncontrado = apps.get_model('core', 'ReportePetEncontrado')
+    pendentes = []
+    for reporte in ReportePetEncontrado.objects.only('id', 'latitude', 'longitude').iterator(chunk_size=2000):
+        reporte.geo_celula = celula_grade(reporte.latitude, reporte.longitude)
+        pendentes.append(reporte)
+        if len(pendentes) >= 2000:
+            ReportePetEncontrado.objects.bulk_update(pendentes, ['geo_celula'])
+            pendentes = []
+    if pendentes:
+        ReportePetEncontrado.objects.bulk_update(pendentes, ['geo_celula'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_tarefa'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportepetencontrado',
+            name='geo_celula',
+            field=models.CharField(blank=True, default='', editable=False, max_length=20, verbose_name='Célula da Grade'),
+        ),
+        migrations.AddIndex(
+            model_name='reportepetencontrado',
+            index=models.Index(fields=['geo_celula', 'especie', 'status'], name='core_report_geo_cel_7d004a_idx'),
+        ),
+        migrations.RunPython(preencher_geo_celula, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:02
+
+from math import atan2, cos, radians, sin, sqrt
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Cópia congelada de core.geo.distancia_haversine_km: a migração não
+# importa o código do app, que pode mudar depois dela
+RAIO_TERRA_KM = 6371.0
+
+
+def distancia_haversine_km(lat1, lon1, lat2, lon2):
+    """Distância Haversine em km entre duas coordenadas em graus."""
+    lat1, lon1, lat2, lon2 = (radians(float(valor)) for valor in (lat1, lon1, lat2, lon2))
+    a = sin((lat2 - lat1) / 2)**2 + cos(lat1) * cos(lat2) * sin((lon2 - lon1) / 2)**2
+    return RAIO_TERRA_KM * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+
+def preencher_distancias(apps, schema_editor):
+    """Calcula a distância dos possíveis matches já gravados."""
+    PossivelMatch = apps.get_model('core', 'PossivelMatch')
+    pendentes = []
+    matches = PossivelMatch.objects.select_related('reporte', 'pet_perdido').only(
+        'id', 'reporte__latitude', 'reporte__longitude', 'pet_perdido__latitude', 'pet_perdido__longitude'
+    )
+    for match in matches.iterator(chunk_size=2000):
+        match.distancia_km = distancia_haversine_km(
+            match.reporte.latitude, match.reporte.longitude,
+            match.pet_perdido.latitude, match.pet_perdido.longitude,
+        )
+        pendentes.append(match)
+        if len(pendentes) >= 2000:
+            PossivelMatch.objects.bulk_update(pendentes, ['distancia_km'])
+            pendentes = []
+    if pendentes:
+        PossivelMatch.objects.bulk_update(pendentes, ['distancia_km'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_reportepetencontrado_geo_celula'),
+    ]
+
+    operations = [
+        # A tabela do ManyToMany já existe: só o estado do Django passa a
+        # conhecer o modelo intermediário explícito
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PossivelMatch',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('pet_perdido', models.ForeignKey(db_column='petperdido_id', on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.petperdido', verbose_name='Pet Perdido')),
+                        ('reporte', models.ForeignKey(db_column='reportepetencontrado_id', on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='core.reportepetencontrado', verbose_name='Reporte')),
+                    ],
+                    options={
+                        'verbose_name': 'Possível Match',
+                        'verbose_name_plural': 'Possíveis Matches',
+                        'db_table': 'core_reportepetencontrado_possiveis_matches',
+                        'ordering': ['distancia_km', 'id'],
+                        'unique_together': {('reporte', 'pet_perdido')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='reportepetencontrado',
+                    name='possiveis_matches',
+                    field=models.ManyToManyField(blank=True, related_name='reportes_relacionados', through='core.PossivelMatch', to='core.petperdido', verbose_name='Possíveis Matches'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='possivelmatch',
+            name='distancia_km',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distância (km)'),
+        ),
+        migrations.RunPython(preencher_distancias, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def _criterios(pet, reporte, distancia):
+    """
+    Cópia congelada de core.matching.calcular_criterios (regras de 0018).
+
+    A migração não importa o código do app: mudanças futuras no score não
+    alteram o que ela grava nem quebram a aplicação das migrações.
+    """
+    criterios = {'especie': 30, 'porte': 0, 'cor': 0, 'proximidade': 0}
+    if pet.porte == reporte.porte:
+        criterios['porte'] = 20
+    if pet.cor and reporte.cor:
+        if pet.cor.lower() in reporte.cor.lower() or reporte.cor.lower() in pet.cor.lower():
+            criterios['cor'] = 25
+    if distancia <= 10:
+        criterios['proximidade'] = 15
+        if distancia <= 3:
+            criterios['proximidade'] += 10
+    return criterios
+
+
+def preencher_scores(apps, schema_editor):
+    """Pontua os possíveis matches já gravados com as regras do matching desta versão."""
+    PossivelMatch = apps.get_model('core', 'PossivelMatch')
+    pendentes = []
+    matches = PossivelMatch.objects.select_related('reporte', 'pet_perdido').only(
+        'id', 'distancia_km', 'reporte__porte', 'reporte__cor', 'pet_perdido__porte', 'pet_perdido__cor'
+    )
+    for match in matches.iterator(chunk_size=2000):
+        # Linhas sem coordenadas não ganham pontos de proximidade
+        distancia = match.distancia_km if match.distancia_km is not None else float('inf')
+        match.criterios = _criterios(match.pet_perdido, match.reporte, distancia)
+        match.score = sum(match.criterios.values())
+        pendentes.append(match)
+        if len(pendentes) >= 2000:
+            PossivelMatch.objects.bulk_update(pendentes, ['score', 'criterios'])
+            pendentes = []
+    if pendentes:
+        PossivelMatch.objects.bulk_update(pendentes, ['score', 'criterios'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_possivelmatch'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='possivelmatch',
+            options={'ordering': ['-score', 'distancia_km', 'id'], 'verbose_name': 'Possível Match', 'verbose_name_plural': 'Possíveis Matches'},
+        ),
+        migrations.AddField(
+            model_name='possivelmatch',
+            name='criterios',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Pontos por Critério'),
+        ),
+        migrations.AddField(
+            model_name='possivelmatch',
+            name='data_calculo',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Calculado em'),
+        ),
+        migrations.AddField(
+            model_name='possivelmatch',
+            name='score',
+            field=models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Score'),
+        ),
+        migrations.AddIndex(
+            model_name='possivelmatch',
+            index=models.Index(fields=['reporte', '-score', 'distancia_km'], name='core_match_ranking_idx'),
+        ),
+        migrations.RunPython(preencher_scores, migrations.RunPython.noop),
+    ]
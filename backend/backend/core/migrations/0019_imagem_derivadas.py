@@ -0,0 +1,53 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_possivelmatch_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='animalfoto',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='animalparaadocao',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='denunciaimagem',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='petperdido',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='petperdidofoto',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='reportepetencontrado',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+        migrations.AddField(
+            model_name='reportepetencontradofoto',
+            name='imagem_derivadas',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Derivadas da Imagem'),
+        ),
+    ]
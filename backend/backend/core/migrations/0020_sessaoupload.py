@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:23
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_imagem_derivadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SessaoUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nome_arquivo', models.CharField(max_length=255, verbose_name='Nome do Arquivo')),
+                ('content_type', models.CharField(blank=True, default='', max_length=100, verbose_name='MIME Type')),
+                ('tamanho_total', models.PositiveBigIntegerField(verbose_name='Tamanho Total (bytes)')),
+                ('recebidos', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recebidos')),
+                ('status', models.CharField(choices=[('aberta', 'Aberta'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], default='aberta', max_length=20, verbose_name='Status')),
+                ('arquivo', models.CharField(blank=True, default='', max_length=255, verbose_name='Arquivo Final')),
+                ('expira_em', models.DateTimeField(verbose_name='Expira Em')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('denuncia', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sessoes_upload', to='core.denuncia', verbose_name='Denúncia')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sessoes_upload', to='core.usuario', verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Sessão de Upload',
+                'verbose_name_plural': 'Sessões de Upload',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+    ]
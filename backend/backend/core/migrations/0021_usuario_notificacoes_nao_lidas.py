@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:34
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def preencher_nao_lidas(apps, schema_editor):
+    """Conta as não lidas já existentes de cada perfil (um UPDATE com subconsulta)."""
+    Usuario = apps.get_model('core', 'Usuario')
+    Notificacao = apps.get_model('core', 'Notificacao')
+    nao_lidas = (
+        Notificacao.objects.filter(usuario=OuterRef('pk'), lida=False)
+        .order_by().values('usuario').annotate(total=Count('id')).values('total')
+    )
+    Usuario.objects.update(
+        notificacoes_nao_lidas=Coalesce(Subquery(nao_lidas, output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_sessaoupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usuario',
+            name='notificacoes_nao_lidas',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Notificações não lidas (badge); atualizado com F() a cada criação/leitura'),
+        ),
+        migrations.RunPython(preencher_nao_lidas, migrations.RunPython.noop),
+    ]
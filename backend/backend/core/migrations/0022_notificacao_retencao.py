@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_usuario_notificacoes_nao_lidas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacaoArquivada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_original', models.BigIntegerField(unique=True, verbose_name='ID Original')),
+                ('tipo', models.CharField(choices=[('adocao_aprovada', 'Adoção Aprovada'), ('adocao_rejeitada', 'Adoção Rejeitada'), ('animal_aprovado', 'Animal Aprovado para Doação'), ('animal_rejeitado', 'Animal Rejeitado'), ('interesse_adocao', 'Novo Interesse em Adoção'), ('denuncia', 'Denúncia'), ('contato_recebido', 'Contato Recebido'), ('contato_respondido', 'Contato Respondido')], max_length=30, verbose_name='Tipo')),
+                ('titulo', models.CharField(max_length=200, verbose_name='Título')),
+                ('mensagem', models.TextField(verbose_name='Mensagem')),
+                ('link', models.CharField(blank=True, max_length=255, null=True, verbose_name='Link de Ação')),
+                ('contato', models.JSONField(blank=True, null=True, verbose_name='Dados de Contato')),
+                ('data_criacao', models.DateTimeField(verbose_name='Data')),
+                ('data_arquivamento', models.DateTimeField(auto_now_add=True, verbose_name='Arquivada Em')),
+            ],
+            options={
+                'verbose_name': 'Notificação Arquivada',
+                'verbose_name_plural': 'Notificações Arquivadas',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario', 'lida', 'data_criacao'], name='core_notif_usuario_lida_idx'),
+        ),
+        migrations.AddField(
+            model_name='notificacaoarquivada',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes_arquivadas', to='core.usuario', verbose_name='Usuário'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacaoarquivada',
+            index=models.Index(fields=['usuario', 'data_criacao'], name='core_notifi_usuario_aeaa10_idx'),
+        ),
+    ]
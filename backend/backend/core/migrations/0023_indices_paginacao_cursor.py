@@ -0,0 +1,35 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_notificacao_retencao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='petperdido',
+            name='core_petper_status_3bfb12_idx',
+        ),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['data_criacao', 'id'], name='core_denun_data_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='denuncia',
+            index=models.Index(fields=['usuario', 'data_criacao', 'id'], name='core_denun_usuario_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacao',
+            index=models.Index(fields=['usuario', 'data_criacao', 'id'], name='core_notif_usuario_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petperdido',
+            index=models.Index(fields=['status', 'ativo', 'data_criacao', 'id'], name='core_petper_ativos_data_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.8 on 2026-10-17 19:49
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+# Cópia congelada de core.busca nesta versão do índice: a migração não
+# importa o código do app, que pode mudar depois dela (o comando
+# `reindexar_busca` reconstrói o índice com as regras atuais)
+CAMPOS_BUSCA = {
+    'core.Animal': {'nome': 5, 'raca': 3, 'descricao': 1},
+    'core.AnimalParaAdocao': {'nome': 5, 'cor': 2, 'caracteristicas_especiais': 2, 'descricao': 1},
+    'core.PetPerdido': {
+        'nome': 5, 'raca': 3, 'cor': 2, 'caracteristicas_distintivas': 2, 'descricao': 1,
+    },
+}
+
+PALAVRAS_VAZIAS = frozenset({
+    'a', 'o', 'e', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+    'nos', 'nas', 'com', 'um', 'uma', 'para', 'por', 'ao', 'se', 'que',
+})
+
+TAMANHO_TERMO = 40
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def palavras(texto):
+    """Palavras minúsculas, sem acento e sem as palavras vazias."""
+    if not texto:
+        return []
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    normalizado = _NAO_ALFANUMERICO.sub(' ', sem_acento.lower()).strip()
+    return [p[:TAMANHO_TERMO] for p in normalizado.split() if p not in PALAVRAS_VAZIAS]
+
+
+def termos_documento(valores, pesos):
+    """{palavra: maior peso entre os campos em que aparece}."""
+    termos = {}
+    for campo, peso in pesos.items():
+        for palavra in palavras(valores.get(campo)):
+            if termos.get(palavra, 0) < peso:
+                termos[palavra] = peso
+    return termos
+
+
+def indexar_existentes(apps, schema_editor):
+    """Indexa os registros já cadastrados (depois disso, os signals mantêm o índice)."""
+    TermoBusca = apps.get_model('core', 'TermoBusca')
+    for label, pesos in CAMPOS_BUSCA.items():
+        Modelo = apps.get_model(label)
+        linhas = []
+        for valores in Modelo.objects.values('pk', *pesos).iterator(chunk_size=1000):
+            linhas.extend(
+                TermoBusca(modelo=label, objeto_id=valores['pk'], termo=termo, peso=peso)
+                for termo, peso in termos_documento(valores, pesos).items()
+            )
+            if len(linhas) >= 5000:
+                TermoBusca.objects.bulk_create(linhas)
+                linhas = []
+        TermoBusca.objects.bulk_create(linhas)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_indices_paginacao_cursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(max_length=40, verbose_name='Modelo')),
+                ('objeto_id', models.PositiveBigIntegerField(verbose_name='ID do Registro')),
+                ('termo', models.CharField(max_length=40, verbose_name='Termo')),
+                ('peso', models.PositiveSmallIntegerField(default=1, verbose_name='Peso')),
+            ],
+            options={
+                'verbose_name': 'Termo de Busca',
+                'verbose_name_plural': 'Termos de Busca',
+                'indexes': [models.Index(fields=['modelo', 'termo', 'objeto_id'], name='core_termobusca_termo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('modelo', 'objeto_id', 'termo'), name='core_termobusca_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,132 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:01
+
+import re
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia congelada da normalização de core.localidades/core.busca nesta
+# versão: a migração não importa o código do app, que pode mudar depois dela
+
+# Sigla -> código IBGE e nome da UF
+UFS = {
+    'RO': (11, 'Rondônia'), 'AC': (12, 'Acre'), 'AM': (13, 'Amazonas'), 'RR': (14, 'Roraima'),
+    'PA': (15, 'Pará'), 'AP': (16, 'Amapá'), 'TO': (17, 'Tocantins'), 'MA': (21, 'Maranhão'),
+    'PI': (22, 'Piauí'), 'CE': (23, 'Ceará'), 'RN': (24, 'Rio Grande do Norte'),
+    'PB': (25, 'Paraíba'), 'PE': (26, 'Pernambuco'), 'AL': (27, 'Alagoas'), 'SE': (28, 'Sergipe'),
+    'BA': (29, 'Bahia'), 'MG': (31, 'Minas Gerais'), 'ES': (32, 'Espírito Santo'),
+    'RJ': (33, 'Rio de Janeiro'), 'SP': (35, 'São Paulo'), 'PR': (41, 'Paraná'),
+    'SC': (42, 'Santa Catarina'), 'RS': (43, 'Rio Grande do Sul'), 'MS': (50, 'Mato Grosso do Sul'),
+    'MT': (51, 'Mato Grosso'), 'GO': (52, 'Goiás'), 'DF': (53, 'Distrito Federal'),
+}
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acento e só letras/números separados por espaço."""
+    if not texto:
+        return ''
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acento.lower()).strip()
+
+
+_SIGLA_POR_CODIGO = {str(codigo): sigla for sigla, (codigo, _) in UFS.items()}
+_SIGLA_POR_NOME = {normalizar(nome): sigla for sigla, (_, nome) in UFS.items()}
+
+
+def normalizar_uf(valor):
+    """Sigla da UF a partir da sigla, do nome ou do código IBGE."""
+    if valor is None:
+        return None
+    limpo = valor.strip()
+    if limpo.upper() in UFS:
+        return limpo.upper()
+    if limpo in _SIGLA_POR_CODIGO:
+        return _SIGLA_POR_CODIGO[limpo]
+    return _SIGLA_POR_NOME.get(normalizar(limpo), limpo.upper())
+
+
+def normalizar_tabela(Modelo, lote=1000):
+    """Corrige estado/cidade_norm de todos os registros do model, em lotes por PK."""
+    ultimo_pk = 0
+    while True:
+        registros = list(
+            Modelo.objects.filter(pk__gt=ultimo_pk).order_by('pk').only('pk', 'cidade', 'estado', 'cidade_norm')[:lote]
+        )
+        if not registros:
+            return
+        ultimo_pk = registros[-1].pk
+        divergentes = []
+        for registro in registros:
+            estado, cidade_norm = normalizar_uf(registro.estado), normalizar(registro.cidade)
+            if (estado, cidade_norm) != (registro.estado, registro.cidade_norm):
+                registro.estado, registro.cidade_norm = estado, cidade_norm
+                divergentes.append(registro)
+        if divergentes:
+            Modelo.objects.bulk_update(divergentes, ['estado', 'cidade_norm'])
+
+
+def normalizar_existentes(apps, schema_editor):
+    """Preenche cidade_norm e canoniza estado dos registros já cadastrados."""
+    for nome in ('Animal', 'AnimalParaAdocao', 'PetPerdido', 'ReportePetEncontrado'):
+        normalizar_tabela(apps.get_model('core', nome))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_termobusca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='petperdido',
+            name='core_petper_cidade_fd9e53_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='reportepetencontrado',
+            name='core_report_cidade_b6c473_idx',
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='cidade_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Cidade (normalizada)'),
+        ),
+        migrations.AddField(
+            model_name='animalparaadocao',
+            name='cidade_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Cidade (normalizada)'),
+        ),
+        migrations.AddField(
+            model_name='petperdido',
+            name='cidade_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Cidade (normalizada)'),
+        ),
+        migrations.AddField(
+            model_name='reportepetencontrado',
+            name='cidade_norm',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100, verbose_name='Cidade (normalizada)'),
+        ),
+        # Antes dos índices: o bulk_update não precisa mantê-los
+        migrations.RunPython(normalizar_existentes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['status', 'estado', 'cidade_norm'], name='core_animal_local_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='animalparaadocao',
+            index=models.Index(fields=['status', 'estado', 'cidade_norm'], name='core_adocao_local_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='petperdido',
+            index=models.Index(fields=['estado', 'cidade_norm', 'status', 'ativo'], name='core_petper_local_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportepetencontrado',
+            index=models.Index(fields=['estado', 'cidade_norm', 'especie', 'status'], name='core_reporte_local_idx'),
+        ),
+    ]
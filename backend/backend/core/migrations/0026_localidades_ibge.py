@@ -0,0 +1,112 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:08
+
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+from django.db import migrations, models
+
+
+# Cópia congelada da normalização de core.localidades nesta versão: a
+# migração não importa o código do app, que pode mudar depois dela. Só os
+# dados vêm do arquivo versionado do IBGE (uma base mais nova só reconhece
+# mais municípios); sem o arquivo, cidade_ibge fica vazio até rodar
+# `normalizar_localizacoes`
+ARQUIVO_LOCALIDADES = Path(__file__).resolve().parent.parent / 'dados' / 'localidades_ibge.json'
+
+CAMPOS = ('estado', 'cidade', 'cidade_norm', 'cidade_ibge')
+
+_NAO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acento e só letras/números separados por espaço."""
+    if not texto:
+        return ''
+    sem_acento = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', sem_acento.lower()).strip()
+
+
+def carregar_base():
+    """(sigla_por_valor, {(uf, nome normalizado): (código, nome oficial)}) do arquivo do IBGE."""
+    dados = json.loads(ARQUIVO_LOCALIDADES.read_text(encoding='utf-8'))
+    sigla_por_valor = {}
+    sigla_por_codigo = {}
+    for codigo, sigla, nome in dados['estados']:
+        sigla_por_valor.update({sigla: sigla, str(codigo): sigla, normalizar(nome): sigla})
+        sigla_por_codigo[codigo] = sigla
+    municipios = {
+        (sigla_por_codigo[codigo // 100000], normalizar(nome)): (codigo, nome)
+        for codigo, nome, *_ in dados['municipios']
+    }
+    return sigla_por_valor, municipios
+
+
+def canonica(base, estado, cidade):
+    """(estado, cidade, cidade_norm, cidade_ibge) canônicos para os valores gravados."""
+    sigla_por_valor, municipios = base
+    if estado is not None:
+        limpo = estado.strip()
+        estado = sigla_por_valor.get(limpo.upper()) or sigla_por_valor.get(limpo) \
+            or sigla_por_valor.get(normalizar(limpo), limpo.upper())
+    encontrado = municipios.get((estado, normalizar(cidade))) if cidade and estado else None
+    if encontrado:
+        codigo, nome = encontrado
+        return estado, nome, normalizar(nome), codigo
+    return estado, cidade, normalizar(cidade), None
+
+
+def preencher_codigos(apps, schema_editor):
+    """Preenche cidade_ibge e o nome oficial dos municípios já cadastrados."""
+    if not ARQUIVO_LOCALIDADES.exists():
+        return
+    base = carregar_base()
+    for nome in ('Animal', 'AnimalParaAdocao', 'PetPerdido', 'ReportePetEncontrado'):
+        Modelo = apps.get_model('core', nome)
+        ultimo_pk = 0
+        while True:
+            registros = list(Modelo.objects.filter(pk__gt=ultimo_pk).order_by('pk').only('pk', *CAMPOS)[:1000])
+            if not registros:
+                break
+            ultimo_pk = registros[-1].pk
+            divergentes = []
+            for registro in registros:
+                valores = dict(zip(CAMPOS, canonica(base, registro.estado, registro.cidade)))
+                if any(getattr(registro, campo) != valores[campo] for campo in CAMPOS):
+                    for campo in CAMPOS:
+                        setattr(registro, campo, valores[campo])
+                    divergentes.append(registro)
+            if divergentes:
+                Modelo.objects.bulk_update(divergentes, CAMPOS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_localizacao_normalizada'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='cidade_ibge',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Código IBGE do Município'),
+        ),
+        migrations.AddField(
+            model_name='animalparaadocao',
+            name='cidade_ibge',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Código IBGE do Município'),
+        ),
+        migrations.AddField(
+            model_name='petperdido',
+            name='cidade_ibge',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Código IBGE do Município'),
+        ),
+        migrations.AddField(
+            model_name='reportepetencontrado',
+            name='cidade_ibge',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Código IBGE do Município'),
+        ),
+        migrations.RunPython(preencher_codigos, migrations.RunPython.noop),
+    ]
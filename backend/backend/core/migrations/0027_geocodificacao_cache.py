@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_localidades_ibge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodificacaoCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=40, unique=True, verbose_name='Chave')),
+                ('tipo', models.CharField(choices=[('direta', 'Endereço -> coordenadas'), ('reversa', 'Coordenadas -> endereço')], max_length=10, verbose_name='Tipo')),
+                ('consulta', models.CharField(max_length=255, verbose_name='Consulta')),
+                ('resultado', models.JSONField(blank=True, null=True, verbose_name='Resultado')),
+                ('provedor', models.CharField(blank=True, default='', max_length=30, verbose_name='Provedor')),
+                ('expira_em', models.DateTimeField(verbose_name='Expira em')),
+                ('ultimo_acesso', models.DateTimeField(verbose_name='Último Acesso')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')),
+            ],
+            options={
+                'verbose_name': 'Geocodificação em Cache',
+                'verbose_name_plural': 'Geocodificações em Cache',
+                'indexes': [models.Index(fields=['expira_em'], name='core_geocache_expira_idx'), models.Index(fields=['ultimo_acesso'], name='core_geocache_acesso_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_geocodificacao_cache'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='sessaoupload',
+            name='status',
+            field=models.CharField(choices=[('aberta', 'Aberta'), ('enviando', 'Enviando Pedaço'), ('concluida', 'Concluída'), ('cancelada', 'Cancelada')], default='aberta', max_length=20, verbose_name='Status'),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 20:37
+
+import core.validators
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_sessaoupload_status_enviando'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='animalfoto',
+            name='imagem',
+            field=models.ImageField(blank=True, null=True, upload_to='animais/fotos/', validators=[core.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='animalparaadocao',
+            name='imagem_principal',
+            field=models.ImageField(blank=True, help_text='Foto principal do animal (máximo 5MB, mínimo 200x200px)', null=True, upload_to='adocao/pendentes/', validators=[core.validators.validate_image_file, django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp'], message='Apenas imagens JPG, PNG ou WebP são permitidas')], verbose_name='Foto Principal'),
+        ),
+        migrations.AlterField(
+            model_name='denuncia',
+            name='imagem',
+            field=models.ImageField(blank=True, help_text='Imagem principal (máximo 5MB, mínimo 200x200px)', null=True, upload_to='denuncias/', validators=[core.validators.validate_image_file, django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp'], message='Apenas imagens JPG, PNG ou WebP são permitidas')], verbose_name='Imagem Principal'),
+        ),
+        migrations.AlterField(
+            model_name='denuncia',
+            name='video',
+            field=models.FileField(blank=True, help_text='Vídeo principal (máximo 20MB)', null=True, upload_to='denuncias/videos/', validators=[core.validators.validate_video_file, django.core.validators.FileExtensionValidator(allowed_extensions=['mp4', 'avi', 'mov', 'wmv', 'webm'], message='Apenas vídeos MP4, AVI, MOV, WMV ou WebM são permitidos')], verbose_name='Vídeo Principal'),
+        ),
+        migrations.AlterField(
+            model_name='denunciaimagem',
+            name='imagem',
+            field=models.ImageField(upload_to='denuncias/imagens/', validators=[core.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='denunciavideo',
+            name='video',
+            field=models.FileField(upload_to='denuncias/videos/', validators=[core.validators.validate_video_file]),
+        ),
+        migrations.AlterField(
+            model_name='historia',
+            name='imagem',
+            field=models.ImageField(help_text='Imagem ilustrativa da história (máximo 5MB)', upload_to='historias/', validators=[core.validators.validate_image_file, django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp'])]),
+        ),
+        migrations.AlterField(
+            model_name='petperdido',
+            name='imagem_principal',
+            field=models.ImageField(help_text='Foto principal do pet perdido (máximo 5MB)', upload_to='pets_perdidos/', validators=[core.validators.validate_image_file, django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp'])], verbose_name='Foto Principal'),
+        ),
+        migrations.AlterField(
+            model_name='petperdidofoto',
+            name='imagem',
+            field=models.ImageField(upload_to='pets_perdidos/fotos/', validators=[core.validators.validate_image_file]),
+        ),
+        migrations.AlterField(
+            model_name='reportepetencontrado',
+            name='imagem_principal',
+            field=models.ImageField(help_text='Foto principal do pet encontrado (máximo 5MB)', upload_to='pets_encontrados/', validators=[core.validators.validate_image_file, django.core.validators.FileExtensionValidator(allowed_extensions=['jpg', 'jpeg', 'png', 'webp'])], verbose_name='Foto Principal'),
+        ),
+        migrations.AlterField(
+            model_name='reportepetencontradofoto',
+            name='imagem',
+            field=models.ImageField(upload_to='pets_encontrados/fotos/', validators=[core.validators.validate_image_file]),
+        ),
+    ]
@@ -1,6 +1,7 @@
 from typing import Optional
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.validators import (
     MinValueValidator, 
     MaxValueValidator,
@@ -10,7 +11,10 @@ from django.core.validators import (
 )
 from django.core.exceptions import ValidationError
 import re
+import uuid
 from .validators import validate_image_file, validate_video_file
+from .geo import celula_grade
+from .localidades import base as base_localidades, preencher_localizacao
 
 
 # ===== VALIDATORS CUSTOMIZADOS =====
@@ -100,13 +104,8 @@ def validar_estado_brasil(valor):
     if not valor:
         return
     
-    estados_validos = [
-        'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA',
-        'MT', 'MS', 'MG', 'PA', 'PB', 'PR', 'PE', 'PI', 'RJ', 'RN',
-        'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO'
-    ]
-    
-    if valor.upper() not in estados_validos:
+    # Siglas da base do IBGE (core.localidades)
+    if valor.upper() not in base_localidades().estados:
         raise ValidationError(
             f'Estado inválido. Use a sigla (AC, SP, RJ, etc.)'
         )
@@ -125,6 +124,9 @@ class Usuario(models.Model):
         endereco (str): Endereço completo
         cidade (str): Cidade de residência
         estado (str): Estado (sigla UF com 2 caracteres)
+        notificacoes_nao_lidas (int): Contador desnormalizado de notificações
+            não lidas (mantido por core.notificacoes; ver
+            `reconciliar_notificacoes_nao_lidas`)
     
     Methods:
         __str__: Retorna o username do usuário associado
@@ -166,6 +168,11 @@ class Usuario(models.Model):
         validators=[validar_estado_brasil],
         help_text='Sigla do estado (AC, SP, RJ, etc.)'
     )
+    notificacoes_nao_lidas = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text='Notificações não lidas (badge); atualizado com F() a cada criação/leitura'
+    )
     data_criacao = models.DateTimeField(auto_now_add=True)
     
     def __str__(self) -> str:
@@ -197,18 +204,21 @@ class Animal(models.Model):
         imagem_url (str): URL da imagem principal
         cidade (str): Cidade onde o animal se encontra
         estado (str): Estado (sigla UF)
+        cidade_norm (str): Cidade sem acento/minúsculas, para filtros (auto)
+        cidade_ibge (int): Código IBGE do município, se reconhecido (auto)
         status (str): Status de disponibilidade - Disponível, Adotado ou Indisponível (choices)
         data_cadastro (datetime): Data de cadastro automática
     
     Methods:
         __str__: Retorna nome e tipo do animal
         delete: Limpa imagens associadas antes de deletar
-        save: Override para lógica customizada ao salvar
+        save: Preenche a localização canônica (estado, cidade, cidade_norm, cidade_ibge)
     
     Meta:
         verbose_name: 'Animal'
         verbose_name_plural: 'Animais'
         ordering: ['-data_cadastro']
+        indexes: [status+estado+cidade_norm] - Filtros de localização
     
     Example:
         >>> animal = Animal.objects.create(
@@ -278,6 +288,9 @@ class Animal(models.Model):
         null=True,
         help_text='Cidade onde o animal se encontra'
     )
+    # Cidade sem acento/minúsculas para filtros por igualdade (core.localidades)
+    cidade_norm = models.CharField(max_length=100, blank=True, default='', editable=False, verbose_name='Cidade (normalizada)')
+    cidade_ibge = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Código IBGE do Município')
     imagem = models.ImageField(
         upload_to='animais/', 
         blank=True, 
@@ -291,6 +304,8 @@ class Animal(models.Model):
         ],
         help_text='Imagem do animal (máximo 5MB)'
     )
+    # Miniatura/card/full em WebP e JPEG (core.imagens), geradas pelo worker
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     imagem_url = models.URLField(blank=True, null=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='disponivel')
     data_criacao = models.DateTimeField(auto_now_add=True)
@@ -299,10 +314,19 @@ class Animal(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.get_tipo_display()})"
     
+    def save(self, *args, **kwargs):
+        # Estado canônico e cidade_norm sempre acompanham cidade/estado
+        kwargs['update_fields'] = preencher_localizacao(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "Animal"
         verbose_name_plural = "Animais"
         ordering = ['-data_criacao']
+        indexes = [
+            # Catálogo filtrado por status + UF + cidade (igualdade)
+            models.Index(fields=['status', 'estado', 'cidade_norm'], name='core_animal_local_idx'),
+        ]
 
 
 class AnimalFoto(models.Model):
@@ -344,6 +368,7 @@ class AnimalFoto(models.Model):
         null=True,
         validators=[validate_image_file]
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     data_criacao = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -478,6 +503,8 @@ class AnimalParaAdocao(models.Model):
         caracteristicas_especiais (str): Informações extras (opcional)
         estado (str): Estado (sigla UF)
         cidade (str): Cidade (max 100)
+        cidade_norm (str): Cidade sem acento/minúsculas, para filtros (auto)
+        cidade_ibge (int): Código IBGE do município, se reconhecido (auto)
         endereco_completo (str): Endereço completo protegido (max 255)
         telefone (str): Telefone de contato (max 15)
         email (str): E-mail de contato
@@ -491,11 +518,13 @@ class AnimalParaAdocao(models.Model):
     
     Methods:
         __str__: Retorna nome, espécie e status do animal
+        save: Preenche a localização canônica (estado, cidade, cidade_norm, cidade_ibge)
     
     Meta:
         verbose_name: 'Animal para Adoção'
         verbose_name_plural: 'Animais para Adoção'
         ordering: ['-data_cadastro']
+        indexes: [status+estado+cidade_norm] - Filtros de localização
     
     Example:
         >>> usuario = Usuario.objects.get(user__username='maria')
@@ -555,6 +584,8 @@ class AnimalParaAdocao(models.Model):
     # Localização (endereço oculto até aprovação de adoção)
     estado = models.CharField(max_length=2, verbose_name='Estado')
     cidade = models.CharField(max_length=100, verbose_name='Cidade')
+    cidade_norm = models.CharField(max_length=100, blank=True, default='', editable=False, verbose_name='Cidade (normalizada)')
+    cidade_ibge = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Código IBGE do Município')
     endereco_completo = models.CharField(max_length=255, verbose_name='Endereço Completo', help_text='Será compartilhado apenas após aprovação da adoção')
     
     # Contatos do doador
@@ -585,6 +616,7 @@ class AnimalParaAdocao(models.Model):
         ],
         help_text='Foto principal do animal (máximo 5MB, mínimo 200x200px)'
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     
     # Status e controle
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name='Status')
@@ -597,10 +629,17 @@ class AnimalParaAdocao(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.get_especie_display()}) - {self.get_status_display()}"
     
+    def save(self, *args, **kwargs):
+        kwargs['update_fields'] = preencher_localizacao(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "Animal para Adoção"
         verbose_name_plural = "Animais para Adoção"
         ordering = ['-data_cadastro']
+        indexes = [
+            models.Index(fields=['status', 'estado', 'cidade_norm'], name='core_adocao_local_idx'),
+        ]
 
 
 # ===== SOLICITAÇÃO DE ADOÇÃO =====
@@ -706,6 +745,9 @@ class Notificacao(models.Model):
         verbose_name: 'Notificação'
         verbose_name_plural: 'Notificações'
         ordering: ['-data_criacao']
+        indexes: (usuario, lida, data_criacao) para o filtro de não lidas e a
+            retenção (core.retencao); (usuario, data_criacao, id) para a
+            listagem paginada do usuário
     
     Example:
         >>> usuario = Usuario.objects.get(user__username='joao')
@@ -750,6 +792,51 @@ class Notificacao(models.Model):
         verbose_name = "Notificação"
         verbose_name_plural = "Notificações"
         ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['usuario', 'lida', 'data_criacao'], name='core_notif_usuario_lida_idx'),
+            models.Index(fields=['usuario', 'data_criacao', 'id'], name='core_notif_usuario_data_idx'),
+        ]
+
+
+class NotificacaoArquivada(models.Model):
+    """
+    Notificação lida antiga, movida para fora da tabela principal.
+    
+    Gravada por core.retencao (`python manage.py arquivar_notificacoes`):
+    Notificacao fica só com o histórico recente, que é o que as listagens
+    e o badge consultam. Os campos de contato, raramente preenchidos, vão
+    juntos em um único JSON.
+    
+    Attributes:
+        id_original (int): PK que a notificação tinha em Notificacao
+        usuario (Usuario): Destinatário (removido junto com o perfil)
+        tipo, titulo, mensagem, link: Como na notificação original
+        contato (dict): contato_telefone/email/endereco preenchidos, ou None
+        data_criacao (datetime): Data de criação original
+        data_arquivamento (datetime): Quando foi arquivada
+    """
+    id_original = models.BigIntegerField(unique=True, verbose_name='ID Original')
+    usuario = models.ForeignKey(
+        Usuario, on_delete=models.CASCADE, related_name='notificacoes_arquivadas', verbose_name='Usuário'
+    )
+    tipo = models.CharField(max_length=30, choices=Notificacao.TIPO_CHOICES, verbose_name='Tipo')
+    titulo = models.CharField(max_length=200, verbose_name='Título')
+    mensagem = models.TextField(verbose_name='Mensagem')
+    link = models.CharField(max_length=255, blank=True, null=True, verbose_name='Link de Ação')
+    contato = models.JSONField(null=True, blank=True, verbose_name='Dados de Contato')
+    data_criacao = models.DateTimeField(verbose_name='Data')
+    data_arquivamento = models.DateTimeField(auto_now_add=True, verbose_name='Arquivada Em')
+    
+    def __str__(self):
+        return f"{self.titulo} - {self.usuario} (arquivada)"
+    
+    class Meta:
+        verbose_name = "Notificação Arquivada"
+        verbose_name_plural = "Notificações Arquivadas"
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['usuario', 'data_criacao']),
+        ]
 
 
 # ===== DENÚNCIA =====
@@ -876,6 +963,11 @@ class Denuncia(models.Model):
         verbose_name = "Denúncia"
         verbose_name_plural = "Denúncias"
         ordering = ['-data_criacao']
+        indexes = [
+            # Listagem paginada (pública/admin e do autor), inclusive por cursor
+            models.Index(fields=['data_criacao', 'id'], name='core_denun_data_id_idx'),
+            models.Index(fields=['usuario', 'data_criacao', 'id'], name='core_denun_usuario_data_idx'),
+        ]
 
 
 class DenunciaImagem(models.Model):
@@ -903,6 +995,7 @@ class DenunciaImagem(models.Model):
         upload_to='denuncias/imagens/',
         validators=[validate_image_file]
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     data_criacao = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -1037,6 +1130,9 @@ class PetPerdido(models.Model):
         bairro (str): Bairro (max 100)
         cidade (str): Cidade (max 100)
         estado (str): Estado (sigla UF)
+        cidade_norm (str): Cidade sem acento/minúsculas, para filtros (auto)
+        cidade_ibge (int): Código IBGE do município, se reconhecido (auto)
+        geo_celula (str): Célula da grade geográfica (calculada no save, usada no matching)
         telefone_contato (str): Telefone (max 15)
         email_contato (str): E-mail
         whatsapp (str): WhatsApp (opcional, max 15)
@@ -1052,12 +1148,14 @@ class PetPerdido(models.Model):
     
     Methods:
         __str__: Retorna nome, espécie e localização
+        save: Recalcula a célula da grade (geo_celula) a partir de lat/long e a
+              localização canônica (estado, cidade, cidade_norm, cidade_ibge)
     
     Meta:
         verbose_name: 'Pet Perdido'
         verbose_name_plural: 'Pets Perdidos'
         ordering: ['-data_criacao']
-        indexes: [status+ativo, cidade+estado, lat+long] - Para performance
+        indexes: [status+ativo+data_criacao+id, estado+cidade_norm+status+ativo, lat+long, geo_celula+especie+status+ativo] - Para performance
     
     Example:
         >>> usuario = Usuario.objects.get(user__username='joao')
@@ -1128,6 +1226,9 @@ class PetPerdido(models.Model):
     bairro = models.CharField(max_length=100, verbose_name='Bairro')
     cidade = models.CharField(max_length=100, verbose_name='Cidade')
     estado = models.CharField(max_length=2, verbose_name='Estado')
+    cidade_norm = models.CharField(max_length=100, blank=True, default='', editable=False, verbose_name='Cidade (normalizada)')
+    cidade_ibge = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Código IBGE do Município')
+    geo_celula = models.CharField(max_length=20, blank=True, default='', editable=False, verbose_name='Célula da Grade')
     
     # Contato
     telefone_contato = models.CharField(max_length=15, verbose_name='Telefone para Contato')
@@ -1148,6 +1249,7 @@ class PetPerdido(models.Model):
         ],
         help_text='Foto principal do pet perdido (máximo 5MB)'
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     
     # Status e controle
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='perdido', verbose_name='Status')
@@ -1160,14 +1262,28 @@ class PetPerdido(models.Model):
     def __str__(self):
         return f"{self.nome} ({self.get_especie_display()}) - {self.cidade}/{self.estado}"
     
+    def save(self, *args, **kwargs):
+        # Mantém o índice de grade sincronizado com as coordenadas
+        if self.latitude is not None and self.longitude is not None:
+            self.geo_celula = celula_grade(self.latitude, self.longitude)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and ('latitude' in update_fields or 'longitude' in update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'geo_celula'}
+        # ...e a localização canônica com cidade/estado
+        kwargs['update_fields'] = preencher_localizacao(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "Pet Perdido"
         verbose_name_plural = "Pets Perdidos"
         ordering = ['-data_criacao']
         indexes = [
-            models.Index(fields=['status', 'ativo']),
-            models.Index(fields=['cidade', 'estado']),
+            # Lista pública (status+ativo) já na ordem da paginação por cursor
+            models.Index(fields=['status', 'ativo', 'data_criacao', 'id'], name='core_petper_ativos_data_idx'),
+            # Filtros de UF/cidade da lista pública e do matching (igualdade)
+            models.Index(fields=['estado', 'cidade_norm', 'status', 'ativo'], name='core_petper_local_idx'),
             models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['geo_celula', 'especie', 'status', 'ativo']),
         ]
 
 
@@ -1197,6 +1313,7 @@ class PetPerdidoFoto(models.Model):
         upload_to='pets_perdidos/fotos/',
         validators=[validate_image_file]
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     descricao = models.CharField(max_length=200, blank=True, null=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
 
@@ -1236,10 +1353,13 @@ class ReportePetEncontrado(models.Model):
         bairro (str): Bairro (max 100)
         cidade (str): Cidade (max 100)
         estado (str): Estado (sigla UF)
+        cidade_norm (str): Cidade sem acento/minúsculas, para filtros (auto)
+        cidade_ibge (int): Código IBGE do município, se reconhecido (auto)
+        geo_celula (str): Célula da grade geográfica (calculada no save, usada no matching)
         pet_com_usuario (bool): Se pet está com quem encontrou (default=True)
         local_temporario (str): Onde o pet está agora (opcional, max 255)
         imagem_principal (ImageField): Foto principal (upload_to='pets_encontrados/')
-        possiveis_matches (ManyToMany): Pets perdidos similares (PetPerdido)
+        possiveis_matches (ManyToMany): Pets perdidos similares (PetPerdido, via PossivelMatch)
         pet_perdido_confirmado (ForeignKey): Match confirmado (PetPerdido, opcional)
         status (str): Pendente, Aprovado, Rejeitado ou Em Análise (choices, default='pendente')
         analisado_por (User): Administrador que analisou (opcional)
@@ -1251,12 +1371,14 @@ class ReportePetEncontrado(models.Model):
     
     Methods:
         __str__: Retorna espécie, localização e status
+        save: Recalcula geo_celula a partir de latitude/longitude e a
+              localização canônica (estado, cidade, cidade_norm, cidade_ibge)
     
     Meta:
         verbose_name: 'Reporte de Pet Encontrado'
         verbose_name_plural: 'Reportes de Pets Encontrados'
         ordering: ['-data_criacao']
-        indexes: [status, cidade+estado, lat+long] - Para performance
+        indexes: [status, estado+cidade_norm+especie+status, lat+long, geo_celula+especie+status] - Para performance
     
     Example:
         >>> reporte = ReportePetEncontrado.objects.create(
@@ -1326,6 +1448,9 @@ class ReportePetEncontrado(models.Model):
     bairro = models.CharField(max_length=100, verbose_name='Bairro')
     cidade = models.CharField(max_length=100, verbose_name='Cidade')
     estado = models.CharField(max_length=2, verbose_name='Estado')
+    cidade_norm = models.CharField(max_length=100, blank=True, default='', editable=False, verbose_name='Cidade (normalizada)')
+    cidade_ibge = models.PositiveIntegerField(null=True, blank=True, editable=False, verbose_name='Código IBGE do Município')
+    geo_celula = models.CharField(max_length=20, blank=True, default='', editable=False, verbose_name='Célula da Grade')
     
     # Situação atual do pet
     pet_com_usuario = models.BooleanField(default=True, verbose_name='Pet está com você')
@@ -1341,9 +1466,10 @@ class ReportePetEncontrado(models.Model):
         ],
         help_text='Foto principal do pet encontrado (máximo 5MB)'
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     
     # Possíveis matches automáticos
-    possiveis_matches = models.ManyToManyField(PetPerdido, blank=True, related_name='reportes_relacionados', verbose_name='Possíveis Matches')
+    possiveis_matches = models.ManyToManyField(PetPerdido, through='PossivelMatch', blank=True, related_name='reportes_relacionados', verbose_name='Possíveis Matches')
     pet_perdido_confirmado = models.ForeignKey(PetPerdido, on_delete=models.SET_NULL, null=True, blank=True, related_name='match_confirmado', verbose_name='Pet Perdido Confirmado')
     
     # Status e controle
@@ -1360,14 +1486,83 @@ class ReportePetEncontrado(models.Model):
     def __str__(self):
         return f"Pet {self.get_especie_display()} encontrado em {self.cidade}/{self.estado} - {self.get_status_display()}"
     
+    def save(self, *args, **kwargs):
+        # Mantém o índice de grade sincronizado com as coordenadas
+        if self.latitude is not None and self.longitude is not None:
+            self.geo_celula = celula_grade(self.latitude, self.longitude)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and ('latitude' in update_fields or 'longitude' in update_fields):
+                kwargs['update_fields'] = set(update_fields) | {'geo_celula'}
+        # ...e a localização canônica com cidade/estado
+        kwargs['update_fields'] = preencher_localizacao(self, kwargs.get('update_fields'))
+        super().save(*args, **kwargs)
+    
     class Meta:
         verbose_name = "Reporte de Pet Encontrado"
         verbose_name_plural = "Reportes de Pets Encontrados"
         ordering = ['-data_criacao']
         indexes = [
             models.Index(fields=['status']),
-            models.Index(fields=['cidade', 'estado']),
+            models.Index(fields=['estado', 'cidade_norm', 'especie', 'status'], name='core_reporte_local_idx'),
             models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['geo_celula', 'especie', 'status']),
+        ]
+
+
+class PossivelMatch(models.Model):
+    """
+    Possível match entre um reporte de pet encontrado e um pet perdido.
+    
+    Tabela intermediária do ManyToMany `ReportePetEncontrado.possiveis_matches`
+    (mantém a tabela original core_reportepetencontrado_possiveis_matches).
+    Guarda o resultado do matching (score, distância e pontos por critério)
+    para que listagens e admin leiam os melhores matches já ordenados pelo
+    índice (reporte, -score, distancia_km), sem recalcular nada.
+    
+    Attributes:
+        reporte (ReportePetEncontrado): Reporte de pet encontrado (ForeignKey)
+        pet_perdido (PetPerdido): Pet perdido candidato (ForeignKey)
+        score (int): Score de similaridade 0-100 (opcional - linhas antigas)
+        distancia_km (float): Distância entre o local do encontro e o da perda (opcional)
+        criterios (dict): Pontos por critério, ex: {'especie': 30, 'porte': 20, 'cor': 0, 'proximidade': 25}
+        data_calculo (datetime): Quando o match foi calculado
+    
+    Meta:
+        verbose_name: 'Possível Match'
+        verbose_name_plural: 'Possíveis Matches'
+        ordering: ['-score', 'distancia_km', 'id'] (melhor match primeiro)
+        unique_together: (reporte, pet_perdido)
+    
+    Example:
+        >>> PossivelMatch.objects.create(reporte=reporte, pet_perdido=pet, score=75, distancia_km=1.2)
+        >>> reporte.matches.first().score
+        75
+    """
+    reporte = models.ForeignKey(
+        ReportePetEncontrado, on_delete=models.CASCADE, related_name='matches',
+        db_column='reportepetencontrado_id', verbose_name='Reporte'
+    )
+    pet_perdido = models.ForeignKey(
+        PetPerdido, on_delete=models.CASCADE, related_name='matches',
+        db_column='petperdido_id', verbose_name='Pet Perdido'
+    )
+    score = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name='Score')
+    distancia_km = models.FloatField(null=True, blank=True, verbose_name='Distância (km)')
+    criterios = models.JSONField(default=dict, blank=True, verbose_name='Pontos por Critério')
+    data_calculo = models.DateTimeField(default=timezone.now, verbose_name='Calculado em')
+    
+    def __str__(self):
+        return f"Reporte #{self.reporte_id} x Pet #{self.pet_perdido_id} ({self.score})"
+    
+    class Meta:
+        db_table = 'core_reportepetencontrado_possiveis_matches'
+        verbose_name = "Possível Match"
+        verbose_name_plural = "Possíveis Matches"
+        ordering = ['-score', 'distancia_km', 'id']
+        unique_together = [('reporte', 'pet_perdido')]
+        indexes = [
+            # Top-N matches de um reporte direto do índice
+            models.Index(fields=['reporte', '-score', 'distancia_km'], name='core_match_ranking_idx'),
         ]
 
 
@@ -1397,6 +1592,7 @@ class ReportePetEncontradoFoto(models.Model):
         upload_to='pets_encontrados/fotos/',
         validators=[validate_image_file]
     )
+    imagem_derivadas = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Derivadas da Imagem')
     descricao = models.CharField(max_length=200, blank=True, null=True)
     data_criacao = models.DateTimeField(auto_now_add=True)
 
@@ -1609,3 +1805,229 @@ class Contato(models.Model):
         verbose_name = "Contato"
         verbose_name_plural = "Contatos"
         ordering = ['-data_criacao']
+
+
+# ===== TAREFA (FILA DE PROCESSAMENTO EM SEGUNDO PLANO) =====
+class Tarefa(models.Model):
+    """
+    Tarefa enfileirada para execução fora do ciclo da requisição HTTP.
+    
+    Implementa uma fila simples sobre o próprio banco de dados: a view
+    grava a tarefa na mesma transação do registro que a originou e um ou
+    mais workers (comando `processar_tarefas`) a executam depois.
+    
+    Attributes:
+        tipo (str): Nome da tarefa registrada em core.tarefas (max 100)
+        payload (dict): Argumentos da tarefa (JSON)
+        status (str): Pendente, Processando, Concluída ou Falhou (choices, default='pendente')
+        tentativas (int): Quantas vezes a tarefa já foi executada
+        max_tentativas (int): Limite de tentativas antes de marcar como falha (default=5)
+        erro (str): Último erro registrado (opcional)
+        agendada_para (datetime): Não executar antes desta data (default=agora)
+        iniciada_em (datetime): Início da execução atual (opcional)
+        concluida_em (datetime): Data de conclusão (opcional)
+        data_criacao (datetime): Data de criação (auto)
+    
+    Methods:
+        __str__: Retorna tipo, id e status
+    
+    Meta:
+        verbose_name: 'Tarefa'
+        verbose_name_plural: 'Tarefas'
+        ordering: ['agendada_para', 'id']
+        indexes: (status, agendada_para) para o worker buscar a próxima tarefa
+    
+    Example:
+        >>> from core.tarefas import enfileirar
+        >>> tarefa = enfileirar('processar_reporte_encontrado', reporte_id=1)
+        >>> print(tarefa)
+        processar_reporte_encontrado #1 (pendente)
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluida', 'Concluída'),
+        ('falhou', 'Falhou'),
+    ]
+    
+    tipo = models.CharField(max_length=100, verbose_name='Tipo')
+    payload = models.JSONField(default=dict, blank=True, verbose_name='Argumentos')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente', verbose_name='Status')
+    tentativas = models.PositiveIntegerField(default=0, verbose_name='Tentativas')
+    max_tentativas = models.PositiveIntegerField(default=5, verbose_name='Máximo de Tentativas')
+    erro = models.TextField(blank=True, default='', verbose_name='Último Erro')
+    agendada_para = models.DateTimeField(default=timezone.now, verbose_name='Agendada Para')
+    iniciada_em = models.DateTimeField(null=True, blank=True, verbose_name='Iniciada Em')
+    concluida_em = models.DateTimeField(null=True, blank=True, verbose_name='Concluída Em')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    
+    def __str__(self):
+        return f"{self.tipo} #{self.pk} ({self.status})"
+    
+    class Meta:
+        verbose_name = "Tarefa"
+        verbose_name_plural = "Tarefas"
+        ordering = ['agendada_para', 'id']
+        indexes = [
+            models.Index(fields=['status', 'agendada_para']),
+        ]
+
+
+# ===== SESSÃO DE UPLOAD EM PEDAÇOS (VÍDEOS) =====
+class SessaoUpload(models.Model):
+    """
+    Upload retomável de vídeo enviado em pedaços (core.uploads).
+    
+    O cliente abre a sessão informando nome e tamanho, envia os bytes em
+    PUTs com Content-Range e, ao final, anexa o vídeo a uma denúncia. Se a
+    conexão cair, consulta `recebidos` e continua do mesmo ponto.
+    
+    Attributes:
+        id (UUID): Identificador da sessão (usado na URL)
+        usuario (Usuario): Dono da sessão (ForeignKey)
+        nome_arquivo (str): Nome original do vídeo (max 255)
+        content_type (str): MIME type informado pelo cliente (opcional)
+        tamanho_total (int): Tamanho final do arquivo em bytes
+        recebidos (int): Bytes já gravados em disco (próximo offset esperado)
+        status (str): Aberta, Enviando (um PUT reservou o offset e está gravando),
+            Concluída ou Cancelada (choices, default='aberta')
+        denuncia (Denuncia): Denúncia à qual o vídeo foi anexado (opcional)
+        arquivo (str): Nome final do vídeo no storage (após anexar)
+        expira_em (datetime): Sessões abertas depois desta data são descartadas
+        data_criacao (datetime): Data de criação (auto)
+        data_atualizacao (datetime): Última alteração (auto)
+    
+    Methods:
+        __str__: Retorna id, progresso e status
+    
+    Meta:
+        verbose_name: 'Sessão de Upload'
+        verbose_name_plural: 'Sessões de Upload'
+        ordering: ['-data_criacao']
+    
+    Example:
+        >>> sessao = SessaoUpload.objects.create(
+        ...     usuario=usuario, nome_arquivo='maus_tratos.mp4',
+        ...     tamanho_total=15_000_000, expira_em=timezone.now() + timedelta(hours=24)
+        ... )
+        >>> print(sessao)
+        Upload 3f2a... (0/15000000 bytes, aberta)
+    """
+    STATUS_CHOICES = [
+        ('aberta', 'Aberta'),
+        ('enviando', 'Enviando Pedaço'),
+        ('concluida', 'Concluída'),
+        ('cancelada', 'Cancelada'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='sessoes_upload', verbose_name='Usuário')
+    nome_arquivo = models.CharField(max_length=255, verbose_name='Nome do Arquivo')
+    content_type = models.CharField(max_length=100, blank=True, default='', verbose_name='MIME Type')
+    tamanho_total = models.PositiveBigIntegerField(verbose_name='Tamanho Total (bytes)')
+    recebidos = models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recebidos')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='aberta', verbose_name='Status')
+    denuncia = models.ForeignKey(
+        Denuncia, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='sessoes_upload', verbose_name='Denúncia'
+    )
+    arquivo = models.CharField(max_length=255, blank=True, default='', verbose_name='Arquivo Final')
+    expira_em = models.DateTimeField(verbose_name='Expira Em')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name='Última Atualização')
+    
+    def __str__(self):
+        return f"Upload {self.pk} ({self.recebidos}/{self.tamanho_total} bytes, {self.status})"
+    
+    class Meta:
+        verbose_name = "Sessão de Upload"
+        verbose_name_plural = "Sessões de Upload"
+        ordering = ['-data_criacao']
+
+
+class TermoBusca(models.Model):
+    """
+    Índice de busca textual dos catálogos (core.busca).
+    
+    Uma palavra sem acento de um registro indexado, com o maior peso entre
+    os campos em que aparece. A busca `?q=` procura por faixa de prefixo em
+    (modelo, termo) em vez de `LIKE '%...%'` nas tabelas dos catálogos.
+    
+    Attributes:
+        modelo (str): Label do model indexado ('core.PetPerdido')
+        objeto_id (int): PK do registro indexado
+        termo (str): Palavra normalizada ('sao', 'paulo', 'caramelo')
+        peso (int): Peso do campo (nome > raça > cor > descrição)
+    
+    Note:
+        Mantido pelos signals de save/delete; após bulk_create ou update()
+        nos campos indexados rode `python manage.py reindexar_busca`
+    """
+    modelo = models.CharField(max_length=40, verbose_name='Modelo')
+    objeto_id = models.PositiveBigIntegerField(verbose_name='ID do Registro')
+    termo = models.CharField(max_length=40, verbose_name='Termo')
+    peso = models.PositiveSmallIntegerField(default=1, verbose_name='Peso')
+    
+    def __str__(self):
+        return f"{self.modelo}#{self.objeto_id}: {self.termo} ({self.peso})"
+    
+    class Meta:
+        verbose_name = "Termo de Busca"
+        verbose_name_plural = "Termos de Busca"
+        constraints = [
+            models.UniqueConstraint(fields=['modelo', 'objeto_id', 'termo'], name='core_termobusca_unico'),
+        ]
+        indexes = [
+            # Busca: WHERE modelo = ? AND termo >= ? AND termo < ? GROUP BY objeto_id
+            models.Index(fields=['modelo', 'termo', 'objeto_id'], name='core_termobusca_termo_idx'),
+        ]
+
+
+class GeocodificacaoCache(models.Model):
+    """
+    Resultado guardado de uma geocodificação (core.geocodificacao).
+    
+    Uma linha por consulta normalizada: endereço -> coordenadas (direta) ou
+    coordenadas arredondadas -> cidade/UF (reversa). Evita repetir chamadas
+    ao provedor externo (Nominatim) para os mesmos endereços.
+    
+    Attributes:
+        chave (str): SHA-1 do tipo + consulta normalizada (única)
+        tipo (str): 'direta' ou 'reversa'
+        consulta (str): Consulta normalizada (para inspeção no admin)
+        resultado (dict): latitude, longitude, cidade, estado, cidade_ibge,
+            endereco, precisao e provedor (None = nada encontrado)
+        provedor (str): Provedor que respondeu
+        expira_em (datetime): Fim da validade (TTL; menor para "nada encontrado")
+        ultimo_acesso (datetime): Última leitura (aproximada), para descartar
+            os menos usados quando o cache passa do tamanho máximo (LRU)
+        data_criacao (datetime): Data da consulta ao provedor (auto)
+    
+    Note:
+        Expirados e excedentes saem com `python manage.py limpar_cache_geocodificacao`
+    """
+    TIPO_CHOICES = [
+        ('direta', 'Endereço -> coordenadas'),
+        ('reversa', 'Coordenadas -> endereço'),
+    ]
+    
+    chave = models.CharField(max_length=40, unique=True, verbose_name='Chave')
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name='Tipo')
+    consulta = models.CharField(max_length=255, verbose_name='Consulta')
+    resultado = models.JSONField(null=True, blank=True, verbose_name='Resultado')
+    provedor = models.CharField(max_length=30, blank=True, default='', verbose_name='Provedor')
+    expira_em = models.DateTimeField(verbose_name='Expira em')
+    ultimo_acesso = models.DateTimeField(verbose_name='Último Acesso')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Data de Criação')
+    
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.consulta}"
+    
+    class Meta:
+        verbose_name = "Geocodificação em Cache"
+        verbose_name_plural = "Geocodificações em Cache"
+        indexes = [
+            # Limpeza: expirados e, acima do limite, os menos usados
+            models.Index(fields=['expira_em'], name='core_geocache_expira_idx'),
+            models.Index(fields=['ultimo_acesso'], name='core_geocache_acesso_idx'),
+        ]
@@ -0,0 +1,266 @@
+"""
+Serviço de notificações
+Ponto único de criação de Notificacao: views e tarefas não chamam mais
+`Notificacao.objects.create` diretamente
+
+Fluxo:
+    1. Os destinatários são resolvidos com uma única consulta (ex: todos os
+       admins com perfil via JOIN em auth_user), sem consulta por usuário
+    2. Todas as linhas são gravadas com um único bulk_create
+    3. O custo de um POST público (contato, pet perdido, reporte) deixa de
+       crescer com a quantidade de administradores
+    4. Na mesma transação, o contador Usuario.notificacoes_nao_lidas de cada
+       destinatário é incrementado com F() (sem ler e regravar o valor)
+    5. Depois do commit, cada destinatário recebe no stream SSE a notificação
+       e a nova contagem de não lidas (core.eventos)
+
+Leitura e remoção também passam por aqui (`definir_leitura`,
+`remover_notificacao`) para o contador acompanhar. Alterações feitas por
+fora (admin, shell, queryset.update) são corrigidas por
+`python manage.py reconciliar_notificacoes_nao_lidas`.
+"""
+
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, When
+from django.db.models.functions import Coalesce
+
+from .eventos import publicar
+from .models import Notificacao, Usuario
+from .serializers import NotificacaoSerializer
+
+
+def criar_notificacoes(notificacoes: List[Notificacao]) -> List[Notificacao]:
+    """
+    Grava notificações já montadas com um único INSERT.
+
+    Usada quando cada destinatário recebe um texto diferente; para o mesmo
+    texto use `notificar_usuarios`/`notificar_admins`.
+
+    Args:
+        notificacoes: Instâncias não salvas de Notificacao
+
+    Returns:
+        As mesmas notificações, gravadas
+    """
+    if not notificacoes:
+        return []
+    with transaction.atomic():
+        criadas = Notificacao.objects.bulk_create(notificacoes)
+        ajustar_contadores(Counter(n.usuario_id for n in criadas if not n.lida))
+    transaction.on_commit(lambda: _publicar_criadas(criadas))
+    return criadas
+
+
+def notificar(usuario: Union[Usuario, int], tipo: str, titulo: str, mensagem: str,
+              link: Optional[str] = None, **extras) -> Notificacao:
+    """
+    Cria uma notificação para um usuário.
+
+    Args:
+        usuario: Usuario destinatário ou seu id
+        tipo: Um de Notificacao.TIPO_CHOICES
+        titulo: Título curto
+        mensagem: Texto completo
+        link: URL de ação (opcional)
+        **extras: contato_telefone, contato_email, contato_endereco
+
+    Returns:
+        Notificação criada
+
+    Examples:
+        >>> notificar(animal.usuario_doador, 'animal_aprovado', 'Pet aprovado!', 'Seu pet foi aprovado.')
+    """
+    return notificar_usuarios([usuario], tipo, titulo, mensagem, link, **extras)[0]
+
+
+def notificar_usuarios(usuarios: Iterable[Union[Usuario, int]], tipo: str, titulo: str, mensagem: str,
+                       link: Optional[str] = None, **extras) -> List[Notificacao]:
+    """
+    Envia a mesma notificação para vários usuários com um único INSERT.
+
+    Args:
+        usuarios: Usuarios destinatários ou seus ids
+        (demais argumentos como em `notificar`)
+
+    Returns:
+        Notificações criadas
+    """
+    return criar_notificacoes([
+        Notificacao(
+            usuario_id=usuario.pk if isinstance(usuario, Usuario) else usuario,
+            tipo=tipo,
+            titulo=titulo,
+            mensagem=mensagem,
+            link=link,
+            **extras
+        )
+        for usuario in usuarios
+    ])
+
+
+def ids_admins() -> List[int]:
+    """Ids dos perfis (Usuario) de todos os administradores, em uma consulta."""
+    return list(Usuario.objects.filter(user__is_staff=True).values_list('pk', flat=True))
+
+
+def notificar_admins(tipo: str, titulo: str, mensagem: str, link: Optional[str] = None) -> List[Notificacao]:
+    """
+    Notifica todos os administradores (is_staff) que têm perfil.
+
+    Três consultas no total (destinatários + INSERT + UPDATE dos contadores),
+    qualquer que seja a quantidade de administradores.
+
+    Examples:
+        >>> notificar_admins('contato_recebido', 'Novo contato recebido',
+        ...                  'Nova mensagem de Ana: Dúvida', link='/admin-panel/?tab=contatos')
+    """
+    return notificar_usuarios(ids_admins(), tipo, titulo, mensagem, link)
+
+
+# ============================================
+# CONTADOR DE NÃO LIDAS
+# ============================================
+
+def ajustar_contadores(deltas: Dict[int, int]) -> None:
+    """
+    Soma `delta` ao contador de cada perfil, direto no banco (F()).
+
+    Perfis com o mesmo delta são atualizados juntos: notificar 50 admins é
+    um único UPDATE. Decrementos nunca deixam o contador negativo.
+
+    Args:
+        deltas: Usuario.pk -> variação (positiva ou negativa)
+    """
+    por_delta = defaultdict(list)
+    for usuario_id, delta in deltas.items():
+        if delta:
+            por_delta[delta].append(usuario_id)
+
+    for delta, usuario_ids in por_delta.items():
+        if delta > 0:
+            novo_valor = F('notificacoes_nao_lidas') + delta
+        else:
+            # Condição antes da subtração: coluna UNSIGNED no MySQL não aceita
+            # resultado negativo nem como valor intermediário
+            novo_valor = Case(
+                When(notificacoes_nao_lidas__gte=-delta, then=F('notificacoes_nao_lidas') + delta),
+                default=0,
+            )
+        Usuario.objects.filter(pk__in=usuario_ids).update(notificacoes_nao_lidas=novo_valor)
+
+
+def definir_leitura(usuario_id: int, lida: bool = True, ids: Optional[Sequence[int]] = None) -> int:
+    """
+    Marca notificações de um usuário como lidas (ou não lidas).
+
+    Só as linhas que realmente mudam entram na conta (o UPDATE filtra pelo
+    estado oposto), então repetir a chamada ou duas requisições simultâneas
+    não descontam em dobro.
+
+    Args:
+        usuario_id: Usuario.pk dono das notificações
+        lida: Novo estado
+        ids: Notificações específicas (padrão: todas do usuário)
+
+    Returns:
+        Quantidade de notificações alteradas
+
+    Examples:
+        >>> definir_leitura(usuario.pk, ids=[notificacao.pk])  # marcar_lida
+        1
+        >>> definir_leitura(usuario.pk)                         # marcar_todas_lidas
+        7
+    """
+    notificacoes = Notificacao.objects.filter(usuario_id=usuario_id, lida=not lida)
+    if ids is not None:
+        notificacoes = notificacoes.filter(pk__in=ids)
+
+    with transaction.atomic():
+        alteradas = notificacoes.update(lida=lida)
+        if alteradas:
+            ajustar_contadores({usuario_id: -alteradas if lida else alteradas})
+    if alteradas:
+        publicar_contagem(usuario_id)
+    return alteradas
+
+
+def remover_notificacao(notificacao: Notificacao) -> None:
+    """Apaga uma notificação, descontando-a do contador se ainda não lida."""
+    with transaction.atomic():
+        # O estado é conferido no próprio DELETE (pode ter sido lida agora)
+        nao_lida = Notificacao.objects.filter(pk=notificacao.pk, lida=False).delete()[0]
+        if nao_lida:
+            ajustar_contadores({notificacao.usuario_id: -1})
+        else:
+            Notificacao.objects.filter(pk=notificacao.pk).delete()
+    if nao_lida:
+        publicar_contagem(notificacao.usuario_id)
+
+
+def contagens_nao_lidas(usuario_ids: Iterable[int]) -> Dict[int, int]:
+    """Contadores de não lidas por Usuario.pk (uma consulta, sem contar notificações)."""
+    return dict(
+        Usuario.objects.filter(pk__in=set(usuario_ids)).values_list('pk', 'notificacoes_nao_lidas')
+    )
+
+
+def _nao_lidas_reais():
+    """Subconsulta: quantidade real de não lidas do perfil da linha externa."""
+    return Coalesce(
+        Subquery(
+            Notificacao.objects.filter(usuario=OuterRef('pk'), lida=False)
+            .order_by().values('usuario').annotate(total=Count('id')).values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def reconciliar_nao_lidas(lote: int = 1000, aplicar: bool = True) -> int:
+    """
+    Corrige contadores que divergem da contagem real.
+
+    Encontra os perfis divergentes com uma consulta e os corrige em lotes
+    de `lote` linhas; cada UPDATE recalcula o valor no próprio banco, então
+    notificações criadas durante a varredura não são sobrescritas por um
+    valor lido antes.
+
+    Args:
+        lote: Perfis por UPDATE
+        aplicar: False apenas conta os divergentes
+
+    Returns:
+        Quantidade de perfis divergentes encontrados
+    """
+    divergentes = list(
+        Usuario.objects.annotate(reais=_nao_lidas_reais())
+        .exclude(notificacoes_nao_lidas=F('reais'))
+        .values_list('pk', flat=True)
+    )
+    if aplicar:
+        for inicio in range(0, len(divergentes), lote):
+            Usuario.objects.filter(pk__in=divergentes[inicio:inicio + lote]).update(
+                notificacoes_nao_lidas=_nao_lidas_reais()
+            )
+    return len(divergentes)
+
+
+# ============================================
+# PUSH (STREAM SSE)
+# ============================================
+
+def publicar_contagem(usuario_id: int) -> None:
+    """Envia ao stream o contador atual de não lidas (após o commit)."""
+    def enviar():
+        publicar(usuario_id, 'contagem', {'nao_lidas': contagens_nao_lidas([usuario_id]).get(usuario_id, 0)})
+    transaction.on_commit(enviar)
+
+
+def _publicar_criadas(notificacoes: List[Notificacao]) -> None:
+    for notificacao in notificacoes:
+        publicar(notificacao.usuario_id, 'notificacao', NotificacaoSerializer(notificacao).data)
+    for usuario_id, total in contagens_nao_lidas(n.usuario_id for n in notificacoes).items():
+        publicar(usuario_id, 'contagem', {'nao_lidas': total})
@@ -0,0 +1,161 @@
+"""
+Paginação customizada da API
+Cursor em vez de OFFSET para listas que crescem sem limite por usuário
+"""
+
+from collections import OrderedDict
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ============================================
+# PAGINAÇÃO POR CURSOR
+# ============================================
+
+class MeusPetsCursorPagination(CursorPagination):
+    """
+    Cursor para o painel de pets cadastrados pelo doador.
+
+    A página seguinte é buscada a partir do último item (data_cadastro, id),
+    sem OFFSET: o custo é o mesmo na primeira e na décima página, e itens
+    cadastrados durante a navegação não duplicam nem somem da lista.
+
+    Example:
+        GET /api/meus-pets-cadastrados/?page_size=20
+        -> {"next": "...?cursor=cD0y...", "previous": null, "results": [...]}
+    """
+    ordering = ('-data_cadastro', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+class DataCriacaoCursorPagination(CursorPagination):
+    """Cursor sobre (data_criacao, id), mais recentes primeiro."""
+    ordering = ('-data_criacao', '-id')
+
+
+# ============================================
+# PAGINAÇÃO DAS LISTAS GRANDES (MODO POR REQUISIÇÃO)
+# ============================================
+
+VALORES_VERDADEIROS = ('1', 'true', 'sim')
+
+
+class PaginacaoListas(PageNumberPagination):
+    """
+    Paginação de pets perdidos, denúncias e notificações, com o modo
+    escolhido pelo cliente em cada requisição.
+
+    Modos:
+        ?page=N (padrão): igual à paginação global, com `count` (COUNT(*))
+            e OFFSET - respostas antigas continuam idênticas
+        ?page=N&sem_total=true: mesmas páginas sem o COUNT(*); busca um item
+            a mais para saber se há próxima página e devolve `count: null`
+        ?paginacao=cursor: keyset sobre (data_criacao, id); os links
+            `next`/`previous` trazem `?cursor=...` e continuam nesse modo.
+            Custo constante em qualquer profundidade e sem itens
+            duplicados/pulados quando surgem registros novos
+
+    Example:
+        GET /api/pets-perdidos/?paginacao=cursor
+        -> {"next": "...?cursor=cD0yMDI2...&paginacao=cursor", "previous": null, "results": [...]}
+        GET /api/notificacoes/?page=40&sem_total=true
+        -> {"count": null, "next": "...?page=41&sem_total=true", "previous": "...", "results": [...]}
+    """
+    classe_cursor = DataCriacaoCursorPagination
+    modo_query_param = 'paginacao'
+    sem_total_query_param = 'sem_total'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self._cursor = None
+        self._sem_total = False
+
+        if self._modo_cursor(request):
+            self._cursor = self.classe_cursor()
+            self._cursor.page_size = self.get_page_size(request)
+            return self._cursor.paginate_queryset(queryset, request, view)
+
+        if request.query_params.get(self.sem_total_query_param, '').lower() in VALORES_VERDADEIROS:
+            self._sem_total = True
+            return self._paginar_sem_total(queryset, request)
+
+        return super().paginate_queryset(queryset, request, view)
+
+    def _modo_cursor(self, request) -> bool:
+        return (
+            self.classe_cursor.cursor_query_param in request.query_params
+            or request.query_params.get(self.modo_query_param) == 'cursor'
+        )
+
+    def _paginar_sem_total(self, queryset, request):
+        """Fatia por OFFSET sem contar a tabela: LIMIT page_size + 1."""
+        tamanho = self.get_page_size(request)
+        try:
+            self._numero = int(request.query_params.get(self.page_query_param, 1))
+            if self._numero < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound('Página inválida.')
+
+        inicio = (self._numero - 1) * tamanho
+        itens = list(queryset[inicio:inicio + tamanho + 1])
+        if not itens and self._numero > 1:
+            raise NotFound('Página inválida.')
+        self._tem_proxima = len(itens) > tamanho
+        return itens[:tamanho]
+
+    def get_paginated_response(self, data):
+        if self._cursor is not None:
+            return self._cursor.get_paginated_response(data)
+        if not self._sem_total:
+            return super().get_paginated_response(data)
+
+        url = self.request.build_absolute_uri()
+        proxima = replace_query_param(url, self.page_query_param, self._numero + 1) if self._tem_proxima else None
+        if self._numero == 1:
+            anterior = None
+        elif self._numero == 2:
+            anterior = remove_query_param(url, self.page_query_param)
+        else:
+            anterior = replace_query_param(url, self.page_query_param, self._numero - 1)
+        return Response(OrderedDict([
+            ('count', None),
+            ('next', proxima),
+            ('previous', anterior),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        resposta = super().get_paginated_response_schema(schema)
+        resposta['properties']['count']['nullable'] = True
+        return resposta
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.sem_total_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'true: não calcula o total (count: null), mais rápido em tabelas grandes',
+                'schema': {'type': 'boolean'},
+            },
+            {
+                'name': self.modo_query_param,
+                'required': False,
+                'in': 'query',
+                'description': '"cursor": paginação por cursor (data_criacao, id)',
+                'schema': {'type': 'string', 'enum': ['cursor']},
+            },
+            {
+                'name': self.classe_cursor.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Cursor recebido em next/previous (modo cursor)',
+                'schema': {'type': 'string'},
+            },
+        ]
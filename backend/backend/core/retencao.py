@@ -0,0 +1,189 @@
+"""
+Retenção de notificações
+Tira da tabela Notificacao as notificações lidas antigas, que ninguém mais
+consulta, para a listagem e o badge trabalharem só com o histórico recente
+
+Fluxo:
+    1. Percorre Notificacao por faixas de PK (keyset: `pk > último`), com
+       no máximo `lote` linhas por vez - nenhuma consulta varre ou trava a
+       tabela inteira
+    2. Cada lote roda em uma transação curta: lê as linhas, grava no destino
+       (tabela NotificacaoArquivada ou arquivo JSONL) e apaga por PK
+    3. Só entram notificações lidas (a condição é conferida de novo dentro
+       da transação), então o contador de não lidas não muda
+    4. Uma pausa opcional entre lotes deixa o banco atender as requisições
+       (e as réplicas acompanharem) durante expurgos grandes
+"""
+
+import json
+import os
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Notificacao, NotificacaoArquivada
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Linhas por transação (lock curto, INSERT/DELETE de tamanho limitado)
+LOTE_ARQUIVAMENTO = 1000
+
+CAMPOS_CONTATO = ('contato_telefone', 'contato_email', 'contato_endereco')
+
+CAMPOS_LIDOS = ('id', 'usuario_id', 'tipo', 'titulo', 'mensagem', 'link', 'data_criacao') + CAMPOS_CONTATO
+
+
+def data_corte(dias: Optional[int] = None):
+    """Notificações lidas criadas antes deste instante podem ser arquivadas."""
+    if dias is None:
+        dias = settings.NOTIFICACOES_RETENCAO_DIAS
+    return timezone.now() - timedelta(days=dias)
+
+
+def _contato(linha: Dict) -> Optional[Dict]:
+    """Campos de contato preenchidos, ou None (a maioria das notificações)."""
+    return {campo: linha[campo] for campo in CAMPOS_CONTATO if linha[campo]} or None
+
+
+# ============================================
+# DESTINOS
+# ============================================
+
+class DestinoTabela:
+    """Arquiva em NotificacaoArquivada (mesmo banco, mesma transação do DELETE)."""
+
+    def gravar(self, linhas: List[Dict]) -> None:
+        NotificacaoArquivada.objects.bulk_create(
+            [
+                NotificacaoArquivada(
+                    id_original=linha['id'],
+                    usuario_id=linha['usuario_id'],
+                    tipo=linha['tipo'],
+                    titulo=linha['titulo'],
+                    mensagem=linha['mensagem'],
+                    link=linha['link'],
+                    contato=_contato(linha),
+                    data_criacao=linha['data_criacao'],
+                )
+                for linha in linhas
+            ],
+            # Lote reprocessado após uma falha no DELETE não duplica
+            ignore_conflicts=True,
+        )
+
+    def fechar(self) -> None:
+        pass
+
+
+class DestinoJsonl:
+    """
+    Arquiva em um arquivo JSONL (uma notificação por linha, modo append).
+
+    Cada lote é gravado e sincronizado em disco antes do DELETE. Se o
+    DELETE falhar, o lote pode aparecer duas vezes no arquivo: use
+    `id_original` para deduplicar.
+    """
+
+    def __init__(self, caminho):
+        self._arquivo = open(caminho, 'a', encoding='utf-8')
+
+    def gravar(self, linhas: List[Dict]) -> None:
+        for linha in linhas:
+            self._arquivo.write(json.dumps({
+                'id_original': linha['id'],
+                'usuario_id': linha['usuario_id'],
+                'tipo': linha['tipo'],
+                'titulo': linha['titulo'],
+                'mensagem': linha['mensagem'],
+                'link': linha['link'],
+                'contato': _contato(linha),
+                'data_criacao': linha['data_criacao'].isoformat(),
+            }, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+
+    def fechar(self) -> None:
+        self._arquivo.close()
+
+
+# ============================================
+# ARQUIVAMENTO
+# ============================================
+
+def candidatas(dias: Optional[int] = None):
+    """QuerySet das notificações que a retenção vai arquivar."""
+    return Notificacao.objects.filter(lida=True, data_criacao__lt=data_corte(dias))
+
+
+def arquivar_notificacoes(dias: Optional[int] = None, lote: int = LOTE_ARQUIVAMENTO, destino=None,
+                          pausa: float = 0.0, limite: Optional[int] = None,
+                          progresso: Optional[Callable[[int, float], None]] = None) -> Dict:
+    """
+    Arquiva e apaga notificações lidas mais antigas que `dias`, em lotes.
+
+    Args:
+        dias: Idade mínima (padrão: settings.NOTIFICACOES_RETENCAO_DIAS)
+        lote: Linhas por transação
+        destino: DestinoTabela (padrão) ou DestinoJsonl
+        pausa: Segundos de espera entre lotes
+        limite: Máximo de notificações nesta execução (None = todas)
+        progresso: Chamado após cada lote com (total_arquivadas, segundos)
+
+    Returns:
+        {'arquivadas': int, 'lotes': int, 'segundos': float, 'linhas_por_segundo': float}
+
+    Examples:
+        >>> arquivar_notificacoes(dias=180, lote=500, pausa=0.1)
+        {'arquivadas': 12000, 'lotes': 24, 'segundos': 3.1, 'linhas_por_segundo': 3870.9}
+    """
+    destino = destino or DestinoTabela()
+    corte = data_corte(dias)
+    inicio = time.perf_counter()
+    arquivadas = lotes = 0
+    ultimo_pk = 0
+
+    try:
+        while limite is None or arquivadas < limite:
+            tamanho = lote if limite is None else min(lote, limite - arquivadas)
+
+            # PASSO 1: Próxima faixa de PKs (fora da transação, só leitura do índice)
+            ids = list(
+                Notificacao.objects.filter(pk__gt=ultimo_pk, lida=True, data_criacao__lt=corte)
+                .order_by('pk').values_list('pk', flat=True)[:tamanho]
+            )
+            if not ids:
+                break
+            ultimo_pk = ids[-1]
+
+            # PASSO 2: Copia e apaga o lote em uma transação curta
+            with transaction.atomic():
+                linhas = list(
+                    Notificacao.objects.select_for_update()
+                    .filter(pk__in=ids, lida=True).values(*CAMPOS_LIDOS)
+                )
+                if linhas:
+                    destino.gravar(linhas)
+                    Notificacao.objects.filter(pk__in=[linha['id'] for linha in linhas]).delete()
+
+            arquivadas += len(linhas)
+            lotes += 1
+            if progresso:
+                progresso(arquivadas, time.perf_counter() - inicio)
+            if pausa:
+                time.sleep(pausa)
+    finally:
+        destino.fechar()
+    segundos = time.perf_counter() - inicio
+    return {
+        'arquivadas': arquivadas,
+        'lotes': lotes,
+        'segundos': segundos,
+        'linhas_por_segundo': arquivadas / segundos if segundos else 0.0,
+    }
@@ -1,24 +1,89 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.models import User
+from django.utils.text import get_valid_filename
 from .models import (
     Animal, Adocao, Usuario, AnimalFoto, AnimalVideo, 
     Denuncia, DenunciaImagem, DenunciaVideo, DenunciaHistorico,
     AnimalParaAdocao, SolicitacaoAdocao, Notificacao, Contato,
-    PetPerdido, PetPerdidoFoto, ReportePetEncontrado, ReportePetEncontradoFoto
+    PetPerdido, PetPerdidoFoto, ReportePetEncontrado, ReportePetEncontradoFoto,
+    SessaoUpload
 )
+from .geo import MemoDistancias
+from .imagens import srcset_imagem
+from .geocodificacao import geocodificar_reversa
+from .localidades import CAMPOS_LOCALIZACAO, municipio, municipio_aproximado, normalizar_uf
+from .validators import validate_video_metadata
+from .matching import MATCHES_EXIBIDOS
 from .utils import (
     sanitize_text_field, sanitize_multiline_text, sanitize_email,
     sanitize_phone_number, normalize_whitespace
 )
 
+class LocalizacaoValidadaMixin:
+    """
+    Cidade precisa ser município da UF informada (base do IBGE, core.localidades).
+
+    Acento e maiúsculas não importam: o save() grava o nome oficial. Nome
+    não reconhecido é recusado com 400, inclusive para clientes antigos que
+    mandam bairro ou distrito; com erro de digitação, a mensagem sugere o
+    município mais parecido da UF (municipio_aproximado) sem trocá-lo.
+    """
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'cidade' in attrs or 'estado' in attrs:
+            cidade = attrs.get('cidade', getattr(self.instance, 'cidade', None))
+            estado = attrs.get('estado', getattr(self.instance, 'estado', None))
+            if cidade and estado and municipio(cidade, estado) is None:
+                mensagem = f'Município "{cidade}" não encontrado em {normalizar_uf(estado)}.'
+                aproximado = municipio_aproximado(cidade, estado)
+                if aproximado is not None:
+                    mensagem += f' Você quis dizer "{aproximado.nome}"?'
+                raise serializers.ValidationError({'cidade': mensagem})
+        return attrs
+
+class LocalizacaoPorCoordenadasMixin:
+    """
+    Cidade/estado opcionais na criação: se faltarem, vêm da geocodificação reversa de latitude/longitude.
+
+    Usa só o cache e os provedores sem rede (sede do município mais próxima).
+
+    Assim o pet perdido e o reporte gravam a mesma cidade canônica para o
+    mesmo ponto do mapa, e o matching por cidade os encontra.
+    """
+
+    def get_fields(self):
+        campos = super().get_fields()
+        for nome in CAMPOS_LOCALIZACAO:
+            campos[nome].required = False
+        return campos
+
+    def validate(self, attrs):
+        if self.instance is None and not (attrs.get('cidade') and attrs.get('estado')):
+            latitude, longitude = attrs.get('latitude'), attrs.get('longitude')
+            resultado = None
+            if latitude is not None and longitude is not None:
+                # Só cache e base offline: o cadastro não espera pelo Nominatim
+                resultado, _ = geocodificar_reversa(latitude, longitude, somente_local=True)
+            if not resultado or not resultado['cidade'] or not resultado['estado']:
+                raise serializers.ValidationError({
+                    'cidade': 'Informe cidade e estado (não foi possível obtê-los pelas coordenadas).'
+                })
+            attrs['cidade'] = attrs.get('cidade') or resultado['cidade']
+            attrs['estado'] = attrs.get('estado') or resultado['estado']
+        return super().validate(attrs)
+
 class AnimalSerializer(serializers.ModelSerializer):
     imagem_absolute = serializers.SerializerMethodField()
+    imagem_srcset = serializers.SerializerMethodField()
     fotos_urls = serializers.SerializerMethodField()
+    fotos_srcset = serializers.SerializerMethodField()
     videos_urls = serializers.SerializerMethodField()
 
     class Meta:
         model = Animal
-        fields = ['id','nome','tipo','porte','sexo','raca','idade_anos','descricao','estado','cidade','status','data_criacao','data_atualizacao','imagem_url','imagem_absolute','fotos_urls','videos_urls']
+        fields = ['id','nome','tipo','porte','sexo','raca','idade_anos','descricao','estado','cidade','status','data_criacao','data_atualizacao','imagem_url','imagem_absolute','imagem_srcset','fotos_urls','fotos_srcset','videos_urls']
 
     def get_imagem_absolute(self, obj):
         request = self.context.get('request')
@@ -43,6 +108,18 @@ class AnimalSerializer(serializers.ModelSerializer):
                 urls.append(f.url)
         return urls
 
+    def get_imagem_srcset(self, obj):
+        return srcset_imagem(obj.imagem, obj.imagem_derivadas, self.context.get('request'))
+
+    def get_fotos_srcset(self, obj):
+        # Mesma ordem de fotos_urls; None para fotos externas ou ainda sem derivadas
+        request = self.context.get('request')
+        return [
+            srcset_imagem(f.imagem, f.imagem_derivadas, request)
+            for f in obj.fotos.all()
+            if (getattr(f, 'imagem', None) and f.imagem) or f.url
+        ]
+
     def get_videos_urls(self, obj):
         return [v.url for v in obj.videos.all()]
 
@@ -147,6 +224,7 @@ class DenunciaSerializer(serializers.ModelSerializer):
     imagem_url = serializers.SerializerMethodField()
     video_url = serializers.SerializerMethodField()
     imagens_urls = serializers.SerializerMethodField()
+    imagens_srcset = serializers.SerializerMethodField()
     videos_urls = serializers.SerializerMethodField()
     historico = serializers.SerializerMethodField()
 
@@ -154,7 +232,7 @@ class DenunciaSerializer(serializers.ModelSerializer):
         model = Denuncia
         fields = [
             'id', 'titulo', 'categoria', 'categoria_display', 'descricao', 'localizacao', 
-            'imagem', 'video', 'imagem_url', 'video_url', 'imagens_urls', 'videos_urls',
+            'imagem', 'video', 'imagem_url', 'video_url', 'imagens_urls', 'imagens_srcset', 'videos_urls',
             'status', 'usuario', 'usuario_nome', 'moderador', 'moderador_nome',
             'observacoes_moderador', 'data_criacao', 'data_atualizacao', 'historico'
         ]
@@ -190,6 +268,15 @@ class DenunciaSerializer(serializers.ModelSerializer):
                     urls.append(url)
         return urls
     
+    def get_imagens_srcset(self, obj):
+        # Mesma ordem de imagens_urls
+        request = self.context.get('request')
+        return [
+            srcset_imagem(img.imagem, img.imagem_derivadas, request)
+            for img in obj.imagens_adicionais.all()
+            if img.imagem and hasattr(img.imagem, 'url')
+        ]
+    
     def get_videos_urls(self, obj):
         request = self.context.get('request')
         urls = []
@@ -203,8 +290,9 @@ class DenunciaSerializer(serializers.ModelSerializer):
         return urls
     
     def get_historico(self, obj):
-        historico_qs = obj.historico.all().order_by('-data_criacao')
-        return DenunciaHistoricoSerializer(historico_qs, many=True).data
+        # .all() sem order_by: usa o Prefetch da view, já ordenado por -data_criacao
+        # (mesma ordem do Meta.ordering de DenunciaHistorico fora da view)
+        return DenunciaHistoricoSerializer(obj.historico.all(), many=True).data
 
     def create(self, validated_data):
         # SANITIZAÇÃO: Processa campos de texto
@@ -236,6 +324,30 @@ class DenunciaSerializer(serializers.ModelSerializer):
         return denuncia
 
 
+class SessaoUploadSerializer(serializers.ModelSerializer):
+    """Sessão de upload de vídeo em pedaços (core.uploads)."""
+    
+    class Meta:
+        model = SessaoUpload
+        fields = [
+            'id', 'nome_arquivo', 'content_type', 'tamanho_total', 'recebidos',
+            'status', 'denuncia', 'expira_em', 'data_criacao'
+        ]
+        read_only_fields = ['recebidos', 'status', 'denuncia', 'expira_em', 'data_criacao']
+    
+    def validate(self, attrs):
+        # Tamanho, extensão e MIME type já na abertura: nada é enviado à toa
+        try:
+            validate_video_metadata(attrs['nome_arquivo'], attrs['tamanho_total'], attrs.get('content_type'))
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'nome_arquivo': e.messages})
+        if attrs['tamanho_total'] == 0:
+            raise serializers.ValidationError({'tamanho_total': 'O vídeo está vazio.'})
+        # Vira nome de arquivo no storage ao anexar o vídeo
+        attrs['nome_arquivo'] = get_valid_filename(attrs['nome_arquivo'])
+        return attrs
+
+
 class DenunciaHistoricoSerializer(serializers.ModelSerializer):
     usuario_nome = serializers.CharField(source='usuario.get_full_name', read_only=True)
     tipo_display = serializers.CharField(source='get_tipo_display', read_only=True)
@@ -247,13 +359,14 @@ class DenunciaHistoricoSerializer(serializers.ModelSerializer):
         read_only_fields = ['data_criacao']
 
 
-class AnimalParaAdocaoSerializer(serializers.ModelSerializer):
+class AnimalParaAdocaoSerializer(LocalizacaoValidadaMixin, serializers.ModelSerializer):
     usuario_doador_nome = serializers.CharField(source='usuario_doador.user.get_full_name', read_only=True)
     especie_display = serializers.CharField(source='get_especie_display', read_only=True)
     porte_display = serializers.CharField(source='get_porte_display', read_only=True)
     sexo_display = serializers.CharField(source='get_sexo_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     imagem_principal_url = serializers.SerializerMethodField()
+    imagem_principal_srcset = serializers.SerializerMethodField()
     imagens_adicionais = serializers.SerializerMethodField()
     # Endereço é oculto por padrão, será revelado apenas após aprovação da adoção
     endereco_completo = serializers.SerializerMethodField()
@@ -266,7 +379,7 @@ class AnimalParaAdocaoSerializer(serializers.ModelSerializer):
             'cor', 'idade', 'descricao', 'temperamento', 'historico_saude',
             'caracteristicas_especiais', 'estado', 'cidade', 'endereco_completo', 
             'telefone', 'email', 'imagem_principal', 'imagem_principal_url',
-            'imagens_adicionais', 'status', 'status_display', 'data_cadastro', 
+            'imagem_principal_srcset', 'imagens_adicionais', 'status', 'status_display', 'data_cadastro', 
             'data_aprovacao'
         ]
         read_only_fields = ['usuario_doador', 'status', 'data_cadastro', 'data_aprovacao']
@@ -280,6 +393,9 @@ class AnimalParaAdocaoSerializer(serializers.ModelSerializer):
             return url
         return None
     
+    def get_imagem_principal_srcset(self, obj):
+        return srcset_imagem(obj.imagem_principal, obj.imagem_derivadas, self.context.get('request'))
+    
     def get_imagens_adicionais(self, obj):
         # Placeholder para futuras imagens adicionais
         return []
@@ -325,6 +441,43 @@ class AnimalParaAdocaoSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class MeuPetCadastradoSerializer(serializers.ModelSerializer):
+    """
+    Item do painel "Meus pets cadastrados" (doador).
+    
+    Mesmo formato que a página minhas-solicitacoes.html já consome. Os
+    contadores vêm anotados pela MeusPetsCadastradosView (total_solicitacoes,
+    solicitacoes_pendentes) - nenhuma consulta extra por pet.
+    """
+    especie_display = serializers.CharField(source='get_especie_display', read_only=True)
+    porte_display = serializers.SerializerMethodField()
+    sexo_display = serializers.CharField(source='get_sexo_display', read_only=True)
+    imagem_principal_url = serializers.SerializerMethodField()
+    # Datetime bruto: renderizado pelo JSONEncoder do DRF como na resposta montada à mão
+    data_cadastro = serializers.ReadOnlyField()
+    total_solicitacoes = serializers.IntegerField(read_only=True)
+    solicitacoes_pendentes = serializers.IntegerField(read_only=True)
+    
+    class Meta:
+        model = AnimalParaAdocao
+        fields = [
+            'id', 'nome', 'especie_display', 'porte_display', 'sexo', 'sexo_display',
+            'cor', 'idade', 'descricao', 'cidade', 'estado', 'status',
+            'imagem_principal_url', 'data_cadastro', 'total_solicitacoes',
+            'solicitacoes_pendentes'
+        ]
+        read_only_fields = fields
+    
+    def get_porte_display(self, obj):
+        return obj.get_porte_display() if obj.porte else 'Não informado'
+    
+    def get_imagem_principal_url(self, obj):
+        request = self.context.get('request')
+        if obj.imagem_principal:
+            return request.build_absolute_uri(obj.imagem_principal.url)
+        return None
+
+
 class SolicitacaoAdocaoSerializer(serializers.ModelSerializer):
     usuario_interessado_nome = serializers.CharField(source='usuario_interessado.user.get_full_name', read_only=True)
     animal_nome = serializers.CharField(source='animal.nome', read_only=True)
@@ -416,10 +569,11 @@ class ContatoSerializer(serializers.ModelSerializer):
 # ===== PET PERDIDO =====
 class PetPerdidoFotoSerializer(serializers.ModelSerializer):
     imagem_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = PetPerdidoFoto
-        fields = ['id', 'imagem', 'imagem_url', 'descricao', 'data_criacao']
+        fields = ['id', 'imagem', 'imagem_url', 'srcset', 'descricao', 'data_criacao']
     
     def get_imagem_url(self, obj):
         request = self.context.get('request')
@@ -429,12 +583,16 @@ class PetPerdidoFotoSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(url)
             return url
         return None
+    
+    def get_srcset(self, obj):
+        return srcset_imagem(obj.imagem, obj.imagem_derivadas, self.context.get('request'))
 
 
-class PetPerdidoSerializer(serializers.ModelSerializer):
+class PetPerdidoSerializer(LocalizacaoPorCoordenadasMixin, LocalizacaoValidadaMixin, serializers.ModelSerializer):
     """Serializer para pets perdidos"""
     fotos_adicionais = PetPerdidoFotoSerializer(many=True, read_only=True)
     imagem_principal_url = serializers.SerializerMethodField()
+    imagem_principal_srcset = serializers.SerializerMethodField()
     usuario_nome = serializers.SerializerMethodField()
     especie_display = serializers.CharField(source='get_especie_display', read_only=True)
     porte_display = serializers.CharField(source='get_porte_display', read_only=True)
@@ -451,7 +609,7 @@ class PetPerdidoSerializer(serializers.ModelSerializer):
             'data_perda', 'hora_perda', 'latitude', 'longitude', 'endereco',
             'bairro', 'cidade', 'estado', 'telefone_contato', 'email_contato',
             'whatsapp', 'oferece_recompensa', 'valor_recompensa',
-            'imagem_principal', 'imagem_principal_url', 'fotos_adicionais',
+            'imagem_principal', 'imagem_principal_url', 'imagem_principal_srcset', 'fotos_adicionais',
             'status', 'status_display', 'ativo', 'visualizacoes',
             'data_criacao', 'data_atualizacao', 'data_encontrado',
             'total_reportes'
@@ -467,6 +625,9 @@ class PetPerdidoSerializer(serializers.ModelSerializer):
             return url
         return None
     
+    def get_imagem_principal_srcset(self, obj):
+        return srcset_imagem(obj.imagem_principal, obj.imagem_derivadas, self.context.get('request'))
+    
     def get_usuario_nome(self, obj):
         if obj.usuario and obj.usuario.user:
             return obj.usuario.user.get_full_name() or obj.usuario.user.username
@@ -474,6 +635,10 @@ class PetPerdidoSerializer(serializers.ModelSerializer):
     
     def get_total_reportes(self, obj):
         """Retorna quantidade de reportes de pets encontrados relacionados"""
+        # Anotado pelo PetPerdidoViewSet; COUNT avulso só fora da listagem
+        total = getattr(obj, 'total_reportes', None)
+        if total is not None:
+            return total
         return obj.reportes_relacionados.filter(status='pendente').count()
     
     def create(self, validated_data):
@@ -505,10 +670,11 @@ class PetPerdidoSerializer(serializers.ModelSerializer):
 # ===== PET ENCONTRADO =====
 class ReportePetEncontradoFotoSerializer(serializers.ModelSerializer):
     imagem_url = serializers.SerializerMethodField()
+    srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = ReportePetEncontradoFoto
-        fields = ['id', 'imagem', 'imagem_url', 'descricao', 'data_criacao']
+        fields = ['id', 'imagem', 'imagem_url', 'srcset', 'descricao', 'data_criacao']
     
     def get_imagem_url(self, obj):
         request = self.context.get('request')
@@ -518,12 +684,16 @@ class ReportePetEncontradoFotoSerializer(serializers.ModelSerializer):
                 return request.build_absolute_uri(url)
             return url
         return None
+    
+    def get_srcset(self, obj):
+        return srcset_imagem(obj.imagem, obj.imagem_derivadas, self.context.get('request'))
 
 
-class ReportePetEncontradoSerializer(serializers.ModelSerializer):
+class ReportePetEncontradoSerializer(LocalizacaoPorCoordenadasMixin, LocalizacaoValidadaMixin, serializers.ModelSerializer):
     """Serializer para reportes de pets encontrados"""
     fotos_adicionais = ReportePetEncontradoFotoSerializer(many=True, read_only=True)
     imagem_principal_url = serializers.SerializerMethodField()
+    imagem_principal_srcset = serializers.SerializerMethodField()
     usuario_nome = serializers.SerializerMethodField()
     especie_display = serializers.CharField(source='get_especie_display', read_only=True)
     porte_display = serializers.CharField(source='get_porte_display', read_only=True)
@@ -541,7 +711,7 @@ class ReportePetEncontradoSerializer(serializers.ModelSerializer):
             'caracteristicas_distintivas', 'data_encontro', 'hora_encontro',
             'latitude', 'longitude', 'endereco', 'bairro', 'cidade', 'estado',
             'pet_com_usuario', 'local_temporario', 'imagem_principal',
-            'imagem_principal_url', 'fotos_adicionais', 'possiveis_matches',
+            'imagem_principal_url', 'imagem_principal_srcset', 'fotos_adicionais', 'possiveis_matches',
             'possiveis_matches_detalhes', 'pet_perdido_confirmado',
             'pet_perdido_confirmado_detalhes', 'status', 'status_display',
             'analisado_por', 'observacoes_admin', 'data_criacao', 'data_analise',
@@ -562,6 +732,9 @@ class ReportePetEncontradoSerializer(serializers.ModelSerializer):
             return url
         return None
     
+    def get_imagem_principal_srcset(self, obj):
+        return srcset_imagem(obj.imagem_principal, obj.imagem_derivadas, self.context.get('request'))
+    
     def get_usuario_nome(self, obj):
         if obj.usuario and obj.usuario.user:
             return obj.usuario.user.get_full_name() or obj.usuario.user.username
@@ -569,17 +742,33 @@ class ReportePetEncontradoSerializer(serializers.ModelSerializer):
     
     def get_possiveis_matches_detalhes(self, obj):
         """Retorna detalhes resumidos dos possíveis matches"""
-        matches = obj.possiveis_matches.all()[:5]  # Limita a 5 matches
-        return [{
-            'id': m.id,
-            'nome': m.nome,
-            'especie': m.get_especie_display(),
-            'cor': m.cor,
-            'cidade': m.cidade,
-            'estado': m.estado,
-            'distancia_km': self._calcular_distancia(obj.latitude, obj.longitude, m.latitude, m.longitude),
-            'telefone_contato': m.telefone_contato if self.context.get('show_contact') else None
-        } for m in matches]
+        # Melhores matches pelo score gravado no matching (top MATCHES_EXIBIDOS)
+        # A view já traz o ranking via prefetch_matches_ranqueados; fora dela,
+        # uma consulta indexada por reporte
+        matches = getattr(obj, 'matches_ranqueados', None)
+        if matches is None:
+            matches = obj.matches.select_related('pet_perdido')[:MATCHES_EXIBIDOS]
+        # Distância já vem gravada no match; o memo cobre linhas antigas sem ela
+        memo = self.context.setdefault('memo_distancias', MemoDistancias())
+        detalhes = []
+        for match in matches:
+            m = match.pet_perdido
+            distancia = match.distancia_km
+            if distancia is None:
+                distancia = memo.distancia(obj.latitude, obj.longitude, m.latitude, m.longitude)
+            detalhes.append({
+                'id': m.id,
+                'nome': m.nome,
+                'especie': m.get_especie_display(),
+                'cor': m.cor,
+                'cidade': m.cidade,
+                'estado': m.estado,
+                'distancia_km': round(distancia, 2),
+                'score': match.score,
+                'criterios': match.criterios,
+                'telefone_contato': m.telefone_contato if self.context.get('show_contact') else None
+            })
+        return detalhes
     
     def get_pet_perdido_confirmado_detalhes(self, obj):
         """Retorna detalhes do pet perdido confirmado como match"""
@@ -598,25 +787,6 @@ class ReportePetEncontradoSerializer(serializers.ModelSerializer):
             }
         return None
     
-    def _calcular_distancia(self, lat1, lon1, lat2, lon2):
-        """Calcula distância aproximada em km entre duas coordenadas"""
-        from math import radians, sin, cos, sqrt, atan2
-        
-        # Raio da Terra em km
-        R = 6371.0
-        
-        lat1, lon1, lat2, lon2 = map(float, [lat1, lon1, lat2, lon2])
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        
-        a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        
-        distancia = R * c
-        return round(distancia, 2)
-    
     def create(self, validated_data):
         # SANITIZAÇÃO: Processa campos de texto
         if 'nome_pessoa' in validated_data:
@@ -0,0 +1,114 @@
+"""
+Sinais do app core
+Conectados em CoreConfig.ready()
+"""
+
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from .busca import CAMPOS_BUSCA, indexar, remover_do_indice
+from .cache import MODELOS_INVALIDAM, invalidar_modelo
+
+from .imagens import CAMPOS_COM_DERIVADAS
+
+
+# ============================================
+# DERIVADAS DE IMAGEM
+# ============================================
+
+def agendar_derivadas(sender, instance, created=False, update_fields=None, **kwargs):
+    """
+    Enfileira a geração de derivadas quando a imagem do registro muda.
+
+    Não faz nada se a imagem está vazia, se as derivadas já são do arquivo
+    atual ou se o save atualizou só outros campos (ex: contador de
+    visualizações). Atenção: bulk_create não dispara post_save - quem criar
+    registros em lote deve chamar `enfileirar('gerar_derivadas_imagem', ...)`.
+    """
+    from .tarefas import enfileirar
+
+    campo = CAMPOS_COM_DERIVADAS[sender._meta.label]
+    if update_fields is not None and campo not in update_fields:
+        return
+    arquivo = getattr(instance, campo)
+    if not arquivo or (instance.imagem_derivadas or {}).get('origem') == arquivo.name:
+        return
+    enfileirar('gerar_derivadas_imagem', modelo=sender._meta.label, pk=instance.pk)
+
+
+# ============================================
+# CONTADOR DE NOTIFICAÇÕES NÃO LIDAS
+# ============================================
+
+def contar_notificacao_criada(sender, instance, created=False, raw=False, **kwargs):
+    """
+    Incrementa o contador do destinatário em um `Notificacao.objects.create`.
+
+    O serviço (core.notificacoes) cria em lote com bulk_create, que não
+    dispara post_save, e atualiza o contador ele mesmo; este receiver cobre
+    criações avulsas (admin, shell, testes).
+    """
+    if created and not raw and not instance.lida:
+        from .notificacoes import ajustar_contadores
+        ajustar_contadores({instance.usuario_id: 1})
+
+
+# ============================================
+# CACHE DAS LISTAGENS PÚBLICAS
+# ============================================
+
+def invalidar_cache_listagens(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Descarta as listagens em cache que mostram o registro salvo/removido.
+
+    Saves que alteram só campos fora das listagens (contador de
+    visualizações, last_login) são ignorados. QuerySet.update() não
+    dispara signals: quem atualiza em massa chama `invalidar_modelo`.
+    """
+    if raw:
+        return
+    invalidar_modelo(sender._meta.label, update_fields)
+
+
+# ============================================
+# ÍNDICE DE BUSCA TEXTUAL
+# ============================================
+
+def indexar_busca(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Reindexa o registro quando algum campo de busca pode ter mudado.
+
+    Saves com update_fields fora de CAMPOS_BUSCA (visualizações, status)
+    não tocam no índice.
+    """
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_BUSCA[sender._meta.label]):
+        return
+    indexar(instance)
+
+
+def remover_busca(sender, instance, **kwargs):
+    remover_do_indice(instance)
+
+
+def conectar():
+    """Registra os receivers (chamado uma vez em CoreConfig.ready)."""
+    post_save.connect(
+        contar_notificacao_criada, sender=apps.get_model('core.Notificacao'),
+        dispatch_uid='contar_notificacao_criada',
+    )
+    for label in CAMPOS_COM_DERIVADAS:
+        post_save.connect(
+            agendar_derivadas, sender=apps.get_model(label),
+            dispatch_uid=f'agendar_derivadas_{label}',
+        )
+    for label in MODELOS_INVALIDAM:
+        for nome, sinal in (('save', post_save), ('delete', post_delete)):
+            sinal.connect(
+                invalidar_cache_listagens, sender=apps.get_model(label),
+                dispatch_uid=f'invalidar_cache_{nome}_{label}',
+            )
+    for label in CAMPOS_BUSCA:
+        post_save.connect(indexar_busca, sender=apps.get_model(label), dispatch_uid=f'indexar_busca_{label}')
+        post_delete.connect(remover_busca, sender=apps.get_model(label), dispatch_uid=f'remover_busca_{label}')
@@ -0,0 +1,396 @@
+"""
+Fila de tarefas em segundo plano sobre o banco de dados
+Tira do ciclo da requisição o trabalho pesado (matching, notificações em massa)
+
+Fluxo:
+    1. A view chama `enfileirar(...)` na mesma transação em que salva o registro
+    2. O worker (`python manage.py processar_tarefas`) reserva a próxima tarefa
+       pendente com um UPDATE condicional (seguro com vários workers)
+    3. A tarefa roda dentro de uma transação; em caso de erro, nada é gravado
+       e ela volta para a fila com backoff exponencial até `max_tentativas`
+"""
+
+import logging
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import invalidar_modelo
+from .models import Notificacao, PetPerdido, ReportePetEncontrado, Tarefa
+from .notificacoes import criar_notificacoes, notificar, notificar_admins
+
+logger = logging.getLogger(__name__)
+
+
+# ============================================
+# REGISTRO DE TAREFAS
+# ============================================
+
+# Nome da tarefa -> função executada pelo worker
+_REGISTRO: Dict[str, Callable[..., None]] = {}
+
+# Espera base entre tentativas (dobra a cada falha: 30s, 60s, 120s...)
+BACKOFF_BASE_SEGUNDOS = 30
+
+
+def tarefa(nome: str) -> Callable:
+    """
+    Decorator que registra uma função como tarefa executável pelo worker.
+
+    Args:
+        nome: Nome usado em `enfileirar` e gravado em Tarefa.tipo
+
+    Examples:
+        >>> @tarefa('enviar_boas_vindas')
+        ... def enviar_boas_vindas(usuario_id):
+        ...     ...
+    """
+    def registrar(func: Callable[..., None]) -> Callable[..., None]:
+        _REGISTRO[nome] = func
+        return func
+    return registrar
+
+
+def enfileirar(tipo: str, *, atraso: Optional[timedelta] = None,
+               max_tentativas: int = 5, **payload) -> Tarefa:
+    """
+    Grava uma tarefa na fila.
+
+    Deve ser chamada dentro da transação que criou os dados usados pela
+    tarefa: se a transação for desfeita, a tarefa também é. Com
+    TAREFAS_SINCRONAS=True (testes/dev sem worker) a tarefa é executada
+    no próprio processo logo após o commit.
+
+    Args:
+        tipo: Nome de uma tarefa registrada com @tarefa
+        atraso: Adia a execução (opcional)
+        max_tentativas: Tentativas antes de marcar como 'falhou'
+        **payload: Argumentos da tarefa (devem ser serializáveis em JSON)
+
+    Returns:
+        Tarefa criada
+
+    Raises:
+        ValueError: Se o tipo não estiver registrado
+    """
+    if tipo not in _REGISTRO:
+        raise ValueError(f'Tarefa desconhecida: {tipo}')
+
+    nova = Tarefa.objects.create(
+        tipo=tipo,
+        payload=payload,
+        max_tentativas=max_tentativas,
+        agendada_para=timezone.now() + (atraso or timedelta()),
+    )
+
+    if getattr(settings, 'TAREFAS_SINCRONAS', False) and not atraso:
+        transaction.on_commit(lambda: executar(nova.pk))
+
+    return nova
+
+
+def enfileirar_em_lote(tipo: str, payloads: List[Dict], *, max_tentativas: int = 5) -> List[Tarefa]:
+    """
+    Grava várias tarefas do mesmo tipo com um único INSERT.
+
+    Mesmas regras de `enfileirar` (transação, TAREFAS_SINCRONAS); usada
+    quando os registros de origem também são criados em lote.
+
+    Args:
+        tipo: Nome de uma tarefa registrada com @tarefa
+        payloads: Argumentos de cada tarefa
+        max_tentativas: Tentativas antes de marcar como 'falhou'
+
+    Returns:
+        Tarefas criadas
+
+    Examples:
+        >>> enfileirar_em_lote('gerar_derivadas_imagem', [{'modelo': 'core.PetPerdidoFoto', 'pk': 1}, ...])
+    """
+    if tipo not in _REGISTRO:
+        raise ValueError(f'Tarefa desconhecida: {tipo}')
+    if not payloads:
+        return []
+
+    agora = timezone.now()
+    novas = Tarefa.objects.bulk_create([
+        Tarefa(tipo=tipo, payload=payload, max_tentativas=max_tentativas, agendada_para=agora)
+        for payload in payloads
+    ])
+
+    if getattr(settings, 'TAREFAS_SINCRONAS', False):
+        # Sem id (MySQL não retorna ids no INSERT em lote): o worker executa
+        transaction.on_commit(lambda: processar_pendentes(tipos=[tipo]))
+
+    return novas
+
+
+# ============================================
+# EXECUÇÃO (WORKER)
+# ============================================
+
+def _reservar(pk: int) -> Optional[Tarefa]:
+    """Marca a tarefa como 'processando' se ela ainda estiver pendente."""
+    reservadas = Tarefa.objects.filter(pk=pk, status='pendente').update(
+        status='processando',
+        iniciada_em=timezone.now(),
+        tentativas=F('tentativas') + 1,
+    )
+    # Outro worker chegou primeiro
+    if not reservadas:
+        return None
+    return Tarefa.objects.get(pk=pk)
+
+
+def reservar_proxima(tipos: Optional[Iterable[str]] = None) -> Optional[Tarefa]:
+    """
+    Reserva a próxima tarefa pendente cujo horário já chegou.
+
+    Args:
+        tipos: Restringe a busca a estes tipos (opcional)
+
+    Returns:
+        Tarefa reservada ou None se a fila estiver vazia
+    """
+    candidatas = Tarefa.objects.filter(status='pendente', agendada_para__lte=timezone.now())
+    if tipos:
+        candidatas = candidatas.filter(tipo__in=list(tipos))
+
+    # Lê alguns ids de uma vez: se outro worker reservar o primeiro,
+    # tenta o seguinte sem voltar ao banco para uma nova consulta
+    for pk in candidatas.order_by('agendada_para', 'id').values_list('pk', flat=True)[:10]:
+        reservada = _reservar(pk)
+        if reservada is not None:
+            return reservada
+    return None
+
+
+def executar(tarefa_ou_pk) -> bool:
+    """
+    Executa uma tarefa e registra o resultado.
+
+    Aceita uma Tarefa já reservada (vinda de `reservar_proxima`) ou o id de
+    uma tarefa pendente, que é reservada antes da execução.
+
+    Returns:
+        True se a tarefa foi concluída, False se falhou ou já foi reservada
+    """
+    if isinstance(tarefa_ou_pk, Tarefa):
+        atual = tarefa_ou_pk
+    else:
+        atual = _reservar(tarefa_ou_pk)
+        if atual is None:
+            return False
+
+    funcao = _REGISTRO.get(atual.tipo)
+    try:
+        if funcao is None:
+            raise LookupError(f'Tarefa desconhecida: {atual.tipo}')
+        # Tudo ou nada: uma falha no meio não deixa notificações duplicadas
+        # quando a tarefa for executada novamente
+        with transaction.atomic():
+            funcao(**atual.payload)
+    except Exception as exc:  # noqa: BLE001 - qualquer erro volta para a fila
+        _registrar_falha(atual, exc)
+        return False
+
+    Tarefa.objects.filter(pk=atual.pk).update(
+        status='concluida',
+        concluida_em=timezone.now(),
+        erro='',
+    )
+    return True
+
+
+def _registrar_falha(atual: Tarefa, exc: Exception) -> None:
+    """Reagenda a tarefa com backoff exponencial ou marca como 'falhou'."""
+    erro = f'{type(exc).__name__}: {exc}'
+    if atual.tentativas >= atual.max_tentativas:
+        logger.error('Tarefa %s falhou definitivamente: %s', atual, erro, exc_info=exc)
+        Tarefa.objects.filter(pk=atual.pk).update(status='falhou', erro=erro)
+        return
+
+    espera = timedelta(seconds=BACKOFF_BASE_SEGUNDOS * 2 ** (atual.tentativas - 1))
+    logger.warning('Tarefa %s falhou (tentativa %s), nova tentativa em %s: %s',
+                   atual, atual.tentativas, espera, erro)
+    Tarefa.objects.filter(pk=atual.pk).update(
+        status='pendente',
+        erro=erro,
+        agendada_para=timezone.now() + espera,
+    )
+
+
+def processar_pendentes(limite: Optional[int] = None,
+                        tipos: Optional[Iterable[str]] = None) -> int:
+    """
+    Executa tarefas pendentes até a fila esvaziar (ou atingir o limite).
+
+    Returns:
+        Quantidade de tarefas executadas (concluídas ou não)
+    """
+    executadas = 0
+    while limite is None or executadas < limite:
+        proxima = reservar_proxima(tipos)
+        if proxima is None:
+            break
+        executar(proxima)
+        executadas += 1
+    return executadas
+
+
+def reprocessar_falhas(tipos: Optional[Iterable[str]] = None) -> int:
+    """Devolve para a fila as tarefas marcadas como 'falhou' (zera tentativas)."""
+    falhas = Tarefa.objects.filter(status='falhou')
+    if tipos:
+        falhas = falhas.filter(tipo__in=list(tipos))
+    return falhas.update(status='pendente', tentativas=0, agendada_para=timezone.now())
+
+
+def liberar_travadas(timeout: timedelta) -> int:
+    """
+    Devolve para a fila tarefas 'processando' há mais tempo que o timeout.
+
+    Acontece quando um worker é encerrado no meio de uma tarefa; como a
+    execução é transacional, nada dela foi gravado.
+    """
+    return Tarefa.objects.filter(
+        status='processando',
+        iniciada_em__lt=timezone.now() - timeout,
+    ).update(status='pendente', agendada_para=timezone.now())
+
+
+# ============================================
+# TAREFAS
+# ============================================
+
+@tarefa('processar_reporte_encontrado')
+def processar_reporte_encontrado(reporte_id: int) -> None:
+    """
+    Matching automático e notificações de um novo reporte de pet encontrado.
+
+    Args:
+        reporte_id: ID do ReportePetEncontrado
+    """
+    from .matching import buscar_matches_automaticos
+
+    reporte = ReportePetEncontrado.objects.filter(pk=reporte_id).first()
+    # Reporte removido antes de a tarefa rodar: nada a fazer
+    if reporte is None:
+        return
+
+    # PASSO 1: MATCHING AUTOMÁTICO - Busca pets perdidos similares
+    # Algoritmo compara: espécie, porte, cor, localização geográfica (até 10km)
+    # e cria lista de possíveis matches baseado em score de similaridade
+    matches = buscar_matches_automaticos(reporte)
+
+    # PASSO 2: Notifica todos os administradores sobre novo reporte
+    # Admins precisam moderar/aprovar reportes antes de ficarem públicos
+    notificar_admins(
+        tipo='denuncia',
+        titulo='Pet encontrado - Novo reporte',
+        mensagem=f'Pet {reporte.get_especie_display()} encontrado em {reporte.cidade}/{reporte.estado}',
+        link='/admin-panel/?tab=pets-encontrados'
+    )
+
+    # PASSO 3: Se matching encontrou possíveis donos, notifica cada um deles
+    # Aumenta chances de reunir pet perdido com seu dono rapidamente
+    criar_notificacoes([
+        Notificacao(
+            usuario_id=pet_perdido.usuario_id,
+            tipo='interesse_adocao',  # Reutilizando tipo existente
+            titulo='Possível match encontrado!',
+            mensagem=f'Um pet similar ao {pet_perdido.nome} foi encontrado em {reporte.cidade}/{reporte.estado}',
+            link=f'/minhas-solicitacoes/?tab=pets-perdidos'
+        )
+        for pet_perdido in matches
+    ])
+
+
+@tarefa('processar_pet_perdido')
+def processar_pet_perdido(pet_id: int) -> None:
+    """
+    Matching reverso de um pet perdido recém-cadastrado.
+
+    Compara o pet com os reportes de pets encontrados em aberto e, se
+    houver possíveis matches, avisa o dono.
+
+    Args:
+        pet_id: ID do PetPerdido
+    """
+    from .matching import buscar_reportes_para_pet
+
+    pet = PetPerdido.objects.filter(pk=pet_id, status='perdido', ativo=True).first()
+    # Pet removido ou já encontrado antes de a tarefa rodar
+    if pet is None:
+        return
+
+    reportes = buscar_reportes_para_pet(pet)
+
+    # Alguém já pode ter encontrado o pet: avisa o dono uma única vez
+    if reportes:
+        notificar(
+            pet.usuario_id,
+            tipo='interesse_adocao',  # Reutilizando tipo existente
+            titulo='Possível match encontrado!',
+            mensagem=f'{len(reportes)} pet(s) encontrado(s) em {pet.cidade}/{pet.estado} parecido(s) com {pet.nome}',
+            link='/minhas-solicitacoes/?tab=pets-perdidos'
+        )
+
+
+@tarefa('gerar_derivadas_imagem')
+def gerar_derivadas_imagem(modelo: str, pk: int) -> None:
+    """
+    Gera miniatura/card/full (WebP e JPEG) da imagem de um registro.
+
+    Args:
+        modelo: Label do modelo (ex: 'core.PetPerdido'), um de
+            core.imagens.CAMPOS_COM_DERIVADAS
+        pk: ID do registro
+    """
+    from django.apps import apps
+    from .imagens import CAMPOS_COM_DERIVADAS, gerar_derivadas, remover_derivadas
+
+    campo = CAMPOS_COM_DERIVADAS[modelo]
+    Modelo = apps.get_model(modelo)
+    registro = Modelo.objects.filter(pk=pk).only('pk', campo, 'imagem_derivadas').first()
+    # Registro removido ou imagem apagada antes de a tarefa rodar
+    if registro is None or not getattr(registro, campo):
+        return
+    arquivo = getattr(registro, campo)
+    anteriores = registro.imagem_derivadas or {}
+    if anteriores.get('origem') == arquivo.name:
+        return
+
+    derivadas = gerar_derivadas(arquivo)
+    # Imagem trocada: as derivadas do arquivo antigo não são mais usadas
+    remover_derivadas(arquivo.storage, anteriores)
+    # update() em vez de save(): não dispara post_save de novo
+    Modelo.objects.filter(pk=pk).update(imagem_derivadas=derivadas)
+    # ...nem a invalidação das listagens, que passam a ter o srcset novo
+    invalidar_modelo(modelo)
+
+
+@tarefa('expirar_sessao_upload')
+def expirar_sessao_upload(sessao_id: str) -> None:
+    """
+    Cancela uma sessão de upload em pedaços que não foi finalizada a tempo.
+
+    Agendada com atraso igual a core.uploads.VALIDADE_SESSAO ao abrir a
+    sessão; se ela já foi concluída ou cancelada, não faz nada.
+
+    Args:
+        sessao_id: UUID da SessaoUpload
+    """
+    from .models import SessaoUpload
+    from .uploads import descartar_parcial
+
+    # 'enviando' também: um PUT pendurado não segura a sessão além da validade
+    sessao = SessaoUpload.objects.filter(pk=sessao_id, status__in=['aberta', 'enviando']).first()
+    if sessao is None:
+        return
+    descartar_parcial(sessao)
+    SessaoUpload.objects.filter(pk=sessao.pk).update(status='cancelada', data_atualizacao=timezone.now())
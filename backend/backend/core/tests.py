@@ -205,6 +205,58 @@ class DenunciaModelTest(TestCase):
         self.assertIn('Abandono de animal', str(denuncia))
 
 
+class ValidacaoImagemTest(TestCase):
+    """Testes da análise única de imagens em core.validators."""
+
+    def _upload(self, largura, altura, formato='PNG', modo='RGB'):
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = BytesIO()
+        Image.new(modo, (largura, altura)).save(buffer, format=formato)
+        return SimpleUploadedFile(f'foto.{formato.lower()}', buffer.getvalue())
+
+    def test_cabecalho_lido_uma_vez_por_upload(self) -> None:
+        """Testa que validators e get_image_info reutilizam a mesma análise."""
+        from unittest import mock
+        from PIL import Image
+        from .validators import get_image_info, validate_image_dimensions, validate_image_file
+
+        arquivo = self._upload(300, 250, 'WEBP')
+        with mock.patch('core.validators.Image.open', wraps=Image.open) as abrir:
+            validate_image_file(arquivo)
+            validate_image_dimensions(arquivo, min_width=300)
+            info = get_image_info(arquivo)
+        self.assertEqual(abrir.call_count, 1)
+        self.assertEqual((info['formato'], info['largura'], info['altura']), ('WEBP', 300, 250))
+
+        # Imagem já aberta pelo ImageField do DRF: nenhuma leitura extra
+        from rest_framework import serializers as drf_serializers
+        arquivo = drf_serializers.ImageField().to_internal_value(self._upload(300, 300, 'JPEG'))
+        with mock.patch('core.validators.Image.open', wraps=Image.open) as abrir:
+            validate_image_file(arquivo)
+        self.assertEqual(abrir.call_count, 0)
+
+    def test_bomba_de_descompressao_rejeitada_antes_do_verify(self) -> None:
+        """Testa o limite de pixels lido do cabeçalho, sem verificar/decodificar o arquivo."""
+        from unittest import mock
+        from django.core.exceptions import ValidationError
+        from PIL import PngImagePlugin
+        from .validators import validate_image_file
+
+        # PNG 1-bit de 6000x6000 (36 MP) com poucos KB
+        arquivo = self._upload(6000, 6000, modo='1')
+        self.assertLess(arquivo.size, 100 * 1024)
+        with mock.patch.object(PngImagePlugin.PngImageFile, 'verify') as verificar:
+            with self.assertRaisesMessage(ValidationError, 'resolução excessiva'):
+                validate_image_file(arquivo)
+        verificar.assert_not_called()
+
+        # O quadro máximo 4000x4000 cabe no limite de pixels
+        validate_image_file(self._upload(4000, 4000, modo='1'))
+
+
 # ===== TESTES DE SERIALIZERS =====
 
 class RegisterSerializerTest(TestCase):
@@ -495,6 +547,119 @@ class PetPerdidoApiTest(APITestCase):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['nome'], 'Rex')
     
+    def test_listagens_do_mapa_com_numero_constante_de_consultas(self) -> None:
+        """Testa que pets perdidos e reportes são listados sem consultas por item (N+1)."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import PetPerdidoFoto, PossivelMatch, ReportePetEncontradoFoto
+        
+        admin = User.objects.create_user(username='admin', password='senha123', is_staff=True)
+        
+        def criar(quantidade):
+            for i in range(quantidade):
+                user = User.objects.create_user(username=f'dono{PetPerdido.objects.count()}', password='x')
+                pet = PetPerdido.objects.create(
+                    usuario=Usuario.objects.create(user=user), nome=f'Pet {i}', especie='cachorro',
+                    porte='medio', cor='marrom', data_perda=timezone.now().date(),
+                    cidade='São Paulo', estado='SP', latitude=Decimal('-23.5505'),
+                    longitude=Decimal('-46.6333'), telefone_contato='11999999999'
+                )
+                PetPerdidoFoto.objects.create(pet_perdido=pet, imagem='pets_perdidos/fotos/x.jpg')
+                reporte = ReportePetEncontrado.objects.create(
+                    usuario=self.usuario, especie='cachorro', porte='medio', cor='marrom',
+                    data_encontro=timezone.now().date(), cidade='São Paulo', estado='SP',
+                    latitude=Decimal('-23.5510'), longitude=Decimal('-46.6340'),
+                    telefone_contato='11988888888', pet_perdido_confirmado=pet
+                )
+                ReportePetEncontradoFoto.objects.create(reporte=reporte, imagem='pets_encontrados/fotos/x.jpg')
+                PossivelMatch.objects.create(reporte=reporte, pet_perdido=pet, score=75, distancia_km=0.1)
+        
+        def consultas(url):
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(capturadas), response.json()['results']
+        
+        criar(2)
+        self.client.force_authenticate(user=admin)
+        poucos_pets, _ = consultas('/api/pets-perdidos/?estado=SP')
+        poucos_reportes, _ = consultas('/api/pets-encontrados/')
+        criar(10)
+        muitos_pets, pets = consultas('/api/pets-perdidos/?estado=SP')
+        muitos_reportes, reportes = consultas('/api/pets-encontrados/')
+        
+        self.assertEqual(len(pets), 12)
+        self.assertEqual(len(reportes), 12)
+        self.assertEqual(muitos_pets, poucos_pets)
+        self.assertEqual(muitos_reportes, poucos_reportes)
+        # count + página + fotos
+        self.assertEqual(muitos_pets, 3)
+        # count + página + fotos + ids dos matches + top-N matches
+        self.assertEqual(muitos_reportes, 5)
+        
+        # Valores continuam os mesmos das consultas avulsas
+        pet = next(p for p in pets if p['id'] != self.pet.id)
+        self.assertEqual(pet['total_reportes'], 1)
+        self.assertEqual(len(pet['fotos_adicionais']), 1)
+        self.assertTrue(pet['usuario_nome'].startswith('dono'))
+        self.assertEqual(len(reportes[0]['possiveis_matches']), 1)
+        self.assertIsNotNone(reportes[0]['pet_perdido_confirmado_detalhes'])
+    
+    def test_markers_do_mapa_colunar_e_agrupado(self) -> None:
+        """Testa /markers/: recorte por bbox, clusters no zoom afastado e pontos no zoom próximo."""
+        from unittest import mock
+        from .views import PetPerdidoViewSet
+        
+        # 3 pets perto da Sé (SP) + 1 no Rio + 1 inativo (fora do mapa)
+        for i, (lat, lng, ativo) in enumerate([
+            ('-23.5510', '-46.6340', True), ('-23.5520', '-46.6350', True),
+            ('-22.9068', '-43.1729', True), ('-23.5530', '-46.6360', False),
+        ]):
+            PetPerdido.objects.create(
+                usuario=self.usuario, nome=f'Pet {i}', especie='gato', porte='pequeno', cor='preto',
+                data_perda=timezone.now().date(), cidade='X', estado='SP', ativo=ativo,
+                latitude=Decimal(lat), longitude=Decimal(lng), telefone_contato='11999999999'
+            )
+        self.client.force_authenticate(user=None)
+        brasil = '-74,-34,-34,6'
+        
+        # Zoom afastado: os 3 pets de SP viram um cluster, o do Rio é ponto
+        response = self.client.get(f'/api/pets-perdidos/markers/?bbox={brasil}&zoom=5')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dados = response.json()
+        self.assertTrue(dados['agrupado'])
+        self.assertEqual(dados['clusters']['total'], [3])
+        self.assertEqual(len(dados['pontos']['id']), 1)
+        self.assertEqual(dados['pontos']['lat'], [-22.9068])
+        
+        # Limite de marcadores vale também para os ids isolados consultados
+        manaus = PetPerdido.objects.create(
+            usuario=self.usuario, nome='Pet AM', especie='gato', porte='pequeno', cor='preto',
+            data_perda=timezone.now().date(), cidade='Manaus', estado='AM',
+            latitude=Decimal('-3.1190'), longitude=Decimal('-60.0217'), telefone_contato='11999999999'
+        )
+        with mock.patch.object(PetPerdidoViewSet, 'MAX_MARCADORES', 1):
+            dados = self.client.get(f'/api/pets-perdidos/markers/?bbox={brasil}&zoom=5').json()
+        self.assertEqual(dados['pontos']['id'], [manaus.pk])
+        manaus.delete()
+        
+        # Zoom próximo na Sé: só pontos, apenas as colunas do marcador
+        response = self.client.get('/api/pets-perdidos/markers/?bbox=-46.70,-23.60,-46.60,-23.50&zoom=16')
+        dados = response.json()
+        self.assertFalse(dados['agrupado'])
+        self.assertEqual(dados['clusters']['total'], [])
+        self.assertEqual(len(dados['pontos']['id']), 3)
+        self.assertEqual(set(dados['pontos']), {'id', 'lat', 'lng', 'especie', 'thumb'})
+        self.assertEqual(dados['pontos']['especie'], ['gato', 'gato', 'cachorro'])
+        
+        # Filtro da listagem também vale para os marcadores
+        response = self.client.get('/api/pets-perdidos/markers/?bbox=-46.70,-23.60,-46.60,-23.50&zoom=16&especie=cachorro')
+        self.assertEqual(response.json()['pontos']['id'], [self.pet.id])
+        
+        for parametros in ('zoom=5', 'bbox=a,b,c,d&zoom=5', 'bbox=10,-34,-34,6&zoom=5'):
+            response = self.client.get(f'/api/pets-perdidos/markers/?{parametros}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
     def test_marcar_pet_como_encontrado(self) -> None:
         """Testa ação de marcar pet como encontrado."""
         url = f'/api/pets-perdidos/{self.pet.id}/marcar_encontrado/'
@@ -564,6 +729,179 @@ class MatchingAutomaticoTest(TransactionTestCase):
         reporte.refresh_from_db()
         self.assertTrue(reporte.possiveis_matches.exists())
         self.assertIn(self.pet_perdido, reporte.possiveis_matches.all())
+
+    def test_matching_ignora_pets_fora_do_raio(self) -> None:
+        """Testa que o índice de grade descarta pets a mais de 10km do reporte."""
+        from .geo import celula_grade
+
+        # Mesmo pet perdido, mas o reporte fica ~25km ao norte
+        self.assertEqual(self.pet_perdido.geo_celula, celula_grade(-23.5505, -46.6333))
+        reporte = ReportePetEncontrado.objects.create(
+            usuario=self.usuario2,
+            especie='cachorro',
+            porte='pequeno',
+            cor='marrom',
+            data_encontro=timezone.now().date(),
+            bairro='Centro',
+            cidade='São Paulo',
+            estado='SP',
+            latitude=Decimal('-23.3250'),
+            longitude=Decimal('-46.6333'),
+            telefone_contato='11988888888',
+            pet_com_usuario=True
+        )
+
+        from .views import ReportePetEncontradoViewSet
+        ReportePetEncontradoViewSet()._buscar_matches_automaticos(reporte)
+
+        reporte.refresh_from_db()
+        self.assertFalse(reporte.possiveis_matches.exists())
+        self.assertEqual(reporte.status, 'pendente')
+
+    def test_matching_reverso_pet_perdido_cadastrado_depois(self) -> None:
+        """Testa que um pet perdido cadastrado após o reporte entra nos matches dele."""
+        from .tarefas import enfileirar, processar_pendentes
+        
+        reporte = ReportePetEncontrado.objects.create(
+            usuario=self.usuario2,
+            especie='gato',
+            porte='medio',
+            cor='preto',
+            data_encontro=timezone.now().date(),
+            bairro='Centro',
+            cidade='São Paulo',
+            estado='SP',
+            latitude=Decimal('-23.5510'),
+            longitude=Decimal('-46.6340'),
+            telefone_contato='11988888888',
+            pet_com_usuario=True
+        )
+        
+        # Dono cadastra o gato perdido depois que alguém já o encontrou
+        gato = PetPerdido.objects.create(
+            usuario=self.usuario1,
+            nome='Frajola',
+            especie='gato',
+            porte='medio',
+            cor='preto e branco',
+            data_perda=timezone.now().date() - timedelta(days=1),
+            cidade='São Paulo',
+            estado='SP',
+            latitude=Decimal('-23.5520'),
+            longitude=Decimal('-46.6350'),
+            telefone_contato='11999999999'
+        )
+        enfileirar('processar_pet_perdido', pet_id=gato.pk)
+        processar_pendentes()
+        
+        reporte.refresh_from_db()
+        self.assertEqual(reporte.status, 'em_analise')
+        self.assertEqual(list(reporte.possiveis_matches.all()), [gato])
+        self.assertTrue(
+            Notificacao.objects.filter(usuario=self.usuario1, titulo='Possível match encontrado!').exists()
+        )
+        # Cachorro do setUp não é afetado pelo reporte de gato
+        self.assertFalse(self.pet_perdido.reportes_relacionados.exists())
+    
+    def test_matching_reverso_substitui_match_mais_fraco_de_reporte_cheio(self) -> None:
+        """Testa que um pet melhor entra no lugar do pior match de um reporte já no limite."""
+        from .matching import buscar_matches_automaticos, buscar_reportes_para_pet
+        from .models import PossivelMatch
+        
+        reporte = ReportePetEncontrado.objects.create(
+            usuario=self.usuario2, especie='gato', porte='medio', cor='preto',
+            data_encontro=timezone.now().date(), bairro='Centro', cidade='São Paulo', estado='SP',
+            latitude=Decimal('-23.5510'), longitude=Decimal('-46.6340'),
+            telefone_contato='11988888888', pet_com_usuario=True
+        )
+        
+        def gato(nome, porte, cor):
+            return PetPerdido.objects.create(
+                usuario=self.usuario1, nome=nome, especie='gato', porte=porte, cor=cor,
+                data_perda=timezone.now().date(), cidade='São Paulo', estado='SP',
+                latitude=Decimal('-23.5520'), longitude=Decimal('-46.6350'), telefone_contato='11999999999'
+            )
+        
+        # Reporte cheio (limite 2): um match de 75 e um de 55
+        forte = gato('Forte', 'medio', 'branco')
+        fraco = gato('Fraco', 'grande', 'branco')
+        buscar_matches_automaticos(reporte, max_matches=2)
+        self.assertEqual(set(reporte.possiveis_matches.all()), {forte, fraco})
+        
+        # Pet de score 80 entra no lugar do de 55
+        melhor = gato('Melhor', 'grande', 'preto')
+        self.assertEqual(buscar_reportes_para_pet(melhor, max_matches=2), [reporte])
+        self.assertEqual(set(reporte.possiveis_matches.all()), {forte, melhor})
+        
+        # Pet que não supera o mais fraco (75) não muda nada
+        empate = gato('Empate', 'medio', 'azul')
+        self.assertEqual(buscar_reportes_para_pet(empate, max_matches=2), [])
+        self.assertEqual(PossivelMatch.objects.filter(reporte=reporte).count(), 2)
+    
+    def test_rematch_pets_vetorizado_igual_ao_matching_por_objeto(self) -> None:
+        """Testa que o comando rematch_pets (NumPy) reproduz o matching por objeto."""
+        import os
+        import random
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        from .matching import buscar_matches_automaticos
+        
+        random.seed(7)
+        hoje = timezone.now().date()
+        for i in range(40):
+            PetPerdido.objects.create(
+                usuario=self.usuario1, nome=f'Pet {i}', especie='cachorro',
+                porte=random.choice(['pequeno', 'medio']), cor=random.choice(['marrom', 'preto', 'Marrom claro']),
+                data_perda=hoje - timedelta(days=random.randint(0, 90)),
+                cidade='São Paulo', estado='SP', telefone_contato='11999999999',
+                latitude=Decimal(f'{-23.55 + random.uniform(-0.1, 0.1):.6f}'),
+                longitude=Decimal(f'{-46.63 + random.uniform(-0.1, 0.1):.6f}'),
+            )
+        reportes = [
+            ReportePetEncontrado.objects.create(
+                usuario=self.usuario2, especie='cachorro',
+                porte=random.choice(['pequeno', 'medio']), cor=random.choice(['marrom', 'preto']),
+                data_encontro=hoje, bairro='Centro', cidade='São Paulo', estado='SP',
+                telefone_contato='11988888888',
+                latitude=Decimal(f'{-23.55 + random.uniform(-0.1, 0.1):.6f}'),
+                longitude=Decimal(f'{-46.63 + random.uniform(-0.1, 0.1):.6f}'),
+            )
+            for _ in range(15)
+        ]
+        
+        from .models import PossivelMatch
+        
+        esperado = {r.pk: [p.pk for p in buscar_matches_automaticos(r)] for r in reportes}
+        self.assertTrue(any(esperado.values()))
+        campos = ('reporte_id', 'pet_perdido_id', 'score', 'criterios')
+        pontuacao = sorted(PossivelMatch.objects.values_list(*campos))
+        PossivelMatch.objects.all().delete()
+        
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'checkpoint.json')
+        saida = StringIO()
+        call_command('rematch_pets', lote=4, checkpoint=checkpoint, stdout=saida)
+        
+        for reporte in reportes:
+            obtido = set(reporte.possiveis_matches.values_list('pk', flat=True))
+            self.assertEqual(obtido, set(esperado[reporte.pk]))
+        # Mesmo score e detalhamento por critério nas duas implementações
+        self.assertEqual(sorted(PossivelMatch.objects.values_list(*campos)), pontuacao)
+        # Execução completa remove o checkpoint
+        self.assertFalse(os.path.exists(checkpoint))
+        
+        # Pares contados depois do recorte pela grade: menos que reportes x pets
+        pares = int(saida.getvalue().split(' pares pontuados')[0].rsplit('- ', 1)[1].replace(',', ''))
+        self.assertLess(pares, len(reportes) * PetPerdido.objects.filter(especie='cachorro').count())
+        
+        # Reportes que perderam todos os matches voltam para pendente
+        PetPerdido.objects.update(ativo=False)
+        call_command('rematch_pets', lote=4, checkpoint=checkpoint, stdout=StringIO())
+        self.assertFalse(PossivelMatch.objects.exists())
+        self.assertEqual(
+            set(ReportePetEncontrado.objects.filter(pk__in=[r.pk for r in reportes]).values_list('status', flat=True)),
+            {'pendente'}
+        )
     
     def test_calcular_distancia_haversine(self) -> None:
         """Testa cálculo de distância geodésica."""
@@ -581,6 +919,1167 @@ class MatchingAutomaticoTest(TransactionTestCase):
         self.assertGreater(distancia, 2.0)
         self.assertLess(distancia, 3.0)
 
+    def test_matches_ranqueados_por_score_gravado(self) -> None:
+        """Testa que o detalhe traz os melhores matches pelo score gravado, em consulta constante."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .matching import MATCHES_EXIBIDOS, buscar_matches_automaticos, prefetch_matches_ranqueados
+        from .models import PossivelMatch
+        from .serializers import ReportePetEncontradoSerializer
+        
+        # Pets com scores diferentes: porte e cor variam, todos a < 3km
+        for i, (porte, cor) in enumerate([('grande', 'preto')] * 3 + [('pequeno', 'preto')] * 4):
+            PetPerdido.objects.create(
+                usuario=self.usuario1, nome=f'Pet {i}', especie='cachorro', porte=porte, cor=cor,
+                data_perda=timezone.now().date(), cidade='São Paulo', estado='SP',
+                latitude=Decimal('-23.5505'), longitude=Decimal(f'{-46.6333 - i / 1000:.4f}'),
+                telefone_contato='11999999999'
+            )
+        reportes = []
+        for _ in range(3):
+            reporte = ReportePetEncontrado.objects.create(
+                usuario=self.usuario2, especie='cachorro', porte='pequeno', cor='marrom',
+                data_encontro=timezone.now().date(), bairro='Centro', cidade='São Paulo', estado='SP',
+                latitude=Decimal('-23.5510'), longitude=Decimal('-46.6340'),
+                telefone_contato='11988888888', pet_com_usuario=True
+            )
+            buscar_matches_automaticos(reporte)
+            reportes.append(reporte)
+        
+        match = PossivelMatch.objects.get(reporte=reportes[0], pet_perdido=self.pet_perdido)
+        self.assertEqual(match.score, 100)
+        self.assertEqual(match.criterios, {'especie': 30, 'porte': 20, 'cor': 25, 'proximidade': 25})
+        
+        qs = ReportePetEncontrado.objects.filter(pk__in=[r.pk for r in reportes]).prefetch_related(
+            'possiveis_matches', prefetch_matches_ranqueados()
+        )
+        with CaptureQueriesContext(connection) as consultas:
+            dados = [ReportePetEncontradoSerializer(r).data for r in qs]
+        # Tabela de matches lida só pelos dois prefetches, qualquer que seja o nº de reportes
+        na_tabela = [c for c in consultas if 'core_reportepetencontrado_possiveis_matches' in c['sql']]
+        self.assertEqual(len(na_tabela), 2)
+        
+        for item in dados:
+            detalhes = item['possiveis_matches_detalhes']
+            self.assertEqual(len(detalhes), MATCHES_EXIBIDOS)
+            scores = [d['score'] for d in detalhes]
+            self.assertEqual(scores, sorted(scores, reverse=True))
+            self.assertEqual(detalhes[0]['id'], self.pet_perdido.pk)
+            # Os 3 pets de porte grande (score 55) ficam fora do top-5
+            self.assertEqual(scores[-1], 75)
+    
+    def test_distancia_gravada_no_match_e_reutilizada_pelo_serializer(self) -> None:
+        """Testa que o matching grava distancia_km e o serializer não recalcula Haversine."""
+        from unittest import mock
+        from .geo import MemoDistancias, distancia_haversine_km
+        from .matching import buscar_matches_automaticos
+        from .models import PossivelMatch
+        from .serializers import ReportePetEncontradoSerializer
+        
+        reporte = ReportePetEncontrado.objects.create(
+            usuario=self.usuario2,
+            especie='cachorro',
+            porte='pequeno',
+            cor='marrom',
+            data_encontro=timezone.now().date(),
+            bairro='Centro',
+            cidade='São Paulo',
+            estado='SP',
+            latitude=Decimal('-23.5510'),
+            longitude=Decimal('-46.6340'),
+            telefone_contato='11988888888',
+            pet_com_usuario=True
+        )
+        buscar_matches_automaticos(reporte)
+        
+        match = PossivelMatch.objects.get(reporte=reporte, pet_perdido=self.pet_perdido)
+        esperado = distancia_haversine_km(-23.5505, -46.6333, -23.5510, -46.6340)
+        self.assertAlmostEqual(match.distancia_km, esperado, places=6)
+        
+        # Linha com distância gravada: nenhum cálculo durante a serialização
+        with mock.patch.object(MemoDistancias, 'distancia', side_effect=AssertionError('recalculou')):
+            detalhes = ReportePetEncontradoSerializer(reporte).data['possiveis_matches_detalhes']
+        self.assertEqual(detalhes[0]['distancia_km'], round(esperado, 2))
+        
+        # Linha antiga sem distância: calcula uma vez e memoriza o par
+        PossivelMatch.objects.filter(pk=match.pk).update(distancia_km=None)
+        memo = MemoDistancias()
+        contexto = {'memo_distancias': memo}
+        for _ in range(2):
+            detalhes = ReportePetEncontradoSerializer(reporte, context=contexto).data['possiveis_matches_detalhes']
+        self.assertEqual(detalhes[0]['distancia_km'], round(esperado, 2))
+        self.assertEqual(len(memo), 1)
+
+
+class FilaTarefasTest(APITestCase):
+    """Testes da fila de tarefas que executa o matching fora da requisição."""
+
+    def setUp(self) -> None:
+        """Configura dono com pet perdido e um admin."""
+        user_dono = User.objects.create_user(username='dono', password='senha123')
+        self.usuario_dono = Usuario.objects.create(user=user_dono)
+        user_admin = User.objects.create_user(username='admin', password='admin123', is_staff=True)
+        self.usuario_admin = Usuario.objects.create(user=user_admin)
+
+        self.pet_perdido = PetPerdido.objects.create(
+            usuario=self.usuario_dono,
+            nome='Totó',
+            especie='cachorro',
+            porte='pequeno',
+            cor='marrom',
+            data_perda=timezone.now().date(),
+            cidade='São Paulo',
+            estado='SP',
+            latitude=Decimal('-23.5505'),
+            longitude=Decimal('-46.6333'),
+            telefone_contato='11999999999'
+        )
+
+    def _imagem_png(self):
+        """Gera uma imagem PNG válida (200x200) para upload."""
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = BytesIO()
+        Image.new('RGB', (200, 200), 'brown').save(buffer, format='PNG')
+        return SimpleUploadedFile('pet.png', buffer.getvalue(), content_type='image/png')
+
+    def _dados_reporte(self):
+        """Dados de um reporte de pet encontrado próximo ao pet perdido."""
+        return {
+            'nome_pessoa': 'Maria',
+            'telefone_contato': '11988888888',
+            'email_contato': 'maria@example.com',
+            'especie': 'cachorro',
+            'porte': 'pequeno',
+            'cor': 'marrom claro',
+            'descricao': 'Cachorro dócil com coleira',
+            'data_encontro': timezone.now().date().isoformat(),
+            'latitude': '-23.551000',
+            'longitude': '-46.634000',
+            'endereco': 'Praça da Sé',
+            'bairro': 'Sé',
+            'cidade': 'São Paulo',
+            'estado': 'SP',
+            'imagem_principal': self._imagem_png(),
+        }
+
+    def test_post_reporte_responde_antes_do_matching(self) -> None:
+        """Testa que o POST só enfileira a tarefa e o worker faz matching e notificações."""
+        import tempfile
+        from django.test import override_settings
+        from .models import Tarefa
+        from .tarefas import processar_pendentes
+
+        dados = self._dados_reporte()
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            response = self.client.post('/api/pets-encontrados/', dados, format='multipart')
+
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            # Resposta volta sem matching: reporte pendente e tarefas na fila
+            # (matching + derivadas da imagem principal)
+            self.assertEqual(response.data['status'], 'pendente')
+            self.assertEqual(response.data['possiveis_matches'], [])
+            self.assertIsNone(response.data['imagem_principal_srcset'])
+            tarefa = Tarefa.objects.get(tipo='processar_reporte_encontrado')
+            self.assertEqual(tarefa.status, 'pendente')
+            self.assertTrue(Tarefa.objects.filter(tipo='gerar_derivadas_imagem').exists())
+            self.assertFalse(Notificacao.objects.exists())
+
+            # Worker processa a fila
+            self.assertEqual(processar_pendentes(), 2)
+
+        reporte = ReportePetEncontrado.objects.get(pk=response.data['id'])
+        self.assertEqual(reporte.status, 'em_analise')
+        self.assertIn(self.pet_perdido, reporte.possiveis_matches.all())
+        self.assertTrue(Notificacao.objects.filter(usuario=self.usuario_dono).exists())
+        self.assertTrue(Notificacao.objects.filter(usuario=self.usuario_admin).exists())
+        tarefa.refresh_from_db()
+        self.assertEqual(tarefa.status, 'concluida')
+
+    def test_tarefa_com_erro_volta_para_fila_e_depois_falha(self) -> None:
+        """Testa backoff entre tentativas, status 'falhou' e reprocessamento."""
+        from .models import Tarefa
+        from .tarefas import tarefa, enfileirar, processar_pendentes, reprocessar_falhas
+
+        chamadas = []
+
+        @tarefa('teste_que_falha')
+        def teste_que_falha(valor):
+            chamadas.append(valor)
+            # Escrita deve ser desfeita junto com a falha
+            Notificacao.objects.create(usuario=self.usuario_dono, tipo='denuncia', titulo='x', mensagem='x')
+            raise RuntimeError('erro proposital')
+
+        nova = enfileirar('teste_que_falha', max_tentativas=2, valor=7)
+
+        # 1ª tentativa: volta para a fila, agendada para o futuro
+        self.assertEqual(processar_pendentes(), 1)
+        nova.refresh_from_db()
+        self.assertEqual(nova.status, 'pendente')
+        self.assertEqual(nova.tentativas, 1)
+        self.assertIn('erro proposital', nova.erro)
+        self.assertGreater(nova.agendada_para, timezone.now())
+        self.assertEqual(processar_pendentes(), 0)  # Ainda não chegou a hora
+
+        # 2ª tentativa (última): marca como falhou
+        Tarefa.objects.filter(pk=nova.pk).update(agendada_para=timezone.now())
+        self.assertEqual(processar_pendentes(), 1)
+        nova.refresh_from_db()
+        self.assertEqual(nova.status, 'falhou')
+        self.assertEqual(chamadas, [7, 7])
+        self.assertFalse(Notificacao.objects.exists())
+
+        # Reprocessar devolve a tarefa para a fila
+        self.assertEqual(reprocessar_falhas(), 1)
+        nova.refresh_from_db()
+        self.assertEqual((nova.status, nova.tentativas), ('pendente', 0))
+
+    def test_fotos_adicionais_gravadas_em_lote_com_rollback(self) -> None:
+        """Testa validação conjunta, bulk_create das fotos e remoção dos arquivos em caso de falha."""
+        import os
+        import tempfile
+        from unittest import mock
+        from django.core.files.storage import FileSystemStorage
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        from .midia import IngestaoMidias
+        from .models import Tarefa
+
+        def arquivos_gravados(pasta):
+            return [nome for _, _, nomes in os.walk(pasta) for nome in nomes]
+
+        pasta = tempfile.mkdtemp()
+        with override_settings(MEDIA_ROOT=pasta):
+            # Uma foto inválida: 400 com o nome do arquivo e nada gravado
+            dados = self._dados_reporte()
+            dados['fotos_adicionais'] = [
+                self._imagem_png(), SimpleUploadedFile('texto.png', b'nao e imagem', content_type='image/png')
+            ]
+            response = self.client.post('/api/pets-encontrados/', dados, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn('texto.png', str(response.data['fotos_adicionais']))
+            self.assertFalse(ReportePetEncontrado.objects.exists())
+            self.assertEqual(arquivos_gravados(pasta), [])
+
+            # Três fotos válidas: um INSERT para as fotos e derivadas agendadas
+            # (bulk_create não dispara post_save)
+            dados = self._dados_reporte()
+            dados['fotos_adicionais'] = [self._imagem_png() for _ in range(3)]
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.post('/api/pets-encontrados/', dados, format='multipart')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            tabela = ReportePetEncontradoFoto._meta.db_table
+            self.assertEqual(
+                len([q for q in consultas.captured_queries if q['sql'].startswith(f'INSERT INTO "{tabela}"')]), 1
+            )
+            reporte = ReportePetEncontrado.objects.get()
+            fotos = list(reporte.fotos_adicionais.all())
+            self.assertEqual(len(fotos), 3)
+            self.assertEqual(len({foto.imagem.name for foto in fotos}), 3)
+            self.assertEqual(
+                set(Tarefa.objects.filter(tipo='gerar_derivadas_imagem').values_list('payload__pk', flat=True)),
+                {reporte.pk} | {foto.pk for foto in fotos},
+            )
+            self.assertEqual(len(arquivos_gravados(pasta)), 4)
+
+            # Falha no storage no meio do lote: linhas desfeitas e arquivos apagados
+            salvar_original = FileSystemStorage.save
+            chamadas = []
+
+            def salvar_falhando(storage, nome, conteudo, max_length=None):
+                chamadas.append(nome)
+                if len(chamadas) == 2:
+                    raise OSError('disco cheio')
+                return salvar_original(storage, nome, conteudo, max_length=max_length)
+
+            antes = set(arquivos_gravados(pasta))
+            with mock.patch.object(FileSystemStorage, 'save', salvar_falhando):
+                with self.assertRaises(OSError):
+                    with IngestaoMidias() as ingestao:
+                        ingestao.salvar(
+                            ReportePetEncontradoFoto, 'imagem',
+                            [self._imagem_png() for _ in range(3)], reporte=reporte
+                        )
+            self.assertEqual(reporte.fotos_adicionais.count(), 3)
+            self.assertEqual(set(arquivos_gravados(pasta)), antes)
+
+    def test_derivadas_de_imagem_geradas_pelo_worker(self) -> None:
+        """Testa chaves determinísticas, srcset exposto e que saves sem a imagem não reenfileiram."""
+        import tempfile
+        from PIL import Image
+        from django.core.files.storage import default_storage
+        from django.test import override_settings
+        from .imagens import TAMANHOS_DERIVADAS, chave_derivada
+        from .models import Tarefa
+        from .tarefas import processar_pendentes
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            self.pet_perdido.imagem_principal = self._imagem_png()
+            self.pet_perdido.save()
+            self.assertEqual(Tarefa.objects.filter(tipo='gerar_derivadas_imagem').count(), 1)
+            self.assertEqual(processar_pendentes(), 1)
+
+            self.pet_perdido.refresh_from_db()
+            origem = self.pet_perdido.imagem_principal.name
+            self.assertEqual(self.pet_perdido.imagem_derivadas['origem'], origem)
+            # Original 200x200: thumb reduz, card/full nunca ampliam
+            self.assertEqual(self.pet_perdido.imagem_derivadas['tamanhos'],
+                             {'full': [200, 200], 'card': [200, 200], 'thumb': [160, 160]})
+            for tamanho in TAMANHOS_DERIVADAS:
+                for formato in ('webp', 'jpg'):
+                    self.assertTrue(default_storage.exists(chave_derivada(origem, tamanho, formato)))
+            with default_storage.open(chave_derivada(origem, 'thumb', 'webp')) as arquivo:
+                self.assertEqual(Image.open(arquivo).format, 'WEBP')
+
+            dados = PetPerdidoSerializer(self.pet_perdido).data
+            self.assertEqual(dados['imagem_principal_srcset']['thumb']['largura'], 160)
+            self.assertTrue(dados['imagem_principal_srcset']['card']['webp'].endswith('/card.webp'))
+
+            # Save de outros campos (ex: visualizações) e save sem mudar a imagem
+            self.pet_perdido.visualizacoes += 1
+            self.pet_perdido.save(update_fields=['visualizacoes'])
+            self.pet_perdido.save()
+            self.assertEqual(Tarefa.objects.filter(tipo='gerar_derivadas_imagem').count(), 1)
+
+
+class NotificacoesServicoTest(APITestCase):
+    """Testes do serviço de notificações (core.notificacoes)."""
+
+    def test_post_publico_notifica_admins_com_consultas_constantes(self) -> None:
+        """Testa que o custo do POST de contato não cresce com o número de admins."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        # Admin sem perfil é ignorado sem consulta extra
+        User.objects.create_user(username='admin_sem_perfil', password='x', is_staff=True)
+        dados = {'nome': 'Ana', 'email': 'ana@example.com', 'assunto': 'Dúvida', 'mensagem': 'Olá'}
+
+        consultas = []
+        for novos_admins in (1, 5):
+            for _ in range(novos_admins):
+                admin = User.objects.create_user(username=f'admin{User.objects.count()}', password='x', is_staff=True)
+                Usuario.objects.create(user=admin)
+            Notificacao.objects.all().delete()
+
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.post('/api/contatos/', dados, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            consultas.append(len(capturadas))
+            self.assertEqual(
+                Notificacao.objects.filter(tipo='contato_recebido').count(),
+                Usuario.objects.filter(user__is_staff=True).count()
+            )
+
+        # 1 admin e 6 admins: mesmas consultas (destinatários em 1 JOIN + 1 INSERT)
+        self.assertEqual(consultas[0], consultas[1])
+
+
+class NotificacoesStreamTest(TestCase):
+    """Testes do stream SSE de notificações (/api/notificacoes/stream/)."""
+
+    def setUp(self) -> None:
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.user = User.objects.create_user(username='leitor', password='x')
+        self.usuario = Usuario.objects.create(user=self.user)
+        Notificacao.objects.create(usuario=self.usuario, tipo='sistema', titulo='Antiga', mensagem='x')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def _ticket(self) -> str:
+        response = self.client.post('/api/notificacoes/stream/ticket/', HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    async def test_stream_envia_contagem_e_notificacoes_novas(self) -> None:
+        """Testa que a conexão recebe a contagem inicial e cada notificação criada depois."""
+        from asgiref.sync import sync_to_async
+        from django.test import AsyncClient
+        from .notificacoes import notificar
+
+        ticket = await sync_to_async(self._ticket)()
+        response = await AsyncClient().get(f'/api/notificacoes/stream/?ticket={ticket}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        eventos = response.streaming_content
+
+        primeiro = (await anext(eventos)).decode()
+        self.assertIn('event: contagem\ndata: {"nao_lidas": 1}', primeiro)
+
+        def criar():
+            with self.captureOnCommitCallbacks(execute=True):
+                notificar(self.usuario, 'sistema', 'Nova', 'Chegou agora')
+        await sync_to_async(criar)()
+
+        notificacao = (await anext(eventos)).decode()
+        self.assertTrue(notificacao.startswith('event: notificacao\n'))
+        self.assertIn('"titulo": "Nova"', notificacao)
+        self.assertIn('"nao_lidas": 2', (await anext(eventos)).decode())
+        await eventos.aclose()
+
+    def test_stream_exige_ticket_valido_e_de_uso_unico(self) -> None:
+        """Testa 401 sem ticket, com ticket inválido, com o JWT na URL e com ticket já usado."""
+        self.assertEqual(self.client.get('/api/notificacoes/stream/').status_code, 401)
+        self.assertEqual(self.client.get('/api/notificacoes/stream/?ticket=abc').status_code, 401)
+        self.assertEqual(self.client.get(f'/api/notificacoes/stream/?token={self.token}').status_code, 401)
+        self.assertEqual(self.client.post('/api/notificacoes/stream/ticket/').status_code, 401)
+
+        ticket = self._ticket()
+        self.assertEqual(self.client.get(f'/api/notificacoes/stream/?ticket={ticket}').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/notificacoes/stream/?ticket={ticket}').status_code, 401)
+
+    def test_sem_asgi_responde_contagem_e_fim(self) -> None:
+        """Testa que sob WSGI a resposta traz só a contagem e pede reconexão com ticket novo."""
+        response = self.client.get(f'/api/notificacoes/stream/?ticket={self._ticket()}')
+        corpo = b''.join(response.streaming_content).decode()
+        self.assertIn('"nao_lidas": 1', corpo)
+        self.assertTrue(corpo.endswith('event: fim\ndata: {"motivo": "sem_stream"}\n\n'))
+
+    def test_worker_avisa_sobre_broker_em_memoria(self) -> None:
+        """Testa que o worker roda com o broker em memória, avisando que o push em tempo real se perde."""
+        from io import StringIO
+        from django.core.management import call_command
+
+        saida = StringIO()
+        call_command('processar_tarefas', '--uma-vez', stdout=saida)
+        self.assertIn('EVENTOS_BROKER=redis', saida.getvalue())
+        self.assertIn('tarefa(s) processada(s)', saida.getvalue())
+
+    def test_marcar_todas_lidas_publica_contagem(self) -> None:
+        """Testa que ler notificações envia a nova contagem ao stream."""
+        from unittest import mock
+
+        cliente = APIClient()
+        cliente.force_authenticate(self.user)
+        with mock.patch('core.notificacoes.publicar') as publicar:
+            with self.captureOnCommitCallbacks(execute=True):
+                cliente.post('/api/notificacoes/marcar_todas_lidas/')
+        publicar.assert_called_once_with(self.usuario.pk, 'contagem', {'nao_lidas': 0})
+
+
+class ContadorNaoLidasTest(APITestCase):
+    """Testes do contador desnormalizado de notificações não lidas."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='contado', password='x')
+        self.usuario = Usuario.objects.create(user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def contador(self) -> int:
+        self.usuario.refresh_from_db(fields=['notificacoes_nao_lidas'])
+        return self.usuario.notificacoes_nao_lidas
+
+    def test_contador_acompanha_criacao_leitura_e_remocao(self) -> None:
+        """Testa o contador em cada caminho que altera notificações."""
+        from .notificacoes import notificar, notificar_usuarios
+
+        primeira = notificar(self.usuario, 'sistema', 'A', 'a')
+        notificar_usuarios([self.usuario.pk, self.usuario.pk], 'sistema', 'B', 'b')
+        avulsa = Notificacao.objects.create(usuario=self.usuario, tipo='sistema', titulo='C', mensagem='c')
+        self.assertEqual(self.contador(), 4)
+
+        # Marcar a mesma notificação duas vezes desconta uma vez só
+        for _ in range(2):
+            self.client.post(f'/api/notificacoes/{primeira.pk}/marcar_lida/')
+        self.assertEqual(self.contador(), 3)
+
+        response = self.client.patch(f'/api/notificacoes/{primeira.pk}/', {'lida': False}, format='json')
+        self.assertFalse(response.data['lida'])
+        self.assertEqual(self.contador(), 4)
+
+        self.client.delete(f'/api/notificacoes/{avulsa.pk}/')
+        self.assertEqual(self.contador(), 3)
+
+        self.client.post('/api/notificacoes/marcar_todas_lidas/')
+        self.assertEqual(self.contador(), 0)
+        self.client.delete(f'/api/notificacoes/{primeira.pk}/')
+        self.assertEqual(self.contador(), 0)
+
+    def test_edicao_nao_regrava_lida(self) -> None:
+        """Testa que o PATCH de outros campos não sobrescreve `lida` com o valor carregado antes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .notificacoes import notificar
+
+        notificacao = notificar(self.usuario, 'sistema', 'A', 'a')
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.patch(f'/api/notificacoes/{notificacao.pk}/', {'titulo': 'B'}, format='json')
+        self.assertEqual(response.data['titulo'], 'B')
+        atualizacoes = [q['sql'] for q in capturadas.captured_queries if q['sql'].startswith('UPDATE "core_notificacao"')]
+        self.assertEqual(len(atualizacoes), 1)
+        self.assertNotIn('"lida"', atualizacoes[0])
+
+        # Só `lida`: nenhum save da linha inteira, apenas o UPDATE condicional
+        with CaptureQueriesContext(connection) as capturadas:
+            self.client.patch(f'/api/notificacoes/{notificacao.pk}/', {'lida': True}, format='json')
+        atualizacoes = [q['sql'] for q in capturadas.captured_queries if q['sql'].startswith('UPDATE "core_notificacao"')]
+        self.assertEqual(len(atualizacoes), 1)
+        self.assertNotIn('"titulo"', atualizacoes[0])
+        self.assertEqual(self.contador(), 0)
+
+    def test_endpoint_contagem_com_etag(self) -> None:
+        """Testa que /contagem/ responde 304 enquanto a contagem não muda."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .notificacoes import notificar
+
+        notificar(self.usuario, 'sistema', 'A', 'a')
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.get('/api/notificacoes/contagem/')
+        self.assertEqual(response.data, {'nao_lidas': 1})
+        self.assertFalse(any('core_notificacao' in q['sql'] for q in capturadas.captured_queries))
+
+        etag = response['ETag']
+        response = self.client.get('/api/notificacoes/contagem/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        notificar(self.usuario, 'sistema', 'B', 'b')
+        response = self.client.get('/api/notificacoes/contagem/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'nao_lidas': 2})
+
+    def test_reconciliacao_corrige_divergencias(self) -> None:
+        """Testa o comando que corrige contadores alterados por fora do serviço."""
+        from io import StringIO
+        from django.core.management import call_command
+        from .notificacoes import notificar
+
+        outro = Usuario.objects.create(user=User.objects.create_user(username='outro', password='x'))
+        for _ in range(3):
+            notificar(self.usuario, 'sistema', 'A', 'a')
+        notificar(outro, 'sistema', 'A', 'a')
+        # Alterações que não passam pelo serviço
+        Notificacao.objects.filter(usuario=self.usuario).update(lida=True)
+        Usuario.objects.filter(pk=outro.pk).update(notificacoes_nao_lidas=9)
+
+        saida = StringIO()
+        call_command('reconciliar_notificacoes_nao_lidas', '--lote', '1', stdout=saida)
+        self.assertIn('2 perfil(is) corrigido(s)', saida.getvalue())
+        self.assertEqual(self.contador(), 0)
+        outro.refresh_from_db()
+        self.assertEqual(outro.notificacoes_nao_lidas, 1)
+
+
+class RetencaoNotificacoesTest(TestCase):
+    """Testes do arquivamento de notificações antigas (core.retencao)."""
+
+    def setUp(self) -> None:
+        self.usuario = Usuario.objects.create(user=User.objects.create_user(username='antigo', password='x'))
+        antiga = timezone.now() - timedelta(days=200)
+        for i in range(3):
+            Notificacao.objects.create(
+                usuario=self.usuario, tipo='sistema', titulo=f'Lida {i}', mensagem='x', lida=True,
+                contato_email='ong@example.com' if i == 0 else None
+            )
+        Notificacao.objects.create(usuario=self.usuario, tipo='sistema', titulo='Não lida', mensagem='x')
+        Notificacao.objects.update(data_criacao=antiga)
+        Notificacao.objects.create(usuario=self.usuario, tipo='sistema', titulo='Recente', mensagem='x', lida=True)
+
+    def test_arquiva_lidas_antigas_em_lotes(self) -> None:
+        """Testa que só as lidas antigas saem da tabela, em lotes, e vão para o arquivo."""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import NotificacaoArquivada
+
+        saida = StringIO()
+        call_command('arquivar_notificacoes', '--dias', '90', '--lote', '2', stdout=saida)
+
+        self.assertIn('3 notificação(ões) arquivada(s) em 2 lote(s)', saida.getvalue())
+        self.assertIn('linhas/s', saida.getvalue())
+        self.assertEqual(
+            sorted(Notificacao.objects.values_list('titulo', flat=True)), ['Não lida', 'Recente']
+        )
+        arquivadas = NotificacaoArquivada.objects.order_by('id_original')
+        self.assertEqual([a.titulo for a in arquivadas], ['Lida 0', 'Lida 1', 'Lida 2'])
+        self.assertEqual(arquivadas[0].contato, {'contato_email': 'ong@example.com'})
+        self.assertIsNone(arquivadas[1].contato)
+        # Só lidas saem: o contador de não lidas continua certo
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.usuario.notificacoes_nao_lidas, 1)
+
+        # Nova execução não encontra mais nada
+        saida = StringIO()
+        call_command('arquivar_notificacoes', '--dias', '90', stdout=saida)
+        self.assertIn('0 notificação(ões) arquivada(s)', saida.getvalue())
+
+    def test_arquiva_em_jsonl(self) -> None:
+        """Testa o destino JSONL."""
+        import json
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import call_command
+        from .models import NotificacaoArquivada
+
+        caminho = Path(tempfile.mkdtemp()) / 'notificacoes.jsonl'
+        call_command('arquivar_notificacoes', '--dias', '90', '--jsonl', str(caminho), stdout=StringIO())
+
+        linhas = [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+        self.assertEqual(len(linhas), 3)
+        self.assertEqual(linhas[0]['usuario_id'], self.usuario.pk)
+        self.assertFalse(NotificacaoArquivada.objects.exists())
+        self.assertEqual(Notificacao.objects.count(), 2)
+
+
+class PaginacaoListasTest(APITestCase):
+    """Testes dos modos de paginação das listas grandes (core.pagination.PaginacaoListas)."""
+
+    def setUp(self) -> None:
+        from .notificacoes import notificar_usuarios
+
+        self.user = User.objects.create_user(username='paginado', password='x')
+        self.usuario = Usuario.objects.create(user=self.user)
+        for i in range(15):
+            notificar_usuarios([self.usuario], 'sistema', f'N{i:02d}', 'x')
+        self.client.force_authenticate(self.user)
+
+    def test_paginas_numeradas_continuam_com_total(self) -> None:
+        """Testa que sem parâmetros a resposta é a mesma de antes (count + page)."""
+        response = self.client.get('/api/notificacoes/')
+        self.assertEqual(response.data['count'], 15)
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertIn('page=2', response.data['next'])
+
+    def test_sem_total_nao_conta_a_tabela(self) -> None:
+        """Testa ?sem_total=true: sem COUNT(*), count null e próxima página detectada."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as capturadas:
+            response = self.client.get('/api/notificacoes/?sem_total=true')
+        self.assertFalse(any('COUNT(' in q['sql'].upper() for q in capturadas.captured_queries))
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertIn('sem_total=true', response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(self.client.get('/api/notificacoes/?sem_total=true&page=9').status_code, 404)
+
+    def test_cursor_percorre_sem_duplicar_itens_novos(self) -> None:
+        """Testa ?paginacao=cursor: itens criados durante a navegação não se repetem."""
+        from .notificacoes import notificar
+
+        primeira = self.client.get('/api/notificacoes/?paginacao=cursor')
+        self.assertNotIn('count', primeira.data)
+        self.assertIn('cursor=', primeira.data['next'])
+
+        notificar(self.usuario, 'sistema', 'Nova', 'x')
+        segunda = self.client.get(primeira.data['next'])
+
+        titulos = [n['titulo'] for n in primeira.data['results'] + segunda.data['results']]
+        self.assertEqual(sorted(titulos), [f'N{i:02d}' for i in range(15)])
+        self.assertIsNone(segunda.data['next'])
+
+        # Mesma opção nas demais listas grandes
+        self.assertEqual(self.client.get('/api/pets-perdidos/?paginacao=cursor').status_code, 200)
+        self.assertEqual(self.client.get('/api/denuncias/?paginacao=cursor').status_code, 200)
+
+
+class CacheListagensTest(APITestCase):
+    """Testes do cache das listagens públicas (core.cache.ListaEmCacheMixin)."""
+
+    def setUp(self) -> None:
+        from django.core.cache import caches
+
+        self.cache = caches['respostas']
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+        Animal.objects.create(nome='Rex', tipo='cachorro', porte='medio', estado='SP', cidade='Santos')
+        self.dono = Usuario.objects.create(user=User.objects.create_user(username='tutor', password='x'))
+        self.pet = PetPerdido.objects.create(
+            usuario=self.dono, nome='Tobby', especie='cachorro', porte='medio', cor='preto',
+            data_perda=timezone.now().date(), cidade='Santos', estado='SP',
+            latitude=Decimal('-23.96'), longitude=Decimal('-46.33'),
+            telefone_contato='11999999999', email_contato='tutor@email.com',
+        )
+
+    def test_segunda_listagem_nao_consulta_o_banco(self) -> None:
+        """Testa acerto sem queries, mesma resposta e 304 com If-None-Match."""
+        primeira = self.client.get('/api/animais/')
+        self.assertEqual(primeira['X-Cache'], 'MISS')
+        self.assertIn('Authorization', primeira['Vary'])
+
+        with self.assertNumQueries(0):
+            segunda = self.client.get('/api/animais/')
+        self.assertEqual(segunda['X-Cache'], 'HIT')
+        self.assertEqual(segunda.data, primeira.data)
+        self.assertEqual(segunda['ETag'], primeira['ETag'])
+
+        revalidada = self.client.get('/api/animais/', HTTP_IF_NONE_MATCH=primeira['ETag'])
+        self.assertEqual(revalidada.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_filtros_normalizados_compartilham_a_chave(self) -> None:
+        """Testa que ordem e caixa dos filtros não geram entradas diferentes."""
+        self.assertEqual(self.client.get('/api/animais/?porte=Medio&tipo=cachorro')['X-Cache'], 'MISS')
+        response = self.client.get('/api/animais/?tipo=CACHORRO&porte=medio')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_save_invalida_e_visualizacao_nao(self) -> None:
+        """Testa invalidação por signal, ignorando o contador de visualizações."""
+        self.client.get('/api/pets-perdidos/')
+
+        self.client.get(f'/api/pets-perdidos/{self.pet.pk}/')  # incrementa visualizacoes
+        self.assertEqual(self.client.get('/api/pets-perdidos/')['X-Cache'], 'HIT')
+
+        self.pet.status = 'encontrado'
+        self.pet.save()
+        response = self.client.get('/api/pets-perdidos/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 0)
+
+        mia = Animal.objects.create(nome='Mia', tipo='gato', porte='pequeno')
+        self.assertEqual(self.client.get('/api/animais/').data['count'], 2)
+        mia.delete()
+        self.assertEqual(self.client.get('/api/animais/').data['count'], 1)
+
+    def test_logados_e_parametros_desconhecidos_ignoram_o_cache(self) -> None:
+        """Testa que só listagens anônimas com filtros conhecidos são cacheadas."""
+        self.assertNotIn('X-Cache', self.client.get('/api/animais/?desconhecido=1'))
+        self.client.force_authenticate(self.dono.user)
+        self.assertNotIn('X-Cache', self.client.get('/api/pets-perdidos/'))
+
+    def test_metricas_de_acerto(self) -> None:
+        """Testa o endpoint administrativo de taxa de acerto."""
+        admin = User.objects.create_user(username='admin_cache', password='x', is_staff=True)
+        self.client.get('/api/animais-adocao/')
+        self.client.get('/api/animais-adocao/')
+
+        self.client.force_authenticate(admin)
+        dados = self.client.get('/api/cache/metricas/').data['animais_adocao']
+        self.assertEqual((dados['acertos'], dados['falhas'], dados['taxa_acerto']), (1, 1, 0.5))
+
+        self.assertEqual(self.client.delete('/api/cache/metricas/').status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.client.get('/api/cache/metricas/').data['animais_adocao']['acertos'], 0)
+        self.client.force_authenticate(self.dono.user)
+        self.assertEqual(self.client.get('/api/cache/metricas/').status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BuscaTextualTest(APITestCase):
+    """Testes da busca sem acento por relevância (core.busca, ?q=)."""
+
+    def setUp(self) -> None:
+        self.dono = Usuario.objects.create(user=User.objects.create_user(username='tutor_busca', password='x'))
+
+    def _pet(self, **campos) -> PetPerdido:
+        dados = dict(
+            usuario=self.dono, nome='Bidu', especie='cachorro', porte='medio', cor='preto',
+            caracteristicas_distintivas='-', descricao='-', data_perda=timezone.now().date(),
+            cidade='Santos', estado='SP', latitude=Decimal('-23.96'), longitude=Decimal('-46.33'),
+            telefone_contato='11999999999', email_contato='tutor@email.com',
+        )
+        dados.update(campos)
+        return PetPerdido.objects.create(**dados)
+
+    def test_busca_ignora_acento_caixa_e_casa_prefixo(self) -> None:
+        """Testa que "pacoca", "PAÇ" e "sao pau" encontram os textos acentuados."""
+        Animal.objects.create(nome='Paçoca', tipo='cachorro', descricao='Resgatada em São Paulo')
+        Animal.objects.create(nome='Mia', tipo='gato')
+
+        for consulta in ('pacoca', 'PAÇ', 'sao pau'):
+            response = self.client.get('/api/animais/', {'q': consulta})
+            self.assertEqual([a['nome'] for a in response.data['results']], ['Paçoca'], consulta)
+        self.assertEqual(self.client.get('/api/animais/', {'q': 'paçoca mia'}).data['count'], 0)
+
+    def test_nome_pesa_mais_que_descricao(self) -> None:
+        """Testa a ordenação por relevância da listagem de pets perdidos."""
+        citado = self._pet(nome='Bidu', descricao='Brincava com o Thor na praça')
+        thor = self._pet(nome='Thor', cor='caramelo')
+        self._pet(nome='Luna')
+
+        response = self.client.get('/api/pets-perdidos/', {'q': 'thor'})
+        self.assertEqual([p['id'] for p in response.data['results']], [thor.pk, citado.pk])
+        # Demais filtros continuam valendo junto com a busca
+        response = self.client.get('/api/pets-perdidos/', {'q': 'thor', 'cor': 'caramelo'})
+        self.assertEqual([p['id'] for p in response.data['results']], [thor.pk])
+
+        # Relevância: soma agregada por registro (GROUP BY), palavra inteira em dobro
+        from .busca import buscar
+        qs = buscar(PetPerdido.objects.all(), 'thor')
+        self.assertIn('GROUP BY', str(qs.query))
+        self.assertEqual(list(qs.values_list('pk', 'relevancia_busca')), [(thor.pk, 10), (citado.pk, 2)])
+
+    def test_indice_acompanha_save_e_delete(self) -> None:
+        """Testa os signals: renomear reindexa, visualização não, remover limpa o índice."""
+        from .models import TermoBusca
+
+        pet = self._pet(nome='Pipoca')
+        pet.nome = 'Amora'
+        pet.save()
+        self.assertEqual(self.client.get('/api/pets-perdidos/', {'q': 'pipoca'}).data['count'], 0)
+        self.assertEqual(self.client.get('/api/pets-perdidos/', {'q': 'amora'}).data['count'], 1)
+
+        termos = list(TermoBusca.objects.filter(objeto_id=pet.pk).values_list('pk', flat=True))
+        self.client.get(f'/api/pets-perdidos/{pet.pk}/')  # save(update_fields=['visualizacoes'])
+        self.assertEqual(list(TermoBusca.objects.filter(objeto_id=pet.pk).values_list('pk', flat=True)), termos)
+
+        pet.delete()
+        self.assertFalse(TermoBusca.objects.filter(modelo='core.PetPerdido', objeto_id=pet.pk).exists())
+
+    def test_reindexar_cobre_bulk_create(self) -> None:
+        """Testa o comando reindexar_busca após um bulk_create (sem signals)."""
+        from django.core.management import call_command
+        from io import StringIO
+
+        AnimalParaAdocao.objects.bulk_create([AnimalParaAdocao(
+            usuario_doador=self.dono, nome='Fumaça', especie='gato', porte='pequeno',
+            descricao='Gata cinza', estado='SP', cidade='Santos', endereco_completo='Rua A, 1',
+            telefone='11999999999', email='tutor@email.com', status='aprovado',
+        )])
+        self.assertEqual(self.client.get('/api/animais-adocao/', {'q': 'fumaca'}).data['count'], 0)
+
+        call_command('reindexar_busca', modelo=['core.AnimalParaAdocao'], stdout=StringIO())
+        self.assertEqual(self.client.get('/api/animais-adocao/', {'q': 'fumaca'}).data['count'], 1)
+
+
+class LocalizacaoNormalizadaTest(APITestCase):
+    """Testes da localização canônica (core.localidades: estado, cidade_norm)."""
+
+    def setUp(self) -> None:
+        from django.core.cache import caches
+
+        # Contadores de throttling (cache default) e respostas guardadas de outros testes
+        for alias in ('default', 'respostas'):
+            caches[alias].clear()
+            self.addCleanup(caches[alias].clear)
+        self.dono = Usuario.objects.create(user=User.objects.create_user(username='tutor_local', password='x'))
+
+    def _pet(self, **campos) -> PetPerdido:
+        dados = dict(
+            usuario=self.dono, nome='Bidu', especie='cachorro', porte='medio', cor='preto',
+            data_perda=timezone.now().date(), cidade='São Paulo', estado='SP',
+            latitude=Decimal('-23.5505'), longitude=Decimal('-46.6333'), telefone_contato='11999999999',
+        )
+        dados.update(campos)
+        return PetPerdido.objects.create(**dados)
+
+    def test_save_canoniza_estado_e_cidade(self) -> None:
+        """Testa sigla/nome/código IBGE da UF e a cidade sem acento, inclusive em save parcial."""
+        from .localidades import normalizar_uf
+
+        self.assertEqual([normalizar_uf(v) for v in ('sp', ' São Paulo ', '35', 'xx')], ['SP', 'SP', 'SP', 'XX'])
+
+        animal = Animal.objects.create(nome='Rex', tipo='cachorro', cidade='São José dos Campos', estado='sp')
+        self.assertEqual((animal.estado, animal.cidade_norm), ('SP', 'sao jose dos campos'))
+
+        pet = self._pet()
+        pet.cidade, pet.estado = 'Niterói', 'rio de janeiro'
+        pet.save(update_fields=['cidade', 'estado'])
+        pet.refresh_from_db()
+        self.assertEqual((pet.estado, pet.cidade_norm), ('RJ', 'niteroi'))
+
+    def test_filtros_da_api_por_igualdade_normalizada(self) -> None:
+        """Testa que cidade/estado escritos de formas diferentes filtram o mesmo registro."""
+        pet = self._pet()
+        self._pet(nome='Luna', cidade='São Paulo de Olivença', estado='AM')
+
+        for filtros in ({'cidade': 'sao paulo'}, {'cidade': 'SÃO PAULO', 'estado': '35'}, {'estado': 'são paulo'}):
+            response = self.client.get('/api/pets-perdidos/', filtros)
+            self.assertEqual([p['id'] for p in response.data['results']], [pet.pk], filtros)
+
+        Animal.objects.create(nome='Mia', tipo='gato', cidade='Florianópolis', estado='SC')
+        self.assertEqual(self.client.get('/api/animais/', {'cidade': 'florianopolis', 'estado': 'sc'}).data['count'], 1)
+
+    def test_matching_ignora_acento_da_cidade(self) -> None:
+        """Testa que "Sao Paulo" no reporte casa com o pet perdido em "São Paulo"."""
+        from .matching import buscar_matches_automaticos
+
+        pet = self._pet()
+        reporte = ReportePetEncontrado.objects.create(
+            especie='cachorro', porte='medio', cor='preto', data_encontro=timezone.now().date(),
+            bairro='Centro', cidade='sao paulo', estado='sp',
+            latitude=Decimal('-23.5510'), longitude=Decimal('-46.6340'), telefone_contato='11988888888',
+        )
+        self.assertEqual(buscar_matches_automaticos(reporte), [pet])
+
+    def test_comando_normaliza_apos_update(self) -> None:
+        """Testa normalizar_localizacoes após um update() (que não passa pelo save())."""
+        from django.core.management import call_command
+        from io import StringIO
+
+        pet = self._pet()
+        PetPerdido.objects.filter(pk=pet.pk).update(cidade='Santos', cidade_norm='', estado='sp')
+        self.assertEqual(self.client.get('/api/pets-perdidos/', {'cidade': 'santos'}).data['count'], 0)
+
+        saida = StringIO()
+        call_command('normalizar_localizacoes', dry_run=True, stdout=saida)
+        self.assertIn('core.PetPerdido: 1 registro(s) a corrigir', saida.getvalue())
+        call_command('normalizar_localizacoes', stdout=StringIO())
+        self.assertEqual(self.client.get('/api/pets-perdidos/', {'cidade': 'santos', 'estado': 'SP'}).data['count'], 1)
+
+
+class LocalidadesIbgeTest(APITestCase):
+    """Testes da base local do IBGE (core.localidades, /api/localidades/)."""
+
+    def test_base_e_nome_oficial_no_save(self) -> None:
+        """Testa a base carregada e o nome/código IBGE gravados pelo save()."""
+        from .localidades import base, municipio
+
+        self.assertEqual((len(base().estados), len(base().municipios)), (27, 5570))
+        self.assertEqual(municipio('SANTA BARBARA D’OESTE', 'sp').nome, "Santa Bárbara d'Oeste")
+        self.assertIsNone(municipio('Santos', 'RJ'))
+
+        animal = Animal.objects.create(nome='Rex', tipo='cachorro', cidade='sao jose dos campos', estado='35')
+        self.assertEqual((animal.cidade, animal.estado, animal.cidade_ibge), ('São José dos Campos', 'SP', 3549904))
+        # Cidade desconhecida fica como digitada, sem código
+        animal = Animal.objects.create(nome='Mia', tipo='gato', cidade='Vila Inventada', estado='SP')
+        self.assertEqual((animal.cidade, animal.cidade_norm, animal.cidade_ibge), ('Vila Inventada', 'vila inventada', None))
+
+    def test_api_estados_municipios_e_autocompletar(self) -> None:
+        """Testa as três consultas do endpoint e o 304 pelo ETag da versão da base."""
+        from .busca import normalizar
+
+        response = self.client.get('/api/localidades/')
+        self.assertEqual(len(response.data['estados']), 27)
+        self.assertEqual(response.data['estados'][0], {'codigo': 12, 'sigla': 'AC', 'nome': 'Acre'})
+        self.assertIn('max-age=', response['Cache-Control'])
+
+        response = self.client.get('/api/localidades/', {'uf': 'Roraima'})
+        self.assertEqual((response.data['uf'], len(response.data['municipios'])), ('RR', 15))
+        self.assertEqual(response.data['municipios'][0]['nome'], 'Alto Alegre')
+
+        response = self.client.get('/api/localidades/', {'q': 'SAO JOSE DOS C', 'uf': 'sp'})
+        self.assertEqual(response.data['municipios'], [{'codigo': 3549904, 'nome': 'São José dos Campos', 'uf': 'SP'}])
+        response = self.client.get('/api/localidades/', {'q': 'bras', 'limite': 3})
+        self.assertEqual(len(response.data['municipios']), 3)
+        # Prefixo sem acento casa "Brás Pires" e "Brasília"
+        self.assertTrue(all(normalizar(m['nome']).startswith('bras') for m in response.data['municipios']))
+
+        etag = response['ETag']
+        response = self.client.get('/api/localidades/', {'uf': 'SP'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get('/api/localidades/', {'uf': 'XX'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_serializer_recusa_municipio_fora_da_uf(self) -> None:
+        """Testa a validação de cidade x UF nos serializers de cadastro."""
+        from .serializers import AnimalParaAdocaoSerializer
+
+        dono = Usuario.objects.create(user=User.objects.create_user(username='doador_ibge', password='x'))
+        animal = AnimalParaAdocao.objects.create(
+            usuario_doador=dono, nome='Fumaça', especie='gato', porte='pequeno', descricao='-',
+            estado='SP', cidade='Santos', endereco_completo='Rua A, 1', telefone='11999999999', email='d@email.com',
+        )
+        serializer = AnimalParaAdocaoSerializer(animal, data={'estado': 'RJ'}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('cidade', serializer.errors)
+        self.assertTrue(AnimalParaAdocaoSerializer(animal, data={'cidade': 'guarujá'}, partial=True).is_valid())
+
+    def test_serializer_sugere_municipio_e_recusa_desconhecido(self) -> None:
+        """Testa que nome com erro é recusado (400) sugerindo o município oficial, sem trocá-lo."""
+        from .localidades import municipio_aproximado
+        from .serializers import AnimalParaAdocaoSerializer
+
+        self.assertEqual(municipio_aproximado('Sao Jose dos Campo', 'SP').nome, 'São José dos Campos')
+        self.assertIsNone(municipio_aproximado('Vila Inventada', 'SP'))
+        dono = Usuario.objects.create(user=User.objects.create_user(username='doador_typo', password='x'))
+        animal = AnimalParaAdocao.objects.create(
+            usuario_doador=dono, nome='Fumaça', especie='gato', porte='pequeno', descricao='-',
+            estado='SP', cidade='Santos', endereco_completo='Rua A, 1', telefone='11999999999', email='d@email.com',
+        )
+
+        serializer = AnimalParaAdocaoSerializer(animal, data={'cidade': 'Sao Jose dos Campo'}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            str(serializer.errors['cidade'][0]),
+            'Município "Sao Jose dos Campo" não encontrado em SP. Você quis dizer "São José dos Campos"?',
+        )
+        animal.refresh_from_db()
+        self.assertEqual(animal.cidade, 'Santos')
+
+        serializer = AnimalParaAdocaoSerializer(animal, data={'cidade': 'Vila Inventada'}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(str(serializer.errors['cidade'][0]), 'Município "Vila Inventada" não encontrado em SP.')
+
+
+class GeocodificacaoTest(APITestCase):
+    """Testes da geocodificação com cache (core.geocodificacao, /api/geocode/)."""
+
+    def setUp(self) -> None:
+        from django.core.cache import caches
+        from django.test import override_settings
+        from .geocodificacao import ProvedorLocal
+
+        # Sem rede: provedor de testes e, em seguida, as sedes de município do IBGE
+        configuracao = override_settings(GEOCODIFICACAO_PROVEDORES=['local', 'centroides'])
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        ProvedorLocal.limpar()
+        self.addCleanup(ProvedorLocal.limpar)
+        for nome in ('default', 'respostas'):
+            caches[nome].clear()
+            self.addCleanup(caches[nome].clear)
+
+    def test_cache_evita_segunda_consulta_ao_provedor(self) -> None:
+        """Testa que a mesma consulta (com outra grafia) sai do cache, sem chamar o provedor."""
+        from .geocodificacao import ProvedorLocal
+
+        ProvedorLocal.registrar('Av. Ana Costa, 100, Santos, SP', -23.9671, -46.3289, 'santos', 'sp')
+        response = self.client.get('/api/geocode/', {'q': 'Av. Ana Costa, 100, Santos, SP'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual((response.data['cidade'], response.data['estado'], response.data['cidade_ibge']),
+                         ('Santos', 'SP', 3548500))
+
+        response = self.client.get('/api/geocode/', {'q': 'AV ANA COSTA 100 SANTOS SP'})
+        self.assertEqual((response['X-Cache'], response.data['latitude']), ('HIT', -23.9671))
+        self.assertEqual(len(ProvedorLocal.chamadas), 1)
+
+    def test_reserva_offline_pelas_sedes_de_municipio(self) -> None:
+        """Testa a direta e a reversa pelas sedes do IBGE quando o primeiro provedor não encontra."""
+        response = self.client.get('/api/geocode/', {'endereco': 'Rua Sem Cadastro, 5', 'cidade': 'sao jose dos campos', 'estado': 'SP'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['cidade'], response.data['precisao'], response.data['provedor']),
+                         ('São José dos Campos', 'municipio', 'centroides'))
+
+        response = self.client.get('/api/geocode/', {'lat': '-23.5505', 'lon': '-46.6333'})
+        self.assertEqual((response.data['cidade'], response.data['estado']), ('São Paulo', 'SP'))
+
+        # Meio do Atlântico: nenhuma sede perto; a ausência também vai para o cache
+        self.assertEqual(self.client.get('/api/geocode/', {'lat': '-20', 'lon': '-20'}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/geocode/', {'lat': '-20', 'lon': '-20'})['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/geocode/', {'lat': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_pet_perdido_sem_cidade_usa_reversa(self) -> None:
+        """Testa que cidade/estado ausentes no cadastro vêm das coordenadas, no formato canônico."""
+        from io import BytesIO
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .serializers import PetPerdidoSerializer
+
+        buffer = BytesIO()
+        Image.new('RGB', (200, 200), 'brown').save(buffer, format='PNG')
+        dados = {
+            'nome': 'Thor', 'especie': 'cachorro', 'cor': 'caramelo', 'porte': 'medio',
+            'caracteristicas_distintivas': 'Coleira azul', 'descricao': 'Fugiu no parque',
+            'data_perda': '2026-10-01', 'latitude': '-23.550500', 'longitude': '-46.633300',
+            'endereco': 'Praça da Sé', 'bairro': 'Sé', 'telefone_contato': '11999999999',
+            'email_contato': 'dono@email.com',
+        }
+        serializer = PetPerdidoSerializer(data={**dados, 'imagem_principal': SimpleUploadedFile('pet.png', buffer.getvalue())})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual((serializer.validated_data['cidade'], serializer.validated_data['estado']), ('São Paulo', 'SP'))
+
+        serializer = PetPerdidoSerializer(data={
+            **dados, 'latitude': '-20', 'longitude': '-20', 'imagem_principal': SimpleUploadedFile('pet.png', buffer.getvalue()),
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('cidade', serializer.errors)
+
+    def test_reserva_apos_falha_fica_so_pelo_ttl_curto(self) -> None:
+        """Testa que a sede do município obtida porque o Nominatim falhou não fica 30 dias no cache."""
+        from unittest import mock
+        from django.conf import settings
+        from django.test import override_settings
+        from .geocodificacao import PROVEDORES, ErroProvedor, Provedor, geocodificar, geocodificar_reversa
+        from .models import GeocodificacaoCache
+
+        chamadas = []
+
+        class ProvedorIndisponivel(Provedor):
+            nome = 'indisponivel'
+
+            def direta(self, consulta):
+                chamadas.append(consulta)
+                raise ErroProvedor('timeout')
+
+            reversa = direta
+
+        with mock.patch.dict(PROVEDORES, {'indisponivel': ProvedorIndisponivel}), \
+                override_settings(GEOCODIFICACAO_PROVEDORES=['indisponivel', 'centroides']):
+            resultado, em_cache = geocodificar('Rua das Flores, 10, Santos, SP')
+            self.assertEqual((resultado['provedor'], em_cache), ('centroides', False))
+            registro = GeocodificacaoCache.objects.get()
+            limite = timezone.now() + timedelta(hours=settings.GEOCODIFICACAO_CACHE_TTL_VAZIO_HORAS)
+            self.assertLessEqual(registro.expira_em, limite)
+
+            # Caminho de escrita: só cache e provedores sem rede, sem gravar
+            chamadas.clear()
+            resultado, _ = geocodificar_reversa(-23.5505, -46.6333, somente_local=True)
+            self.assertEqual((resultado['cidade'], chamadas), ('São Paulo', []))
+            self.assertEqual(GeocodificacaoCache.objects.count(), 1)
+
+    def test_limpeza_remove_expirados_e_menos_usados(self) -> None:
+        """Testa o comando de limpeza: expirados primeiro, depois os de acesso mais antigo."""
+        from io import StringIO
+        from django.core.management import call_command
+        from .models import GeocodificacaoCache
+
+        agora = timezone.now()
+        for i, (expira, acesso) in enumerate([(-1, 0), (1, -3), (1, -2), (1, -1)]):
+            GeocodificacaoCache.objects.create(
+                chave=f'{i:040d}', tipo='direta', consulta=f'consulta {i}', resultado=None,
+                expira_em=agora + timedelta(days=expira), ultimo_acesso=agora + timedelta(hours=acesso),
+            )
+        saida = StringIO()
+        call_command('limpar_cache_geocodificacao', '--max', '2', '--lote', '1', stdout=saida)
+        self.assertIn('1 expirado(s) e 1 excedente(s)', saida.getvalue())
+        self.assertEqual(sorted(GeocodificacaoCache.objects.values_list('consulta', flat=True)), ['consulta 2', 'consulta 3'])
+
+
+class ThrottlingJanelaDeslizanteTest(TestCase):
+    """Testes do motor de throttling por janela deslizante (core.throttling)."""
+
+    def setUp(self) -> None:
+        from django.core.cache import caches
+
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+
+    def _throttle(self, rate: str, agora: list):
+        from .throttling import AnonJanelaDeslizanteThrottle
+
+        class Throttle(AnonJanelaDeslizanteThrottle):
+            scope = 'teste'
+            timer = staticmethod(lambda: agora[0])
+
+        Throttle.rate = rate
+        return Throttle()
+
+    def _permitidas(self, throttle, total: int) -> int:
+        from django.test import RequestFactory
+        from rest_framework.request import Request
+
+        request = Request(RequestFactory().get('/', REMOTE_ADDR='10.0.0.1'))
+        return sum(throttle.allow_request(request, None) for _ in range(total))
+
+    def test_limite_e_janela_deslizante(self) -> None:
+        """Testa o limite, o peso da janela anterior e que recusadas não contam."""
+        from django.core.cache import caches
+
+        agora = [3600.0 * 10]
+        throttle = self._throttle('10/hour', agora)
+        self.assertEqual(self._permitidas(throttle, 15), 10)
+        self.assertGreater(throttle.wait(), 0)
+
+        # Dois contadores por chave, não uma lista de horários
+        self.assertEqual(caches['default'].get(f'{throttle.key}:10'), 10)
+
+        # Meia hora na janela seguinte: anterior pesa 10 * 0.5 = 5 -> cabem mais 5
+        agora[0] += 3600 * 1.5
+        self.assertEqual(self._permitidas(throttle, 8), 5)
+        # Na janela seguinte, as 5 ainda pesam metade (2.5) -> cabem 7
+        agora[0] += 3600
+        self.assertEqual(self._permitidas(throttle, 12), 7)
+        # Duas janelas sem requisições: limite inteiro de novo
+        agora[0] += 3600 * 2
+        self.assertEqual(self._permitidas(throttle, 12), 10)
+
+    def test_todos_os_escopos_tem_limite(self) -> None:
+        """Testa que toda classe de core.throttling encontra seu escopo em DEFAULT_THROTTLE_RATES."""
+        import inspect
+        from . import throttling
+
+        for nome, classe in inspect.getmembers(throttling, inspect.isclass):
+            # Só as classes do módulo com escopo próprio (as bases herdam 'anon'/'user' do DRF)
+            if classe.__module__ == throttling.__name__ and 'scope' in vars(classe):
+                with self.subTest(classe=nome):
+                    self.assertIsNotNone(classe().num_requests)
+
 
 class DenunciaApiTest(APITestCase):
     """Testes para a API de denúncias."""
@@ -646,6 +2145,39 @@ class DenunciaApiTest(APITestCase):
         self.assertEqual(denuncia.status, 'aprovada')
         self.assertEqual(denuncia.moderador, self.admin)
     
+    def test_listagem_com_numero_constante_de_consultas(self) -> None:
+        """Testa que a listagem de moderação não faz consultas por denúncia (N+1)."""
+        from .models import DenunciaHistorico, DenunciaImagem, DenunciaVideo
+        
+        def criar_denuncias(quantidade):
+            for i in range(quantidade):
+                denuncia = Denuncia.objects.create(
+                    usuario=self.usuario, moderador=self.admin, titulo=f'Denúncia {i}',
+                    categoria='maus_tratos', descricao='Descrição', localizacao='Rua Y - SP/SP',
+                    imagem='denuncias/imagens/foto.jpg'
+                )
+                DenunciaImagem.objects.create(denuncia=denuncia, imagem='denuncias/imagens/extra.jpg')
+                DenunciaVideo.objects.create(denuncia=denuncia, video='denuncias/videos/extra.mp4')
+                DenunciaHistorico.objects.create(denuncia=denuncia, tipo='criacao', usuario=self.user)
+                DenunciaHistorico.objects.create(denuncia=denuncia, tipo='aprovacao', usuario=self.admin)
+        
+        def listar():
+            # count + página (com autor e moderador) + imagens + vídeos + histórico
+            with self.assertNumQueries(5):
+                response = self.client.get('/api/denuncias/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data['results']
+        
+        self.client.force_authenticate(user=self.admin)
+        criar_denuncias(2)
+        self.assertEqual(len(listar()), 2)
+        criar_denuncias(8)
+        resultados = listar()
+        self.assertEqual(len(resultados), 10)
+        # Histórico continua do mais recente para o mais antigo
+        self.assertEqual([h['tipo'] for h in resultados[0]['historico']], ['aprovacao', 'criacao'])
+        self.assertEqual(resultados[0]['usuario_nome'], '')
+    
     def test_usuario_normal_nao_pode_aprovar(self) -> None:
         """Testa que usuário normal não pode aprovar denúncia."""
         denuncia = Denuncia.objects.create(
@@ -664,6 +2196,126 @@ class DenunciaApiTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
 
+    def test_upload_de_video_em_pedacos_retomavel(self) -> None:
+        """Testa sessão, PUTs com Content-Range, retomada após conflito e anexo à denúncia."""
+        import tempfile
+        from django.test import override_settings
+        from .models import SessaoUpload, Tarefa
+        from .uploads import caminho_parcial
+
+        self.client.force_authenticate(user=self.user)
+        denuncia = Denuncia.objects.create(
+            usuario=self.usuario, titulo='Maus-tratos', categoria='maus_tratos',
+            descricao='Descrição', localizacao='Rua X'
+        )
+        video = b'\x00\x00\x00\x18ftypmp42' + bytes(range(256)) * 40
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            response = self.client.post('/api/uploads/videos/', {
+                'nome_arquivo': 'caso.mp4', 'tamanho_total': len(video), 'content_type': 'video/mp4'
+            }, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            url = f'/api/uploads/videos/{response.data["id"]}/'
+            self.assertTrue(Tarefa.objects.filter(tipo='expirar_sessao_upload').exists())
+
+            def enviar(inicio, fim):
+                return self.client.generic(
+                    'PUT', url, video[inicio:fim], content_type='application/octet-stream',
+                    HTTP_CONTENT_RANGE=f'bytes {inicio}-{fim - 1}/{len(video)}'
+                )
+
+            self.assertEqual(enviar(0, 4000).data['recebidos'], 4000)
+            # Pedaço repetido/fora de ordem: 409 informa de onde retomar
+            conflito = enviar(0, 4000)
+            self.assertEqual(conflito.status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(conflito.data['recebidos'], 4000)
+            self.assertEqual(self.client.get(url).data['recebidos'], 4000)
+            self.assertEqual(enviar(4000, len(video)).data['recebidos'], len(video))
+
+            response = self.client.post(f'{url}finalizar/', {'denuncia': denuncia.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            denuncia.refresh_from_db()
+            with denuncia.video.open('rb') as arquivo:
+                self.assertEqual(arquivo.read(), video)
+            sessao = SessaoUpload.objects.get()
+            self.assertEqual((sessao.status, sessao.arquivo), ('concluida', denuncia.video.name))
+            self.assertFalse(caminho_parcial(sessao).exists())
+
+            # Cabeçalho que não é de vídeo: sessão cancelada já no primeiro pedaço
+            falso = b'MZ' + b'\x00' * 100
+            response = self.client.post('/api/uploads/videos/', {
+                'nome_arquivo': 'virus.mp4', 'tamanho_total': len(falso)
+            }, format='json')
+            url = f'/api/uploads/videos/{response.data["id"]}/'
+            response = self.client.generic(
+                'PUT', url, falso, content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes 0-{len(falso) - 1}/{len(falso)}'
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            sessao = SessaoUpload.objects.get(pk=url.rstrip('/').rsplit('/', 1)[-1])
+            self.assertEqual(sessao.status, 'cancelada')
+            self.assertFalse(caminho_parcial(sessao).exists())
+
+    def test_upload_em_pedacos_reserva_offset_e_valida_arquivo_montado(self) -> None:
+        """Testa que um PUT concorrente não grava no parcial e que finalizar valida o arquivo inteiro."""
+        import tempfile
+        from datetime import timedelta
+        from django.test import override_settings
+        from django.utils import timezone
+        from .models import SessaoUpload
+        from .uploads import PRAZO_RESERVA_PEDACO, caminho_parcial
+
+        self.client.force_authenticate(user=self.user)
+        denuncia = Denuncia.objects.create(
+            usuario=self.usuario, titulo='Maus-tratos', categoria='maus_tratos',
+            descricao='Descrição', localizacao='Rua X'
+        )
+        video = b'\x00\x00\x00\x18ftypmp42' + bytes(range(256)) * 40
+
+        with override_settings(MEDIA_ROOT=tempfile.mkdtemp()):
+            response = self.client.post('/api/uploads/videos/', {
+                'nome_arquivo': 'caso.mp4', 'tamanho_total': len(video), 'content_type': 'video/mp4'
+            }, format='json')
+            url = f'/api/uploads/videos/{response.data["id"]}/'
+            sessao = SessaoUpload.objects.get()
+
+            def enviar(inicio, fim):
+                return self.client.generic(
+                    'PUT', url, video[inicio:fim], content_type='application/octet-stream',
+                    HTTP_CONTENT_RANGE=f'bytes {inicio}-{fim - 1}/{len(video)}'
+                )
+
+            self.assertEqual(enviar(0, 4000).status_code, status.HTTP_200_OK)
+
+            # Outro PUT reservou o offset 4000 e ainda está gravando
+            SessaoUpload.objects.filter(pk=sessao.pk).update(status='enviando', data_atualizacao=timezone.now())
+            conflito = enviar(4000, len(video))
+            self.assertEqual(conflito.status_code, status.HTTP_409_CONFLICT)
+            self.assertEqual(conflito.data['recebidos'], 4000)
+            self.assertEqual(caminho_parcial(sessao).stat().st_size, 4000)
+            response = self.client.post(f'{url}finalizar/', {'denuncia': denuncia.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+            # Reserva abandonada (processo caiu) é assumida depois do prazo
+            SessaoUpload.objects.filter(pk=sessao.pk).update(
+                data_atualizacao=timezone.now() - PRAZO_RESERVA_PEDACO - timedelta(seconds=1)
+            )
+            self.assertEqual(enviar(4000, len(video)).data['recebidos'], len(video))
+            sessao.refresh_from_db()
+            self.assertEqual(sessao.status, 'aberta')
+
+            # Arquivo montado adulterado em disco: finalizar recusa e cancela a sessão
+            with open(caminho_parcial(sessao), 'r+b') as parcial:
+                parcial.write(b'MZ' + b'\x00' * 30)
+            response = self.client.post(f'{url}finalizar/', {'denuncia': denuncia.pk}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            sessao.refresh_from_db()
+            self.assertEqual(sessao.status, 'cancelada')
+            self.assertFalse(caminho_parcial(sessao).exists())
+            denuncia.refresh_from_db()
+            self.assertFalse(denuncia.video)
+
+
 class SolicitacaoAdocaoApiTest(APITestCase):
     """Testes para sistema de solicitações de adoção."""
     
@@ -739,6 +2391,62 @@ class SolicitacaoAdocaoApiTest(APITestCase):
         # Verifica que animal foi marcado como adotado
         self.animal.refresh_from_db()
         self.assertEqual(self.animal.status, 'adotado')
+    
+    def test_meus_pets_cadastrados_agregado_e_paginado(self) -> None:
+        """Testa contadores agregados, formato compatível com o painel e cursor."""
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIRequestFactory
+        
+        outro = AnimalParaAdocao.objects.create(
+            usuario_doador=self.usuario_doador, nome='Mimi', especie='gato', porte='pequeno',
+            descricao='Gata calma', cidade='São Paulo', estado='SP'
+        )
+        AnimalParaAdocao.objects.create(
+            usuario_doador=self.usuario_doador, nome='Bob', especie='cachorro', porte='medio',
+            descricao='Brincalhão', cidade='Santos', estado='SP'
+        )
+        SolicitacaoAdocao.objects.create(animal=self.animal, usuario_interessado=self.usuario_interessado)
+        for i in range(3):
+            user = User.objects.create_user(username=f'interessado{i}', password='x')
+            SolicitacaoAdocao.objects.create(
+                animal=outro, usuario_interessado=Usuario.objects.create(user=user),
+                status='pendente' if i else 'rejeitada'
+            )
+        
+        self.client.force_authenticate(user=self.doador)
+        # Uma única consulta: página com os contadores no mesmo SELECT
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/meus-pets-cadastrados/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        # Mesmos bytes do item montado à mão pela versão anterior da view
+        request = APIRequestFactory().get('/')
+        esperado = []
+        for pet in AnimalParaAdocao.objects.order_by('-data_cadastro', '-id'):
+            esperado.append({
+                'id': pet.id, 'nome': pet.nome, 'especie_display': pet.get_especie_display(),
+                'porte_display': pet.get_porte_display() if pet.porte else 'Não informado',
+                'sexo': pet.sexo, 'sexo_display': pet.get_sexo_display(), 'cor': pet.cor,
+                'idade': pet.idade, 'descricao': pet.descricao, 'cidade': pet.cidade,
+                'estado': pet.estado, 'status': pet.status,
+                'imagem_principal_url': request.build_absolute_uri(pet.imagem_principal.url) if pet.imagem_principal else None,
+                'data_cadastro': pet.data_cadastro,
+                'total_solicitacoes': SolicitacaoAdocao.objects.filter(animal=pet).count(),
+                'solicitacoes_pendentes': SolicitacaoAdocao.objects.filter(animal=pet, status='pendente').count(),
+            })
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(response.data['results']), renderer.render(esperado))
+        totais = {p['nome']: (p['total_solicitacoes'], p['solicitacoes_pendentes']) for p in response.data['results']}
+        self.assertEqual(totais, {'Thor': (1, 1), 'Mimi': (3, 2), 'Bob': (0, 0)})
+        
+        # Cursor: segue "next" até o fim sem repetir itens
+        vistos = []
+        url = '/api/meus-pets-cadastrados/?page_size=2'
+        while url:
+            pagina = self.client.get(url).data
+            vistos += [p['id'] for p in pagina['results']]
+            url = pagina['next']
+        self.assertEqual(vistos, [p['id'] for p in esperado])
 
 
 # ===== TESTES DE INTEGRAÇÃO =====
@@ -1,16 +1,123 @@
 """
 Rate Limiting customizado para proteção contra spam e abuso
 Implementa diferentes limites para diferentes endpoints
+
+Motor (janela deslizante aproximada):
+    O SimpleRateThrottle do DRF guarda a lista com o horário de cada
+    requisição da chave e a regrava inteira a cada acesso (500 floats para
+    '500/hour'). Aqui cada chave tem só dois contadores inteiros: o da
+    janela fixa atual e o da anterior. A contagem na janela deslizante é
+    estimada como
+
+        anterior * (fração da janela anterior ainda dentro do período) + atual
+
+    1. INCR atômico do contador atual (cria com ADD se não existe)
+    2. Lê o contador anterior
+    3. Estimativa acima do limite: desfaz o INCR (DECR) e recusa com 429
+
+    O INCR vem antes da decisão: requisições simultâneas recebem contagens
+    distintas, sem a corrida ler-decidir-gravar da lista do DRF.
+
+Armazenamento:
+    Cache settings.THROTTLE_CACHE ('default'). Com CACHE_REDIS_URL é o
+    Redis, compartilhado entre processos/containers (INCR/DECR atômicos);
+    sem ele, o LocMemCache por processo (dev/testes). Backends sem INCR
+    atômico (banco, arquivo) funcionam, mas podem deixar passar algumas
+    requisições a mais sob concorrência.
+
+Escopos e limites continuam em REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
 """
 
-from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, SimpleRateThrottle, UserRateThrottle
+
+
+# ============================================
+# MOTOR: JANELA DESLIZANTE COM DOIS CONTADORES
+# ============================================
+
+class JanelaDeslizanteThrottle(SimpleRateThrottle):
+    """
+    SimpleRateThrottle com memória constante por chave (dois contadores).
+
+    Subclasses definem get_cache_key (ou herdam de Anon/UserRateThrottle)
+    e o scope, como no DRF.
+
+    Example:
+        >>> class BuscaRateThrottle(JanelaDeslizanteThrottle, AnonRateThrottle):
+        ...     scope = 'busca'
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def allow_request(self, request, view) -> bool:
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        janela = int(self.now // self.duration)
+        self.decorrido = self.now - janela * self.duration
+        chave_atual = f'{self.key}:{janela}'
+
+        # PASSO 1: Conta esta requisição (atômico no Redis e no LocMemCache)
+        self.atual = self._incrementar(chave_atual)
+        # PASSO 2: Janela anterior, com o peso da parte que ainda está no período
+        self.anterior = self.cache.get(f'{self.key}:{janela - 1}', 0)
+
+        # PASSO 3: Acima do limite, a requisição recusada não conta
+        if self._estimativa(self.atual, self.anterior) > self.num_requests:
+            try:
+                self.atual = self.cache.decr(chave_atual)
+            except ValueError:
+                self.atual -= 1
+            return False
+        return True
+
+    def wait(self):
+        """Segundos até a próxima requisição caber no limite (cabeçalho Retry-After)."""
+        limite, duracao = self.num_requests, self.duration
+        if self.atual + 1 <= limite and self.anterior:
+            # Ainda nesta janela: espera o peso da anterior cair o suficiente
+            espera = duracao * (1 - (limite - self.atual - 1) / self.anterior) - self.decorrido
+        else:
+            # Só na próxima janela, quando a atual vira a anterior
+            espera = duracao - self.decorrido
+            if self.atual:
+                espera += max(duracao * (1 - (limite - 1) / self.atual), 0)
+        return max(espera, 0)
+
+    def _estimativa(self, atual: int, anterior: int) -> float:
+        return anterior * (1 - self.decorrido / self.duration) + atual
+
+    def _incrementar(self, chave: str) -> int:
+        # Cada contador vive duas janelas: a sua e a seguinte, em que é o "anterior"
+        try:
+            return self.cache.incr(chave)
+        except ValueError:
+            self.cache.add(chave, 0, timeout=2 * self.duration)
+            return self.cache.incr(chave)
+
+
+class AnonJanelaDeslizanteThrottle(JanelaDeslizanteThrottle, AnonRateThrottle):
+    """Limite por IP para anônimos (autenticados não são limitados)."""
+
+
+class UserJanelaDeslizanteThrottle(JanelaDeslizanteThrottle, UserRateThrottle):
+    """Limite por usuário para autenticados (anônimos por IP)."""
 
 
 # ============================================
 # THROTTLES PARA USUÁRIOS ANÔNIMOS
 # ============================================
 
-class AnonBurstRateThrottle(AnonRateThrottle):
+class AnonBurstRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite agressivo para burst (rajada de requisições)
     Previne ataques rápidos de força bruta
@@ -18,7 +125,7 @@ class AnonBurstRateThrottle(AnonRateThrottle):
     scope = 'anon_burst'
 
 
-class AnonSustainedRateThrottle(AnonRateThrottle):
+class AnonSustainedRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite sustentado para uso normal
     Permite navegação normal mas previne abuso prolongado
@@ -30,7 +137,7 @@ class AnonSustainedRateThrottle(AnonRateThrottle):
 # THROTTLES PARA USUÁRIOS AUTENTICADOS
 # ============================================
 
-class UserBurstRateThrottle(UserRateThrottle):
+class UserBurstRateThrottle(UserJanelaDeslizanteThrottle):
     """
     Limite de burst para usuários logados
     Mais permissivo que anônimos, mas ainda protege
@@ -38,7 +145,7 @@ class UserBurstRateThrottle(UserRateThrottle):
     scope = 'user_burst'
 
 
-class UserSustainedRateThrottle(UserRateThrottle):
+class UserSustainedRateThrottle(UserJanelaDeslizanteThrottle):
     """
     Limite sustentado para usuários logados
     Permite uso intenso mas razoável
@@ -50,7 +157,7 @@ class UserSustainedRateThrottle(UserRateThrottle):
 # THROTTLES PARA AÇÕES ESPECÍFICAS
 # ============================================
 
-class RegistroRateThrottle(AnonRateThrottle):
+class RegistroRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite muito restritivo para registro de usuários
     Previne criação em massa de contas falsas
@@ -59,7 +166,7 @@ class RegistroRateThrottle(AnonRateThrottle):
     scope = 'registro'
 
 
-class LoginRateThrottle(AnonRateThrottle):
+class LoginRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para tentativas de login
     Previne ataques de força bruta em senhas
@@ -68,7 +175,7 @@ class LoginRateThrottle(AnonRateThrottle):
     scope = 'login'
 
 
-class ContatoRateThrottle(AnonRateThrottle):
+class ContatoRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para formulário de contato
     Previne spam via formulário de contato
@@ -77,7 +184,7 @@ class ContatoRateThrottle(AnonRateThrottle):
     scope = 'contato'
 
 
-class DenunciaRateThrottle(AnonRateThrottle):
+class DenunciaRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para denúncias
     Previne spam de denúncias falsas
@@ -86,7 +193,7 @@ class DenunciaRateThrottle(AnonRateThrottle):
     scope = 'denuncia'
 
 
-class AdocaoRateThrottle(AnonRateThrottle):
+class AdocaoRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para solicitações de adoção
     Previne spam de solicitações falsas
@@ -95,7 +202,7 @@ class AdocaoRateThrottle(AnonRateThrottle):
     scope = 'adocao'
 
 
-class PetPerdidoRateThrottle(AnonRateThrottle):
+class PetPerdidoRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para cadastro de pets perdidos
     Previne spam de cadastros falsos
@@ -104,7 +211,7 @@ class PetPerdidoRateThrottle(AnonRateThrottle):
     scope = 'pet_perdido'
 
 
-class UploadRateThrottle(AnonRateThrottle):
+class UploadRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para upload de arquivos (fotos/vídeos)
     Previne abuso de armazenamento
@@ -117,7 +224,7 @@ class UploadRateThrottle(AnonRateThrottle):
 # THROTTLES PARA LEITURA (GET)
 # ============================================
 
-class ListRateThrottle(AnonRateThrottle):
+class ListRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para listagem de recursos (GET em coleções)
     Previne scraping massivo
@@ -126,7 +233,7 @@ class ListRateThrottle(AnonRateThrottle):
     scope = 'list'
 
 
-class DetailRateThrottle(AnonRateThrottle):
+class DetailRateThrottle(AnonJanelaDeslizanteThrottle):
     """
     Limite para leitura de detalhes (GET em instância única)
     Mais permissivo que listagens
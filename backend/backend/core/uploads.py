@@ -0,0 +1,191 @@
+"""
+Upload retomável de vídeos em pedaços
+Evita reenviar 20MB do zero quando a conexão móvel cai no meio do upload
+
+Fluxo:
+    1. POST /api/uploads/videos/ abre a sessão (nome, tamanho, MIME type)
+    2. PUT /api/uploads/videos/{id}/ com `Content-Range: bytes inicio-fim/total`
+       reserva o offset (status 'enviando') e só então grava o pedaço direto
+       no arquivo parcial em MEDIA_ROOT, lendo o corpo da requisição em
+       blocos (sem montar o pedaço inteiro na memória)
+    3. Assim que os primeiros bytes chegam, o cabeçalho do vídeo é conferido
+       (validate_video_header); vídeo inválido cancela a sessão na hora
+    4. GET /api/uploads/videos/{id}/ informa `recebidos` para retomar
+    5. POST /api/uploads/videos/{id}/finalizar/ valida o arquivo montado
+       (validate_video_file), move-o para o storage e o anexa à denúncia
+"""
+
+import re
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.files import File
+
+from .validators import TAMANHO_CABECALHO_VIDEO, validate_video_file, validate_video_header
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Pasta (dentro de MEDIA_ROOT) dos arquivos ainda em envio
+PASTA_PARCIAIS = 'uploads_parciais'
+
+# Maior pedaço aceito por PUT
+TAMANHO_MAXIMO_PEDACO = 5 * 1024 * 1024  # 5MB
+
+# Bloco lido do corpo da requisição e gravado em disco por vez
+TAMANHO_BLOCO_LEITURA = 64 * 1024
+
+# Tempo para concluir o upload depois de aberta a sessão
+VALIDADE_SESSAO = timedelta(hours=24)
+
+# Reserva de um PUT ('enviando') mais antiga que isto é de um processo que
+# caiu no meio da gravação e pode ser assumida pelo próximo PUT
+PRAZO_RESERVA_PEDACO = timedelta(minutes=10)
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+# ============================================
+# ARQUIVO PARCIAL
+# ============================================
+
+def caminho_parcial(sessao) -> Path:
+    """Caminho em disco do arquivo parcial de uma sessão."""
+    return Path(settings.MEDIA_ROOT) / PASTA_PARCIAIS / f'{sessao.pk}.part'
+
+
+def interpretar_content_range(valor: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Lê o cabeçalho Content-Range de um PUT.
+
+    Returns:
+        (inicio, fim_exclusivo, total) ou None se o formato for inválido
+
+    Examples:
+        >>> interpretar_content_range('bytes 0-1048575/20971520')
+        (0, 1048576, 20971520)
+        >>> interpretar_content_range('bytes 10-5/20') is None
+        True
+    """
+    encontrado = _CONTENT_RANGE.match((valor or '').strip())
+    if not encontrado:
+        return None
+    inicio, fim, total = (int(grupo) for grupo in encontrado.groups())
+    if fim < inicio or fim >= total:
+        return None
+    return inicio, fim + 1, total
+
+
+def gravar_pedaco(sessao, inicio: int, fluxo, tamanho: int) -> int:
+    """
+    Copia até `tamanho` bytes do corpo da requisição para o arquivo parcial.
+
+    Escreve a partir de `inicio` e descarta o que houver depois (restos de
+    um PUT interrompido antes de atualizar `recebidos`).
+
+    Args:
+        sessao: SessaoUpload
+        inicio: Offset do pedaço (deve ser igual a sessao.recebidos)
+        fluxo: Objeto com read() (request.stream)
+        tamanho: Bytes declarados no Content-Length
+
+    Returns:
+        Bytes efetivamente gravados (menos que `tamanho` se o cliente desconectou)
+    """
+    caminho = caminho_parcial(sessao)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    gravados = 0
+    with open(caminho, 'r+b' if caminho.exists() else 'wb') as destino:
+        destino.seek(inicio)
+        while gravados < tamanho:
+            bloco = fluxo.read(min(TAMANHO_BLOCO_LEITURA, tamanho - gravados))
+            if not bloco:
+                break
+            destino.write(bloco)
+            gravados += len(bloco)
+        destino.truncate()
+    return gravados
+
+
+def validar_cabecalho_parcial(sessao, recebidos: int) -> None:
+    """
+    Confere o cabeçalho do vídeo assim que os primeiros bytes estão em disco.
+
+    Não faz nada antes de TAMANHO_CABECALHO_VIDEO bytes (ou do arquivo
+    inteiro, se for menor) nem depois que o cabeçalho já foi conferido.
+
+    Raises:
+        ValidationError: Se o cabeçalho não for de um vídeo conhecido
+    """
+    necessario = min(TAMANHO_CABECALHO_VIDEO, sessao.tamanho_total)
+    if sessao.recebidos >= necessario or recebidos < necessario:
+        return
+    with open(caminho_parcial(sessao), 'rb') as parcial:
+        validate_video_header(parcial.read(TAMANHO_CABECALHO_VIDEO))
+
+
+def validar_arquivo_completo(sessao) -> None:
+    """
+    Valida o vídeo montado antes de anexá-lo (mesmas regras de um upload direto).
+
+    Confere tamanho, extensão, MIME type e cabeçalho do arquivo em disco,
+    não só dos primeiros bytes que chegaram no PUT.
+
+    Raises:
+        ValidationError: Se o arquivo montado não for um vídeo aceito
+    """
+    with open(caminho_parcial(sessao), 'rb') as parcial:
+        arquivo = File(parcial, name=sessao.nome_arquivo)
+        arquivo.content_type = sessao.content_type or None
+        validate_video_file(arquivo)
+
+
+def descartar_parcial(sessao) -> None:
+    """Apaga o arquivo parcial (sessão cancelada ou expirada)."""
+    caminho_parcial(sessao).unlink(missing_ok=True)
+
+
+class _ArquivoParcial(File):
+    """
+    Arquivo parcial já completo, entregue ao storage.
+
+    `temporary_file_path` faz o FileSystemStorage mover o arquivo (rename)
+    em vez de copiar os bytes; outros storages leem em blocos normalmente.
+    """
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def anexar_video(sessao, denuncia):
+    """
+    Move o vídeo completo para o storage e o anexa à denúncia.
+
+    Vira o vídeo principal se a denúncia ainda não tiver um; senão entra
+    como vídeo adicional.
+
+    Args:
+        sessao: SessaoUpload com todos os bytes recebidos
+        denuncia: Denuncia de destino
+
+    Returns:
+        FieldFile do vídeo anexado
+    """
+    from .models import DenunciaVideo
+
+    with open(caminho_parcial(sessao), 'rb') as parcial:
+        conteudo = _ArquivoParcial(parcial)
+        if not denuncia.video:
+            denuncia.video.save(sessao.nome_arquivo, conteudo, save=False)
+            denuncia.save(update_fields=['video', 'data_atualizacao'])
+            return denuncia.video
+
+        extra = DenunciaVideo(denuncia=denuncia)
+        extra.video.save(sessao.nome_arquivo, conteudo, save=False)
+        extra.save()
+        return extra.video
@@ -4,9 +4,12 @@ from .views import (
     RegisterView, MeView, AnimalViewSet, AdocaoViewSet, DenunciaViewSet,
     AnimalParaAdocaoViewSet, SolicitacaoAdocaoViewSet, NotificacaoViewSet,
     MinhasSolicitacoesEnviadasView, SolicitacoesRecebidasView, MeusPetsCadastradosView,
-    ContatoViewSet, PetPerdidoViewSet, ReportePetEncontradoViewSet
+    ContatoViewSet, PetPerdidoViewSet, ReportePetEncontradoViewSet, MetricasCacheView,
+    LocalidadesView, GeocodificacaoView
 )
 from .views_fotos import AnimalFotoUploadView
+from .views_eventos import TicketStreamView, stream_notificacoes
+from .views_uploads import SessaoUploadVideoViewSet
 from rest_framework.routers import DefaultRouter
 
 router = DefaultRouter()
@@ -19,12 +22,16 @@ router.register(r'notificacoes', NotificacaoViewSet, basename='notificacao')
 router.register(r'contatos', ContatoViewSet, basename='contato')
 router.register(r'pets-perdidos', PetPerdidoViewSet, basename='pet-perdido')
 router.register(r'pets-encontrados', ReportePetEncontradoViewSet, basename='pet-encontrado')
+router.register(r'uploads/videos', SessaoUploadVideoViewSet, basename='upload-video')
 
 urlpatterns = [
     path('auth/register/', RegisterView.as_view(), name='auth-register'),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/me/', MeView.as_view(), name='auth_me'),
+    path('cache/metricas/', MetricasCacheView.as_view(), name='cache-metricas'),
+    path('localidades/', LocalidadesView.as_view(), name='localidades'),
+    path('geocode/', GeocodificacaoView.as_view(), name='geocode'),
     path('animais/<int:pk>/fotos/', AnimalFotoUploadView.as_view(), name='animal-fotos'),
     
     # Endpoints para página "Minhas Solicitações"
@@ -32,5 +39,9 @@ urlpatterns = [
     path('solicitacoes-recebidas/', SolicitacoesRecebidasView.as_view(), name='solicitacoes-recebidas'),
     path('meus-pets-cadastrados/', MeusPetsCadastradosView.as_view(), name='meus-pets-cadastrados'),
     
+    # Antes do router: senão "stream" casaria com notificacoes/{pk}/
+    path('notificacoes/stream/', stream_notificacoes, name='notificacoes-stream'),
+    path('notificacoes/stream/ticket/', TicketStreamView.as_view(), name='notificacoes-stream-ticket'),
+    
     path('', include(router.urls)),
 ]
\ No newline at end of file
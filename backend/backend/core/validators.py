@@ -6,6 +6,7 @@ Implementa verificação de MIME real, dimensões e tamanhos
 from django.core.exceptions import ValidationError
 from PIL import Image
 import io
+import warnings
 
 
 # ============================================
@@ -22,6 +23,13 @@ MIN_IMAGE_HEIGHT = 200
 MAX_IMAGE_WIDTH = 4000
 MAX_IMAGE_HEIGHT = 4000
 
+# Limite rígido de pixels (largura x altura), conferido no cabeçalho antes de
+# qualquer leitura dos dados: barra "bombas de descompressão" (arquivos de
+# poucos KB que viram centenas de MB ao decodificar). Igual ao quadro máximo
+# 4000x4000 (16 MP, ~48MB decodificado em RGB), para não recusar foto que
+# as dimensões aceitam
+MAX_IMAGE_PIXELS = MAX_IMAGE_WIDTH * MAX_IMAGE_HEIGHT
+
 # Formatos permitidos
 ALLOWED_IMAGE_EXTENSIONS = ['jpg', 'jpeg', 'png', 'webp']
 ALLOWED_VIDEO_EXTENSIONS = ['mp4', 'avi', 'mov', 'webm']
@@ -47,6 +55,99 @@ ALLOWED_VIDEO_MIMETYPES = [
 # VALIDADORES DE IMAGEM
 # ============================================
 
+# Atributo do UploadedFile onde a análise fica guardada
+_ATRIBUTO_INFO_IMAGEM = '_sos_pets_info_imagem'
+
+
+def analisar_imagem(arquivo):
+    """
+    Lê o cabeçalho da imagem uma única vez por upload.
+
+    O resultado fica guardado no próprio UploadedFile: os validators do
+    serializer, do model e `get_image_info` reutilizam a mesma análise em
+    vez de abrir o arquivo de novo. Se o forms.ImageField do Django (usado
+    pelo ImageField do DRF) já abriu e verificou a imagem em `arquivo.image`,
+    ela é aproveitada sem nova leitura.
+
+    `verify()` (integridade) só roda quando o total de pixels declarado está
+    dentro de MAX_IMAGE_PIXELS; a imagem nunca é decodificada aqui.
+
+    Args:
+        arquivo: UploadedFile do Django
+
+    Returns:
+        dict: {'formato', 'largura', 'altura', 'pixels', 'modo', 'tamanho_mb'}
+        ou {'erro': mensagem} se o Pillow não reconhecer o arquivo
+
+    Examples:
+        >>> analisar_imagem(arquivo)
+        {'formato': 'JPEG', 'largura': 1920, 'altura': 1080, 'pixels': 2073600, 'modo': 'RGB', 'tamanho_mb': 0.4}
+        >>> analisar_imagem(arquivo) is analisar_imagem(arquivo)  # Sem nova leitura
+        True
+    """
+    info = getattr(arquivo, _ATRIBUTO_INFO_IMAGEM, None)
+    if info is not None:
+        return info
+
+    img = getattr(arquivo, 'image', None)
+    if isinstance(img, Image.Image):
+        info = _info_da_imagem(img, arquivo)
+    else:
+        try:
+            arquivo.seek(0)
+            # O limite de pixels é aplicado abaixo com MAX_IMAGE_PIXELS (16 MP,
+            # bem menor que os ~89 MP do aviso do Pillow); o aviso só polui o log
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+                img = Image.open(arquivo)
+            info = _info_da_imagem(img, arquivo)
+            if info['pixels'] <= MAX_IMAGE_PIXELS:
+                img.verify()
+        except Exception as e:
+            info = {'erro': str(e)}
+        finally:
+            arquivo.seek(0)
+
+    setattr(arquivo, _ATRIBUTO_INFO_IMAGEM, info)
+    return info
+
+
+def _info_da_imagem(img, arquivo):
+    """Monta o dicionário de `analisar_imagem` a partir do cabeçalho."""
+    largura, altura = img.size
+    return {
+        'formato': img.format,
+        'largura': largura,
+        'altura': altura,
+        'pixels': largura * altura,
+        'modo': img.mode,  # RGB, RGBA, L, etc.
+        'tamanho_mb': round(arquivo.size / (1024 * 1024), 2),
+    }
+
+
+def _validar_pixels_e_dimensoes(info, min_width, min_height, max_width, max_height):
+    """Aplica o limite de pixels e os limites de dimensões a uma análise."""
+    largura, altura = info['largura'], info['altura']
+
+    if info['pixels'] > MAX_IMAGE_PIXELS:
+        raise ValidationError(
+            f'Imagem com resolução excessiva ({largura}x{altura}px). '
+            f'Máximo permitido: {MAX_IMAGE_PIXELS / 1_000_000:.0f} megapixels'
+        )
+
+    if largura < min_width or altura < min_height:
+        raise ValidationError(
+            f'Imagem muito pequena ({largura}x{altura}px). '
+            f'Dimensões mínimas: {min_width}x{min_height}px'
+        )
+
+    if largura > max_width or altura > max_height:
+        raise ValidationError(
+            f'Imagem muito grande ({largura}x{altura}px). '
+            f'Dimensões máximas: {max_width}x{max_height}px'
+        )
+
+
 def validate_image_file(arquivo):
     """
     Validação completa de arquivo de imagem.
@@ -90,51 +191,26 @@ def validate_image_file(arquivo):
             f'Formatos aceitos: {", ".join(ALLOWED_IMAGE_EXTENSIONS)}'
         )
     
-    # VALIDAÇÃO 3: MIME type real (verificando conteúdo do arquivo)
-    try:
-        # Lê o início do arquivo para verificar MIME type
-        arquivo.seek(0)
-        img = Image.open(arquivo)
-        
-        # Verifica formato real detectado pelo Pillow
-        formato_real = img.format.lower() if img.format else None
-        
-        if formato_real not in ['jpeg', 'png', 'webp']:
-            raise ValidationError(
-                f'Tipo de arquivo não permitido. '
-                f'O arquivo parece ser {formato_real}, mas apenas JPEG, PNG e WebP são aceitos.'
-            )
-        
-        # VALIDAÇÃO 4: Dimensões da imagem
-        largura, altura = img.size
-        
-        if largura < MIN_IMAGE_WIDTH or altura < MIN_IMAGE_HEIGHT:
-            raise ValidationError(
-                f'Imagem muito pequena ({largura}x{altura}px). '
-                f'Dimensões mínimas: {MIN_IMAGE_WIDTH}x{MIN_IMAGE_HEIGHT}px'
-            )
-        
-        if largura > MAX_IMAGE_WIDTH or altura > MAX_IMAGE_HEIGHT:
-            raise ValidationError(
-                f'Imagem muito grande ({largura}x{altura}px). '
-                f'Dimensões máximas: {MAX_IMAGE_WIDTH}x{MAX_IMAGE_HEIGHT}px'
-            )
-        
-        # VALIDAÇÃO 5: Verifica se imagem não está corrompida
-        img.verify()
-        
-    except ValidationError:
-        # Re-lança ValidationError já tratados
-        raise
-    except Exception as e:
-        # Qualquer outro erro indica arquivo inválido/corrompido
+    # VALIDAÇÃO 3: Integridade - o Pillow reconhece e verifica o arquivo
+    # (cabeçalho lido uma única vez por upload, ver analisar_imagem)
+    info = analisar_imagem(arquivo)
+    if 'erro' in info:
         raise ValidationError(
             f'Arquivo de imagem inválido ou corrompido. '
-            f'Certifique-se de enviar uma imagem válida. Erro: {str(e)}'
+            f'Certifique-se de enviar uma imagem válida. Erro: {info["erro"]}'
         )
-    finally:
-        # Volta cursor do arquivo para o início
-        arquivo.seek(0)
+    
+    # VALIDAÇÃO 4: MIME type real (formato detectado pelo Pillow)
+    formato_real = info['formato'].lower() if info['formato'] else None
+    
+    if formato_real not in ['jpeg', 'png', 'webp']:
+        raise ValidationError(
+            f'Tipo de arquivo não permitido. '
+            f'O arquivo parece ser {formato_real}, mas apenas JPEG, PNG e WebP são aceitos.'
+        )
+    
+    # VALIDAÇÃO 5: Pixels totais (bomba de descompressão) e dimensões
+    _validar_pixels_e_dimensoes(info, MIN_IMAGE_WIDTH, MIN_IMAGE_HEIGHT, MAX_IMAGE_WIDTH, MAX_IMAGE_HEIGHT)
 
 
 def validate_image_dimensions(arquivo, min_width=MIN_IMAGE_WIDTH, min_height=MIN_IMAGE_HEIGHT,
@@ -158,35 +234,31 @@ def validate_image_dimensions(arquivo, min_width=MIN_IMAGE_WIDTH, min_height=MIN
     if not arquivo:
         return
     
-    try:
-        arquivo.seek(0)
-        img = Image.open(arquivo)
-        largura, altura = img.size
-        
-        if largura < min_width or altura < min_height:
-            raise ValidationError(
-                f'Imagem muito pequena ({largura}x{altura}px). '
-                f'Dimensões mínimas: {min_width}x{min_height}px'
-            )
-        
-        if largura > max_width or altura > max_height:
-            raise ValidationError(
-                f'Imagem muito grande ({largura}x{altura}px). '
-                f'Dimensões máximas: {max_width}x{max_height}px'
-            )
-        
-    except ValidationError:
-        raise
-    except Exception as e:
-        raise ValidationError(f'Não foi possível verificar dimensões da imagem: {str(e)}')
-    finally:
-        arquivo.seek(0)
+    info = analisar_imagem(arquivo)
+    if 'erro' in info:
+        raise ValidationError(f'Não foi possível verificar dimensões da imagem: {info["erro"]}')
+    
+    _validar_pixels_e_dimensoes(info, min_width, min_height, max_width, max_height)
 
 
 # ============================================
 # VALIDADORES DE VÍDEO
 # ============================================
 
+# Bytes iniciais necessários para reconhecer o formato do vídeo
+TAMANHO_CABECALHO_VIDEO = 12
+
+# Assinaturas de cabeçalho de arquivos de vídeo comuns
+VIDEO_SIGNATURES = [
+    b'\x00\x00\x00\x14ftypmp4',  # MP4
+    b'\x00\x00\x00\x18ftypmp4',  # MP4 variant
+    b'\x00\x00\x00\x1cftypisom', # MP4/MOV
+    b'\x00\x00\x00\x20ftypisom', # MP4/MOV variant
+    b'RIFF',                      # AVI (first 4 bytes)
+    b'\x1aE\xdf\xa3',            # WebM/MKV
+]
+
+
 def validate_video_file(arquivo):
     """
     Validação completa de arquivo de vídeo.
@@ -208,16 +280,48 @@ def validate_video_file(arquivo):
     if not arquivo:
         return
     
+    # VALIDAÇÕES 1 a 3: Tamanho, extensão e MIME type informado
+    validate_video_metadata(arquivo.name, arquivo.size, getattr(arquivo, 'content_type', None))
+    
+    # VALIDAÇÃO 4: Verificação básica do cabeçalho do arquivo
+    try:
+        arquivo.seek(0)
+        header = arquivo.read(TAMANHO_CABECALHO_VIDEO)
+        validate_video_header(header)
+    except ValidationError:
+        raise
+    except Exception:
+        # Se falhar na leitura, permite (alguns vídeos podem ter formatos diferentes)
+        pass
+    finally:
+        arquivo.seek(0)
+
+
+def validate_video_metadata(nome_arquivo, tamanho, content_type=None):
+    """
+    Validação de vídeo só com os metadados (sem ler o conteúdo).
+    
+    Usada por `validate_video_file` e ao abrir uma sessão de upload em
+    pedaços, quando o arquivo ainda não chegou.
+    
+    Args:
+        nome_arquivo: Nome original do arquivo
+        tamanho: Tamanho total em bytes
+        content_type: MIME type informado pelo cliente (opcional)
+        
+    Raises:
+        ValidationError: Se tamanho, extensão ou MIME type não forem aceitos
+    """
     # VALIDAÇÃO 1: Tamanho do arquivo
-    tamanho_mb = arquivo.size / (1024 * 1024)
-    if arquivo.size > MAX_VIDEO_SIZE:
+    tamanho_mb = tamanho / (1024 * 1024)
+    if tamanho > MAX_VIDEO_SIZE:
         raise ValidationError(
             f'Vídeo muito grande ({tamanho_mb:.1f}MB). '
             f'Tamanho máximo permitido: {MAX_VIDEO_SIZE / (1024 * 1024):.0f}MB'
         )
     
     # VALIDAÇÃO 2: Extensão do arquivo
-    nome_arquivo = arquivo.name.lower()
+    nome_arquivo = nome_arquivo.lower()
     extensao = nome_arquivo.split('.')[-1] if '.' in nome_arquivo else ''
     
     if extensao not in ALLOWED_VIDEO_EXTENSIONS:
@@ -229,8 +333,8 @@ def validate_video_file(arquivo):
     # VALIDAÇÃO 3: Verificação básica de MIME type
     # Para vídeos, fazemos verificação mais leve já que não temos biblioteca
     # específica como o Pillow. Verificamos o MIME type informado.
-    if hasattr(arquivo, 'content_type'):
-        content_type = arquivo.content_type.lower()
+    if content_type:
+        content_type = content_type.lower()
         
         # Verifica se é um dos MIME types de vídeo aceitos
         is_video = content_type.startswith('video/') or content_type in ALLOWED_VIDEO_MIMETYPES
@@ -241,46 +345,36 @@ def validate_video_file(arquivo):
                 f'MIME type recebido: {content_type}. '
                 f'Envie apenas arquivos de vídeo.'
             )
+
+
+def validate_video_header(header):
+    """
+    Confere os bytes iniciais (magic bytes) de um vídeo.
     
-    # VALIDAÇÃO 4: Verificação básica do cabeçalho do arquivo
-    try:
-        arquivo.seek(0)
-        header = arquivo.read(12)
-        arquivo.seek(0)
-        
-        # Assinaturas de cabeçalho de arquivos de vídeo comuns
-        video_signatures = [
-            b'\x00\x00\x00\x14ftypmp4',  # MP4
-            b'\x00\x00\x00\x18ftypmp4',  # MP4 variant
-            b'\x00\x00\x00\x1cftypisom', # MP4/MOV
-            b'\x00\x00\x00\x20ftypisom', # MP4/MOV variant
-            b'RIFF',                      # AVI (first 4 bytes)
-            b'\x1aE\xdf\xa3',            # WebM/MKV
-        ]
-        
-        # Verifica se cabeçalho corresponde a algum formato conhecido
-        is_valid_header = any(header.startswith(sig) for sig in video_signatures)
-        
-        # Para AVI, verifica também a segunda parte do cabeçalho
-        if header.startswith(b'RIFF'):
-            arquivo.seek(8)
-            avi_sig = arquivo.read(4)
-            arquivo.seek(0)
-            is_valid_header = avi_sig == b'AVI '
+    Só precisa dos primeiros TAMANHO_CABECALHO_VIDEO bytes: o upload em
+    pedaços chama esta função assim que eles chegam, sem esperar o resto.
+    
+    Args:
+        header: Primeiros bytes do arquivo
         
-        if not is_valid_header:
-            raise ValidationError(
-                'Arquivo não parece ser um vídeo válido. '
-                'Certifique-se de enviar um arquivo de vídeo real (.mp4, .avi, .mov, .webm).'
-            )
+    Raises:
+        ValidationError: Se o cabeçalho não for de um formato de vídeo conhecido
         
-    except ValidationError:
-        raise
-    except Exception:
-        # Se falhar na leitura, permite (alguns vídeos podem ter formatos diferentes)
-        pass
-    finally:
-        arquivo.seek(0)
+    Examples:
+        >>> validate_video_header(b'\x1aE\xdf\xa3' + b'\x00' * 8)  # WebM
+    """
+    # Verifica se cabeçalho corresponde a algum formato conhecido
+    is_valid_header = any(header.startswith(sig) for sig in VIDEO_SIGNATURES)
+    
+    # Para AVI, verifica também a segunda parte do cabeçalho
+    if header.startswith(b'RIFF'):
+        is_valid_header = header[8:12] == b'AVI '
+    
+    if not is_valid_header:
+        raise ValidationError(
+            'Arquivo não parece ser um vídeo válido. '
+            'Certifique-se de enviar um arquivo de vídeo real (.mp4, .avi, .mov, .webm).'
+        )
 
 
 # ============================================
@@ -326,22 +420,11 @@ def get_image_info(arquivo):
         >>> print(info)
         {'formato': 'JPEG', 'largura': 1920, 'altura': 1080, 'tamanho_mb': 2.5}
     """
-    try:
-        arquivo.seek(0)
-        img = Image.open(arquivo)
-        
-        info = {
-            'formato': img.format,
-            'largura': img.size[0],
-            'altura': img.size[1],
-            'tamanho_mb': round(arquivo.size / (1024 * 1024), 2),
-            'modo': img.mode,  # RGB, RGBA, L, etc.
-        }
-        
-        arquivo.seek(0)
-        return info
-    except Exception as e:
-        return {'erro': str(e)}
+    info = analisar_imagem(arquivo)
+    if 'erro' in info:
+        return {'erro': info['erro']}
+    # Cópia: quem chama pode alterar o dicionário sem mexer na análise guardada
+    return {chave: info[chave] for chave in ('formato', 'largura', 'altura', 'tamanho_mb', 'modo')}
 
 
 # ============================================
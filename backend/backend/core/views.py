@@ -1,15 +1,31 @@
 from typing import Any, Dict, List, Optional, Union
+from django.conf import settings
 from django.shortcuts import render
+from django.db import transaction
 from django.utils import timezone
-from django.db.models import QuerySet
+from django.utils.http import parse_etags, quote_etag
+from django.db.models import Avg, Count, FloatField, Max, Prefetch, Q, QuerySet
+from django.db.models.functions import Cast, Floor
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.request import Request
-from math import radians, sin, cos, sqrt, atan2
+from .busca import buscar, ordenar_por_relevancia
+from .cache import ListaEmCacheMixin, metricas, zerar_metricas
+from .localidades import autocompletar, base as base_localidades, normalizar_cidade, normalizar_uf
+from .geocodificacao import geocodificar, geocodificar_reversa
+from .geo import ZOOM_MARCADORES_INDIVIDUAIS, distancia_haversine_km, tamanho_cluster_graus
+from .imagens import chave_derivada
+from .matching import buscar_matches_automaticos, prefetch_matches_ranqueados, MAX_MATCHES
+from .midia import IngestaoMidias, validar_midias
+from .notificacoes import definir_leitura, notificar, notificar_admins, remover_notificacao
+from .pagination import MeusPetsCursorPagination, PaginacaoListas
+from .tarefas import enfileirar
+from .validators import validate_image_file, validate_video_file
 from .throttling import (
     RegistroRateThrottle, LoginRateThrottle, ContatoRateThrottle,
     DenunciaRateThrottle, AdocaoRateThrottle, PetPerdidoRateThrottle,
-    UploadRateThrottle, ListRateThrottle, DetailRateThrottle
+    UploadRateThrottle, ListRateThrottle, DetailRateThrottle,
+    AnonBurstRateThrottle, UserBurstRateThrottle
 )
 from .models import (
     Animal, Adocao, Denuncia, DenunciaImagem, DenunciaVideo, DenunciaHistorico,
@@ -20,7 +36,8 @@ from .serializers import (
     AnimalSerializer, AdocaoSerializer, DenunciaSerializer,
     RegisterSerializer, UserMeSerializer, UserUpdateSerializer,
     AnimalParaAdocaoSerializer, SolicitacaoAdocaoSerializer, NotificacaoSerializer,
-    ContatoSerializer, PetPerdidoSerializer, ReportePetEncontradoSerializer
+    ContatoSerializer, PetPerdidoSerializer, ReportePetEncontradoSerializer,
+    MeuPetCadastradoSerializer
 )
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -29,7 +46,7 @@ from rest_framework.generics import CreateAPIView, GenericAPIView
 
 # Create your views here.
 
-class AnimalViewSet(viewsets.ModelViewSet):
+class AnimalViewSet(ListaEmCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet para operações CRUD do catálogo de animais da ONG.
     
@@ -49,9 +66,14 @@ class AnimalViewSet(viewsets.ModelViewSet):
         tipo: Filtrar por tipo (cachorro, gato, cao como alias)
         porte: Filtrar por porte (pequeno, medio, grande)
         sexo: Filtrar por sexo (macho, femea)
-        estado: Filtrar por estado (UF)
-        cidade: Filtrar por cidade
-        nome/q: Buscar por nome (case-insensitive, partial match)
+        estado: Filtrar por estado (sigla, nome ou código IBGE da UF)
+        cidade: Filtrar por cidade (nome completo, sem diferenciar acento/maiúsculas)
+        nome: Buscar por nome (case-insensitive, partial match)
+        q: Busca sem acento em nome, raça e descrição, ordenada por relevância
+    
+    Cache:
+        Listagem anônima servida de core.cache (namespace 'animais'),
+        com ETag/If-None-Match; invalidada ao salvar Animal, fotos e vídeos
     
     Methods:
         get_queryset: Aplica filtros e exibe apenas disponíveis por padrão
@@ -59,10 +81,13 @@ class AnimalViewSet(viewsets.ModelViewSet):
     Example:
         GET /api/animais/?tipo=cachorro&porte=medio&cidade=São%20Paulo
         GET /api/animais/?nome=rex
+        GET /api/animais/?q=vira%20lata%20caramelo
         GET /api/animais/?status=adotado
     """
     serializer_class = AnimalSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_namespace = 'animais'
+    cache_parametros = ('status', 'tipo', 'porte', 'sexo', 'estado', 'cidade', 'nome', 'q')
 
     def get_queryset(self) -> QuerySet:
         """Aplica filtros e retorna queryset de animais."""
@@ -89,19 +114,158 @@ class AnimalViewSet(viewsets.ModelViewSet):
         if sexo:
             qs = qs.filter(sexo__iexact=sexo)
 
+        # Igualdade nas colunas normalizadas (índice de localização):
+        # 'sp'/'São Paulo'/'35' e 'Sao Paulo'/'são paulo' casam iguais
         estado = self.request.query_params.get('estado')
         if estado:
-            qs = qs.filter(estado__iexact=estado)
+            qs = qs.filter(estado=normalizar_uf(estado))
 
         cidade = self.request.query_params.get('cidade')
         if cidade:
-            qs = qs.filter(cidade__iexact=cidade)
+            qs = qs.filter(cidade_norm=normalizar_cidade(cidade))
 
-        nome = self.request.query_params.get('nome') or self.request.query_params.get('q')
+        nome = self.request.query_params.get('nome')
         if nome:
             qs = qs.filter(nome__icontains=nome)
 
-        return qs
+        # Busca por relevância no índice de prefixos de palavras (core.busca)
+        return buscar(qs, self.request.query_params.get('q'))
+
+class MetricasCacheView(APIView):
+    """
+    Taxa de acerto do cache das listagens públicas (core.cache).
+    
+    Endpoints:
+        GET /api/cache/metricas/ - Acertos, falhas, taxa e versão por namespace
+        DELETE /api/cache/metricas/ - Zera os contadores
+    
+    Permissions:
+        IsAdminUser
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request: Request) -> Response:
+        return Response(metricas())
+
+    def delete(self, request: Request) -> Response:
+        zerar_metricas()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class LocalidadesView(APIView):
+    """
+    Estados e municípios do IBGE servidos da base local (core.localidades).
+    
+    Substitui as chamadas do navegador a servicodados.ibge.gov.br: os
+    formulários listam os municípios da UF escolhida ou autocompletam o
+    nome digitado, sem depender de um serviço externo.
+    
+    Endpoints:
+        GET /api/localidades/ - Estados (código, sigla, nome)
+        GET /api/localidades/?uf=SP - Municípios da UF em ordem alfabética
+        GET /api/localidades/?q=sao jo&uf=SP&limite=10 - Municípios que começam com o texto
+    
+    Cache:
+        A base só muda com `atualizar_localidades`: a versão dela é o ETag
+        (If-None-Match -> 304) e a resposta pode ficar no navegador por
+        LOCALIDADES_CACHE_MAX_AGE segundos.
+    
+    Permissions:
+        AllowAny
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request: Request) -> Response:
+        dados = base_localidades()
+        etag = quote_etag(f'localidades-{dados.versao}')
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return self._com_cabecalhos(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+        uf = request.query_params.get('uf')
+        sigla = normalizar_uf(uf) if uf else None
+        if uf and sigla not in dados.estados:
+            return Response({'uf': 'UF inválida. Use a sigla, o nome ou o código IBGE do estado.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # PASSO 1: Autocompletar por prefixo
+        q = request.query_params.get('q')
+        if q is not None:
+            try:
+                limite = int(request.query_params.get('limite', 10))
+            except ValueError:
+                return Response({'limite': 'Informe um número inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+            municipios = autocompletar(q, sigla, limite)
+            corpo = {'versao': dados.versao, 'municipios': [
+                {'codigo': m.codigo, 'nome': m.nome, 'uf': m.uf} for m in municipios
+            ]}
+        # PASSO 2: Municípios de uma UF
+        elif sigla:
+            _, municipios = dados.prefixos[sigla]
+            corpo = {'versao': dados.versao, 'uf': sigla, 'municipios': [
+                {'codigo': m.codigo, 'nome': m.nome} for m in municipios
+            ]}
+        # PASSO 3: Estados
+        else:
+            corpo = {'versao': dados.versao, 'estados': [
+                {'codigo': e.codigo, 'sigla': e.sigla, 'nome': e.nome}
+                for e in sorted(dados.estados.values(), key=lambda e: e.nome)
+            ]}
+        return self._com_cabecalhos(Response(corpo), etag)
+
+    def _com_cabecalhos(self, resposta: Response, etag: str) -> Response:
+        resposta['ETag'] = etag
+        resposta['Cache-Control'] = f'public, max-age={settings.LOCALIDADES_CACHE_MAX_AGE}'
+        return resposta
+
+
+class GeocodificacaoView(APIView):
+    """
+    Geocodificação direta e reversa, com cache no banco (core.geocodificacao).
+    
+    Substitui as chamadas do navegador ao Nominatim: consultas repetidas
+    saem do cache e, sem rede, a sede do município (base do IBGE) é usada
+    como aproximação.
+    
+    Endpoints:
+        GET /api/geocode/?q=Rua X, 10, Santos, SP - Endereço em texto livre
+        GET /api/geocode/?cidade=Santos&estado=SP&endereco=Rua X, 10 - Endereço em campos
+        GET /api/geocode/?lat=-23.96&lon=-46.33 - Reversa (cidade/UF das coordenadas)
+    
+    Returns:
+        200: {latitude, longitude, cidade, estado, cidade_ibge, endereco, precisao, provedor}
+             com X-Cache: HIT ou MISS
+        404: Nada encontrado
+    
+    Permissions:
+        AllowAny (com limite por IP/usuário)
+    """
+    permission_classes = [permissions.AllowAny]
+    throttle_classes = [AnonBurstRateThrottle, UserBurstRateThrottle]
+
+    def get(self, request: Request) -> Response:
+        params = request.query_params
+
+        # PASSO 1: Reversa
+        if 'lat' in params or 'lon' in params:
+            try:
+                resultado, em_cache = geocodificar_reversa(params['lat'], params['lon'])
+            except (KeyError, ValueError):
+                return Response({'detail': 'Informe lat e lon numéricos.'}, status=status.HTTP_400_BAD_REQUEST)
+        # PASSO 2: Direta (texto livre ou campos)
+        else:
+            consulta = params.get('q') or ', '.join(
+                params[campo].strip() for campo in ('endereco', 'cidade', 'estado') if params.get(campo, '').strip()
+            )
+            if not consulta.strip():
+                return Response({'detail': 'Informe q, cidade/estado ou lat/lon.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            resultado, em_cache = geocodificar(consulta)
+
+        if resultado is None:
+            resposta = Response({'detail': 'Localização não encontrada.'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            resposta = Response(resultado)
+        resposta['X-Cache'] = 'HIT' if em_cache else 'MISS'
+        return resposta
 
 class AdocaoViewSet(viewsets.ModelViewSet):
     """
@@ -237,6 +401,9 @@ class DenunciaViewSet(viewsets.ModelViewSet):
         categoria: Filtrar por categoria (maus_tratos, abandono, acumulacao, animal_perdido, animal_ferido, outros)
         usuario: Filtrar por ID do usuário
     
+    Pagination:
+        PaginacaoListas: ?page=N (padrão), ?sem_total=true ou ?paginacao=cursor
+    
     Note:
         Cria automaticamente entrada no histórico ao criar denúncia
     """
@@ -244,10 +411,20 @@ class DenunciaViewSet(viewsets.ModelViewSet):
     serializer_class = DenunciaSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     throttle_classes = [DenunciaRateThrottle]
+    pagination_class = PaginacaoListas
 
     def get_queryset(self) -> QuerySet:
         """Filtra denúncias baseado no tipo de usuário."""
-        qs = super().get_queryset()
+        # Número fixo de consultas por página: autor, moderador, mídias e
+        # histórico (já ordenado e com o autor de cada entrada) em lote
+        qs = super().get_queryset().select_related('usuario__user', 'moderador').prefetch_related(
+            'imagens_adicionais',
+            'videos_adicionais',
+            Prefetch(
+                'historico',
+                queryset=DenunciaHistorico.objects.select_related('usuario').order_by('-data_criacao'),
+            ),
+        )
         
         # Controle de visibilidade:
         # - Admins (is_staff): Acesso total a todas as denúncias para moderação
@@ -260,25 +437,29 @@ class DenunciaViewSet(viewsets.ModelViewSet):
     
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """Cria denúncia e processa múltiplas mídias anexadas."""
-        # PASSO 1: Cria a denúncia principal com dados básicos (texto, localização, etc)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        denuncia = serializer.save()
         
-        # PASSO 2: Processa múltiplas imagens adicionais enviadas via FormData
+        # PASSO 1: Valida em paralelo todas as mídias adicionais enviadas via FormData
         # getlist() captura todos os arquivos com o mesmo nome de campo
+        # Nenhum arquivo é gravado se algum deles for inválido
         imagens = request.FILES.getlist('imagens_adicionais')
-        for imagem in imagens:
-            # Cria registro separado para cada imagem (relacionamento 1:N)
-            DenunciaImagem.objects.create(denuncia=denuncia, imagem=imagem)
-        
-        # PASSO 3: Processa múltiplos vídeos adicionais (mesmo processo das imagens)
         videos = request.FILES.getlist('videos_adicionais')
-        for video in videos:
-            # Armazena vídeos em registros separados para facilitar moderação
-            DenunciaVideo.objects.create(denuncia=denuncia, video=video)
-        
-        # PASSO 4: Retorna a denúncia completa com todas as mídias anexadas
+        validar_midias({
+            'imagens_adicionais': (imagens, validate_image_file),
+            'videos_adicionais': (videos, validate_video_file),
+        })
+        
+        # PASSO 2: Cria a denúncia principal e grava as mídias (1 registro por
+        # arquivo, relacionamento 1:N) em lote; uma falha desfaz linhas e arquivos
+        with IngestaoMidias() as ingestao:
+            denuncia = serializer.save()
+            ingestao.registrar(denuncia.imagem, denuncia.video)
+            ingestao.salvar(DenunciaImagem, 'imagem', imagens, denuncia=denuncia)
+            # Vídeos em registros separados para facilitar moderação
+            ingestao.salvar(DenunciaVideo, 'video', videos, denuncia=denuncia)
+        
+        # PASSO 3: Retorna a denúncia completa com todas as mídias anexadas
         # Serializer busca automaticamente imagens/vídeos via related_name
         output_serializer = self.get_serializer(denuncia)
         headers = self.get_success_headers(output_serializer.data)
@@ -407,7 +588,7 @@ class DenunciaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
+class AnimalParaAdocaoViewSet(ListaEmCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet para animais cadastrados por usuários para adoção.
     
@@ -427,10 +608,15 @@ class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
         especie: Filtrar por espécie (cachorro, gato, outro)
         porte: Filtrar por porte (pequeno, medio, grande)
         sexo: Filtrar por sexo (M, F, N)
-        estado: Filtrar por estado (UF)
-        cidade: Filtrar por cidade
+        estado: Filtrar por estado (sigla, nome ou código IBGE da UF)
+        cidade: Filtrar por cidade (nome completo, sem diferenciar acento/maiúsculas)
         status: Filtrar por status (pendente, aprovado, rejeitado, adotado)
         meus: Listar apenas animais do usuário logado (meus=true)
+        q: Busca sem acento em nome, cor, características e descrição (por relevância)
+    
+    Cache:
+        Listagem anônima (só aprovados) servida de core.cache (namespace
+        'animais_adocao'); logados sempre consultam o banco
     
     Custom Actions:
         @action aprovar: Aprova animal para publicação (staff only)
@@ -442,6 +628,8 @@ class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
     queryset = AnimalParaAdocao.objects.all()
     serializer_class = AnimalParaAdocaoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    cache_namespace = 'animais_adocao'
+    cache_parametros = ('especie', 'porte', 'estado', 'cidade', 'nome', 'q')
     
     def get_queryset(self):
         """Filtra animais para adoção baseado em permissões e status."""
@@ -479,19 +667,21 @@ class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
         if porte:
             qs = qs.filter(porte__iexact=porte)
         
+        # Igualdade nas colunas normalizadas (índice de localização):
+        # 'sp'/'São Paulo'/'35' e 'Sao Paulo'/'são paulo' casam iguais
         estado = self.request.query_params.get('estado')
         if estado:
-            qs = qs.filter(estado__iexact=estado)
+            qs = qs.filter(estado=normalizar_uf(estado))
         
         cidade = self.request.query_params.get('cidade')
         if cidade:
-            qs = qs.filter(cidade__icontains=cidade)
+            qs = qs.filter(cidade_norm=normalizar_cidade(cidade))
         
         nome = self.request.query_params.get('nome')
         if nome:
             qs = qs.filter(nome__icontains=nome)
         
-        return qs.distinct()
+        return buscar(qs.distinct(), self.request.query_params.get('q'))
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def aprovar(self, request, pk=None):
@@ -502,8 +692,8 @@ class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
         animal.save()
         
         # Notifica o doador
-        Notificacao.objects.create(
-            usuario=animal.usuario_doador,
+        notificar(
+            animal.usuario_doador,
             tipo='animal_aprovado',
             titulo='Pet aprovado!',
             mensagem=f'Seu pet "{animal.nome}" foi aprovado e agora está visível na galeria de adoção.',
@@ -522,8 +712,8 @@ class AnimalParaAdocaoViewSet(viewsets.ModelViewSet):
         
         # Notifica o doador
         motivo = request.data.get('motivo', 'Não especificado')
-        Notificacao.objects.create(
-            usuario=animal.usuario_doador,
+        notificar(
+            animal.usuario_doador,
             tipo='animal_rejeitado',
             titulo='Pet rejeitado',
             mensagem=f'Seu pet "{animal.nome}" foi rejeitado. Motivo: {motivo}',
@@ -622,8 +812,8 @@ class SolicitacaoAdocaoViewSet(viewsets.ModelViewSet):
         
         # PASSO 5: Notifica o interessado com dados completos do doador
         # Notificação inclui telefone, email e endereço para facilitar coordenação
-        Notificacao.objects.create(
-            usuario=interessado,
+        notificar(
+            interessado,
             tipo='adocao_aprovada',
             titulo='Adoção aprovada!',
             mensagem=f'Sua solicitação para adotar "{animal.nome}" foi aprovada! Entre em contato com o doador.',
@@ -636,8 +826,8 @@ class SolicitacaoAdocaoViewSet(viewsets.ModelViewSet):
         
         # PASSO 6: Notifica o doador com dados do interessado
         # Permite doador validar e combinar detalhes da entrega do pet
-        Notificacao.objects.create(
-            usuario=doador,
+        notificar(
+            doador,
             tipo='adocao_aprovada',
             titulo='Solicitação de adoção aprovada!',
             mensagem=f'A solicitação de adoção de "{animal.nome}" foi aprovada. Entre em contato com o interessado.',
@@ -663,8 +853,8 @@ class SolicitacaoAdocaoViewSet(viewsets.ModelViewSet):
         solicitacao.save()
         
         # Notifica o interessado
-        Notificacao.objects.create(
-            usuario=solicitacao.usuario_interessado,
+        notificar(
+            solicitacao.usuario_interessado,
             tipo='adocao_rejeitada',
             titulo='Solicitação rejeitada',
             mensagem=f'Sua solicitação para adotar "{solicitacao.animal.nome}" foi rejeitada. Motivo: {motivo}',
@@ -713,6 +903,9 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
     - PATCH /api/notificacoes/{id}/ - Marca como lida
     - DELETE /api/notificacoes/{id}/ - Remove notificação
     - POST /api/notificacoes/marcar-todas-lidas/ - Marca todas como lidas (action)
+    - GET /api/notificacoes/contagem/ - Não lidas, para o badge (action, com ETag)
+    - POST /api/notificacoes/stream/ticket/ - Ticket de uso único para o stream
+    - GET /api/notificacoes/stream/?ticket=... - Stream SSE (core.views_eventos)
     
     Permissions:
         - Todas operações: Requer autenticação (IsAuthenticated)
@@ -722,15 +915,22 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         lida: Filtrar por status de leitura (true/false)
         tipo: Filtrar por tipo de notificação
     
+    Pagination:
+        PaginacaoListas: ?page=N (padrão), ?sem_total=true ou ?paginacao=cursor
+    
     Custom Actions:
         @action marcar_todas_lidas: Marca todas notificações do usuário como lidas
+        @action contagem: Contador de não lidas (Usuario.notificacoes_nao_lidas)
     
     Note:
-        GET automáticamente filtra apenas notificações do usuário logado
+        GET automáticamente filtra apenas notificações do usuário logado.
+        Leitura e remoção passam por core.notificacoes para manter o
+        contador de não lidas em dia.
     """
     queryset = Notificacao.objects.all()
     serializer_class = NotificacaoSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = PaginacaoListas
     
     def get_queryset(self):
         # Usuários veem apenas suas próprias notificações
@@ -748,12 +948,31 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
             return qs
         return Notificacao.objects.none()
     
+    def perform_update(self, serializer):
+        # `lida` sai do save comum: muda por UPDATE condicional + contador
+        dados = serializer.validated_data
+        lida = dados.pop('lida', None)
+        notificacao = serializer.instance
+        with transaction.atomic():
+            # Só as colunas enviadas: um save() completo regravaria o `lida`
+            # carregado antes, desfazendo um definir_leitura concorrente
+            if dados:
+                for campo, valor in dados.items():
+                    setattr(notificacao, campo, valor)
+                notificacao.save(update_fields=list(dados))
+            if lida is not None:
+                definir_leitura(notificacao.usuario_id, lida, ids=[notificacao.pk])
+                notificacao.lida = lida
+    
+    def perform_destroy(self, instance):
+        remover_notificacao(instance)
+    
     @action(detail=True, methods=['post'])
     def marcar_lida(self, request, pk=None):
         """Marca uma notificação como lida"""
         notificacao = self.get_object()
+        definir_leitura(notificacao.usuario_id, ids=[notificacao.pk])
         notificacao.lida = True
-        notificacao.save()
         
         serializer = self.get_serializer(notificacao)
         return Response(serializer.data)
@@ -762,14 +981,37 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
     def marcar_todas_lidas(self, request):
         """Marca todas as notificações do usuário como lidas"""
         if hasattr(request.user, 'usuario'):
-            Notificacao.objects.filter(
-                usuario=request.user.usuario,
-                lida=False
-            ).update(lida=True)
+            definir_leitura(request.user.usuario.pk)
             
             return Response({'detail': 'Todas as notificações foram marcadas como lidas.'})
         
         return Response({'detail': 'Usuário sem perfil.'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'])
+    def contagem(self, request):
+        """
+        Quantidade de notificações não lidas, para o badge.
+        
+        Lê só o contador do perfil (uma consulta por chave única), sem
+        listar nem contar notificações.
+        
+        Response:
+            200: {'nao_lidas': int} com ETag
+            304: If-None-Match igual ao ETag atual (contagem não mudou)
+        """
+        nao_lidas = Usuario.objects.filter(user=request.user).values_list(
+            'notificacoes_nao_lidas', flat=True
+        ).first() or 0
+        etag = quote_etag(f'nao-lidas-{nao_lidas}')
+        
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            resposta = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            resposta = Response({'nao_lidas': nao_lidas})
+        resposta['ETag'] = etag
+        # Sempre revalidar: o valor muda a qualquer momento, o 304 é barato
+        resposta['Cache-Control'] = 'private, no-cache'
+        return resposta
 
 
 # Novos ViewSets para "Minhas Solicitações"
@@ -938,15 +1180,32 @@ class MeusPetsCadastradosView(GenericAPIView):
         Lista de todos os animais cadastrados pelo usuário autenticado,
         independente do status (pendente, aprovado, rejeitado, adotado)
         Inclui contador de solicitações totais e pendentes por animal
+        Paginada por cursor: {"next", "previous", "results"}
     
-    Filters:
-        status: Filtrar por status de aprovação
+    Query Params:
+        page_size: Itens por página (padrão 50, máximo 200)
+        cursor: Valor opaco vindo de "next"/"previous"
     
     Example:
-        GET /api/meus-pets-cadastrados/?status=aprovado
+        GET /api/meus-pets-cadastrados/?page_size=20
     """
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = AnimalParaAdocaoSerializer
+    serializer_class = MeuPetCadastradoSerializer
+    pagination_class = MeusPetsCursorPagination
+    
+    def get_queryset(self) -> QuerySet:
+        """Pets do usuário (qualquer status) com os contadores de solicitações."""
+        # BUSCA COMPLETA: Todos os pets do usuário (qualquer status)
+        # ESTATÍSTICAS: Contadores calculados no mesmo SELECT (agregação condicional)
+        # total_solicitacoes: Todas (pendente, aprovada, rejeitada, cancelada)
+        # solicitacoes_pendentes: Apenas aguardando decisão
+        # Útil para doador priorizar análise de pets com mais interesse
+        return AnimalParaAdocao.objects.filter(
+            usuario_doador=self.request.user.usuario
+        ).annotate(
+            total_solicitacoes=Count('solicitacoes'),
+            solicitacoes_pendentes=Count('solicitacoes', filter=Q(solicitacoes__status='pendente')),
+        )
     
     def get(self, request: Request) -> Response:
         """Lista todos os pets cadastrados pelo usuário com contadores."""
@@ -954,45 +1213,10 @@ class MeusPetsCadastradosView(GenericAPIView):
         if not hasattr(request.user, 'usuario'):
             return Response([], status=status.HTTP_200_OK)
         
-        usuario = request.user.usuario
-        
-        # BUSCA COMPLETA: Todos os pets do usuário (qualquer status)
-        # Ordenação por data de cadastro (mais recentes primeiro)
-        pets = AnimalParaAdocao.objects.filter(
-            usuario_doador=usuario
-        ).order_by('-data_cadastro')
-        
-        data = []
-        for pet in pets:
-            # ESTATÍSTICAS: Conta solicitações para cada pet
-            # total_solicitacoes: Todas (pendente, aprovada, rejeitada, cancelada)
-            # solicitacoes_pendentes: Apenas aguardando decisão
-            # Útil para doador priorizar análise de pets com mais interesse
-            total_solicitacoes = SolicitacaoAdocao.objects.filter(animal=pet).count()
-            solicitacoes_pendentes = SolicitacaoAdocao.objects.filter(animal=pet, status='pendente').count()
-            
-            item = {
-                'id': pet.id,
-                'nome': pet.nome,
-                'especie_display': pet.get_especie_display(),
-                'porte_display': pet.get_porte_display() if pet.porte else 'Não informado',
-                'sexo': pet.sexo if hasattr(pet, 'sexo') else None,
-                'sexo_display': pet.get_sexo_display() if hasattr(pet, 'sexo') else None,
-                'cor': pet.cor if hasattr(pet, 'cor') else None,
-                'idade': pet.idade if hasattr(pet, 'idade') else None,
-                'descricao': pet.descricao,
-                'cidade': pet.cidade,
-                'estado': pet.estado,
-                'status': pet.status,
-                'imagem_principal_url': request.build_absolute_uri(pet.imagem_principal.url) if pet.imagem_principal else None,
-                'data_cadastro': pet.data_cadastro,
-                'total_solicitacoes': total_solicitacoes,
-                'solicitacoes_pendentes': solicitacoes_pendentes,
-            }
-            
-            data.append(item)
-        
-        return Response({'results': data}, status=status.HTTP_200_OK)
+        # Ordenação por data de cadastro (mais recentes primeiro) definida no cursor
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 class ContatoViewSet(viewsets.ModelViewSet):
@@ -1053,16 +1277,12 @@ class ContatoViewSet(viewsets.ModelViewSet):
         contato = serializer.save()
         
         # Notifica todos os administradores
-        admin_users = User.objects.filter(is_staff=True)
-        for admin in admin_users:
-            if hasattr(admin, 'usuario'):
-                Notificacao.objects.create(
-                    usuario=admin.usuario,
-                    tipo='contato_recebido',
-                    titulo='Novo contato recebido',
-                    mensagem=f'Nova mensagem de {contato.nome}: {contato.assunto}',
-                    link='/admin-panel/?tab=contatos'
-                )
+        notificar_admins(
+            tipo='contato_recebido',
+            titulo='Novo contato recebido',
+            mensagem=f'Nova mensagem de {contato.nome}: {contato.assunto}',
+            link='/admin-panel/?tab=contatos'
+        )
         
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
@@ -1088,8 +1308,8 @@ class ContatoViewSet(viewsets.ModelViewSet):
         
         # Notifica o usuário que enviou o contato (se estiver registrado)
         if contato.usuario:
-            Notificacao.objects.create(
-                usuario=contato.usuario,
+            notificar(
+                contato.usuario,
                 tipo='contato_respondido',
                 titulo='Resposta do administrador',
                 mensagem=f'Sua mensagem "{contato.assunto}" foi respondida!',
@@ -1126,7 +1346,7 @@ class ContatoViewSet(viewsets.ModelViewSet):
 
 
 # ===== PETS PERDIDOS =====
-class PetPerdidoViewSet(viewsets.ModelViewSet):
+class PetPerdidoViewSet(ListaEmCacheMixin, viewsets.ModelViewSet):
     """
     ViewSet para pets perdidos com geolocalização.
     
@@ -1138,6 +1358,7 @@ class PetPerdidoViewSet(viewsets.ModelViewSet):
     - DELETE /api/pets-perdidos/{id}/ - Remove pet (dono)
     - POST /api/pets-perdidos/{id}/marcar-encontrado/ - Marca como encontrado (action)
     - GET /api/pets-perdidos/cidades-disponiveis/ - Lista cidades com pets perdidos (action)
+    - GET /api/pets-perdidos/markers/?bbox=&zoom= - Marcadores leves do mapa (action)
     
     Permissions:
         - List/Retrieve: Público (AllowAny)
@@ -1149,26 +1370,42 @@ class PetPerdidoViewSet(viewsets.ModelViewSet):
         - List/Retrieve: Throttling padrão
     
     Filters:
-        cidade: Filtrar por cidade
-        estado: Filtrar por estado (UF)
+        cidade: Filtrar por cidade (nome completo, sem diferenciar acento/maiúsculas)
+        estado: Filtrar por estado (sigla, nome ou código IBGE da UF)
         especie: Filtrar por espécie (cachorro, gato, outro)
         porte: Filtrar por porte (pequeno, medio, grande)
         status: Filtrar por status (perdido, encontrado, cancelado)
         ativo: Filtrar por visibilidade no mapa (true/false)
         oferece_recompensa: Filtrar pets com recompensa (true)
+        q: Busca sem acento em nome, raça, cor, características e descrição (por relevância)
+    
+    Pagination:
+        PaginacaoListas: ?page=N (padrão), ?sem_total=true ou ?paginacao=cursor
+    
+    Cache:
+        Listagem anônima (ativos e perdidos) servida de core.cache
+        (namespace 'pets_perdidos'); visualizações não invalidam
     
     Custom Actions:
         @action marcar_encontrado: Marca pet como encontrado e desativa no mapa
         @action cidades_disponiveis: Retorna lista de cidades com pets perdidos ativos
+        @action markers: Marcadores (ou clusters) do mapa em formato colunar
     
     Note:
         GET retrieve incrementa contador de visualizações automaticamente
         Lista ordenada por data_criacao descendente (mais recentes primeiro)
+        POST enfileira o matching reverso contra reportes de pets encontrados em aberto
     """
     queryset = PetPerdido.objects.all()
     serializer_class = PetPerdidoSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     throttle_classes = [PetPerdidoRateThrottle]
+    pagination_class = PaginacaoListas
+    cache_namespace = 'pets_perdidos'
+    cache_parametros = ('estado', 'cidade', 'especie', 'porte', 'cor', 'q')
+    
+    # Limite de pontos individuais por resposta de /markers/
+    MAX_MARCADORES = 5000
     
     def get_queryset(self):
         qs = super().get_queryset()
@@ -1184,14 +1421,34 @@ class PetPerdidoViewSet(viewsets.ModelViewSet):
             # Não autenticados veem apenas ativos e perdidos
             qs = qs.filter(ativo=True, status='perdido')
         
-        # Filtros de busca
+        qs = self._filtrar_busca(qs)
+        
+        # Número fixo de consultas para qualquer tamanho de listagem (mapa
+        # carrega o estado inteiro): dono e fotos em lote, reportes
+        # pendentes contados no próprio SELECT
+        qs = qs.select_related('usuario__user').prefetch_related('fotos_adicionais').annotate(
+            total_reportes=Count(
+                'reportes_relacionados',
+                filter=Q(reportes_relacionados__status='pendente'),
+                distinct=True,
+            )
+        )
+        
+        if self.request.query_params.get('q'):
+            return ordenar_por_relevancia(qs, self.request.query_params.get('q'))
+        return qs.order_by('-data_criacao')
+    
+    def _filtrar_busca(self, qs: QuerySet) -> QuerySet:
+        """Aplica os filtros de busca da query string (estado, cidade, espécie, porte, cor, q)."""
+        # Igualdade nas colunas normalizadas (índice de localização):
+        # 'sp'/'São Paulo'/'35' e 'Sao Paulo'/'são paulo' casam iguais
         estado = self.request.query_params.get('estado')
         if estado:
-            qs = qs.filter(estado__iexact=estado)
+            qs = qs.filter(estado=normalizar_uf(estado))
         
         cidade = self.request.query_params.get('cidade')
         if cidade:
-            qs = qs.filter(cidade__icontains=cidade)
+            qs = qs.filter(cidade_norm=normalizar_cidade(cidade))
         
         especie = self.request.query_params.get('especie')
         if especie:
@@ -1205,7 +1462,102 @@ class PetPerdidoViewSet(viewsets.ModelViewSet):
         if cor:
             qs = qs.filter(cor__icontains=cor)
         
-        return qs.order_by('-data_criacao')
+        # Só filtra: a ordenação por relevância é aplicada em get_queryset
+        return buscar(qs, self.request.query_params.get('q'), ordenar=False)
+    
+    @action(
+        detail=False, methods=['get'], url_path='markers',
+        permission_classes=[permissions.AllowAny],
+        throttle_classes=[AnonBurstRateThrottle, UserBurstRateThrottle],
+    )
+    def markers(self, request: Request) -> Response:
+        """
+        Marcadores leves do mapa de pets perdidos para a área visível.
+        
+        Query Params:
+            bbox: "oeste,sul,leste,norte" em graus (Leaflet: map.getBounds().toBBoxString())
+            zoom: Nível de zoom do mapa (0-20)
+            estado, cidade, especie, porte, cor, q: Mesmos filtros da listagem
+        
+        Response (colunar - cada lista tem um valor por item):
+            {
+                "zoom": 12, "agrupado": true,
+                "pontos": {"id": [...], "lat": [...], "lng": [...], "especie": [...], "thumb": [...]},
+                "clusters": {"lat": [...], "lng": [...], "total": [...]}
+            }
+        
+        Note:
+            Abaixo do zoom ZOOM_MARCADORES_INDIVIDUAIS os pets são agrupados
+            no banco (GROUP BY célula da grade de tamanho_cluster_graus);
+            células com um único pet voltam como ponto. Apenas pets ativos
+            e perdidos aparecem no mapa.
+        """
+        # PASSO 1: Valida área visível e zoom
+        try:
+            oeste, sul, leste, norte = (float(valor) for valor in request.query_params['bbox'].split(','))
+            zoom = int(request.query_params.get('zoom', ZOOM_MARCADORES_INDIVIDUAIS))
+        except (KeyError, ValueError):
+            return Response(
+                {'detail': 'Informe bbox=oeste,sul,leste,norte e zoom numéricos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (-90 <= sul <= norte <= 90 and -180 <= oeste <= leste <= 180 and 0 <= zoom <= 22):
+            return Response({'detail': 'bbox ou zoom fora dos limites.'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # PASSO 2: Pets visíveis no mapa dentro da caixa (mesmos filtros da listagem)
+        qs = self._filtrar_busca(PetPerdido.objects.filter(
+            ativo=True,
+            status='perdido',
+            latitude__range=(sul, norte),
+            longitude__range=(oeste, leste),
+        )).order_by()
+        
+        pontos = {'id': [], 'lat': [], 'lng': [], 'especie': [], 'thumb': []}
+        clusters = {'lat': [], 'lng': [], 'total': []}
+        agrupado = zoom < ZOOM_MARCADORES_INDIVIDUAIS
+        
+        # PASSO 3: Zoom afastado - agrupa por célula no próprio banco
+        isolados = qs
+        if agrupado:
+            celula = tamanho_cluster_graus(zoom)
+            grupos = qs.annotate(
+                celula_lat=Floor(Cast('latitude', FloatField()) / celula),
+                celula_lng=Floor(Cast('longitude', FloatField()) / celula),
+            ).values('celula_lat', 'celula_lng').annotate(
+                total=Count('id'), lat=Avg('latitude'), lng=Avg('longitude'), pet_id=Max('id'),
+            )
+            ids_isolados = []
+            for grupo in grupos:
+                if grupo['total'] == 1:
+                    ids_isolados.append(grupo['pet_id'])
+                    continue
+                clusters['lat'].append(round(float(grupo['lat']), 5))
+                clusters['lng'].append(round(float(grupo['lng']), 5))
+                clusters['total'].append(grupo['total'])
+            # Limite aplicado antes do IN: a lista de ids não cresce com o mapa.
+            # Maior id primeiro, a mesma ordem (mais recentes) do PASSO 4
+            ids_isolados = sorted(ids_isolados, reverse=True)[:self.MAX_MARCADORES]
+            isolados = PetPerdido.objects.filter(pk__in=ids_isolados)
+        
+        # PASSO 4: Pontos individuais - só as colunas necessárias
+        armazenamento = PetPerdido._meta.get_field('imagem_principal').storage
+        linhas = isolados.order_by('-data_criacao').values_list(
+            'id', 'latitude', 'longitude', 'especie', 'imagem_principal', 'imagem_derivadas'
+        )[:self.MAX_MARCADORES]
+        for pet_id, latitude, longitude, especie, imagem, derivadas in linhas:
+            pontos['id'].append(pet_id)
+            pontos['lat'].append(round(float(latitude), 5))
+            pontos['lng'].append(round(float(longitude), 5))
+            pontos['especie'].append(especie)
+            if not imagem:
+                pontos['thumb'].append(None)
+                continue
+            # Miniatura WebP quando já gerada; senão o original
+            if (derivadas or {}).get('origem') == imagem:
+                imagem = chave_derivada(imagem, 'thumb', 'webp')
+            pontos['thumb'].append(request.build_absolute_uri(armazenamento.url(imagem)))
+        
+        return Response({'zoom': zoom, 'agrupado': agrupado, 'pontos': pontos, 'clusters': clusters})
     
     def retrieve(self, request, *args, **kwargs):
         """Incrementa visualizações ao visualizar detalhes"""
@@ -1217,32 +1569,37 @@ class PetPerdidoViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         """Criar novo pet perdido e processar fotos adicionais"""
-        # PASSO 1: Cria registro do pet perdido com dados básicos
+        # PASSO 1: Valida os dados básicos do pet perdido
         # (nome, espécie, porte, cor, local, coordenadas GPS)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        pet_perdido = serializer.save()
         
-        # PASSO 2: Processa múltiplas fotos adicionais do pet
+        # PASSO 2: Valida em paralelo as fotos adicionais do pet
         # getlist() captura todos os arquivos com o mesmo nome de campo
         # Múltiplas fotos aumentam chances de identificação visual
         fotos = request.FILES.getlist('fotos_adicionais')
-        for foto in fotos:
-            PetPerdidoFoto.objects.create(pet_perdido=pet_perdido, imagem=foto)
+        validar_midias({'fotos_adicionais': (fotos, validate_image_file)})
         
-        # PASSO 3: Notifica administradores sobre novo cadastro
+        # Registro e fotos gravados juntos: uma falha desfaz linhas e arquivos
+        with IngestaoMidias() as ingestao:
+            pet_perdido = serializer.save()
+            ingestao.registrar(pet_perdido.imagem_principal)
+            ingestao.salvar(PetPerdidoFoto, 'imagem', fotos, pet_perdido=pet_perdido)
+            
+            # PASSO 3: Enfileira o matching reverso
+            # O pet pode já ter sido encontrado e reportado antes do cadastro:
+            # o worker compara com os reportes em aberto próximos
+            enfileirar('processar_pet_perdido', pet_id=pet_perdido.pk)
+        
+        # PASSO 4: Notifica administradores sobre novo cadastro
         # Admins podem monitorar pets perdidos e auxiliar em buscas
         # Sistema de divulgação e apoio da ONG
-        admin_users = User.objects.filter(is_staff=True)
-        for admin in admin_users:
-            if hasattr(admin, 'usuario'):
-                Notificacao.objects.create(
-                    usuario=admin.usuario,
-                    tipo='denuncia',  # Reutilizando tipo existente
-                    titulo='Novo pet perdido cadastrado',
-                    mensagem=f'Pet {pet_perdido.nome} perdido em {pet_perdido.cidade}/{pet_perdido.estado}',
-                    link='/admin-panel/?tab=pets-perdidos'
-                )
+        notificar_admins(
+            tipo='denuncia',  # Reutilizando tipo existente
+            titulo='Novo pet perdido cadastrado',
+            mensagem=f'Pet {pet_perdido.nome} perdido em {pet_perdido.cidade}/{pet_perdido.estado}',
+            link='/admin-panel/?tab=pets-perdidos'
+        )
         
         output_serializer = self.get_serializer(pet_perdido)
         headers = self.get_success_headers(output_serializer.data)
@@ -1318,24 +1675,37 @@ class ReportePetEncontradoViewSet(viewsets.ModelViewSet):
         @action confirmar_match: Confirma match com pet perdido e notifica dono (staff only)
     
     Matching Automático:
-        Ao criar reporte, busca pets perdidos similares usando:
+        Ao criar reporte, enfileira a tarefa 'processar_reporte_encontrado'
+        (core.tarefas). Um worker separado busca pets perdidos similares usando:
         - Mesma espécie e porte
         - Cores semelhantes (case-insensitive partial match)
-        - Proximidade geográfica (até 50km de distância)
+        - Proximidade geográfica (até 10km, via índice de grade geo_celula)
         - Mesma cidade ou estado
         - Apenas pets com status 'perdido' e ativos no mapa
-        - Máximo de 10 possíveis matches
+        - Máximo de 10 possíveis matches, ordenados por score
     
     Note:
         Sistema calcula distância em km usando coordenadas (lat/long)
         Matching usa fórmula Haversine para distância geodésica
+        A resposta do POST volta antes do matching: possiveis_matches começa vazio
     """
     queryset = ReportePetEncontrado.objects.all()
     serializer_class = ReportePetEncontradoSerializer
     permission_classes = [permissions.AllowAny]  # Permite reporte anônimo
     
+    # Máximo de possíveis matches guardados por reporte
+    MAX_MATCHES = MAX_MATCHES
+    
     def get_queryset(self):
-        qs = super().get_queryset()
+        # Número fixo de consultas por página: quem reportou e o pet confirmado
+        # no JOIN; fotos, ids dos matches e top-N matches por score em lote
+        qs = super().get_queryset().select_related(
+            'usuario__user', 'pet_perdido_confirmado'
+        ).prefetch_related(
+            'fotos_adicionais',
+            Prefetch('possiveis_matches', queryset=PetPerdido.objects.only('id')),
+            prefetch_matches_ranqueados(),
+        )
         
         # Admins veem todos
         if self.request.user.is_authenticated and self.request.user.is_staff:
@@ -1349,156 +1719,38 @@ class ReportePetEncontradoViewSet(viewsets.ModelViewSet):
         return qs.none()
     
     def create(self, request, *args, **kwargs):
-        """Criar novo reporte de pet encontrado e buscar matches automáticos"""
-        # PASSO 1: Cria o reporte base com dados do pet encontrado
+        """Criar novo reporte de pet encontrado e enfileirar o matching automático"""
+        # PASSO 1: Valida o reporte base com dados do pet encontrado
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        reporte = serializer.save()
         
-        # PASSO 2: Processa múltiplas fotos adicionais do pet encontrado
+        # PASSO 2: Valida em paralelo as fotos adicionais do pet encontrado
         fotos = request.FILES.getlist('fotos_adicionais')
-        for foto in fotos:
-            ReportePetEncontradoFoto.objects.create(reporte=reporte, imagem=foto)
-        
-        # PASSO 3: MATCHING AUTOMÁTICO - Busca pets perdidos similares
-        # Algoritmo compara: espécie, porte, cor, localização geográfica (até 50km)
-        # e cria lista de possíveis matches baseado em score de similaridade
-        self._buscar_matches_automaticos(reporte)
-        
-        # PASSO 4: Notifica todos os administradores sobre novo reporte
-        # Admins precisam moderar/aprovar reportes antes de ficarem públicos
-        admin_users = User.objects.filter(is_staff=True)
-        for admin in admin_users:
-            if hasattr(admin, 'usuario'):
-                Notificacao.objects.create(
-                    usuario=admin.usuario,
-                    tipo='denuncia',
-                    titulo='Pet encontrado - Novo reporte',
-                    mensagem=f'Pet {reporte.get_especie_display()} encontrado em {reporte.cidade}/{reporte.estado}',
-                    link='/admin-panel/?tab=pets-encontrados'
-                )
+        validar_midias({'fotos_adicionais': (fotos, validate_image_file)})
         
-        # PASSO 5: Se matching encontrou possíveis donos, notifica cada um deles
-        # Aumenta chances de reunir pet perdido com seu dono rapidamente
-        if reporte.possiveis_matches.exists():
-            for pet_perdido in reporte.possiveis_matches.all():
-                Notificacao.objects.create(
-                    usuario=pet_perdido.usuario,
-                    tipo='interesse_adocao',  # Reutilizando tipo existente
-                    titulo='Possível match encontrado!',
-                    mensagem=f'Um pet similar ao {pet_perdido.nome} foi encontrado em {reporte.cidade}/{reporte.estado}',
-                    link=f'/minhas-solicitacoes/?tab=pets-perdidos'
-                )
+        # Registro e fotos gravados juntos: uma falha desfaz linhas e arquivos
+        with IngestaoMidias() as ingestao:
+            reporte = serializer.save()
+            ingestao.registrar(reporte.imagem_principal)
+            ingestao.salvar(ReportePetEncontradoFoto, 'imagem', fotos, reporte=reporte)
+            
+            # PASSO 3: Enfileira matching automático e notificações
+            # O worker (processar_tarefas) compara espécie, porte, cor e localização
+            # com os pets perdidos, notifica admins e possíveis donos e muda o
+            # status para 'em_analise' - a resposta não espera por esse trabalho
+            enfileirar('processar_reporte_encontrado', reporte_id=reporte.pk)
         
         output_serializer = self.get_serializer(reporte)
         headers = self.get_success_headers(output_serializer.data)
         return Response(output_serializer.data, status=status.HTTP_201_CREATED, headers=headers)
     
     def _buscar_matches_automaticos(self, reporte: ReportePetEncontrado) -> None:
-        """Busca automática de pets perdidos que podem ser matches"""
-        from datetime import timedelta
-        from math import radians, sin, cos, sqrt, atan2
-        
-        # FILTRO INICIAL: Reduz o escopo de busca para pets relevantes
-        # Critérios obrigatórios:
-        # - status='perdido': Apenas pets ainda não encontrados
-        # - ativo=True: Visíveis no mapa (não removidos pelo usuário)
-        # - mesma espécie: Cachorro só matcha com cachorro, gato com gato
-        # - mesma cidade/estado: Filtra geograficamente (case-insensitive)
-        pets_perdidos = PetPerdido.objects.filter(
-            status='perdido',
-            ativo=True,
-            especie=reporte.especie,
-            cidade__iexact=reporte.cidade,
-            estado__iexact=reporte.estado
-        )
-        
-        # FILTRO TEMPORAL: Pet encontrado hoje não pode ser pet perdido há 6 meses
-        # Considera apenas pets perdidos nos últimos 60 dias antes do encontro
-        data_limite = reporte.data_encontro - timedelta(days=60)
-        pets_perdidos = pets_perdidos.filter(data_perda__gte=data_limite)
-        
-        matches = []
-        
-        # ALGORITMO DE SCORE: Calcula similaridade para cada pet perdido
-        # Score máximo possível: 100 pontos
-        # Score mínimo para match: 50 pontos
-        for pet in pets_perdidos:
-            score = 0
-            
-            # CRITÉRIO 1: Mesma espécie (30 pontos - já garantido pelo filtro)
-            score += 30
-            
-            # CRITÉRIO 2: Mesmo porte (20 pontos)
-            # Pequeno/Médio/Grande - importante para identificação visual
-            if pet.porte == reporte.porte:
-                score += 20
-            
-            # CRITÉRIO 3: Cor similar (25 pontos)
-            # Busca parcial: "marrom" matcha "marrom claro" e vice-versa
-            # Case-insensitive para evitar problemas de digitação
-            if pet.cor and reporte.cor:
-                if pet.cor.lower() in reporte.cor.lower() or reporte.cor.lower() in pet.cor.lower():
-                    score += 25
-            
-            # CRITÉRIO 4: Proximidade geográfica (até 25 pontos)
-            # Usa coordenadas GPS (lat/long) para calcular distância real em km
-            # Fórmula Haversine considera curvatura da Terra
-            distancia = self._calcular_distancia(
-                float(pet.latitude), float(pet.longitude),
-                float(reporte.latitude), float(reporte.longitude)
-            )
-            if distancia <= 10:  # Até 10km de distância
-                score += 15
-                if distancia <= 3:  # Muito próximo (até 3km)
-                    score += 10  # Bonus extra - alta probabilidade de match
-            
-            # DECISÃO: Score >= 50 indica possível match (50% de similaridade mínima)
-            # Exemplos de matches válidos:
-            # - Mesma espécie + mesmo porte + cor similar = 75 pontos ✅
-            # - Mesma espécie + mesmo porte + próximo (10km) = 65 pontos ✅
-            # - Mesma espécie + cor similar + muito próximo (3km) = 80 pontos ✅
-            if score >= 50:
-                matches.append(pet)
-        
-        # Adiciona matches ao reporte (relacionamento ManyToMany)
-        # Se houver matches, muda status para 'em_analise' (requer atenção admin)
-        if matches:
-            reporte.possiveis_matches.set(matches)
-            reporte.status = 'em_analise'
-            reporte.save()
+        """Busca automática de pets perdidos que podem ser matches (ver core.matching)"""
+        buscar_matches_automaticos(reporte, max_matches=self.MAX_MATCHES)
     
     def _calcular_distancia(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calcula distância em km entre duas coordenadas usando fórmula Haversine"""
-        # FÓRMULA HAVERSINE: Calcula distância geodésica (linha reta) entre dois pontos
-        # Considera a curvatura da Terra (não é distância euclidiana simples)
-        # Usado para calcular proximidade entre pet perdido e pet encontrado
-        
-        # Raio médio da Terra em quilômetros
-        # (valor aproximado usado em cálculos geodésicos)
-        R = 6371.0
-        
-        # Converte todas as coordenadas de graus para radianos
-        # Necessário para funções trigonométricas (sin, cos)
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        
-        # Calcula diferenças entre latitudes e longitudes
-        dlat = lat2 - lat1  # Diferença de latitude
-        dlon = lon2 - lon1  # Diferença de longitude
-        
-        # FÓRMULA HAVERSINE (parte 1): Calcula 'a' - área do triângulo esférico
-        # sin²(Δlat/2) + cos(lat1) * cos(lat2) * sin²(Δlon/2)
-        # Este valor representa a distância angular entre os dois pontos
-        a = sin(dlat / 2)**2 + cos(lat1) * cos(lat2) * sin(dlon / 2)**2
-        
-        # FÓRMULA HAVERSINE (parte 2): Calcula 'c' - ângulo central em radianos
-        # 2 * arctan2(√a, √(1-a))
-        # atan2 é usado em vez de asin para maior estabilidade numérica
-        c = 2 * atan2(sqrt(a), sqrt(1 - a))
-        
-        # Distância final: Multiplica ângulo pelo raio da Terra
-        # Resultado em quilômetros (mesma unidade do raio R)
-        return R * c
+        return distancia_haversine_km(lat1, lon1, lat2, lon2)
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAdminUser])
     def aprovar_match(self, request: Request, pk: Optional[int] = None) -> Response:
@@ -1541,8 +1793,8 @@ class ReportePetEncontradoViewSet(viewsets.ModelViewSet):
         # PASSO 3: Notifica o dono do pet perdido (notificação principal)
         # Inclui dados de contato de quem encontrou para facilitar reunião
         if not reporte.dono_notificado:
-            Notificacao.objects.create(
-                usuario=pet_perdido.usuario,
+            notificar(
+                pet_perdido.usuario,
                 tipo='adocao_aprovada',  # Reutilizando tipo existente
                 titulo='Seu pet foi encontrado!',
                 mensagem=f'{pet_perdido.nome} foi encontrado! Entre em contato com quem encontrou.',
@@ -1556,8 +1808,8 @@ class ReportePetEncontradoViewSet(viewsets.ModelViewSet):
         # PASSO 4: Notifica quem encontrou o pet (se tiver cadastro)
         # Inclui dados de contato do dono para coordenar entrega
         if reporte.usuario:
-            Notificacao.objects.create(
-                usuario=reporte.usuario,
+            notificar(
+                reporte.usuario,
                 tipo='adocao_aprovada',
                 titulo='Match confirmado!',
                 mensagem=f'O match foi confirmado. O dono do pet entrará em contato.',
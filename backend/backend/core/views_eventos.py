@@ -0,0 +1,197 @@
+"""
+Stream SSE (Server-Sent Events) de notificações
+Substitui o polling de contagem feito pelo front a cada 30s
+
+View assíncrona do Django (DRF não tem views async): precisa rodar sob
+ASGI (backend/asgi.py) para manter a conexão aberta sem ocupar uma thread.
+
+Autenticação:
+    O EventSource não envia cabeçalhos e o JWT na URL acabaria nos logs de
+    acesso (gunicorn/nginx). O front pede antes um ticket de uso único
+    (POST /api/notificacoes/stream/ticket/, com o Authorization normal),
+    válido por TICKET_VALIDADE segundos e guardado no cache 'default'
+    (Redis com CACHE_REDIS_URL, compartilhado entre os processos web), e
+    abre o stream com ?ticket=.
+"""
+
+import json
+import secrets
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework import permissions, status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .eventos import assinar
+from .models import Usuario
+
+
+# ============================================
+# CONFIGURAÇÃO
+# ============================================
+
+# Comentário SSE enviado quando nada acontece (mantém proxies sem timeout)
+INTERVALO_KEEPALIVE = 15  # segundos
+
+# Duração máxima de uma conexão; o EventSource reconecta sozinho
+DURACAO_MAXIMA_STREAM = 10 * 60  # segundos
+
+# Espera do EventSource antes de reconectar (campo `retry` do SSE)
+RETRY_RECONEXAO_MS = 3000
+
+# Validade do ticket de conexão (só precisa durar até o EventSource abrir)
+TICKET_VALIDADE = 30  # segundos
+
+PREFIXO_TICKET = 'sse_ticket:'
+
+
+def formatar_evento(evento: str, dados: Dict[str, Any]) -> str:
+    """
+    Monta um evento no formato text/event-stream.
+
+    Examples:
+        >>> formatar_evento('contagem', {'nao_lidas': 2})
+        'event: contagem\\ndata: {"nao_lidas": 2}\\n\\n'
+    """
+    return f'event: {evento}\ndata: {json.dumps(dados, default=str)}\n\n'
+
+
+class TicketStreamView(APIView):
+    """
+    Ticket de uso único para abrir o stream de notificações.
+
+    Endpoint:
+        POST /api/notificacoes/stream/ticket/
+
+    Response:
+        200: {"ticket": str, "validade": int (segundos)}
+        403: Usuário sem perfil
+
+    Permissions:
+        IsAuthenticated
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request: Request) -> Response:
+        usuario = getattr(request.user, 'usuario', None)
+        if usuario is None:
+            return Response({'detail': 'Usuário sem perfil.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # O stream não dura mais que o access token que pediu o ticket
+        exp = request.auth.get('exp') if request.auth is not None else None
+        ticket = secrets.token_urlsafe(32)
+        cache.set(f'{PREFIXO_TICKET}{ticket}', {
+            'usuario_id': usuario.pk,
+            'exp': exp or time.time() + DURACAO_MAXIMA_STREAM,
+        }, TICKET_VALIDADE)
+        return Response({'ticket': ticket, 'validade': TICKET_VALIDADE})
+
+
+async def _autenticar(request) -> Optional[Tuple[int, float]]:
+    """(Usuario.pk, fim da autorização) do `?ticket=` ou do Authorization; None se inválido."""
+    # Ticket: consumido na primeira leitura (delete só é True para quem apagou)
+    ticket = request.GET.get('ticket')
+    if ticket:
+        chave = f'{PREFIXO_TICKET}{ticket}'
+        dados = await cache.aget(chave)
+        if dados is None or not await cache.adelete(chave):
+            return None
+        return dados['usuario_id'], dados['exp']
+
+    cabecalho = request.headers.get('Authorization', '')
+    if not cabecalho.startswith('Bearer '):
+        return None
+    try:
+        token = AccessToken(cabecalho[len('Bearer '):])
+    except TokenError:
+        return None
+    usuario_id = await Usuario.objects.filter(
+        user_id=token.get(jwt_settings.USER_ID_CLAIM), user__is_active=True
+    ).values_list('pk', flat=True).afirst()
+    return (usuario_id, token['exp']) if usuario_id is not None else None
+
+
+@require_GET
+async def stream_notificacoes(request):
+    """
+    Stream de notificações do usuário logado.
+
+    Endpoint:
+        GET /api/notificacoes/stream/?ticket=<ticket de /api/notificacoes/stream/ticket/>
+        (clientes que enviam cabeçalhos podem usar Authorization: Bearer)
+
+    Eventos:
+        contagem:    {"nao_lidas": int} - ao conectar e sempre que muda
+        notificacao: Notificação nova (mesmo formato de /api/notificacoes/)
+        fim:         {"motivo": "token_expirado" | "tempo_maximo" | "sem_stream"}
+                     - o ticket já foi usado: feche o EventSource e reconecte
+                     com um ticket novo ("sem_stream": servidor WSGI, que só
+                     envia a contagem; reconecte em ~30s)
+
+    Response:
+        200: text/event-stream
+        401: Ticket/token ausente, inválido, expirado ou já usado
+
+    Example:
+        const { ticket } = await (await fetch('/api/notificacoes/stream/ticket/', {method: 'POST', headers})).json();
+        const fonte = new EventSource(`/api/notificacoes/stream/?ticket=${ticket}`);
+        fonte.addEventListener('contagem', (e) => atualizarBadge(JSON.parse(e.data).nao_lidas));
+    """
+    # PASSO 1: Ticket de uso único (ou Authorization) -> perfil do usuário
+    autenticado = await _autenticar(request)
+    if autenticado is None:
+        return JsonResponse({'detail': 'Ticket inválido, expirado ou já usado.'}, status=401)
+    usuario_id, fim_token = autenticado
+
+    # PASSO 2: Sob WSGI só há a contagem atual; o front reconecta em 30s
+    if not isinstance(request, ASGIRequest):
+        nao_lidas = await _nao_lidas(usuario_id)
+        return _resposta_sse(
+            formatar_evento('contagem', {'nao_lidas': nao_lidas})
+            + formatar_evento('fim', {'motivo': 'sem_stream'})
+        )
+
+    # PASSO 3: Stream até a conexão cair, o token expirar ou o tempo máximo
+    fim = min(fim_token, time.time() + DURACAO_MAXIMA_STREAM)
+
+    async def eventos():
+        async with assinar(usuario_id) as assinatura:
+            # Contador lido depois de assinar: nada criado no meio se perde
+            nao_lidas = await _nao_lidas(usuario_id)
+            yield f'retry: {RETRY_RECONEXAO_MS}\n\n' + formatar_evento('contagem', {'nao_lidas': nao_lidas})
+
+            while (restante := fim - time.time()) > 0:
+                mensagem = await assinatura.receber(timeout=min(INTERVALO_KEEPALIVE, restante))
+                if mensagem is None:
+                    yield ': keepalive\n\n'
+                else:
+                    yield formatar_evento(mensagem['evento'], mensagem['dados'])
+
+            # O ticket não serve para a reconexão automática: o front pede outro
+            yield formatar_evento('fim', {'motivo': 'token_expirado' if fim >= fim_token else 'tempo_maximo'})
+
+    return _resposta_sse(eventos())
+
+
+async def _nao_lidas(usuario_id: int) -> int:
+    return await Usuario.objects.filter(pk=usuario_id).values_list('notificacoes_nao_lidas', flat=True).aget()
+
+
+def _resposta_sse(conteudo) -> StreamingHttpResponse:
+    resposta = StreamingHttpResponse(
+        [conteudo] if isinstance(conteudo, str) else conteudo,
+        content_type='text/event-stream',
+    )
+    resposta['Cache-Control'] = 'no-cache'
+    # Nginx: não segurar o stream em buffer
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
@@ -0,0 +1,221 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .models import Denuncia, SessaoUpload, Usuario
+from .serializers import SessaoUploadSerializer
+from .tarefas import enfileirar
+from .throttling import UploadRateThrottle, UserBurstRateThrottle
+from .uploads import (
+    PRAZO_RESERVA_PEDACO, TAMANHO_MAXIMO_PEDACO, VALIDADE_SESSAO, anexar_video,
+    descartar_parcial, gravar_pedaco, interpretar_content_range, validar_arquivo_completo,
+    validar_cabecalho_parcial,
+)
+
+
+class SessaoUploadVideoViewSet(viewsets.GenericViewSet):
+    """
+    Upload retomável de vídeos de denúncia, enviado em pedaços.
+
+    Endpoints:
+        POST   /api/uploads/videos/                  - Abre a sessão
+        GET    /api/uploads/videos/{id}/             - Progresso (para retomar)
+        PUT    /api/uploads/videos/{id}/             - Envia um pedaço (corpo binário)
+        POST   /api/uploads/videos/{id}/finalizar/   - Anexa o vídeo a uma denúncia
+        DELETE /api/uploads/videos/{id}/             - Cancela a sessão
+
+    Permissions:
+        IsAuthenticated (cada usuário só vê as próprias sessões)
+
+    Throttling:
+        - Abertura de sessão: UploadRateThrottle
+        - Pedaços: UserBurstRateThrottle (um vídeo de 20MB são vários PUTs)
+
+    Request (PUT):
+        Content-Range: bytes {inicio}-{fim}/{tamanho_total}
+        Content-Type: application/octet-stream
+        Corpo: bytes do pedaço (máximo 5MB)
+
+    Response (PUT):
+        200: {'recebidos': int, 'tamanho_total': int, 'status': str}
+        400: Content-Range inválido, pedaço grande demais ou vídeo inválido
+        409: Offset diferente de `recebidos` ou outro PUT gravando o mesmo
+             offset (retome a partir do valor retornado)
+        410: Sessão expirada, cancelada ou já concluída
+
+    Example:
+        POST /api/uploads/videos/ {"nome_arquivo": "caso.mp4", "tamanho_total": 15000000}
+        PUT  /api/uploads/videos/{id}/  Content-Range: bytes 0-5242879/15000000
+        ... (queda de conexão) ...
+        GET  /api/uploads/videos/{id}/  -> {"recebidos": 5242880, ...}
+        PUT  /api/uploads/videos/{id}/  Content-Range: bytes 5242880-10485759/15000000
+        ...
+        POST /api/uploads/videos/{id}/finalizar/ {"denuncia": 42}
+    """
+    serializer_class = SessaoUploadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return SessaoUpload.objects.filter(usuario__user=self.request.user)
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [UploadRateThrottle()]
+        return [UserBurstRateThrottle()]
+
+    def create(self, request, *args, **kwargs):
+        """Abre a sessão depois de validar nome, tamanho e MIME type."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            # Mesmo critério da criação de denúncia: o perfil é criado se faltar
+            usuario, _ = Usuario.objects.get_or_create(user=request.user)
+            sessao = serializer.save(usuario=usuario, expira_em=timezone.now() + VALIDADE_SESSAO)
+            # Limpeza do arquivo parcial se o upload for abandonado
+            enfileirar('expirar_sessao_upload', atraso=VALIDADE_SESSAO, sessao_id=str(sessao.pk))
+
+        dados = serializer.data
+        dados['tamanho_maximo_pedaco'] = TAMANHO_MAXIMO_PEDACO
+        return Response(dados, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def update(self, request, *args, **kwargs):
+        """Grava um pedaço do vídeo direto no arquivo parcial."""
+        sessao = self.get_object()
+
+        # PASSO 1: Sessão ainda aceita bytes? ('enviando' cai no conflito do PASSO 3)
+        if sessao.status not in ('aberta', 'enviando') or sessao.expira_em <= timezone.now():
+            return Response({'detail': 'Sessão encerrada ou expirada.'},
+                            status=status.HTTP_410_GONE)
+
+        # PASSO 2: Content-Range coerente com a sessão e com o corpo enviado
+        intervalo = interpretar_content_range(request.headers.get('Content-Range'))
+        if intervalo is None or intervalo[2] != sessao.tamanho_total:
+            return Response({'detail': 'Content-Range inválido. Use "bytes inicio-fim/tamanho_total".'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        inicio, fim, _ = intervalo
+        if inicio != sessao.recebidos:
+            return Response({'detail': 'Offset fora de ordem.', 'recebidos': sessao.recebidos},
+                            status=status.HTTP_409_CONFLICT)
+        tamanho = fim - inicio
+        if tamanho > TAMANHO_MAXIMO_PEDACO:
+            return Response({'detail': f'Pedaço maior que {TAMANHO_MAXIMO_PEDACO} bytes.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length != tamanho:
+            return Response({'detail': 'Content-Length diferente do intervalo em Content-Range.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # PASSO 3: Reserva o offset ANTES de escrever: dois PUTs simultâneos
+        # com o mesmo inicio nunca gravam no arquivo parcial ao mesmo tempo.
+        # O instante da reserva identifica o dono (um PUT que caiu no meio
+        # perde a reserva depois de PRAZO_RESERVA_PEDACO).
+        reservado_em = timezone.now()
+        reservou = SessaoUpload.objects.filter(
+            Q(status='aberta') | Q(status='enviando', data_atualizacao__lt=reservado_em - PRAZO_RESERVA_PEDACO),
+            pk=sessao.pk, recebidos=inicio,
+        ).update(status='enviando', data_atualizacao=reservado_em)
+        if not reservou:
+            return self._conflito(sessao)
+        reserva = SessaoUpload.objects.filter(pk=sessao.pk, status='enviando', data_atualizacao=reservado_em)
+
+        try:
+            # PASSO 4: Copia o corpo para o disco em blocos (request.data nunca é lido)
+            gravados = gravar_pedaco(sessao, inicio, request.stream, tamanho)
+            recebidos = inicio + gravados
+
+            # PASSO 5: Cabeçalho do vídeo conferido assim que disponível
+            validar_cabecalho_parcial(sessao, recebidos)
+        except ValidationError as e:
+            descartar_parcial(sessao)
+            reserva.update(status='cancelada', data_atualizacao=timezone.now())
+            return Response({'detail': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        except BaseException:
+            # Falha de disco/conexão: devolve a sessão sem avançar o offset
+            reserva.update(status='aberta', data_atualizacao=timezone.now())
+            raise
+
+        # PASSO 6: Confirma o offset e libera a sessão para o próximo pedaço
+        if not reserva.update(status='aberta', recebidos=recebidos, data_atualizacao=timezone.now()):
+            return self._conflito(sessao)
+        if gravados < tamanho:
+            return Response({'detail': 'Pedaço incompleto: conexão interrompida.', 'recebidos': recebidos},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'recebidos': recebidos, 'tamanho_total': sessao.tamanho_total, 'status': 'aberta'})
+
+    def _conflito(self, sessao):
+        """409 com o offset atual, para o cliente retomar dali."""
+        sessao.refresh_from_db(fields=['recebidos', 'status'])
+        if sessao.status in ('concluida', 'cancelada'):
+            return Response({'detail': 'Sessão encerrada ou expirada.'}, status=status.HTTP_410_GONE)
+        return Response({'detail': 'Offset fora de ordem ou pedaço ainda em envio.', 'recebidos': sessao.recebidos},
+                        status=status.HTTP_409_CONFLICT)
+
+    def destroy(self, request, *args, **kwargs):
+        sessao = self.get_object()
+        if sessao.status in ('aberta', 'enviando'):
+            descartar_parcial(sessao)
+            SessaoUpload.objects.filter(pk=sessao.pk).update(status='cancelada', data_atualizacao=timezone.now())
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=True, methods=['post'])
+    def finalizar(self, request, pk=None):
+        """
+        Conclui o upload e anexa o vídeo a uma denúncia do próprio usuário.
+
+        Request Body:
+            denuncia (int): ID da denúncia
+        """
+        sessao = self.get_object()
+        if sessao.status == 'enviando':
+            return Response({'detail': 'Pedaço ainda em envio.', 'recebidos': sessao.recebidos},
+                            status=status.HTTP_409_CONFLICT)
+        if sessao.status != 'aberta':
+            return Response({'detail': 'Sessão já concluída ou cancelada.'}, status=status.HTTP_410_GONE)
+        if sessao.recebidos != sessao.tamanho_total:
+            return Response({'detail': 'Upload incompleto.', 'recebidos': sessao.recebidos},
+                            status=status.HTTP_409_CONFLICT)
+
+        denuncias = Denuncia.objects.all()
+        if not request.user.is_staff:
+            denuncias = denuncias.filter(usuario__user=request.user)
+        denuncia = get_object_or_404(denuncias, pk=request.data.get('denuncia'))
+
+        # Arquivo montado passa pela validação completa antes de virar mídia
+        try:
+            validar_arquivo_completo(sessao)
+        except ValidationError as e:
+            descartar_parcial(sessao)
+            SessaoUpload.objects.filter(pk=sessao.pk, status='aberta').update(
+                status='cancelada', data_atualizacao=timezone.now()
+            )
+            return Response({'detail': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Reserva a sessão: dois "finalizar" simultâneos não anexam o vídeo duas vezes
+            if not SessaoUpload.objects.filter(pk=sessao.pk, status='aberta').update(status='concluida'):
+                return Response({'detail': 'Sessão já concluída ou cancelada.'}, status=status.HTTP_410_GONE)
+            video = anexar_video(sessao, denuncia)
+            SessaoUpload.objects.filter(pk=sessao.pk).update(
+                denuncia=denuncia, arquivo=video.name, data_atualizacao=timezone.now()
+            )
+        descartar_parcial(sessao)
+
+        return Response({
+            'id': str(sessao.pk),
+            'status': 'concluida',
+            'denuncia': denuncia.pk,
+            'video_url': request.build_absolute_uri(video.url),
+        })